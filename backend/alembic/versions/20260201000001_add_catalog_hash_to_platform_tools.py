@@ -0,0 +1,38 @@
+"""add_catalog_hash_to_platform_tools
+
+Revision ID: 20260201000001
+Revises: 20260127000001
+Create Date: 2026-02-01 00:00:01.000000
+
+This migration adds a `catalog_hash` column to `platform_tools`. The tool
+registry stores a hash of each tool's metadata and function schemas here so
+startup sync can skip tools that have not changed since the last deploy.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260201000001"
+down_revision: Union[str, None] = "20260127000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "platform_tools",
+        sa.Column(
+            "catalog_hash",
+            sa.String(64),
+            nullable=True,
+            comment="SHA-256 of tool metadata and function schemas from the last sync",
+        ),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("platform_tools", "catalog_hash")
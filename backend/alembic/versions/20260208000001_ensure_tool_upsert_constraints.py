@@ -0,0 +1,73 @@
+"""ensure_tool_upsert_constraints
+
+Revision ID: 20260208000001
+Revises: 20260201000001
+Create Date: 2026-02-08 00:00:01.000000
+
+ToolService upserts platform tools with ON CONFLICT (name) and agent tools
+with ON CONFLICT (agent_id, tool_id), which require a unique constraint on
+exactly those columns. Tables created by 20251220000000 already have them;
+databases provisioned outside Alembic may not. This migration removes any
+duplicate rows (keeping the most recently updated one) and adds the missing
+constraints. It is a no-op where the constraints already exist.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260208000001"
+down_revision: Union[str, None] = "20260201000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _ensure_unique_constraint(
+    table: str, columns: Sequence[str], constraint_name: str
+) -> str:
+    column_list = ", ".join(columns)
+    sorted_columns = ", ".join(f"'{column}'" for column in sorted(columns))
+    join_condition = " AND ".join(f"a.{column} = b.{column}" for column in columns)
+    return f"""
+    DO $$
+    BEGIN
+        IF NOT EXISTS (
+            SELECT 1
+            FROM pg_constraint c
+            WHERE c.conrelid = '{table}'::regclass
+              AND c.contype = 'u'
+              AND (
+                  SELECT array_agg(a.attname::text ORDER BY a.attname)
+                  FROM pg_attribute a
+                  WHERE a.attrelid = c.conrelid AND a.attnum = ANY(c.conkey)
+              ) = ARRAY[{sorted_columns}]
+        ) THEN
+            DELETE FROM {table} a
+            USING {table} b
+            WHERE {join_condition}
+              AND (a.updated_at, a.id::text) < (b.updated_at, b.id::text);
+
+            ALTER TABLE {table}
+                ADD CONSTRAINT {constraint_name} UNIQUE ({column_list});
+        END IF;
+    END $$;
+    """
+
+
+def upgrade() -> None:
+    op.execute(
+        _ensure_unique_constraint("platform_tools", ["name"], "platform_tools_name_key")
+    )
+    op.execute(
+        _ensure_unique_constraint(
+            "agent_tools", ["agent_id", "tool_id"], "uq_agent_tool"
+        )
+    )
+
+
+def downgrade() -> None:
+    # The constraints predate this migration on Alembic-managed databases and
+    # the upserts depend on them, so they are left in place.
+    pass
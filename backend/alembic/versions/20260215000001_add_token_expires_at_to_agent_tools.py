@@ -0,0 +1,96 @@
+"""add_token_expires_at_to_agent_tools
+
+Revision ID: 20260215000001
+Revises: 20260208000001
+Create Date: 2026-02-15 00:00:01.000000
+
+This migration adds an indexed `token_expires_at` column to `agent_tools`.
+It mirrors `expires_at` from the encrypted `sensitive_config` so the token
+refresh job can select expiring tokens without decrypting every row.
+
+Existing rows are backfilled by decrypting their `sensitive_config`, so
+ENCRYPTION_KEY (and ENCRYPTION_PREVIOUS_KEYS, if rotating) must be set when
+running this migration. Rows that cannot be decrypted are left NULL and
+are picked up the next time their tokens are saved.
+
+"""
+
+import sys
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# The backfill needs the shared package for decryption
+sys.path.insert(0, str(Path(__file__).resolve().parents[3]))
+
+# revision identifiers, used by Alembic.
+revision: str = "20260215000001"
+down_revision: Union[str, None] = "20260208000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+BACKFILL_BATCH_SIZE = 500
+
+
+def _backfill_token_expires_at() -> None:
+    from shared.common.security import decrypt_data
+
+    connection = op.get_bind()
+    select_batch = sa.text(
+        "SELECT id, sensitive_config FROM agent_tools "
+        "WHERE sensitive_config IS NOT NULL AND id > CAST(:after_id AS uuid) "
+        "ORDER BY id LIMIT :limit"
+    )
+    update_row = sa.text(
+        "UPDATE agent_tools SET token_expires_at = :token_expires_at WHERE id = :id"
+    )
+
+    after_id = "00000000-0000-0000-0000-000000000000"
+    while True:
+        rows = connection.execute(
+            select_batch, {"after_id": after_id, "limit": BACKFILL_BATCH_SIZE}
+        ).fetchall()
+        if not rows:
+            break
+
+        updates = []
+        for row_id, sensitive_config in rows:
+            expires_at = decrypt_data(sensitive_config).get("expires_at")
+            if expires_at:
+                updates.append(
+                    {
+                        "id": row_id,
+                        "token_expires_at": datetime.fromtimestamp(
+                            float(expires_at), timezone.utc
+                        ),
+                    }
+                )
+        if updates:
+            connection.execute(update_row, updates)
+
+        after_id = str(rows[-1][0])
+
+
+def upgrade() -> None:
+    op.add_column(
+        "agent_tools",
+        sa.Column(
+            "token_expires_at",
+            sa.DateTime(timezone=True),
+            nullable=True,
+            comment="Access token expiry mirrored from sensitive_config (not secret)",
+        ),
+    )
+    op.create_index(
+        "ix_agent_tools_token_expires_at", "agent_tools", ["token_expires_at"]
+    )
+
+    _backfill_token_expires_at()
+
+
+def downgrade() -> None:
+    op.drop_index("ix_agent_tools_token_expires_at", table_name="agent_tools")
+    op.drop_column("agent_tools", "token_expires_at")
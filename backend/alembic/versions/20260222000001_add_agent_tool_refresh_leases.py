@@ -0,0 +1,126 @@
+"""add_agent_tool_refresh_leases
+
+Revision ID: 20260222000001
+Revises: 20260215000001
+Create Date: 2026-02-22 00:00:01.000000
+
+This migration adds leases so that only one backend instance refreshes a
+given agent tool's OAuth tokens at a time.
+
+- `agent_tool_refresh_leases` holds one row per agent tool with the current
+  holder, its expiry and a fencing token that increases on every
+  acquisition. Rows are never deleted on release (only expired), so fencing
+  tokens stay monotonic per agent tool.
+- `acquire_agent_tool_refresh_lease` atomically takes the lease if it is
+  free, expired or already held by the caller, returning the new fencing
+  token, or NULL if another holder has a live lease.
+- `release_agent_tool_refresh_lease` expires the lease if the caller still
+  holds it with the given fencing token.
+- `agent_tools.refresh_fencing_token` records the token of the last fenced
+  write, so a holder whose lease was taken over cannot overwrite tokens
+  written by the newer holder.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260222000001"
+down_revision: Union[str, None] = "20260215000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "agent_tool_refresh_leases",
+        sa.Column("agent_tool_id", sa.UUID(), nullable=False),
+        sa.Column("holder", sa.Text(), nullable=False),
+        sa.Column("fencing_token", sa.BigInteger(), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.ForeignKeyConstraint(
+            ["agent_tool_id"], ["agent_tools.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("agent_tool_id"),
+    )
+    op.execute("ALTER TABLE agent_tool_refresh_leases ENABLE ROW LEVEL SECURITY")
+
+    op.add_column(
+        "agent_tools",
+        sa.Column(
+            "refresh_fencing_token",
+            sa.BigInteger(),
+            nullable=True,
+            comment="Fencing token of the refresh lease that last wrote the tokens",
+        ),
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION acquire_agent_tool_refresh_lease(
+            p_agent_tool_id uuid,
+            p_holder text,
+            p_ttl_seconds integer
+        ) RETURNS bigint
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_fencing_token bigint;
+        BEGIN
+            INSERT INTO agent_tool_refresh_leases AS lease
+                (agent_tool_id, holder, fencing_token, expires_at)
+            VALUES
+                (
+                    p_agent_tool_id, p_holder, 1,
+                    clock_timestamp() + make_interval(secs => p_ttl_seconds)
+                )
+            ON CONFLICT (agent_tool_id) DO UPDATE
+                SET holder = EXCLUDED.holder,
+                    fencing_token = lease.fencing_token + 1,
+                    expires_at = EXCLUDED.expires_at
+                WHERE lease.expires_at <= clock_timestamp()
+                   OR lease.holder = EXCLUDED.holder
+            RETURNING lease.fencing_token INTO v_fencing_token;
+
+            RETURN v_fencing_token;
+        END;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION release_agent_tool_refresh_lease(
+            p_agent_tool_id uuid,
+            p_holder text,
+            p_fencing_token bigint
+        ) RETURNS boolean
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            UPDATE agent_tool_refresh_leases
+            SET expires_at = clock_timestamp()
+            WHERE agent_tool_id = p_agent_tool_id
+              AND holder = p_holder
+              AND fencing_token = p_fencing_token
+              AND expires_at > clock_timestamp();
+
+            RETURN FOUND;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP FUNCTION IF EXISTS release_agent_tool_refresh_lease(uuid, text, bigint)"
+    )
+    op.execute(
+        "DROP FUNCTION IF EXISTS acquire_agent_tool_refresh_lease(uuid, text, integer)"
+    )
+    op.drop_column("agent_tools", "refresh_fencing_token")
+    op.drop_table("agent_tool_refresh_leases")
@@ -0,0 +1,165 @@
+"""add_atomic_credit_functions
+
+Revision ID: 20260301000001
+Revises: 20260222000001
+Create Date: 2026-03-01 00:00:01.000000
+
+This migration adds Postgres functions that change an organization's credit
+balance and record the ledger entry in one atomic call (called via RPC by
+BillingService).
+
+Previously the service read `organizations.credit_balance`, computed the new
+balance in Python and wrote it back, so concurrent calls could overspend or
+lose updates. Both functions now debit/credit with a single conditional
+UPDATE, which takes the organization row lock, and insert the matching
+`credit_transactions` row in the same transaction.
+
+- `consume_organization_credits` looks up the active credit event, debits
+  `credit_cost * quantity` only if the balance covers it, and records the
+  consumption. Returns success, credits_consumed, balance_after and
+  transaction_id, or an `error` for an unknown event or organization.
+- `add_organization_credits` credits the balance and returns the inserted
+  transaction row, or an `error` for an unknown organization.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260301000001"
+down_revision: Union[str, None] = "20260222000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION consume_organization_credits(
+            p_organization_id uuid,
+            p_event_name text,
+            p_quantity integer,
+            p_description text,
+            p_metadata jsonb
+        ) RETURNS jsonb
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_event_id uuid;
+            v_credits integer;
+            v_balance integer;
+            v_transaction_id uuid;
+        BEGIN
+            SELECT id, credit_cost * p_quantity INTO v_event_id, v_credits
+            FROM credit_events
+            WHERE name = p_event_name AND is_active;
+
+            IF NOT FOUND THEN
+                RETURN jsonb_build_object(
+                    'error',
+                    format('Credit event ''%s'' not found or inactive', p_event_name)
+                );
+            END IF;
+
+            UPDATE organizations
+            SET credit_balance = credit_balance - v_credits,
+                updated_at = now()
+            WHERE id = p_organization_id AND credit_balance >= v_credits
+            RETURNING credit_balance INTO v_balance;
+
+            IF NOT FOUND THEN
+                SELECT credit_balance INTO v_balance
+                FROM organizations
+                WHERE id = p_organization_id;
+
+                IF NOT FOUND THEN
+                    RETURN jsonb_build_object(
+                        'error', format('Organization %s not found', p_organization_id)
+                    );
+                END IF;
+
+                RETURN jsonb_build_object(
+                    'success', false,
+                    'credits_consumed', 0,
+                    'balance_after', v_balance,
+                    'transaction_id', NULL
+                );
+            END IF;
+
+            INSERT INTO credit_transactions (
+                organization_id, transaction_type, amount, balance_after,
+                source, source_id, credit_event_id, description, metadata
+            ) VALUES (
+                p_organization_id, 'consumed', -v_credits, v_balance,
+                'event_consumption', v_event_id, v_event_id, p_description, p_metadata
+            )
+            RETURNING id INTO v_transaction_id;
+
+            RETURN jsonb_build_object(
+                'success', true,
+                'credits_consumed', v_credits,
+                'balance_after', v_balance,
+                'transaction_id', v_transaction_id
+            );
+        END;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION add_organization_credits(
+            p_organization_id uuid,
+            p_amount integer,
+            p_transaction_type text,
+            p_source text,
+            p_source_id uuid,
+            p_expires_at timestamptz,
+            p_stripe_payment_intent_id text,
+            p_description text
+        ) RETURNS jsonb
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_balance integer;
+            v_transaction credit_transactions;
+        BEGIN
+            UPDATE organizations
+            SET credit_balance = credit_balance + p_amount,
+                updated_at = now()
+            WHERE id = p_organization_id
+            RETURNING credit_balance INTO v_balance;
+
+            IF NOT FOUND THEN
+                RETURN jsonb_build_object(
+                    'error', format('Organization %s not found', p_organization_id)
+                );
+            END IF;
+
+            INSERT INTO credit_transactions (
+                organization_id, transaction_type, amount, balance_after, source,
+                source_id, expires_at, stripe_payment_intent_id, description
+            ) VALUES (
+                p_organization_id, p_transaction_type, p_amount, v_balance, p_source,
+                p_source_id, p_expires_at, p_stripe_payment_intent_id, p_description
+            )
+            RETURNING * INTO v_transaction;
+
+            RETURN to_jsonb(v_transaction);
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP FUNCTION IF EXISTS add_organization_credits("
+        "uuid, integer, text, text, uuid, timestamptz, text, text)"
+    )
+    op.execute(
+        "DROP FUNCTION IF EXISTS consume_organization_credits("
+        "uuid, text, integer, text, jsonb)"
+    )
@@ -0,0 +1,102 @@
+"""add_metered_usage_batches
+
+Revision ID: 20260308000001
+Revises: 20260301000001
+Create Date: 2026-03-08 00:00:01.000000
+
+This migration adds batched, idempotent credit consumption for metered usage
+(see src/billing/metering.py).
+
+- `credit_metering_batches` records every applied batch id, so a batch that
+  is retried after a crash (e.g. replayed from the metering spill file) is
+  only charged once.
+- `consume_organization_credits_batch` applies a whole batch of aggregated
+  (organization, credit event, quantity) debits in one transaction through
+  `consume_organization_credits`, locking organizations in id order to avoid
+  deadlocks between concurrent batches. It returns `duplicate` plus one
+  result per debit.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260308000001"
+down_revision: Union[str, None] = "20260301000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_metering_batches",
+        sa.Column("batch_id", sa.UUID(), nullable=False),
+        sa.Column("debit_count", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("batch_id"),
+    )
+    op.execute("ALTER TABLE credit_metering_batches ENABLE ROW LEVEL SECURITY")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION consume_organization_credits_batch(
+            p_batch_id uuid,
+            p_debits jsonb
+        ) RETURNS jsonb
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_debit record;
+            v_result jsonb;
+            v_results jsonb := '[]'::jsonb;
+        BEGIN
+            INSERT INTO credit_metering_batches (batch_id, debit_count)
+            VALUES (p_batch_id, jsonb_array_length(p_debits))
+            ON CONFLICT (batch_id) DO NOTHING;
+
+            IF NOT FOUND THEN
+                RETURN jsonb_build_object('duplicate', true, 'results', v_results);
+            END IF;
+
+            FOR v_debit IN
+                SELECT *
+                FROM jsonb_to_recordset(p_debits)
+                    AS d(organization_id uuid, event_name text, quantity integer)
+                ORDER BY organization_id, event_name
+            LOOP
+                v_result := consume_organization_credits(
+                    v_debit.organization_id,
+                    v_debit.event_name,
+                    v_debit.quantity,
+                    format('Metered %sx %s', v_debit.quantity, v_debit.event_name),
+                    jsonb_build_object('metering_batch_id', p_batch_id)
+                );
+                v_results := v_results || jsonb_build_array(
+                    v_result || jsonb_build_object(
+                        'organization_id', v_debit.organization_id,
+                        'event_name', v_debit.event_name,
+                        'quantity', v_debit.quantity
+                    )
+                );
+            END LOOP;
+
+            RETURN jsonb_build_object('duplicate', false, 'results', v_results);
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        "DROP FUNCTION IF EXISTS consume_organization_credits_batch(uuid, jsonb)"
+    )
+    op.drop_table("credit_metering_batches")
@@ -0,0 +1,145 @@
+"""add_credit_balance_buckets
+
+Revision ID: 20260315000001
+Revises: 20260308000001
+Create Date: 2026-03-15 00:00:01.000000
+
+This migration pre-aggregates the credit balance breakdown so
+BillingService.get_credit_balance is one round trip whose cost does not
+grow with the ledger.
+
+- `credit_balance_buckets` holds running sums of `credit_transactions.amount`
+  per organization, bucket and expiry. There is one row per distinct expiry
+  (roughly one per billing period), not per transaction:
+    - `subscription`: earned subscription credits that expire
+    - `purchased`: purchased credits without expiry (expires_at = 'infinity')
+    - `expiring`: every transaction with an expiry, for "expiring soon"
+- An AFTER INSERT trigger on `credit_transactions` keeps the buckets up to
+  date. The ledger is append-only; rows changed or deleted by hand require
+  re-running the backfill below.
+- `get_organization_credit_balance` returns the `CreditBalance` fields as
+  jsonb (NULL for an unknown organization).
+
+Existing transactions are backfilled into the buckets.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260315000001"
+down_revision: Union[str, None] = "20260308000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# Maps a credit_transactions row to its buckets; shared by the trigger and backfill
+BUCKETS_OF_TRANSACTION = """
+    SELECT 'subscription' AS bucket, t.expires_at
+    WHERE t.source = 'subscription' AND t.transaction_type = 'earned'
+      AND t.expires_at IS NOT NULL
+    UNION ALL
+    SELECT 'purchased', 'infinity'::timestamptz
+    WHERE t.source = 'purchase' AND t.transaction_type = 'purchased'
+      AND t.expires_at IS NULL
+    UNION ALL
+    SELECT 'expiring', t.expires_at
+    WHERE t.expires_at IS NOT NULL
+"""
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_balance_buckets",
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("bucket", sa.VARCHAR(length=20), nullable=False),
+        sa.Column("expires_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("amount", sa.BigInteger(), server_default="0", nullable=False),
+        sa.ForeignKeyConstraint(
+            ["organization_id"], ["organizations.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("organization_id", "bucket", "expires_at"),
+    )
+    op.execute("ALTER TABLE credit_balance_buckets ENABLE ROW LEVEL SECURITY")
+
+    op.execute(
+        f"""
+        CREATE OR REPLACE FUNCTION credit_transactions_update_balance_buckets()
+        RETURNS trigger
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO credit_balance_buckets AS b
+                (organization_id, bucket, expires_at, amount)
+            SELECT NEW.organization_id, buckets.bucket, buckets.expires_at, NEW.amount
+            FROM (SELECT NEW.*) AS t,
+                LATERAL ({BUCKETS_OF_TRANSACTION}) AS buckets
+            ON CONFLICT (organization_id, bucket, expires_at) DO UPDATE
+                SET amount = b.amount + EXCLUDED.amount;
+            RETURN NULL;
+        END;
+        $$;
+        """
+    )
+    op.execute(
+        """
+        CREATE TRIGGER trg_credit_transactions_balance_buckets
+        AFTER INSERT ON credit_transactions
+        FOR EACH ROW EXECUTE FUNCTION credit_transactions_update_balance_buckets()
+        """
+    )
+
+    op.execute(
+        f"""
+        INSERT INTO credit_balance_buckets (organization_id, bucket, expires_at, amount)
+        SELECT t.organization_id, buckets.bucket, buckets.expires_at, SUM(t.amount)
+        FROM credit_transactions t,
+            LATERAL ({BUCKETS_OF_TRANSACTION}) AS buckets
+        GROUP BY t.organization_id, buckets.bucket, buckets.expires_at
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION get_organization_credit_balance(
+            p_organization_id uuid
+        ) RETURNS jsonb
+        LANGUAGE sql
+        STABLE
+        AS $$
+            SELECT jsonb_build_object(
+                'total_credits', o.credit_balance,
+                'subscription_credits', COALESCE(SUM(b.amount) FILTER (
+                    WHERE b.bucket = 'subscription' AND b.expires_at >= now()
+                ), 0),
+                'purchased_credits', COALESCE(SUM(b.amount) FILTER (
+                    WHERE b.bucket = 'purchased'
+                ), 0),
+                'expiring_soon', COALESCE(SUM(b.amount) FILTER (
+                    WHERE b.bucket = 'expiring'
+                      AND b.expires_at BETWEEN now() AND now() + interval '30 days'
+                ), 0),
+                'expires_at', MIN(b.expires_at) FILTER (
+                    WHERE b.bucket = 'expiring'
+                      AND b.expires_at BETWEEN now() AND now() + interval '30 days'
+                )
+            )
+            FROM organizations o
+            LEFT JOIN credit_balance_buckets b ON b.organization_id = o.id
+            WHERE o.id = p_organization_id
+            GROUP BY o.id, o.credit_balance
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS get_organization_credit_balance(uuid)")
+    op.execute(
+        "DROP TRIGGER IF EXISTS trg_credit_transactions_balance_buckets "
+        "ON credit_transactions"
+    )
+    op.execute("DROP FUNCTION IF EXISTS credit_transactions_update_balance_buckets()")
+    op.drop_table("credit_balance_buckets")
@@ -0,0 +1,169 @@
+"""add_credit_usage_daily
+
+Revision ID: 20260322000001
+Revises: 20260315000001
+Create Date: 2026-03-22 00:00:01.000000
+
+This migration adds an incremental daily usage rollup so billing summaries
+and usage statistics no longer sum every consumption transaction of the
+period in Python.
+
+- `credit_usage_daily` holds, per organization, UTC day and credit event,
+  the number of events and credits consumed.
+- `consume_organization_credits` (and therefore the metered usage batches
+  that call it) now adds to the rollup in the same transaction as the debit.
+- Existing consumption transactions are backfilled. Their quantity is read
+  from the "Consumed Nx event" / "Metered Nx event" description, since the
+  ledger does not store it separately, and defaults to 1.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260322000001"
+down_revision: Union[str, None] = "20260315000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _consume_organization_credits(rollup: bool) -> str:
+    """consume_organization_credits, optionally updating the daily rollup."""
+    update_rollup = (
+        """
+            INSERT INTO credit_usage_daily AS u (
+                organization_id, usage_date, credit_event_id,
+                event_count, credits_consumed
+            ) VALUES (
+                p_organization_id, (now() AT TIME ZONE 'utc')::date, v_event_id,
+                p_quantity, v_credits
+            )
+            ON CONFLICT (organization_id, usage_date, credit_event_id) DO UPDATE
+                SET event_count = u.event_count + EXCLUDED.event_count,
+                    credits_consumed = u.credits_consumed + EXCLUDED.credits_consumed;
+        """
+        if rollup
+        else ""
+    )
+    return f"""
+        CREATE OR REPLACE FUNCTION consume_organization_credits(
+            p_organization_id uuid,
+            p_event_name text,
+            p_quantity integer,
+            p_description text,
+            p_metadata jsonb
+        ) RETURNS jsonb
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_event_id uuid;
+            v_credits integer;
+            v_balance integer;
+            v_transaction_id uuid;
+        BEGIN
+            SELECT id, credit_cost * p_quantity INTO v_event_id, v_credits
+            FROM credit_events
+            WHERE name = p_event_name AND is_active;
+
+            IF NOT FOUND THEN
+                RETURN jsonb_build_object(
+                    'error',
+                    format('Credit event ''%s'' not found or inactive', p_event_name)
+                );
+            END IF;
+
+            UPDATE organizations
+            SET credit_balance = credit_balance - v_credits,
+                updated_at = now()
+            WHERE id = p_organization_id AND credit_balance >= v_credits
+            RETURNING credit_balance INTO v_balance;
+
+            IF NOT FOUND THEN
+                SELECT credit_balance INTO v_balance
+                FROM organizations
+                WHERE id = p_organization_id;
+
+                IF NOT FOUND THEN
+                    RETURN jsonb_build_object(
+                        'error', format('Organization %s not found', p_organization_id)
+                    );
+                END IF;
+
+                RETURN jsonb_build_object(
+                    'success', false,
+                    'credits_consumed', 0,
+                    'balance_after', v_balance,
+                    'transaction_id', NULL
+                );
+            END IF;
+
+            INSERT INTO credit_transactions (
+                organization_id, transaction_type, amount, balance_after,
+                source, source_id, credit_event_id, description, metadata
+            ) VALUES (
+                p_organization_id, 'consumed', -v_credits, v_balance,
+                'event_consumption', v_event_id, v_event_id, p_description, p_metadata
+            )
+            RETURNING id INTO v_transaction_id;
+{update_rollup}
+            RETURN jsonb_build_object(
+                'success', true,
+                'credits_consumed', v_credits,
+                'balance_after', v_balance,
+                'transaction_id', v_transaction_id
+            );
+        END;
+        $$;
+    """
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_usage_daily",
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("usage_date", sa.Date(), nullable=False),
+        sa.Column("credit_event_id", sa.UUID(), nullable=False),
+        sa.Column("event_count", sa.BigInteger(), server_default="0", nullable=False),
+        sa.Column(
+            "credits_consumed", sa.BigInteger(), server_default="0", nullable=False
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"], ["organizations.id"], ondelete="CASCADE"
+        ),
+        sa.ForeignKeyConstraint(
+            ["credit_event_id"], ["credit_events.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("organization_id", "usage_date", "credit_event_id"),
+    )
+    op.execute("ALTER TABLE credit_usage_daily ENABLE ROW LEVEL SECURITY")
+
+    op.execute(_consume_organization_credits(rollup=True))
+
+    op.execute(
+        r"""
+        INSERT INTO credit_usage_daily (
+            organization_id, usage_date, credit_event_id, event_count, credits_consumed
+        )
+        SELECT
+            organization_id,
+            (created_at AT TIME ZONE 'utc')::date,
+            credit_event_id,
+            SUM(COALESCE(
+                (regexp_match(description, '^(Consumed|Metered) (\d+)x '))[2]::bigint, 1
+            )),
+            -SUM(amount)
+        FROM credit_transactions
+        WHERE transaction_type = 'consumed'
+          AND source = 'event_consumption'
+          AND credit_event_id IS NOT NULL
+        GROUP BY 1, 2, 3
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(_consume_organization_credits(rollup=False))
+    op.drop_table("credit_usage_daily")
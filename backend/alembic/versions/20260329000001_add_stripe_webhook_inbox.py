@@ -0,0 +1,167 @@
+"""add_stripe_webhook_inbox
+
+Revision ID: 20260329000001
+Revises: 20260322000001
+Create Date: 2026-03-29 00:00:01.000000
+
+This migration adds a durable inbox for Stripe webhook events (see
+src/billing/webhook_inbox.py). The webhook endpoint verifies the signature
+and stores the event before acknowledging it, and a worker pool processes
+the inbox, so an event is neither lost when the process restarts nor applied
+twice when Stripe retries it.
+
+- `stripe_webhook_events` holds one row per Stripe event id with its payload,
+  status (pending, processing, succeeded, failed), attempt count and next
+  retry time. `sequence` records arrival order to break ties between events
+  Stripe created in the same second.
+- `enqueue_stripe_webhook_event` inserts an event, returning false if the
+  event id is already in the inbox.
+- `claim_stripe_webhook_events` leases up to p_limit due events. An event is
+  only claimed once every earlier unfinished event of the same Stripe
+  customer has finished, so each customer's events are applied in order and
+  never concurrently, even across instances. Events whose lease expired
+  (their worker died) are claimed again.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "20260329000001"
+down_revision: Union[str, None] = "20260322000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "stripe_webhook_events",
+        sa.Column("event_id", sa.Text(), nullable=False),
+        sa.Column("sequence", sa.BigInteger(), sa.Identity(), nullable=False),
+        sa.Column("event_type", sa.VARCHAR(length=100), nullable=False),
+        sa.Column("customer_id", sa.Text(), nullable=True),
+        sa.Column("stripe_created_at", sa.DateTime(timezone=True), nullable=False),
+        sa.Column("payload", postgresql.JSONB(), nullable=False),
+        sa.Column(
+            "status", sa.VARCHAR(length=20), server_default="pending", nullable=False
+        ),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("locked_until", sa.DateTime(timezone=True), nullable=True),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("processed_at", sa.DateTime(timezone=True), nullable=True),
+        sa.PrimaryKeyConstraint("event_id"),
+        sa.CheckConstraint(
+            "status IN ('pending', 'processing', 'succeeded', 'failed')",
+            name="stripe_webhook_events_status_check",
+        ),
+    )
+    op.create_index(
+        "idx_stripe_webhook_events_due",
+        "stripe_webhook_events",
+        ["stripe_created_at", "sequence"],
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+    )
+    op.create_index(
+        "idx_stripe_webhook_events_customer_unfinished",
+        "stripe_webhook_events",
+        ["customer_id", "stripe_created_at", "sequence"],
+        postgresql_where=sa.text("status IN ('pending', 'processing')"),
+    )
+    op.create_index(
+        "idx_stripe_webhook_events_status",
+        "stripe_webhook_events",
+        ["status", "created_at"],
+    )
+    op.execute("ALTER TABLE stripe_webhook_events ENABLE ROW LEVEL SECURITY")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION enqueue_stripe_webhook_event(
+            p_event_id text,
+            p_event_type text,
+            p_customer_id text,
+            p_stripe_created_at timestamptz,
+            p_payload jsonb
+        ) RETURNS boolean
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO stripe_webhook_events
+                (event_id, event_type, customer_id, stripe_created_at, payload)
+            VALUES (
+                p_event_id, p_event_type, p_customer_id, p_stripe_created_at, p_payload
+            )
+            ON CONFLICT (event_id) DO NOTHING;
+
+            RETURN FOUND;
+        END;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claim_stripe_webhook_events(
+            p_limit integer,
+            p_lease_seconds integer
+        ) RETURNS SETOF stripe_webhook_events
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            RETURN QUERY
+            UPDATE stripe_webhook_events AS e
+            SET status = 'processing',
+                attempts = e.attempts + 1,
+                locked_until = clock_timestamp()
+                    + make_interval(secs => p_lease_seconds)
+            WHERE e.event_id IN (
+                SELECT c.event_id
+                FROM stripe_webhook_events c
+                WHERE (
+                        (c.status = 'pending'
+                            AND c.next_attempt_at <= clock_timestamp())
+                        OR (c.status = 'processing'
+                            AND c.locked_until <= clock_timestamp())
+                    )
+                  AND NOT EXISTS (
+                        SELECT 1
+                        FROM stripe_webhook_events earlier
+                        WHERE earlier.customer_id = c.customer_id
+                          AND earlier.status IN ('pending', 'processing')
+                          AND (earlier.stripe_created_at, earlier.sequence)
+                              < (c.stripe_created_at, c.sequence)
+                    )
+                ORDER BY c.stripe_created_at, c.sequence
+                LIMIT p_limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING e.*;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS claim_stripe_webhook_events(integer, integer)")
+    op.execute(
+        "DROP FUNCTION IF EXISTS "
+        "enqueue_stripe_webhook_event(text, text, text, timestamptz, jsonb)"
+    )
+    op.drop_table("stripe_webhook_events")
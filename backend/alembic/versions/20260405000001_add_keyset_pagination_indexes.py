@@ -0,0 +1,94 @@
+"""add_keyset_pagination_indexes
+
+Revision ID: 20260405000001
+Revises: 20260329000001
+Create Date: 2026-04-05 00:00:01.000000
+
+This migration adds composite indexes for cursor (keyset) pagination of
+billing history, credit transactions and notification logs, which are
+listed newest first on (created_at, id) per organization or user (see
+shared/common/pagination.py).
+
+Each page is then an index range scan starting at the cursor, however deep
+the page. The composite indexes lead with the same column as the
+single-column organization/user indexes they replace, so those are dropped
+to avoid maintaining both on every insert.
+
+The indexes are built CONCURRENTLY so the ledger stays writable while they
+are built.
+
+"""
+
+from typing import Sequence, Union
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260405000001"
+down_revision: Union[str, None] = "20260329000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+# (new index, table, leading column, replaced index)
+KEYSET_INDEXES = [
+    (
+        "idx_billing_history_org_created_at_id",
+        "billing_history",
+        "organization_id",
+        "idx_billing_history_org_id",
+    ),
+    (
+        "idx_credit_transactions_org_created_at_id",
+        "credit_transactions",
+        "organization_id",
+        "idx_credit_transactions_org_id",
+    ),
+    (
+        "idx_notification_logs_org_created_at_id",
+        "notification_logs",
+        "organization_id",
+        "idx_notification_logs_organization_id",
+    ),
+    (
+        "idx_notification_logs_user_created_at_id",
+        "notification_logs",
+        "user_id",
+        "idx_notification_logs_user_id",
+    ),
+]
+
+
+def upgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name, column, replaced_index in KEYSET_INDEXES:
+            op.create_index(
+                index_name,
+                table_name,
+                [column, "created_at", "id"],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                replaced_index,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
+
+
+def downgrade() -> None:
+    with op.get_context().autocommit_block():
+        for index_name, table_name, column, replaced_index in KEYSET_INDEXES:
+            op.create_index(
+                replaced_index,
+                table_name,
+                [column],
+                postgresql_concurrently=True,
+                if_not_exists=True,
+            )
+            op.drop_index(
+                index_name,
+                table_name=table_name,
+                postgresql_concurrently=True,
+                if_exists=True,
+            )
@@ -0,0 +1,196 @@
+"""add_notification_outbox
+
+Revision ID: 20260412000001
+Revises: 20260405000001
+Create Date: 2026-04-12 00:00:01.000000
+
+This migration adds a durable outbox for notification emails (see
+src/notifications/outbox.py). send_notification stores the rendered email
+and returns, and a worker pool sends it, instead of calling Resend on the
+request path.
+
+- `notification_outbox` holds one row per email still to be sent: the
+  Resend message, attempt count and the time it is next due. Claiming a row
+  pushes next_attempt_at out by a lease, so a row whose worker died becomes
+  due again by itself. Rows are deleted once the email is sent or has
+  failed for good; the outcome is kept in `notification_logs`.
+- `enqueue_notifications` inserts pending notification logs and their
+  outbox rows in one transaction.
+- `claim_notification_outbox` leases up to p_limit due rows.
+- `finish_notification_outbox` applies a batch of send outcomes: sent and
+  failed rows are removed and their logs updated, retried rows are
+  rescheduled. Failures and retries are fenced on the attempt count, so a
+  worker whose lease expired cannot overwrite a newer attempt.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "20260412000001"
+down_revision: Union[str, None] = "20260405000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "notification_outbox",
+        sa.Column(
+            "id", sa.UUID(), server_default=sa.text("gen_random_uuid()"), nullable=False
+        ),
+        sa.Column("notification_log_id", sa.UUID(), nullable=False),
+        sa.Column(
+            "message",
+            postgresql.JSONB(),
+            nullable=False,
+            comment="Resend send parameters (from, to, subject, html)",
+        ),
+        sa.Column("attempts", sa.Integer(), server_default="0", nullable=False),
+        sa.Column(
+            "next_attempt_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.Column("last_error", sa.Text(), nullable=True),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.PrimaryKeyConstraint("id"),
+        sa.ForeignKeyConstraint(
+            ["notification_log_id"], ["notification_logs.id"], ondelete="CASCADE"
+        ),
+        sa.UniqueConstraint("notification_log_id"),
+    )
+    op.create_index(
+        "idx_notification_outbox_next_attempt_at",
+        "notification_outbox",
+        ["next_attempt_at"],
+    )
+    op.execute("ALTER TABLE notification_outbox ENABLE ROW LEVEL SECURITY")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION enqueue_notifications(
+            p_logs jsonb,
+            p_messages jsonb
+        ) RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO notification_logs (
+                id, notification_event_id, notification_template_id,
+                organization_id, user_id, recipient_email, recipient_name,
+                subject, status, provider, metadata
+            )
+            SELECT
+                l.id, l.notification_event_id, l.notification_template_id,
+                l.organization_id, l.user_id, l.recipient_email, l.recipient_name,
+                l.subject, 'pending', COALESCE(l.provider, 'resend'), l.metadata
+            FROM jsonb_populate_recordset(NULL::notification_logs, p_logs) AS l;
+
+            INSERT INTO notification_outbox (notification_log_id, message)
+            SELECT (m->>'notification_log_id')::uuid, m->'message'
+            FROM jsonb_array_elements(p_messages) AS m;
+        END;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claim_notification_outbox(
+            p_limit integer,
+            p_lease_seconds integer
+        ) RETURNS SETOF notification_outbox
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            RETURN QUERY
+            UPDATE notification_outbox AS o
+            SET attempts = o.attempts + 1,
+                next_attempt_at = clock_timestamp()
+                    + make_interval(secs => p_lease_seconds)
+            WHERE o.id IN (
+                SELECT c.id
+                FROM notification_outbox c
+                WHERE c.next_attempt_at <= clock_timestamp()
+                ORDER BY c.next_attempt_at
+                LIMIT p_limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING o.*;
+        END;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION finish_notification_outbox(
+            p_results jsonb
+        ) RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            -- A sent email is recorded even if its lease expired meanwhile:
+            -- a second attempt reuses the idempotency key and sends nothing
+            WITH r AS (
+                SELECT *
+                FROM jsonb_to_recordset(p_results) AS r(
+                    id uuid,
+                    attempts integer,
+                    status text,
+                    provider_message_id text,
+                    error text
+                )
+                WHERE r.status IN ('sent', 'failed')
+            ),
+            done AS (
+                DELETE FROM notification_outbox AS o
+                USING r
+                WHERE o.id = r.id
+                  AND (r.status = 'sent' OR o.attempts = r.attempts)
+                RETURNING
+                    o.notification_log_id, r.status, r.provider_message_id, r.error
+            )
+            UPDATE notification_logs AS l
+            SET status = done.status,
+                provider_message_id = done.provider_message_id,
+                error_message = done.error,
+                sent_at = CASE WHEN done.status = 'sent' THEN now() END
+            FROM done
+            WHERE l.id = done.notification_log_id;
+
+            UPDATE notification_outbox AS o
+            SET next_attempt_at = r.next_attempt_at,
+                last_error = r.error
+            FROM jsonb_to_recordset(p_results) AS r(
+                id uuid,
+                attempts integer,
+                status text,
+                error text,
+                next_attempt_at timestamptz
+            )
+            WHERE r.status = 'retry'
+              AND o.id = r.id
+              AND o.attempts = r.attempts;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute("DROP FUNCTION IF EXISTS finish_notification_outbox(jsonb)")
+    op.execute("DROP FUNCTION IF EXISTS claim_notification_outbox(integer, integer)")
+    op.execute("DROP FUNCTION IF EXISTS enqueue_notifications(jsonb, jsonb)")
+    op.drop_table("notification_outbox")
@@ -0,0 +1,173 @@
+"""add_notification_outbox_batches
+
+Revision ID: 20260419000001
+Revises: 20260412000001
+Create Date: 2026-04-19 00:00:01.000000
+
+This migration lets the notification outbox send emails through the Resend
+batch endpoint (see NotificationService.send_notifications_batch).
+
+- `notification_outbox.batch_key` groups up to 100 emails that are sent
+  with one provider request. Emails queued one at a time have no batch key
+  and are sent on their own as before.
+- `enqueue_notifications` stores the batch_key of each message.
+- `claim_notification_outbox` claims the due rows sharing a batch key with
+  a claimed row along with it, so a batch is not split between workers.
+  A claim can therefore return more than p_limit rows.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260419000001"
+down_revision: Union[str, None] = "20260412000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column(
+        "notification_outbox",
+        sa.Column(
+            "batch_key",
+            sa.Text(),
+            nullable=True,
+            comment="Emails with the same key are sent with one provider request",
+        ),
+    )
+    op.create_index(
+        "idx_notification_outbox_batch_key",
+        "notification_outbox",
+        ["batch_key"],
+        postgresql_where=sa.text("batch_key IS NOT NULL"),
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION enqueue_notifications(
+            p_logs jsonb,
+            p_messages jsonb
+        ) RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO notification_logs (
+                id, notification_event_id, notification_template_id,
+                organization_id, user_id, recipient_email, recipient_name,
+                subject, status, provider, metadata
+            )
+            SELECT
+                l.id, l.notification_event_id, l.notification_template_id,
+                l.organization_id, l.user_id, l.recipient_email, l.recipient_name,
+                l.subject, 'pending', COALESCE(l.provider, 'resend'), l.metadata
+            FROM jsonb_populate_recordset(NULL::notification_logs, p_logs) AS l;
+
+            INSERT INTO notification_outbox (notification_log_id, message, batch_key)
+            SELECT (m->>'notification_log_id')::uuid, m->'message', m->>'batch_key'
+            FROM jsonb_array_elements(p_messages) AS m;
+        END;
+        $$;
+        """
+    )
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claim_notification_outbox(
+            p_limit integer,
+            p_lease_seconds integer
+        ) RETURNS SETOF notification_outbox
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            RETURN QUERY
+            WITH picked AS (
+                SELECT c.id, c.batch_key
+                FROM notification_outbox c
+                WHERE c.next_attempt_at <= clock_timestamp()
+                ORDER BY c.next_attempt_at
+                LIMIT p_limit
+                FOR UPDATE SKIP LOCKED
+            ),
+            batched AS (
+                SELECT b.id
+                FROM notification_outbox b
+                WHERE b.batch_key IN (SELECT p.batch_key FROM picked p)
+                  AND b.next_attempt_at <= clock_timestamp()
+                FOR UPDATE SKIP LOCKED
+            )
+            UPDATE notification_outbox AS o
+            SET attempts = o.attempts + 1,
+                next_attempt_at = clock_timestamp()
+                    + make_interval(secs => p_lease_seconds)
+            WHERE o.id IN (SELECT p.id FROM picked p UNION SELECT b.id FROM batched b)
+            RETURNING o.*;
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION enqueue_notifications(
+            p_logs jsonb,
+            p_messages jsonb
+        ) RETURNS void
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            INSERT INTO notification_logs (
+                id, notification_event_id, notification_template_id,
+                organization_id, user_id, recipient_email, recipient_name,
+                subject, status, provider, metadata
+            )
+            SELECT
+                l.id, l.notification_event_id, l.notification_template_id,
+                l.organization_id, l.user_id, l.recipient_email, l.recipient_name,
+                l.subject, 'pending', COALESCE(l.provider, 'resend'), l.metadata
+            FROM jsonb_populate_recordset(NULL::notification_logs, p_logs) AS l;
+
+            INSERT INTO notification_outbox (notification_log_id, message)
+            SELECT (m->>'notification_log_id')::uuid, m->'message'
+            FROM jsonb_array_elements(p_messages) AS m;
+        END;
+        $$;
+        """
+    )
+
+    # The return type changes with the table, so the function is recreated
+    op.execute("DROP FUNCTION IF EXISTS claim_notification_outbox(integer, integer)")
+    op.drop_index("idx_notification_outbox_batch_key", table_name="notification_outbox")
+    op.drop_column("notification_outbox", "batch_key")
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION claim_notification_outbox(
+            p_limit integer,
+            p_lease_seconds integer
+        ) RETURNS SETOF notification_outbox
+        LANGUAGE plpgsql
+        AS $$
+        BEGIN
+            RETURN QUERY
+            UPDATE notification_outbox AS o
+            SET attempts = o.attempts + 1,
+                next_attempt_at = clock_timestamp()
+                    + make_interval(secs => p_lease_seconds)
+            WHERE o.id IN (
+                SELECT c.id
+                FROM notification_outbox c
+                WHERE c.next_attempt_at <= clock_timestamp()
+                ORDER BY c.next_attempt_at
+                LIMIT p_limit
+                FOR UPDATE SKIP LOCKED
+            )
+            RETURNING o.*;
+        END;
+        $$;
+        """
+    )
@@ -0,0 +1,217 @@
+"""add_metered_usage_shortfalls
+
+Revision ID: 20260426000001
+Revises: 20260419000001
+Create Date: 2026-04-26 00:00:01.000000
+
+This migration makes metered usage batches charge what an organization can
+afford instead of dropping a whole aggregated entry (see
+src/billing/metering.py).
+
+- `consume_organization_credits_batch` charges each debit up to the
+  organization's available balance: it debits as many whole units as the
+  balance covers and reports the rest as `unbilled_quantity`. Previously an
+  entry costing more than the balance was not charged at all.
+- `credit_metering_shortfalls` records every unit of metered usage that
+  could not be charged, per batch, organization and credit event, so the
+  usage is not lost and can be reconciled later.
+
+"""
+
+from typing import Sequence, Union
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "20260426000001"
+down_revision: Union[str, None] = "20260419000001"
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "credit_metering_shortfalls",
+        sa.Column(
+            "id",
+            sa.UUID(),
+            server_default=sa.text("gen_random_uuid()"),
+            nullable=False,
+        ),
+        sa.Column("batch_id", sa.UUID(), nullable=False),
+        sa.Column("organization_id", sa.UUID(), nullable=False),
+        sa.Column("event_name", sa.Text(), nullable=False),
+        sa.Column("quantity", sa.Integer(), nullable=False),
+        sa.Column(
+            "created_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("NOW()"),
+            nullable=False,
+        ),
+        sa.ForeignKeyConstraint(
+            ["organization_id"], ["organizations.id"], ondelete="CASCADE"
+        ),
+        sa.PrimaryKeyConstraint("id"),
+    )
+    op.create_index(
+        "idx_credit_metering_shortfalls_organization_id",
+        "credit_metering_shortfalls",
+        ["organization_id"],
+    )
+    op.execute("ALTER TABLE credit_metering_shortfalls ENABLE ROW LEVEL SECURITY")
+
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION consume_organization_credits_batch(
+            p_batch_id uuid,
+            p_debits jsonb
+        ) RETURNS jsonb
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_debit record;
+            v_cost integer;
+            v_balance integer;
+            v_billable integer;
+            v_unbilled integer;
+            v_result jsonb;
+            v_results jsonb := '[]'::jsonb;
+        BEGIN
+            INSERT INTO credit_metering_batches (batch_id, debit_count)
+            VALUES (p_batch_id, jsonb_array_length(p_debits))
+            ON CONFLICT (batch_id) DO NOTHING;
+
+            IF NOT FOUND THEN
+                RETURN jsonb_build_object('duplicate', true, 'results', v_results);
+            END IF;
+
+            FOR v_debit IN
+                SELECT *
+                FROM jsonb_to_recordset(p_debits)
+                    AS d(organization_id uuid, event_name text, quantity integer)
+                ORDER BY organization_id, event_name
+            LOOP
+                SELECT credit_cost INTO v_cost
+                FROM credit_events
+                WHERE name = v_debit.event_name AND is_active;
+
+                SELECT credit_balance INTO v_balance
+                FROM organizations
+                WHERE id = v_debit.organization_id
+                FOR UPDATE;
+
+                -- Whole units the balance covers; unknown events and
+                -- organizations fall through to the error of
+                -- consume_organization_credits
+                IF v_cost IS NULL OR v_balance IS NULL OR v_cost <= 0 THEN
+                    v_billable := v_debit.quantity;
+                ELSE
+                    v_billable := LEAST(
+                        v_debit.quantity, GREATEST(v_balance, 0) / v_cost
+                    );
+                END IF;
+
+                IF v_billable > 0 THEN
+                    v_result := consume_organization_credits(
+                        v_debit.organization_id,
+                        v_debit.event_name,
+                        v_billable,
+                        format('Metered %sx %s', v_billable, v_debit.event_name),
+                        jsonb_build_object('metering_batch_id', p_batch_id)
+                    );
+                ELSE
+                    v_result := jsonb_build_object(
+                        'success', false,
+                        'credits_consumed', 0,
+                        'balance_after', v_balance,
+                        'transaction_id', NULL
+                    );
+                END IF;
+
+                IF COALESCE((v_result->>'success')::boolean, false) THEN
+                    v_unbilled := v_debit.quantity - v_billable;
+                ELSE
+                    v_unbilled := v_debit.quantity;
+                END IF;
+
+                IF v_unbilled > 0 AND NOT v_result ? 'error' THEN
+                    INSERT INTO credit_metering_shortfalls (
+                        batch_id, organization_id, event_name, quantity
+                    ) VALUES (
+                        p_batch_id, v_debit.organization_id, v_debit.event_name,
+                        v_unbilled
+                    );
+                END IF;
+
+                v_results := v_results || jsonb_build_array(
+                    v_result || jsonb_build_object(
+                        'organization_id', v_debit.organization_id,
+                        'event_name', v_debit.event_name,
+                        'quantity', v_debit.quantity,
+                        'unbilled_quantity', v_unbilled
+                    )
+                );
+            END LOOP;
+
+            RETURN jsonb_build_object('duplicate', false, 'results', v_results);
+        END;
+        $$;
+        """
+    )
+
+
+def downgrade() -> None:
+    op.execute(
+        """
+        CREATE OR REPLACE FUNCTION consume_organization_credits_batch(
+            p_batch_id uuid,
+            p_debits jsonb
+        ) RETURNS jsonb
+        LANGUAGE plpgsql
+        AS $$
+        DECLARE
+            v_debit record;
+            v_result jsonb;
+            v_results jsonb := '[]'::jsonb;
+        BEGIN
+            INSERT INTO credit_metering_batches (batch_id, debit_count)
+            VALUES (p_batch_id, jsonb_array_length(p_debits))
+            ON CONFLICT (batch_id) DO NOTHING;
+
+            IF NOT FOUND THEN
+                RETURN jsonb_build_object('duplicate', true, 'results', v_results);
+            END IF;
+
+            FOR v_debit IN
+                SELECT *
+                FROM jsonb_to_recordset(p_debits)
+                    AS d(organization_id uuid, event_name text, quantity integer)
+                ORDER BY organization_id, event_name
+            LOOP
+                v_result := consume_organization_credits(
+                    v_debit.organization_id,
+                    v_debit.event_name,
+                    v_debit.quantity,
+                    format('Metered %sx %s', v_debit.quantity, v_debit.event_name),
+                    jsonb_build_object('metering_batch_id', p_batch_id)
+                );
+                v_results := v_results || jsonb_build_array(
+                    v_result || jsonb_build_object(
+                        'organization_id', v_debit.organization_id,
+                        'event_name', v_debit.event_name,
+                        'quantity', v_debit.quantity
+                    )
+                );
+            END LOOP;
+
+            RETURN jsonb_build_object('duplicate', false, 'results', v_results);
+        END;
+        $$;
+        """
+    )
+    op.drop_index(
+        "idx_credit_metering_shortfalls_organization_id",
+        table_name="credit_metering_shortfalls",
+    )
+    op.drop_table("credit_metering_shortfalls")
@@ -3,6 +3,7 @@ FastAPI application entry point for multi-tenant SaaS platform.
 Includes authentication, health endpoints and CORS configuration.
 """
 
+import asyncio
 import logging
 from contextlib import asynccontextmanager
 from datetime import datetime
@@ -19,6 +20,7 @@ from src.organization.routes import organization_router
 from src.rbac.routes import rbac_router
 from src.voice_agents import agent_router, tool_router, voice_router
 
+from shared.common.pagination import NEXT_CURSOR_HEADER
 from shared.config import settings, supabase_config
 
 # Import OpenTelemetry setup function first to ensure proper logging configuration
@@ -81,6 +83,8 @@ def create_app() -> FastAPI:
         allow_credentials=settings.cors_credentials,
         allow_methods=settings.cors_methods,
         allow_headers=settings.cors_headers,
+        # Lets browsers read the cursor of paginated list endpoints
+        expose_headers=[NEXT_CURSOR_HEADER],
     )
 
     # Instrument the FastAPI app with OpenTelemetry
@@ -145,8 +149,12 @@ async def lifespan(app: FastAPI):
         ```
 
     Notes:
+        - Syncs the tool catalog to the database in a background task
         - Starts token refresh service on startup
         - Stops token refresh service on shutdown
+        - Starts the usage meter on startup and flushes it on shutdown
+        - Starts the Stripe webhook inbox worker pool on startup
+        - Starts the notification outbox worker pool on startup
         - Ensures graceful shutdown of background tasks
     """
     # Startup
@@ -154,6 +162,15 @@ async def lifespan(app: FastAPI):
     from shared.voice_agents.tools.base.registry_livekit import (
         livekit_tool_registry,
     )
+    from src.billing.metering import start_usage_meter, stop_usage_meter
+    from src.billing.webhook_inbox import (
+        start_stripe_webhook_inbox,
+        stop_stripe_webhook_inbox,
+    )
+    from src.notifications.outbox import (
+        start_notification_outbox,
+        stop_notification_outbox,
+    )
     from src.services.token_refresh_service import (
         start_token_refresh_service,
         stop_token_refresh_service,
@@ -167,23 +184,55 @@ async def lifespan(app: FastAPI):
     # Sync with database
     tool_service = ToolService()
 
-    # Sync LiveKit-based registry
-    logging.info("Syncing tools to database using LiveKit native registry...")
-    await livekit_tool_registry.sync_with_db(tool_service)
-    logging.info("Tools synchronized with database")
+    # Sync LiveKit-based registry in the background so startup isn't blocked
+    # on the database; only tools whose catalog hash changed are written
+    async def _sync_tools() -> None:
+        try:
+            logging.info("Syncing tools to database using LiveKit native registry...")
+            await livekit_tool_registry.sync_with_db(tool_service)
+            logging.info("Tools synchronized with database")
+        except Exception as e:
+            logging.error(f"Tool sync failed: {e}", exc_info=True)
+
+    tool_sync_task = asyncio.create_task(_sync_tools())
 
     # Start token refresh service
     logging.info("Starting token refresh service...")
     await start_token_refresh_service(tool_service)
     logging.info("Token refresh service started")
 
+    # Start usage meter (replays usage spilled before a crash)
+    await start_usage_meter()
+
+    # Start processing stored Stripe webhook events
+    await start_stripe_webhook_inbox()
+
+    # Start sending queued notification emails
+    await start_notification_outbox()
+
     yield
 
     # Shutdown
+    if not tool_sync_task.done():
+        tool_sync_task.cancel()
+        try:
+            await tool_sync_task
+        except asyncio.CancelledError:
+            pass
+
     logging.info("Shutting down token refresh service...")
     await stop_token_refresh_service()
     logging.info("Token refresh service stopped")
 
+    logging.info("Stopping Stripe webhook inbox...")
+    await stop_stripe_webhook_inbox()
+
+    logging.info("Stopping notification outbox...")
+    await stop_notification_outbox()
+
+    logging.info("Flushing metered usage...")
+    await stop_usage_meter()
+
 
 # Create FastAPI app instance
 app = create_app()
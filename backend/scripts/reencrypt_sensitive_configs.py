@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Re-encrypt agent tool sensitive configs with the current primary key.
+
+Run this after rotating ENCRYPTION_KEY (see shared/common/security.py), while
+the old key is still listed in ENCRYPTION_PREVIOUS_KEYS. Once it reports no
+remaining rows, the old key can be removed.
+
+Usage:
+    python scripts/reencrypt_sensitive_configs.py --dry-run
+    python scripts/reencrypt_sensitive_configs.py --batch-size 200
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the backend and project root directories to the path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+from shared.voice_agents.tool_service import tool_service  # noqa: E402
+
+
+async def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(
+        description="Re-encrypt agent tool sensitive configs with the primary key"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=100, help="Rows fetched per page"
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only count rows that still use a previous key",
+    )
+    args = parser.parse_args()
+
+    stats, error = await tool_service.reencrypt_sensitive_configs(
+        batch_size=args.batch_size, dry_run=args.dry_run
+    )
+
+    label = "Would rotate" if args.dry_run else "Rotated"
+    print(f"Scanned: {stats['scanned']}")
+    print(f"{label}: {stats['rotated']}")
+    print(f"Skipped (changed concurrently): {stats['skipped']}")
+    print(f"Failed (no active key): {stats['failed']}")
+
+    if error:
+        print(f"✗ Stopped early: {error}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
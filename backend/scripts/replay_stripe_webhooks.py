@@ -0,0 +1,106 @@
+#!/usr/bin/env python3
+"""
+Replay Stripe webhook events stored in the webhook inbox.
+
+Events that exhausted their retries are marked failed and are not processed
+again on their own. Fix the cause, then reset them to pending; the running
+backend picks them up within one poll interval, or pass --drain to process
+them in this process. Replaying an event that already succeeded applies it
+again (e.g. adds purchased credits twice), so only do that deliberately.
+
+Usage:
+    python scripts/replay_stripe_webhooks.py --dry-run
+    python scripts/replay_stripe_webhooks.py
+    python scripts/replay_stripe_webhooks.py --event-id evt_123 --event-id evt_456
+    python scripts/replay_stripe_webhooks.py --status failed --drain
+"""
+
+import argparse
+import asyncio
+import sys
+from pathlib import Path
+
+# Add the backend and project root directories to the path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+from src.billing.models import WebhookEventStatus  # noqa: E402
+from src.billing.service import billing_service  # noqa: E402
+from src.billing.webhook_inbox import StripeWebhookInbox  # noqa: E402
+
+from shared.config import settings  # noqa: E402
+
+
+async def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(
+        description="Replay Stripe webhook events from the webhook inbox"
+    )
+    parser.add_argument(
+        "--event-id",
+        action="append",
+        dest="event_ids",
+        help="Stripe event id to replay (repeatable)",
+    )
+    parser.add_argument(
+        "--status",
+        choices=[
+            s.value for s in WebhookEventStatus if s != WebhookEventStatus.PROCESSING
+        ],
+        help="Replay every event with this status (default: failed, "
+        "unless --event-id is given)",
+    )
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="Only list the events that would be replayed",
+    )
+    parser.add_argument(
+        "--drain",
+        action="store_true",
+        help="Process the replayed events in this process",
+    )
+    args = parser.parse_args()
+
+    status = WebhookEventStatus(args.status) if args.status else None
+    if status is None and not args.event_ids:
+        status = WebhookEventStatus.FAILED
+
+    if args.dry_run:
+        events = await billing_service.get_webhook_events(
+            status=status, event_ids=args.event_ids, limit=1000
+        )
+        for event in events:
+            print(
+                f"{event.event_id}  {event.event_type:<32} {event.status.value:<10} "
+                f"attempts={event.attempts}  {event.last_error or ''}"
+            )
+        print(f"Would replay: {len(events)}")
+        return
+
+    replayed = await billing_service.replay_webhook_events(
+        status=status, event_ids=args.event_ids
+    )
+    print(f"Reset for replay: {replayed}")
+
+    if args.drain and replayed:
+        inbox = StripeWebhookInbox(
+            workers=settings.stripe_webhook_workers,
+            max_attempts=settings.stripe_webhook_max_attempts,
+            retry_base_seconds=settings.stripe_webhook_retry_base_seconds,
+            poll_interval_seconds=settings.stripe_webhook_poll_interval_seconds,
+        )
+        applied = await inbox.drain()
+        print(f"Applied: {applied}")
+
+        if applied < replayed:
+            print(
+                f"✗ Not applied: {replayed - applied} "
+                "(see logs; failed events are retried)"
+            )
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Validate the polymorphic source references of credit transactions.
+
+Reports transactions whose source/source_id combination is invalid and
+transactions referencing records that no longer exist.
+
+Usage:
+    python scripts/validate_transaction_references.py
+    python scripts/validate_transaction_references.py --organization-id <uuid>
+    python scripts/validate_transaction_references.py --batch-size 1000 --json
+"""
+
+import argparse
+import asyncio
+import json
+import sys
+from pathlib import Path
+from uuid import UUID
+
+# Add the backend and project root directories to the path
+backend_dir = Path(__file__).parent.parent
+sys.path.insert(0, str(backend_dir))
+sys.path.insert(0, str(backend_dir.parent))
+
+from src.billing.service import billing_service  # noqa: E402
+
+
+def print_progress(report):
+    """Print a one-line progress update."""
+    print(
+        f"\rScanned {report['total_transactions']:,} transactions "
+        f"({len(report['invalid_source_relationships'])} invalid, "
+        f"{len(report['orphaned_references'])} orphaned)",
+        end="",
+        file=sys.stderr,
+        flush=True,
+    )
+
+
+async def main():
+    """Main function."""
+    parser = argparse.ArgumentParser(
+        description="Validate credit transaction source references"
+    )
+    parser.add_argument(
+        "--organization-id", type=UUID, help="Only validate this organization"
+    )
+    parser.add_argument(
+        "--batch-size", type=int, default=500, help="Transactions fetched per page"
+    )
+    parser.add_argument(
+        "--json", action="store_true", help="Print the full report as JSON"
+    )
+    args = parser.parse_args()
+
+    report = await billing_service.validate_transaction_references(
+        organization_id=args.organization_id,
+        batch_size=args.batch_size,
+        on_progress=print_progress,
+    )
+    print(file=sys.stderr)
+
+    if args.json:
+        print(json.dumps(report, indent=2, default=str))
+    else:
+        for entry in report["invalid_source_relationships"]:
+            print(f"✗ {entry['transaction_id']}: {entry['error']}")
+        for entry in report["orphaned_references"]:
+            print(f"✗ {entry['transaction_id']}: {entry['error']}")
+        print(f"Valid: {report['valid_transactions']}/{report['total_transactions']}")
+
+    if report["invalid_source_relationships"] or report["orphaned_references"]:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
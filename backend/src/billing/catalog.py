@@ -0,0 +1,130 @@
+"""
+In-process cache of the billing catalog.
+
+Subscription plans, credit events and credit products only change through
+the admin routes or stripe_manager.py seeding, yet they are read on every
+checkout, webhook and credit consumption. BillingService keeps them here
+and reloads a table only when its TTL expires, when a lookup misses (at
+most once per miss_reload_seconds), or after invalidate(); its subscription
+plan create/update methods replace single entries in place.
+"""
+
+import threading
+import time
+from typing import Dict, List, Optional, Union
+
+from .models import CreditEvent, CreditProduct, SubscriptionPlan
+
+CatalogRecord = Union[SubscriptionPlan, CreditEvent, CreditProduct]
+
+# Catalog tables and the model of their rows
+CATALOG_TABLES = {
+    "subscription_plans": SubscriptionPlan,
+    "credit_events": CreditEvent,
+    "credit_products": CreditProduct,
+}
+
+
+class BillingCatalog:
+    """Process-wide cache of the catalog tables, indexed by id.
+
+    Each table is loaded and expires on its own; credit events are also
+    indexed by name. Every change bumps version and the version of the
+    table it touched, so a load that started before a change to its table
+    can tell it is outdated and is not stored.
+    """
+
+    def __init__(
+        self, ttl_seconds: float = 300, miss_reload_seconds: float = 30
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.miss_reload_seconds = miss_reload_seconds
+        self.version = 0
+        self._records: Dict[str, Dict[str, CatalogRecord]] = {
+            table_name: {} for table_name in CATALOG_TABLES
+        }
+        self._credit_events_by_name: Dict[str, CreditEvent] = {}
+        self._loaded_at: Dict[str, float] = {}
+        self._miss_reloaded_at: Dict[str, float] = {}
+        self._table_versions: Dict[str, int] = dict.fromkeys(CATALOG_TABLES, 0)
+        self._lock = threading.Lock()
+
+    def is_stale(self, table_name: str) -> bool:
+        """Whether a table has never been loaded or its TTL has expired."""
+        loaded_at = self._loaded_at.get(table_name)
+        if loaded_at is None:
+            return True
+        return time.monotonic() - loaded_at > self.ttl_seconds
+
+    def claim_miss_reload(self, table_name: str) -> bool:
+        """Whether a lookup miss may reload a table now.
+
+        Returns True at most once per miss_reload_seconds for each table.
+        """
+        with self._lock:
+            now = time.monotonic()
+            claimed_at = self._miss_reloaded_at.get(table_name)
+            if claimed_at is not None and now - claimed_at < self.miss_reload_seconds:
+                return False
+            self._miss_reloaded_at[table_name] = now
+            return True
+
+    def table_version(self, table_name: str) -> int:
+        """Version of a table, to pass to load() once its rows are read."""
+        return self._table_versions[table_name]
+
+    def load(self, table_name: str, records: List[CatalogRecord], version: int) -> bool:
+        """Replace a whole table with records read at the given version.
+
+        Returns:
+            False, without storing anything, if the table changed since
+            version; the records may then miss that change
+        """
+        with self._lock:
+            if version != self._table_versions[table_name]:
+                return False
+            self._records[table_name] = {str(record.id): record for record in records}
+            if table_name == "credit_events":
+                self._credit_events_by_name = {
+                    record.name: record for record in records
+                }
+            self._loaded_at[table_name] = time.monotonic()
+            self._bump(table_name)
+            return True
+
+    def put(self, table_name: str, record: CatalogRecord) -> None:
+        """Add or replace a single record without reloading its table."""
+        with self._lock:
+            records = self._records[table_name]
+            previous = records.get(str(record.id))
+            records[str(record.id)] = record
+            if table_name == "credit_events":
+                if previous is not None and previous.name != record.name:
+                    self._credit_events_by_name.pop(previous.name, None)
+                self._credit_events_by_name[record.name] = record
+            self._bump(table_name)
+
+    def get(self, table_name: str, record_id: object) -> Optional[CatalogRecord]:
+        return self._records[table_name].get(str(record_id))
+
+    def get_credit_event(self, name: str) -> Optional[CreditEvent]:
+        return self._credit_events_by_name.get(name)
+
+    def records(self, table_name: str, active_only: bool = True) -> List[CatalogRecord]:
+        """Records of a table in load order, optionally only active ones."""
+        records = list(self._records[table_name].values())
+        if active_only:
+            return [record for record in records if record.is_active]
+        return records
+
+    def invalidate(self, table_name: Optional[str] = None) -> None:
+        """Force a reload of one table, or of every table, on next access."""
+        with self._lock:
+            for name in [table_name] if table_name else list(CATALOG_TABLES):
+                self._loaded_at.pop(name, None)
+                self._miss_reloaded_at.pop(name, None)
+                self._bump(name)
+
+    def _bump(self, table_name: str) -> None:
+        self._table_versions[table_name] += 1
+        self.version += 1
@@ -0,0 +1,342 @@
+"""
+Usage metering with batched credit consumption.
+
+High-frequency usage (e.g. per-second voice minutes) is recorded into an
+in-memory aggregator keyed by (organization, credit event) instead of calling
+consume_credits per tick. Aggregated debits are flushed periodically and on
+shutdown through one atomic, idempotent database call per batch
+(BillingService.consume_metered_usage_batch).
+
+Crash safety:
+Every recorded event is appended to a journal in the spill directory. A
+flush rotates the journal, writes the aggregated batch to its own fsynced
+batch file listing the journals it covers, deletes those journals, then
+charges the batch and deletes its file once the database confirms. On
+startup, journals not covered by a batch file are loaded back into the
+aggregator and leftover batch files are retried; batches are idempotent by
+batch id, so a batch charged just before a crash is not charged again.
+
+A batch that still fails after usage_metering_max_batch_attempts flushes is
+renamed to a quarantine file and skipped, so one bad batch cannot stop
+metering for every organization. Renaming it back to its batch file name
+retries it, still idempotently.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import time
+from collections import defaultdict
+from pathlib import Path
+from typing import Dict, Iterator, Optional, Tuple
+from uuid import UUID, uuid4
+
+from opentelemetry import metrics
+
+from shared.config import settings
+
+from .models import MAX_METERED_QUANTITY, MeteredUsage
+from .service import BillingService, billing_service
+
+logger = logging.getLogger(__name__)
+
+# Get meter for this module
+meter = metrics.get_meter(__name__)
+
+# Create metrics
+metering_events_counter = meter.create_counter(
+    "billing.metering.events", description="Number of usage events recorded"
+)
+
+metering_flush_duration = meter.create_histogram(
+    "billing.metering.flush.duration",
+    unit="s",
+    description="Duration of metered usage flushes",
+)
+
+metering_unbilled_counter = meter.create_counter(
+    "billing.metering.unbilled",
+    description="Aggregated usage entries that could not be fully charged",
+)
+
+metering_quarantined_counter = meter.create_counter(
+    "billing.metering.quarantined",
+    description="Metered usage batches quarantined after repeated failures",
+)
+
+JOURNAL_FILE = "journal.log"
+ROTATED_JOURNAL_SUFFIX = ".journal"
+BATCH_FILE_PREFIX = "batch-"
+QUARANTINE_FILE_PREFIX = "quarantined-"
+
+
+def _split_quantity(quantity: int) -> Iterator[int]:
+    """Split an aggregated quantity into entries the database can charge."""
+    while quantity > 0:
+        yield min(quantity, MAX_METERED_QUANTITY)
+        quantity -= MAX_METERED_QUANTITY
+
+
+class UsageMeter:
+    """Aggregates usage events in memory and charges them in batches.
+
+    record() is synchronous and O(1) so it can be called on every usage tick;
+    it must be called from the event loop thread, which makes cutting a batch
+    atomic with respect to new events.
+    """
+
+    def __init__(
+        self,
+        spill_dir: Path,
+        flush_interval_seconds: float,
+        billing: BillingService = billing_service,
+        max_batch_attempts: int = 10,
+    ) -> None:
+        self.spill_dir = Path(spill_dir)
+        self.flush_interval_seconds = flush_interval_seconds
+        self.billing = billing
+        self.max_batch_attempts = max_batch_attempts
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self._pending: Dict[Tuple[str, str], int] = defaultdict(int)
+        self._journal = None
+        # Rotated journals whose usage is pending but not yet in a batch file
+        self._unbatched_journals: list[Path] = []
+        # Failed charges per batch file name, for quarantining
+        self._batch_failures: Dict[str, int] = defaultdict(int)
+        self._flush_lock = asyncio.Lock()
+
+    def record(self, organization_id: UUID, event_name: str, quantity: int = 1) -> None:
+        """Record usage of a credit event by an organization."""
+        if quantity < 1:
+            raise ValueError("quantity must be at least 1")
+        if quantity > MAX_METERED_QUANTITY:
+            raise ValueError(f"quantity must be at most {MAX_METERED_QUANTITY}")
+        if self._journal is None:
+            self._open_journal()
+        key = (str(organization_id), event_name)
+        self._journal.write(f"{key[0]}\t{event_name}\t{quantity}\n")
+        self._pending[key] += quantity
+        metering_events_counter.add(1)
+
+    @property
+    def pending(self) -> Dict[Tuple[str, str], int]:
+        """Aggregated quantities not yet cut into a batch."""
+        return dict(self._pending)
+
+    async def start(self) -> None:
+        """Recover spilled usage and start the periodic flush task."""
+        if self.running:
+            logger.warning("Usage meter is already running")
+            return
+
+        self._recover()
+        self.running = True
+        self.task = asyncio.create_task(self._flush_loop())
+        logger.info("Usage meter started")
+
+    async def stop(self) -> None:
+        """Stop the flush task and flush everything still pending."""
+        if not self.running:
+            return
+
+        self.running = False
+        if self.task:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        await self.flush()
+        self._close_journal()
+        logger.info("Usage meter stopped")
+
+    async def _flush_loop(self) -> None:
+        while self.running:
+            try:
+                await self.flush()
+            except Exception as e:
+                logger.error(f"Error flushing metered usage: {e}", exc_info=True)
+            await asyncio.sleep(self.flush_interval_seconds)
+
+    async def flush(self) -> int:
+        """Cut pending usage into a batch and charge every unconfirmed batch.
+
+        Batches left over from failed flushes are retried first, in the
+        order they were cut. A failed batch stops the flush so later batches
+        are not charged ahead of it, unless it has failed max_batch_attempts
+        times, in which case it is quarantined and the flush moves on.
+
+        Returns:
+            Number of aggregated entries charged
+        """
+        async with self._flush_lock:
+            start = time.perf_counter()
+            self._cut_batch()
+            charged = 0
+            for batch_file in sorted(self.spill_dir.glob(f"{BATCH_FILE_PREFIX}*.json")):
+                try:
+                    charged += await self._charge_batch(batch_file)
+                except Exception as e:
+                    self._batch_failures[batch_file.name] += 1
+                    if self._batch_failures[batch_file.name] < self.max_batch_attempts:
+                        logger.error(
+                            f"Failed to charge metered usage batch {batch_file.name}, "
+                            f"will retry: {e}"
+                        )
+                        break
+                    self._quarantine(batch_file, e)
+                else:
+                    self._batch_failures.pop(batch_file.name, None)
+            metering_flush_duration.record(time.perf_counter() - start)
+            return charged
+
+    def _cut_batch(self) -> Optional[Path]:
+        """Move pending usage into a durable batch file and retire its journals."""
+        if not self._pending:
+            return None
+
+        stem = f"{time.time_ns()}-{uuid4().hex[:8]}"
+        self._close_journal()
+        journal_path = self.spill_dir / JOURNAL_FILE
+        if journal_path.exists():
+            rotated = self.spill_dir / f"{stem}{ROTATED_JOURNAL_SUFFIX}"
+            os.replace(journal_path, rotated)
+            self._unbatched_journals.append(rotated)
+
+        batch = {
+            "batch_id": str(uuid4()),
+            "journals": [journal.name for journal in self._unbatched_journals],
+            "usage": [
+                {"organization_id": org, "event_name": event, "quantity": part}
+                for (org, event), quantity in self._pending.items()
+                for part in _split_quantity(quantity)
+            ],
+        }
+        # The nanosecond prefix keeps batch files in the order they were cut
+        batch_file = self.spill_dir / f"{BATCH_FILE_PREFIX}{stem}.json"
+        tmp_file = batch_file.with_suffix(".tmp")
+        with open(tmp_file, "w") as f:
+            json.dump(batch, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_file, batch_file)
+
+        # The batch file now covers these journals
+        for journal in self._unbatched_journals:
+            journal.unlink(missing_ok=True)
+        self._unbatched_journals = []
+        self._pending = defaultdict(int)
+        return batch_file
+
+    async def _charge_batch(self, batch_file: Path) -> int:
+        with open(batch_file) as f:
+            batch = json.load(f)
+
+        # Batch files cut before quantities were split may hold larger ones
+        usage = [
+            MeteredUsage(**{**entry, "quantity": part})
+            for entry in batch["usage"]
+            for part in _split_quantity(entry["quantity"])
+        ]
+        duplicate, results = await self.billing.consume_metered_usage_batch(
+            UUID(batch["batch_id"]), usage
+        )
+
+        unbilled = [
+            result
+            for result in results
+            if not result.success or result.unbilled_quantity > 0
+        ]
+        for result in unbilled:
+            quantity = result.quantity if result.error else result.unbilled_quantity
+            logger.warning(
+                f"Metered usage not charged: {quantity}x {result.event_name} "
+                f"for organization {result.organization_id}: "
+                f"{result.error or 'insufficient credits'}"
+            )
+        if unbilled:
+            metering_unbilled_counter.add(len(unbilled))
+
+        batch_file.unlink()
+        charged = [result for result in results if result.success]
+        return 0 if duplicate else len(charged)
+
+    def _quarantine(self, batch_file: Path, error: Exception) -> None:
+        """Set aside a batch that keeps failing so later batches can be charged."""
+        quarantined = self.spill_dir / f"{QUARANTINE_FILE_PREFIX}{batch_file.name}"
+        os.replace(batch_file, quarantined)
+        self._batch_failures.pop(batch_file.name, None)
+        metering_quarantined_counter.add(1)
+        logger.error(
+            f"Quarantined metered usage batch {batch_file.name} as {quarantined.name} "
+            f"after {self.max_batch_attempts} failed attempts: {error}"
+        )
+
+    def _recover(self) -> None:
+        """Load journaled usage that no batch file covers back into the aggregator."""
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        journal_path = self.spill_dir / JOURNAL_FILE
+        if journal_path.exists():
+            os.replace(
+                journal_path,
+                self.spill_dir / f"{time.time_ns()}-recovered{ROTATED_JOURNAL_SUFFIX}",
+            )
+
+        covered = set()
+        for batch_file in self.spill_dir.glob(f"{BATCH_FILE_PREFIX}*.json"):
+            with open(batch_file) as f:
+                covered.update(json.load(f).get("journals", []))
+
+        recovered = 0
+        for journal in sorted(self.spill_dir.glob(f"*{ROTATED_JOURNAL_SUFFIX}")):
+            if journal.name in covered:
+                journal.unlink()
+                continue
+            with open(journal) as f:
+                for line in f:
+                    parts = line.rstrip("\n").split("\t")
+                    if len(parts) != 3:
+                        # Torn final write from a crash
+                        continue
+                    org, event, quantity = parts
+                    self._pending[(org, event)] += int(quantity)
+                    recovered += 1
+            self._unbatched_journals.append(journal)
+        if recovered:
+            logger.info(f"Recovered {recovered} journaled usage event(s)")
+
+    def _open_journal(self) -> None:
+        self.spill_dir.mkdir(parents=True, exist_ok=True)
+        # Line buffered: each event reaches the OS before record() returns
+        self._journal = open(self.spill_dir / JOURNAL_FILE, "a", buffering=1)
+
+    def _close_journal(self) -> None:
+        if self._journal is not None:
+            self._journal.flush()
+            os.fsync(self._journal.fileno())
+            self._journal.close()
+            self._journal = None
+
+
+# Global instance
+usage_meter: Optional[UsageMeter] = None
+
+
+async def start_usage_meter() -> None:
+    """Start the global usage meter."""
+    global usage_meter
+    usage_meter = UsageMeter(
+        spill_dir=Path(settings.usage_metering_spill_dir),
+        flush_interval_seconds=settings.usage_metering_flush_interval_seconds,
+        max_batch_attempts=settings.usage_metering_max_batch_attempts,
+    )
+    await usage_meter.start()
+
+
+async def stop_usage_meter() -> None:
+    """Stop the global usage meter, flushing pending usage."""
+    global usage_meter
+    if usage_meter:
+        await usage_meter.stop()
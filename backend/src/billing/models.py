@@ -52,6 +52,15 @@ class TransactionSource(str, Enum):
     ADMIN_ADJUSTMENT = "admin_adjustment"
 
 
+class WebhookEventStatus(str, Enum):
+    """Stripe webhook inbox event status enumeration."""
+
+    PENDING = "pending"
+    PROCESSING = "processing"
+    SUCCEEDED = "succeeded"
+    FAILED = "failed"
+
+
 class BillingStatus(str, Enum):
     """Billing history status enumeration."""
 
@@ -399,6 +408,24 @@ class StripeWebhookEvent(BaseModel):
     created: int
 
 
+class StripeWebhookInboxEvent(BaseModel):
+    """Stripe webhook event stored in the webhook inbox."""
+
+    event_id: str
+    sequence: int
+    event_type: str
+    customer_id: Optional[str] = None
+    stripe_created_at: datetime
+    payload: dict[str, Any]
+    status: WebhookEventStatus = WebhookEventStatus.PENDING
+    attempts: int = 0
+    next_attempt_at: Optional[datetime] = None
+    locked_until: Optional[datetime] = None
+    last_error: Optional[str] = None
+    created_at: Optional[datetime] = None
+    processed_at: Optional[datetime] = None
+
+
 # Credit Consumption Models
 class CreditConsumptionRequest(BaseModel):
     """Request model for credit consumption."""
@@ -418,6 +445,29 @@ class CreditConsumptionResponse(BaseModel):
     transaction_id: UUID
 
 
+# Largest quantity of one metered usage entry (the database charges int4)
+MAX_METERED_QUANTITY = 2_147_483_647
+
+
+class MeteredUsage(BaseModel):
+    """Metered usage of one credit event by one organization."""
+
+    organization_id: UUID
+    event_name: str
+    quantity: int = Field(default=1, ge=1, le=MAX_METERED_QUANTITY)
+
+
+class MeteredUsageResult(MeteredUsage):
+    """Outcome of charging one aggregated metered usage entry."""
+
+    success: bool = False
+    credits_consumed: int = 0
+    unbilled_quantity: int = 0
+    balance_after: Optional[int] = None
+    transaction_id: Optional[UUID] = None
+    error: Optional[str] = None
+
+
 # Polymorphic Relationship Utilities
 class TransactionSourceMapping:
     """Utility class for managing polymorphic relationships in credit transactions."""
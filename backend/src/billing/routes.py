@@ -2,12 +2,14 @@
 API routes for billing functionality.
 """
 
+import json
 import logging
-from typing import Any
+from datetime import datetime
+from typing import Any, Literal, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, BackgroundTasks, Depends, HTTPException, Request, status
-from fastapi.responses import JSONResponse
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response, status
+from fastapi.responses import JSONResponse, StreamingResponse
 from src.auth.middleware import check_billing_permissions, get_authenticated_user
 from src.auth.models import UserProfile
 from src.billing.models import (
@@ -18,6 +20,8 @@ from src.billing.models import (
     CreditEvent,
     CreditProduct,
     CreditPurchaseResponse,
+    CreditTransaction,
+    MeteredUsage,
     OrganizationBillingSummary,
     OrganizationSubscriptionUpdate,
     OrganizationSubscriptionWithPlan,
@@ -25,13 +29,17 @@ from src.billing.models import (
     SubscriptionPlan,
     SubscriptionPlanCreate,
     SubscriptionPlanUpdate,
+    UsageStats,
 )
 from src.billing.service import billing_service
 from src.billing.stripe_service import stripe_service
-from src.billing.webhook_handler import handle_stripe_webhook
+from src.billing.webhook_handler import construct_stripe_webhook_event
+from src.billing.webhook_inbox import enqueue_stripe_event
 from src.organization.service import organization_service
 from src.rbac.user_roles.service import user_role_service
 
+from shared.common.pagination import NEXT_CURSOR_HEADER
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api/v1/billing", tags=["billing"])
@@ -349,6 +357,36 @@ async def consume_credits(
         raise HTTPException(status_code=500, detail="Failed to consume credits")
 
 
+@router.post("/credits/usage", status_code=status.HTTP_202_ACCEPTED)
+async def record_usage(
+    usage: MeteredUsage,
+    user_auth: tuple[UUID, UserProfile] = Depends(get_authenticated_user),
+):
+    """Record metered usage; credits are consumed in the next batched flush."""
+    from src.billing import metering
+
+    user_id, user_profile = user_auth
+
+    if not user_profile.has_role("platform_admin"):
+        if not user_profile.has_permission(
+            "billing:subscribe", str(usage.organization_id)
+        ):
+            if not user_profile.has_role("org_admin", str(usage.organization_id)):
+                raise HTTPException(
+                    status_code=status.HTTP_403_FORBIDDEN,
+                    detail="Insufficient permissions for billing operations in this organization",
+                )
+
+    if not metering.usage_meter:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Usage metering is not running",
+        )
+
+    metering.usage_meter.record(usage.organization_id, usage.event_name, usage.quantity)
+    return {"accepted": True}
+
+
 @router.get("/credit-events", response_model=list[CreditEvent])
 async def get_credit_events(active_only: bool = True):
     """Get all credit events."""
@@ -423,16 +461,96 @@ async def create_credit_purchase_checkout(
 @router.get("/history/{organization_id}", response_model=list[BillingHistory])
 async def get_billing_history(
     organization_id: UUID,
-    limit: int = 10,
+    response: Response,
+    limit: int = Query(10, ge=1, le=200),
+    cursor: Optional[str] = None,
     _: tuple[UUID, UserProfile] = Depends(check_billing_permissions),
 ):
-    """Get billing history for an organization."""
+    """Get billing history for an organization, newest first.
+
+    When more entries exist, the X-Next-Cursor response header holds the
+    cursor to pass for the next page.
+    """
     try:
-        return await billing_service.get_billing_history(organization_id, limit=limit)
+        page = await billing_service.get_billing_history_page(
+            organization_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
     except Exception as e:
         logger.error(f"Error fetching billing history for {organization_id}: {e}")
         raise HTTPException(status_code=500, detail="Failed to fetch billing history")
 
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+@router.get(
+    "/credits/{organization_id}/transactions", response_model=list[CreditTransaction]
+)
+async def get_credit_transactions(
+    organization_id: UUID,
+    response: Response,
+    limit: int = Query(50, ge=1, le=200),
+    cursor: Optional[str] = None,
+    _: tuple[UUID, UserProfile] = Depends(check_billing_permissions),
+):
+    """Get credit transactions for an organization, newest first.
+
+    When more transactions exist, the X-Next-Cursor response header holds
+    the cursor to pass for the next page.
+    """
+    try:
+        page = await billing_service.get_credit_transactions_page(
+            organization_id, limit=limit, cursor=cursor
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        logger.error(f"Error fetching credit transactions for {organization_id}: {e}")
+        raise HTTPException(
+            status_code=500, detail="Failed to fetch credit transactions"
+        )
+
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
+
+
+@router.get("/export/{organization_id}/{resource}")
+async def export_billing_records(
+    organization_id: UUID,
+    resource: Literal["billing_history", "credit_transactions"],
+    _: tuple[UUID, UserProfile] = Depends(check_billing_permissions),
+):
+    """Export all billing history or credit transactions as NDJSON.
+
+    Rows are streamed newest first, one JSON object per line, as they are
+    read page by page, so the export never holds the whole ledger in memory.
+    """
+
+    async def ndjson_lines():
+        try:
+            async for row in billing_service.iter_organization_records(
+                resource, organization_id
+            ):
+                yield json.dumps(row, default=str) + "\n"
+        except Exception as e:
+            # Headers are already sent; ending the stream early marks the failure
+            logger.error(f"Error exporting {resource} for {organization_id}: {e}")
+            raise
+
+    return StreamingResponse(
+        ndjson_lines(),
+        media_type="application/x-ndjson",
+        headers={
+            "Content-Disposition": (
+                f'attachment; filename="{resource}-{organization_id}.ndjson"'
+            )
+        },
+    )
+
 
 # Billing Summary
 @router.get("/summary/{organization_id}", response_model=OrganizationBillingSummary)
@@ -448,34 +566,63 @@ async def get_billing_summary(
         raise HTTPException(status_code=500, detail="Failed to fetch billing summary")
 
 
+# Usage Statistics
+@router.get("/usage/{organization_id}", response_model=UsageStats)
+async def get_usage_stats(
+    organization_id: UUID,
+    period_start: Optional[datetime] = None,
+    period_end: Optional[datetime] = None,
+    _: tuple[UUID, UserProfile] = Depends(check_billing_permissions),
+):
+    """Get usage statistics, by default for the current billing period."""
+    try:
+        return await billing_service.get_usage_stats(
+            organization_id, period_start=period_start, period_end=period_end
+        )
+    except Exception as e:
+        logger.error(f"Error fetching usage stats for {organization_id}: {e}")
+        raise HTTPException(status_code=500, detail="Failed to fetch usage stats")
+
+
 # Webhooks
 @router.post("/webhook/stripe")
-async def stripe_webhook(request: Request, background_tasks: BackgroundTasks):
-    """Handle Stripe webhook events."""
-    try:
-        logger.info("Stripe webhook endpoint hit")
+async def stripe_webhook(request: Request):
+    """Handle Stripe webhook events.
 
+    The event is verified and stored in the webhook inbox before it is
+    acknowledged, then processed by the inbox worker pool. Duplicate
+    deliveries of an event are acknowledged without being stored again.
+    """
+    try:
         # Get webhook payload and signature
         payload = await request.body()
         signature = request.headers.get("stripe-signature")
 
-        logger.info(f"Webhook payload size: {len(payload)} bytes")
-        logger.info(f"Stripe signature present: {signature is not None}")
-
         if not signature:
             logger.error("Missing Stripe signature")
             raise HTTPException(status_code=400, detail="Missing Stripe signature")
 
-        # Add webhook processing to background tasks
-        background_tasks.add_task(handle_stripe_webhook, payload, signature)
-
-        logger.info("Webhook processing added to background tasks")
-        return JSONResponse(content={"status": "success"})
+        event = construct_stripe_webhook_event(payload, signature)
 
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Error processing Stripe webhook: {e}")
+        logger.error(f"Error verifying Stripe webhook: {e}")
         raise HTTPException(status_code=400, detail="Webhook processing failed")
 
+    try:
+        inserted = await enqueue_stripe_event(event)
+    except Exception as e:
+        # Not acknowledged, so Stripe delivers the event again
+        logger.error(f"Error storing Stripe webhook event {event['id']}: {e}")
+        raise HTTPException(status_code=500, detail="Webhook processing failed")
+
+    logger.info(
+        f"Stripe webhook event {event['id']} ({event['type']}) "
+        + ("queued" if inserted else "already received")
+    )
+    return JSONResponse(content={"status": "success", "duplicate": not inserted})
+
 
 # Checkout and Payment Management
 @router.post("/checkout/subscription", response_model=dict[str, Any])
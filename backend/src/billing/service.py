@@ -2,13 +2,18 @@
 Core billing service for subscription and credit management.
 """
 
+import asyncio
 import logging
-from datetime import datetime, timedelta, timezone
-from typing import Any, Optional
+from collections import defaultdict
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Optional, TypeVar
 from uuid import UUID
 
-from shared.config import supabase_config
+from shared.common.pagination import CursorPage, keyset_page, keyset_query
+from shared.common.single_flight import SingleFlight
+from shared.config import settings, supabase_config
 
+from .catalog import CATALOG_TABLES, BillingCatalog, CatalogRecord
 from .models import (
     BillingHistory,
     BillingHistoryCreate,
@@ -25,11 +30,14 @@ from .models import (
     CreditTransaction,
     CreditTransactionCreate,
     CreditTransactionWithEvent,
+    MeteredUsage,
+    MeteredUsageResult,
     OrganizationBillingSummary,
     OrganizationSubscription,
     OrganizationSubscriptionCreate,
     OrganizationSubscriptionUpdate,
     OrganizationSubscriptionWithPlan,
+    StripeWebhookInboxEvent,
     SubscriptionPlan,
     SubscriptionPlanCreate,
     SubscriptionPlanUpdate,
@@ -38,18 +46,38 @@ from .models import (
     TransactionSourceMapping,
     TransactionType,
     UsageStats,
+    WebhookEventStatus,
 )
 from .stripe_service import stripe_service
 
 logger = logging.getLogger(__name__)
 
+R = TypeVar("R")
+
+
+def _subscription_credits_description(stripe_invoice_id: Optional[str]) -> str:
+    if stripe_invoice_id:
+        return f"Subscription credits allocation for invoice {stripe_invoice_id}"
+    return "Subscription credits allocation"
+
 
 class BillingService:
-    """Service for managing billing, subscriptions, and credits."""
+    """Service for managing billing, subscriptions, and credits.
+
+    Subscription plans, credit events and credit products are served from
+    an in-process BillingCatalog, kept current by the subscription plan
+    create/update methods below and reloaded after
+    billing_catalog_ttl_seconds.
+    """
 
     def __init__(self):
         """Initialize billing service."""
         self.supabase = supabase_config.client
+        self.catalog = BillingCatalog(
+            ttl_seconds=settings.billing_catalog_ttl_seconds,
+            miss_reload_seconds=settings.billing_catalog_miss_reload_seconds,
+        )
+        self._catalog_loads: SingleFlight[None] = SingleFlight()
 
     # Subscription Plan Management
     async def create_subscription_plan(
@@ -65,7 +93,9 @@ class BillingService:
 
             if result.data:
                 logger.info(f"Created subscription plan: {result.data[0]['id']}")
-                return SubscriptionPlan(**result.data[0])
+                plan = SubscriptionPlan(**result.data[0])
+                self.catalog.put("subscription_plans", plan)
+                return plan
 
             raise Exception("Failed to create subscription plan")
 
@@ -78,14 +108,7 @@ class BillingService:
     ) -> list[SubscriptionPlan]:
         """Get all subscription plans."""
         try:
-            query = self.supabase.table("subscription_plans").select("*")
-
-            if active_only:
-                query = query.eq("is_active", True)
-
-            result = query.execute()
-
-            return [SubscriptionPlan(**plan) for plan in result.data]
+            return await self._get_catalog_records("subscription_plans", active_only)
 
         except Exception as e:
             logger.error(f"Error fetching subscription plans: {e}")
@@ -94,18 +117,11 @@ class BillingService:
     async def get_subscription_plan(self, plan_id: UUID) -> Optional[SubscriptionPlan]:
         """Get a subscription plan by ID."""
         try:
-            result = (
-                self.supabase.table("subscription_plans")
-                .select("*")
-                .eq("id", str(plan_id))
-                .execute()
+            return await self._find_catalog_record(
+                "subscription_plans",
+                lambda: self.catalog.get("subscription_plans", plan_id),
             )
 
-            if result.data:
-                return SubscriptionPlan(**result.data[0])
-
-            return None
-
         except Exception as e:
             logger.error(f"Error fetching subscription plan {plan_id}: {e}")
             raise
@@ -128,7 +144,9 @@ class BillingService:
             )
 
             if result.data:
-                return SubscriptionPlan(**result.data[0])
+                plan = SubscriptionPlan(**result.data[0])
+                self.catalog.put("subscription_plans", plan)
+                return plan
 
             return None
 
@@ -232,11 +250,11 @@ class BillingService:
     ) -> Optional[OrganizationSubscriptionWithPlan]:
         """Get organization subscription with plan details."""
         try:
-            result = (
+            result = await asyncio.to_thread(
                 self.supabase.table("organization_subscriptions")
                 .select("*, subscription_plans(*)")
                 .eq("organization_id", str(organization_id))
-                .execute()
+                .execute
             )
 
             if result.data:
@@ -316,83 +334,24 @@ class BillingService:
 
     # Credit Management
     async def get_credit_balance(self, organization_id: UUID) -> CreditBalance:
-        """Get detailed credit balance for an organization."""
+        """Get detailed credit balance for an organization.
+
+        Reads the trigger-maintained credit_balance_buckets through the
+        get_organization_credit_balance database function, so this is one
+        round trip regardless of how long the ledger is.
+        """
         try:
-            # Get organization's current credit balance
-            org_result = (
-                self.supabase.table("organizations")
-                .select("credit_balance")
-                .eq("id", str(organization_id))
-                .execute()
+            result = await asyncio.to_thread(
+                self.supabase.rpc(
+                    "get_organization_credit_balance",
+                    {"p_organization_id": str(organization_id)},
+                ).execute
             )
 
-            if not org_result.data:
+            if not result.data:
                 raise ValueError(f"Organization {organization_id} not found")
 
-            total_credits = org_result.data[0]["credit_balance"]
-
-            # Get breakdown of subscription vs purchased credits
-            thirty_days_from_now = (
-                datetime.now(timezone.utc) + timedelta(days=30)
-            ).isoformat()
-
-            # Subscription credits (with expiry)
-            subscription_credits_result = (
-                self.supabase.table("credit_transactions")
-                .select("amount")
-                .eq("organization_id", str(organization_id))
-                .eq("source", TransactionSource.SUBSCRIPTION.value)
-                .eq("transaction_type", TransactionType.EARNED.value)
-                .not_.is_("expires_at", "null")
-                .gte("expires_at", datetime.now(timezone.utc).isoformat())
-                .execute()
-            )
-
-            subscription_credits = sum(
-                tx["amount"] for tx in subscription_credits_result.data
-            )
-
-            # Purchased credits (no expiry)
-            purchased_credits_result = (
-                self.supabase.table("credit_transactions")
-                .select("amount")
-                .eq("organization_id", str(organization_id))
-                .eq("source", TransactionSource.PURCHASE.value)
-                .eq("transaction_type", TransactionType.PURCHASED.value)
-                .is_("expires_at", "null")
-                .execute()
-            )
-
-            purchased_credits = sum(
-                tx["amount"] for tx in purchased_credits_result.data
-            )
-
-            # Credits expiring soon
-            expiring_soon_result = (
-                self.supabase.table("credit_transactions")
-                .select("amount, expires_at")
-                .eq("organization_id", str(organization_id))
-                .not_.is_("expires_at", "null")
-                .lte("expires_at", thirty_days_from_now)
-                .gte("expires_at", datetime.now(timezone.utc).isoformat())
-                .order("expires_at")
-                .execute()
-            )
-
-            expiring_soon = sum(tx["amount"] for tx in expiring_soon_result.data)
-            next_expiry = None
-            if expiring_soon_result.data:
-                next_expiry = datetime.fromisoformat(
-                    expiring_soon_result.data[0]["expires_at"].replace("Z", "+00:00")
-                )
-
-            return CreditBalance(
-                total_credits=total_credits,
-                subscription_credits=subscription_credits,
-                purchased_credits=purchased_credits,
-                expiring_soon=expiring_soon,
-                expires_at=next_expiry,
-            )
+            return CreditBalance(**result.data)
 
         except Exception as e:
             logger.error(f"Error getting credit balance for {organization_id}: {e}")
@@ -404,17 +363,45 @@ class BillingService:
         credits: int,
         subscription_id: UUID,
         expires_at: Optional[datetime] = None,
+        stripe_invoice_id: Optional[str] = None,
     ) -> CreditTransaction:
-        """Add subscription credits to an organization."""
+        """Add subscription credits to an organization.
+
+        Credits allocated for a Stripe invoice record its id in the
+        description, so has_invoice_subscription_credits can find them.
+        """
         return await self._add_credits(
             organization_id=organization_id,
             credits=credits,
             source=TransactionSource.SUBSCRIPTION,
             source_id=subscription_id,
             expires_at=expires_at,
-            description=f"Subscription credits allocation",
+            description=_subscription_credits_description(stripe_invoice_id),
         )
 
+    async def has_invoice_subscription_credits(
+        self, organization_id: UUID, stripe_invoice_id: str
+    ) -> bool:
+        """Whether subscription credits were already allocated for an invoice."""
+        try:
+            result = (
+                self.supabase.table("credit_transactions")
+                .select("id")
+                .eq("organization_id", str(organization_id))
+                .eq("source", TransactionSource.SUBSCRIPTION.value)
+                .eq("description", _subscription_credits_description(stripe_invoice_id))
+                .limit(1)
+                .execute()
+            )
+            return bool(result.data)
+
+        except Exception as e:
+            logger.error(
+                "Error checking subscription credits for invoice "
+                f"{stripe_invoice_id}: {e}"
+            )
+            raise
+
     async def reset_subscription_credits(
         self,
         organization_id: UUID,
@@ -530,6 +517,28 @@ class BillingService:
             description=description or "Credit purchase",
         )
 
+    async def has_purchased_credits(
+        self, organization_id: UUID, stripe_payment_intent_id: str
+    ) -> bool:
+        """Whether credits were already added for a payment intent."""
+        try:
+            result = (
+                self.supabase.table("credit_transactions")
+                .select("id")
+                .eq("organization_id", str(organization_id))
+                .eq("source", TransactionSource.PURCHASE.value)
+                .eq("stripe_payment_intent_id", stripe_payment_intent_id)
+                .limit(1)
+                .execute()
+            )
+            return bool(result.data)
+
+        except Exception as e:
+            logger.error(
+                f"Error checking purchased credits for {stripe_payment_intent_id}: {e}"
+            )
+            raise
+
     async def _add_credits(
         self,
         organization_id: UUID,
@@ -540,31 +549,13 @@ class BillingService:
         stripe_payment_intent_id: Optional[str] = None,
         description: Optional[str] = None,
     ) -> CreditTransaction:
-        """Internal method to add credits."""
-        try:
-            # Get current balance
-            org_result = (
-                self.supabase.table("organizations")
-                .select("credit_balance")
-                .eq("id", str(organization_id))
-                .execute()
-            )
-
-            if not org_result.data:
-                raise ValueError(f"Organization {organization_id} not found")
-
-            current_balance = org_result.data[0]["credit_balance"]
-            new_balance = current_balance + credits
+        """Internal method to add credits.
 
-            # Update organization balance
-            self.supabase.table("organizations").update(
-                {
-                    "credit_balance": new_balance,
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                }
-            ).eq("id", str(organization_id)).execute()
-
-            # Create transaction record using the validated model
+        The balance update and ledger insert happen atomically in the
+        add_organization_credits database function.
+        """
+        try:
+            # Validate the source/source_id relationship before calling the database
             transaction_data = CreditTransactionCreate(
                 organization_id=organization_id,
                 transaction_type=(
@@ -580,47 +571,35 @@ class BillingService:
                 description=description,
             )
 
-            # Convert UUID objects to strings for JSON serialization
-            transaction_dict = transaction_data.model_dump()
-            if (
-                "organization_id" in transaction_dict
-                and transaction_dict["organization_id"]
-            ):
-                transaction_dict["organization_id"] = str(
-                    transaction_dict["organization_id"]
-                )
-            if "source_id" in transaction_dict and transaction_dict["source_id"]:
-                transaction_dict["source_id"] = str(transaction_dict["source_id"])
-            if (
-                "credit_event_id" in transaction_dict
-                and transaction_dict["credit_event_id"]
-            ):
-                transaction_dict["credit_event_id"] = str(
-                    transaction_dict["credit_event_id"]
-                )
-
-            # Set balance_after field (required by database)
-            transaction_dict["balance_after"] = new_balance
-
             # Log the polymorphic relationship for debugging
             table_name = TransactionSourceMapping.get_source_table(source)
             logger.debug(
                 f"Creating credit transaction: source={source.value}, source_id={source_id}, references_table={table_name}"
             )
 
-            result = (
-                self.supabase.table("credit_transactions")
-                .insert(transaction_dict)
-                .execute()
-            )
+            result = self.supabase.rpc(
+                "add_organization_credits",
+                {
+                    "p_organization_id": str(organization_id),
+                    "p_amount": credits,
+                    "p_transaction_type": transaction_data.transaction_type.value,
+                    "p_source": source.value,
+                    "p_source_id": str(source_id) if source_id else None,
+                    "p_expires_at": expires_at.isoformat() if expires_at else None,
+                    "p_stripe_payment_intent_id": stripe_payment_intent_id,
+                    "p_description": description,
+                },
+            ).execute()
 
-            if result.data:
-                logger.info(
-                    f"Added {credits} credits to organization {organization_id} (source: {source.value})"
-                )
-                return CreditTransaction(**result.data[0])
+            if not result.data:
+                raise Exception("Failed to create credit transaction")
+            if result.data.get("error"):
+                raise ValueError(result.data["error"])
 
-            raise Exception("Failed to create credit transaction")
+            logger.info(
+                f"Added {credits} credits to organization {organization_id} (source: {source.value})"
+            )
+            return CreditTransaction(**result.data)
 
         except Exception as e:
             logger.error(f"Error adding credits to {organization_id}: {e}")
@@ -629,168 +608,194 @@ class BillingService:
     async def consume_credits(
         self, consumption_request: CreditConsumptionRequest
     ) -> CreditConsumptionResponse:
-        """Consume credits for an event."""
-        try:
-            # Get credit event details
-            event_result = (
-                self.supabase.table("credit_events")
-                .select("*")
-                .eq("name", consumption_request.event_name)
-                .eq("is_active", True)
-                .execute()
-            )
+        """Consume credits for an event.
 
-            if not event_result.data:
+        The balance check, debit and ledger insert happen atomically in the
+        consume_organization_credits database function, so concurrent
+        consumers can neither overspend nor lose updates.
+        """
+        try:
+            # Resolved from the catalog; the database function still reads
+            # the authoritative cost in the same transaction as the debit
+            credit_event = await self.get_credit_event(consumption_request.event_name)
+            if credit_event is None or not credit_event.is_active:
                 raise ValueError(
                     f"Credit event '{consumption_request.event_name}' not found or inactive"
                 )
 
-            credit_event = CreditEvent(**event_result.data[0])
-            credits_needed = credit_event.credit_cost * consumption_request.quantity
-
-            # Get current balance
-            org_result = (
-                self.supabase.table("organizations")
-                .select("credit_balance")
-                .eq("id", str(consumption_request.organization_id))
-                .execute()
+            # Log the polymorphic relationship
+            table_name = TransactionSourceMapping.get_source_table(
+                TransactionSource.EVENT_CONSUMPTION
+            )
+            logger.debug(
+                "Creating consumption transaction for "
+                f"{consumption_request.event_name}, source_id references {table_name}"
             )
 
-            if not org_result.data:
-                raise ValueError(
-                    f"Organization {consumption_request.organization_id} not found"
-                )
+            result = self.supabase.rpc(
+                "consume_organization_credits",
+                {
+                    "p_organization_id": str(consumption_request.organization_id),
+                    "p_event_name": consumption_request.event_name,
+                    "p_quantity": consumption_request.quantity,
+                    "p_description": (
+                        f"Consumed {consumption_request.quantity}x "
+                        f"{consumption_request.event_name}"
+                    ),
+                    "p_metadata": consumption_request.metadata,
+                },
+            ).execute()
 
-            current_balance = int(org_result.data[0]["credit_balance"])
+            if not result.data:
+                raise Exception("Failed to create consumption transaction")
+            if result.data.get("error"):
+                raise ValueError(result.data["error"])
 
-            if current_balance < credits_needed:
+            if not result.data["success"]:
                 return CreditConsumptionResponse(
                     success=False,
                     credits_consumed=0,
-                    balance_after=current_balance,
+                    balance_after=result.data["balance_after"],
                     transaction_id=UUID("00000000-0000-0000-0000-000000000000"),
                 )
 
-            new_balance = current_balance - credits_needed
-
-            # Update organization balance
-            self.supabase.table("organizations").update(
-                {
-                    "credit_balance": new_balance,
-                    "updated_at": datetime.now(timezone.utc).isoformat(),
-                }
-            ).eq("id", str(consumption_request.organization_id)).execute()
-
-            # Create consumption transaction using validated model
-            transaction_data = CreditTransactionCreate(
-                organization_id=consumption_request.organization_id,
-                transaction_type=TransactionType.CONSUMED,
-                amount=-credits_needed,
-                source=TransactionSource.EVENT_CONSUMPTION,
-                source_id=credit_event.id,  # References credit_events table
-                credit_event_id=credit_event.id,
-                description=f"Consumed {consumption_request.quantity}x {consumption_request.event_name}",
-                metadata=consumption_request.metadata,
-            )
-
-            # Log the polymorphic relationship
-            table_name = TransactionSourceMapping.get_source_table(
-                TransactionSource.EVENT_CONSUMPTION
-            )
-            logger.debug(
-                f"Creating consumption transaction: source_id={credit_event.id} references {table_name}"
+            logger.info(
+                f"Consumed {result.data['credits_consumed']} credits for "
+                f"{consumption_request.event_name}"
             )
+            return CreditConsumptionResponse(**result.data)
 
-            # Manually set balance_after since it's not in the create model
-            transaction_dict = transaction_data.model_dump()
-            transaction_dict["balance_after"] = new_balance
-
-            # Convert UUID objects to strings for JSON serialization
-            if (
-                "organization_id" in transaction_dict
-                and transaction_dict["organization_id"]
-            ):
-                transaction_dict["organization_id"] = str(
-                    transaction_dict["organization_id"]
-                )
-            if "source_id" in transaction_dict and transaction_dict["source_id"]:
-                transaction_dict["source_id"] = str(transaction_dict["source_id"])
-            if (
-                "credit_event_id" in transaction_dict
-                and transaction_dict["credit_event_id"]
-            ):
-                transaction_dict["credit_event_id"] = str(
-                    transaction_dict["credit_event_id"]
-                )
+        except Exception as e:
+            logger.error(f"Error consuming credits: {e}")
+            raise
 
-            # Convert datetime objects to ISO strings
-            if "expires_at" in transaction_dict and transaction_dict["expires_at"]:
-                if isinstance(transaction_dict["expires_at"], datetime):
-                    transaction_dict["expires_at"] = transaction_dict[
-                        "expires_at"
-                    ].isoformat()
+    async def consume_metered_usage_batch(
+        self, batch_id: UUID, usage: list[MeteredUsage]
+    ) -> tuple[bool, list[MeteredUsageResult]]:
+        """Consume credits for a batch of aggregated metered usage.
 
-            result = (
-                self.supabase.table("credit_transactions")
-                .insert(transaction_dict)
-                .execute()
-            )
+        The whole batch is applied in one transaction by the
+        consume_organization_credits_batch database function. Batches are
+        idempotent by batch_id, so a retried batch is never charged twice.
 
-            if result.data:
-                transaction = CreditTransaction(**result.data[0])
-                logger.info(
-                    f"Consumed {credits_needed} credits for {consumption_request.event_name}"
-                )
+        Returns:
+            Tuple of (duplicate, per-entry results); results are empty when
+            the batch had already been applied
+        """
+        try:
+            result = self.supabase.rpc(
+                "consume_organization_credits_batch",
+                {
+                    "p_batch_id": str(batch_id),
+                    "p_debits": [
+                        {
+                            "organization_id": str(entry.organization_id),
+                            "event_name": entry.event_name,
+                            "quantity": entry.quantity,
+                        }
+                        for entry in usage
+                    ],
+                },
+            ).execute()
 
-                return CreditConsumptionResponse(
-                    success=True,
-                    credits_consumed=credits_needed,
-                    balance_after=new_balance,
-                    transaction_id=transaction.id,
-                )
+            if not result.data:
+                raise Exception("Failed to consume metered usage batch")
 
-            raise Exception("Failed to create consumption transaction")
+            results = [MeteredUsageResult(**entry) for entry in result.data["results"]]
+            logger.info(
+                f"Consumed metered usage batch {batch_id}: {len(results)} entries"
+                + (" (already applied)" if result.data["duplicate"] else "")
+            )
+            return result.data["duplicate"], results
 
         except Exception as e:
-            logger.error(f"Error consuming credits: {e}")
+            logger.error(f"Error consuming metered usage batch {batch_id}: {e}")
             raise
 
     # Credit Events Management
     async def get_credit_events(self, active_only: bool = True) -> list[CreditEvent]:
         """Get all credit events."""
         try:
-            query = self.supabase.table("credit_events").select("*")
-
-            if active_only:
-                query = query.eq("is_active", True)
+            return await self._get_catalog_records("credit_events", active_only)
 
-            result = query.execute()
+        except Exception as e:
+            logger.error(f"Error fetching credit events: {e}")
+            raise
 
-            return [CreditEvent(**event) for event in result.data]
+    async def get_credit_event(self, name: str) -> Optional[CreditEvent]:
+        """Get a credit event by name, active or not."""
+        try:
+            return await self._find_catalog_record(
+                "credit_events", lambda: self.catalog.get_credit_event(name)
+            )
 
         except Exception as e:
-            logger.error(f"Error fetching credit events: {e}")
+            logger.error(f"Error fetching credit event {name}: {e}")
             raise
 
     # Credit Products Management
     async def get_credit_products(
         self, active_only: bool = True
     ) -> list[CreditProduct]:
-        """Get all credit products."""
+        """Get all credit products, smallest credit amount first."""
         try:
-            query = self.supabase.table("credit_products").select("*")
-
-            if active_only:
-                query = query.eq("is_active", True)
-
-            result = query.order("credit_amount").execute()
-
-            return [CreditProduct(**product) for product in result.data]
+            products = await self._get_catalog_records("credit_products", active_only)
+            return sorted(products, key=lambda product: product.credit_amount)
 
         except Exception as e:
             logger.error(f"Error fetching credit products: {e}")
             raise
 
+    # Catalog Cache
+    async def _get_catalog_records(
+        self, table_name: str, active_only: bool
+    ) -> list[Any]:
+        if self.catalog.is_stale(table_name):
+            await self.reload_catalog(table_name)
+        return self.catalog.records(table_name, active_only)
+
+    async def _find_catalog_record(
+        self, table_name: str, lookup: Callable[[], Optional[R]]
+    ) -> Optional[R]:
+        """Look a record up in the catalog, reloading its table at most once.
+
+        A miss in a fresh table also reloads it, so records created by
+        another process (e.g. stripe_manager.py) are found without waiting
+        for the TTL; at most once per miss_reload_seconds, so repeated
+        unknown names (e.g. consume_credits with a bad event_name) do not
+        each cost a full-table query.
+        """
+        reloaded = False
+        if self.catalog.is_stale(table_name):
+            await self.reload_catalog(table_name)
+            reloaded = True
+
+        record = lookup()
+        if (
+            record is None
+            and not reloaded
+            and self.catalog.claim_miss_reload(table_name)
+        ):
+            await self.reload_catalog(table_name)
+            record = lookup()
+        return record
+
+    async def reload_catalog(self, table_name: str) -> None:
+        """Reload a catalog table; concurrent reloads share one query."""
+        await self._catalog_loads.do(
+            table_name, lambda: self._load_catalog_table(table_name)
+        )
+
+    async def _load_catalog_table(self, table_name: str) -> None:
+        version = self.catalog.table_version(table_name)
+        result = await asyncio.to_thread(
+            self.supabase.table(table_name).select("*").execute
+        )
+        model = CATALOG_TABLES[table_name]
+        records: list[CatalogRecord] = [model(**row) for row in result.data or []]
+        if not self.catalog.load(table_name, records, version):
+            logger.debug(f"Discarded {table_name} catalog load overtaken by a change")
+
     # Billing History
     async def create_billing_history(
         self, billing_data: BillingHistoryCreate
@@ -820,53 +825,168 @@ class BillingService:
             logger.error(f"Error creating billing history: {e}")
             raise
 
+    async def upsert_billing_history(
+        self, billing_data: BillingHistoryCreate
+    ) -> BillingHistory:
+        """Create or update the billing history entry of a Stripe payment.
+
+        Entries are keyed on the Stripe invoice id, or on the payment intent
+        id for one-time payments, so a retried or redelivered webhook event
+        updates its entry instead of adding another one (or failing on the
+        unique invoice id). A payment intent event never overwrites the entry
+        of the invoice the payment intent paid.
+        """
+        try:
+            existing = None
+            if billing_data.stripe_invoice_id:
+                existing = self._find_billing_history(
+                    "stripe_invoice_id", billing_data.stripe_invoice_id
+                )
+            if existing is None and billing_data.stripe_payment_intent_id:
+                existing = self._find_billing_history(
+                    "stripe_payment_intent_id", billing_data.stripe_payment_intent_id
+                )
+                if existing is not None and existing.get("stripe_invoice_id"):
+                    if not billing_data.stripe_invoice_id:
+                        return BillingHistory(**existing)
+                    # Another invoice paid by the same payment intent
+                    existing = None
+
+            billing_dict = billing_data.model_dump(mode="json")
+            if existing is None:
+                result = (
+                    self.supabase.table("billing_history")
+                    .insert(billing_dict)
+                    .execute()
+                )
+            else:
+                result = (
+                    self.supabase.table("billing_history")
+                    .update(billing_dict)
+                    .eq("id", existing["id"])
+                    .execute()
+                )
+
+            if result.data:
+                return BillingHistory(**result.data[0])
+
+            raise Exception("Failed to save billing history")
+
+        except Exception as e:
+            logger.error(f"Error saving billing history: {e}")
+            raise
+
+    def _find_billing_history(self, column: str, value: str) -> Optional[dict]:
+        result = (
+            self.supabase.table("billing_history")
+            .select("*")
+            .eq(column, value)
+            .limit(1)
+            .execute()
+        )
+        return result.data[0] if result.data else None
+
     async def get_billing_history(
         self, organization_id: UUID, limit: int = 10
     ) -> list[BillingHistory]:
-        """Get billing history for an organization."""
-        try:
-            result = (
-                self.supabase.table("billing_history")
-                .select("*")
-                .eq("organization_id", str(organization_id))
-                .order("created_at", desc=True)
-                .limit(limit)
-                .execute()
-            )
+        """Get the most recent billing history for an organization."""
+        page = await self.get_billing_history_page(organization_id, limit=limit)
+        return page.items
 
-            return [BillingHistory(**record) for record in result.data]
+    async def get_billing_history_page(
+        self, organization_id: UUID, limit: int = 10, cursor: Optional[str] = None
+    ) -> CursorPage[BillingHistory]:
+        """Get a page of billing history, newest first.
 
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        rows, next_cursor = await self._get_keyset_page(
+            "billing_history", organization_id, limit, cursor
+        )
+        return CursorPage[BillingHistory](
+            items=[BillingHistory(**record) for record in rows],
+            next_cursor=next_cursor,
+        )
+
+    async def get_credit_transactions_page(
+        self, organization_id: UUID, limit: int = 50, cursor: Optional[str] = None
+    ) -> CursorPage[CreditTransaction]:
+        """Get a page of an organization's credit transactions, newest first.
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        rows, next_cursor = await self._get_keyset_page(
+            "credit_transactions", organization_id, limit, cursor
+        )
+        return CursorPage[CreditTransaction](
+            items=[CreditTransaction(**record) for record in rows],
+            next_cursor=next_cursor,
+        )
+
+    async def iter_organization_records(
+        self, table_name: str, organization_id: UUID, page_size: int = 1000
+    ) -> AsyncIterator[dict[str, Any]]:
+        """Stream every row of an organization in a table, newest first.
+
+        Rows are fetched a page at a time, so memory use does not grow with
+        the number of rows (e.g. for exports).
+        """
+        cursor = None
+        while True:
+            rows, cursor = await self._get_keyset_page(
+                table_name, organization_id, page_size, cursor
+            )
+            for row in rows:
+                yield row
+            if cursor is None:
+                return
+
+    async def _get_keyset_page(
+        self,
+        table_name: str,
+        organization_id: UUID,
+        limit: int,
+        cursor: Optional[str],
+    ) -> tuple[list[dict[str, Any]], Optional[str]]:
+        query = keyset_query(
+            self.supabase.table(table_name)
+            .select("*")
+            .eq("organization_id", str(organization_id)),
+            limit,
+            cursor,
+        )
+        try:
+            result = await asyncio.to_thread(query.execute)
+            return keyset_page(result.data or [], limit)
         except Exception as e:
-            logger.error(f"Error fetching billing history for {organization_id}: {e}")
+            logger.error(f"Error fetching {table_name} for {organization_id}: {e}")
             raise
 
     # Billing Summary
     async def get_organization_billing_summary(
         self, organization_id: UUID
     ) -> OrganizationBillingSummary:
-        """Get comprehensive billing summary for an organization."""
-        try:
-            # Get subscription details
-            subscription = await self.get_organization_subscription(organization_id)
+        """Get comprehensive billing summary for an organization.
 
-            # Get credit balance
-            credit_balance_info = await self.get_credit_balance(organization_id)
+        The subscription and credit balance are fetched concurrently; usage
+        is read from the daily rollup, counting whole UTC days from the day
+        the current period started.
+        """
+        try:
+            subscription, credit_balance_info = await asyncio.gather(
+                self.get_organization_subscription(organization_id),
+                self.get_credit_balance(organization_id),
+            )
 
             # Calculate current period usage
             current_period_usage = 0
             if subscription and subscription.current_period_start:
-                usage_result = (
-                    self.supabase.table("credit_transactions")
-                    .select("amount")
-                    .eq("organization_id", str(organization_id))
-                    .eq("transaction_type", TransactionType.CONSUMED.value)
-                    .gte("created_at", subscription.current_period_start.isoformat())
-                    .execute()
-                )
-
-                current_period_usage = abs(
-                    sum(tx["amount"] for tx in usage_result.data)
+                usage = await self._get_daily_usage(
+                    organization_id, subscription.current_period_start.date()
                 )
+                current_period_usage = sum(row["credits_consumed"] for row in usage)
 
             # Determine next billing date and amount
             next_billing_date = None
@@ -890,74 +1010,297 @@ class BillingService:
             logger.error(f"Error getting billing summary for {organization_id}: {e}")
             raise
 
+    async def get_usage_stats(
+        self,
+        organization_id: UUID,
+        period_start: Optional[datetime] = None,
+        period_end: Optional[datetime] = None,
+    ) -> UsageStats:
+        """Get usage statistics for an organization from the daily rollup.
+
+        Defaults to the current subscription period, or the last 30 days
+        without a subscription. Usage is counted in whole UTC days.
+        """
+        try:
+            if period_start is None:
+                subscription = await self.get_organization_subscription(organization_id)
+                if subscription and subscription.current_period_start:
+                    period_start = subscription.current_period_start
+                    period_end = period_end or subscription.current_period_end
+                else:
+                    period_start = datetime.now(timezone.utc) - timedelta(days=30)
+            period_end = period_end or datetime.now(timezone.utc)
+
+            usage = await self._get_daily_usage(
+                organization_id, period_start.date(), period_end.date()
+            )
+
+            events_by_category: dict[str, int] = {}
+            credits_by_category: dict[str, int] = {}
+            for row in usage:
+                category = (row.get("credit_events") or {}).get("category", "other")
+                events_by_category[category] = (
+                    events_by_category.get(category, 0) + row["event_count"]
+                )
+                credits_by_category[category] = (
+                    credits_by_category.get(category, 0) + row["credits_consumed"]
+                )
+
+            return UsageStats(
+                period_start=period_start,
+                period_end=period_end,
+                total_events=sum(events_by_category.values()),
+                credits_consumed=sum(credits_by_category.values()),
+                events_by_category=events_by_category,
+                credits_by_category=credits_by_category,
+            )
+
+        except Exception as e:
+            logger.error(f"Error getting usage stats for {organization_id}: {e}")
+            raise
+
+    async def _get_daily_usage(
+        self, organization_id: UUID, start_date: date, end_date: Optional[date] = None
+    ) -> list[dict[str, Any]]:
+        """Rows of credit_usage_daily (with event category) between two UTC days."""
+        query = (
+            self.supabase.table("credit_usage_daily")
+            .select(
+                "usage_date, event_count, credits_consumed, credit_events(category)"
+            )
+            .eq("organization_id", str(organization_id))
+            .gte("usage_date", start_date.isoformat())
+        )
+        if end_date:
+            query = query.lte("usage_date", end_date.isoformat())
+
+        result = await asyncio.to_thread(query.execute)
+        return result.data
+
+    # Stripe Webhook Inbox
+    async def enqueue_webhook_event(self, event: dict[str, Any]) -> bool:
+        """Store a verified Stripe webhook event in the inbox.
+
+        Returns:
+            False if an event with the same id is already in the inbox
+        """
+        try:
+            result = await asyncio.to_thread(
+                self.supabase.rpc(
+                    "enqueue_stripe_webhook_event",
+                    {
+                        "p_event_id": event["id"],
+                        "p_event_type": event["type"],
+                        "p_customer_id": _webhook_event_customer(event),
+                        "p_stripe_created_at": datetime.fromtimestamp(
+                            event["created"], tz=timezone.utc
+                        ).isoformat(),
+                        "p_payload": event,
+                    },
+                ).execute
+            )
+            return bool(result.data)
+
+        except Exception as e:
+            logger.error(f"Error enqueuing Stripe webhook event {event.get('id')}: {e}")
+            raise
+
+    async def claim_webhook_events(
+        self, limit: int, lease_seconds: int
+    ) -> list[StripeWebhookInboxEvent]:
+        """Lease up to `limit` due inbox events, at most one per Stripe customer."""
+        try:
+            result = await asyncio.to_thread(
+                self.supabase.rpc(
+                    "claim_stripe_webhook_events",
+                    {"p_limit": limit, "p_lease_seconds": lease_seconds},
+                ).execute
+            )
+            events = [StripeWebhookInboxEvent(**row) for row in result.data or []]
+            return sorted(events, key=lambda e: (e.stripe_created_at, e.sequence))
+
+        except Exception as e:
+            logger.error(f"Error claiming Stripe webhook events: {e}")
+            raise
+
+    async def complete_webhook_event(self, event: StripeWebhookInboxEvent) -> bool:
+        """Mark a claimed inbox event as succeeded.
+
+        Returns:
+            False if the claim was lost (the lease expired and the event was
+            claimed again)
+        """
+        return await self._finish_webhook_event(
+            event,
+            {
+                "status": WebhookEventStatus.SUCCEEDED.value,
+                "processed_at": datetime.now(timezone.utc).isoformat(),
+                "locked_until": None,
+                "last_error": None,
+            },
+        )
+
+    async def fail_webhook_event(
+        self,
+        event: StripeWebhookInboxEvent,
+        error: str,
+        retry_at: Optional[datetime] = None,
+    ) -> bool:
+        """Record a failed attempt of a claimed inbox event.
+
+        The event is retried at `retry_at`, or marked failed when it is None.
+
+        Returns:
+            False if the claim was lost
+        """
+        if retry_at is None:
+            update = {"status": WebhookEventStatus.FAILED.value}
+        else:
+            update = {
+                "status": WebhookEventStatus.PENDING.value,
+                "next_attempt_at": retry_at.isoformat(),
+            }
+        update.update({"locked_until": None, "last_error": error})
+        return await self._finish_webhook_event(event, update)
+
+    async def _finish_webhook_event(
+        self, event: StripeWebhookInboxEvent, update: dict[str, Any]
+    ) -> bool:
+        try:
+            # The attempt count fences out a worker whose lease was taken over
+            query = (
+                self.supabase.table("stripe_webhook_events")
+                .update(update)
+                .eq("event_id", event.event_id)
+                .eq("status", WebhookEventStatus.PROCESSING.value)
+                .eq("attempts", event.attempts)
+            )
+            result = await asyncio.to_thread(query.execute)
+            return bool(result.data)
+
+        except Exception as e:
+            logger.error(f"Error updating Stripe webhook event {event.event_id}: {e}")
+            raise
+
+    async def get_webhook_events(
+        self,
+        status: Optional[WebhookEventStatus] = None,
+        event_ids: Optional[list[str]] = None,
+        limit: int = 100,
+    ) -> list[StripeWebhookInboxEvent]:
+        """Get inbox events, oldest first."""
+        try:
+            query = self.supabase.table("stripe_webhook_events").select("*")
+            if status:
+                query = query.eq("status", status.value)
+            if event_ids:
+                query = query.in_("event_id", event_ids)
+            result = query.order("sequence").limit(limit).execute()
+            return [StripeWebhookInboxEvent(**row) for row in result.data]
+
+        except Exception as e:
+            logger.error(f"Error getting Stripe webhook events: {e}")
+            raise
+
+    async def replay_webhook_events(
+        self,
+        status: Optional[WebhookEventStatus] = None,
+        event_ids: Optional[list[str]] = None,
+    ) -> int:
+        """Reset inbox events to pending so the worker pool processes them again.
+
+        Events currently being processed are left alone.
+
+        Returns:
+            Number of events reset
+        """
+        if status is None and not event_ids:
+            raise ValueError("A status or event ids are required to replay events")
+        try:
+            query = (
+                self.supabase.table("stripe_webhook_events")
+                .update(
+                    {
+                        "status": WebhookEventStatus.PENDING.value,
+                        "attempts": 0,
+                        "next_attempt_at": datetime.now(timezone.utc).isoformat(),
+                        "locked_until": None,
+                        "last_error": None,
+                        "processed_at": None,
+                    }
+                )
+                .neq("status", WebhookEventStatus.PROCESSING.value)
+            )
+            if status:
+                query = query.eq("status", status.value)
+            if event_ids:
+                query = query.in_("event_id", event_ids)
+            result = query.execute()
+            logger.info(f"Reset {len(result.data)} Stripe webhook event(s) for replay")
+            return len(result.data)
+
+        except Exception as e:
+            logger.error(f"Error replaying Stripe webhook events: {e}")
+            raise
+
     # Polymorphic Relationship Utilities
     async def validate_transaction_references(
-        self, organization_id: Optional[UUID] = None
-    ) -> dict[str, list[dict[str, Any]]]:
+        self,
+        organization_id: Optional[UUID] = None,
+        batch_size: int = 500,
+        on_progress: Optional[Callable[[dict[str, Any]], None]] = None,
+    ) -> dict[str, Any]:
         """Validate polymorphic references in credit transactions.
 
+        Streams the ledger in keyset pages by id. The source_ids of each page
+        are grouped by referenced table (see TransactionSourceMapping) and
+        each group is checked with one query, skipping ids already checked on
+        earlier pages.
+
+        Args:
+            organization_id: Only validate this organization's transactions
+            batch_size: Number of transactions fetched per page
+            on_progress: Called with the report so far after every page
+
         Returns a report of invalid or orphaned references.
         """
         try:
-            # Get transactions to validate
-            query = self.supabase.table("credit_transactions").select("*")
-            if organization_id:
-                query = query.eq("organization_id", str(organization_id))
-
-            result = query.execute()
-            transactions = result.data
-
             validation_report = {
                 "invalid_source_relationships": [],
                 "orphaned_references": [],
                 "valid_transactions": 0,
-                "total_transactions": len(transactions),
+                "total_transactions": 0,
             }
+            # Per referenced table, whether each checked id exists
+            checked: dict[str, dict[str, bool]] = defaultdict(dict)
 
-            for tx in transactions:
-                source = TransactionSource(tx["source"])
-                source_id = tx.get("source_id")
-
-                # Check source/source_id relationship validity
-                if not TransactionSourceMapping.validate_source_relationship(
-                    source, source_id
-                ):
-                    validation_report["invalid_source_relationships"].append(
-                        {
-                            "transaction_id": tx["id"],
-                            "source": tx["source"],
-                            "source_id": source_id,
-                            "error": TransactionSourceMapping.get_validation_error(
-                                source, source_id
-                            ),
-                        }
-                    )
-                    continue
-
-                # Check if referenced record exists (for sources that require it)
-                if source_id and TransactionSourceMapping.requires_source_id(source):
-                    table_name = TransactionSourceMapping.get_source_table(source)
-                    if table_name:
-                        ref_result = (
-                            self.supabase.table(table_name)
-                            .select("id")
-                            .eq("id", str(source_id))
-                            .execute()
-                        )
-
-                        if not ref_result.data:
-                            validation_report["orphaned_references"].append(
-                                {
-                                    "transaction_id": tx["id"],
-                                    "source": tx["source"],
-                                    "source_id": source_id,
-                                    "referenced_table": table_name,
-                                    "error": f"Referenced {table_name} record {source_id} does not exist",
-                                }
-                            )
-                            continue
-
-                validation_report["valid_transactions"] += 1
+            last_id: Optional[str] = None
+            while True:
+                query = (
+                    self.supabase.table("credit_transactions")
+                    .select("id, source, source_id")
+                    .order("id")
+                    .limit(batch_size)
+                )
+                if organization_id:
+                    query = query.eq("organization_id", str(organization_id))
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                transactions = query.execute().data or []
+
+                self._check_source_references(transactions, checked)
+                for tx in transactions:
+                    self._validate_transaction_reference(tx, checked, validation_report)
+                validation_report["total_transactions"] += len(transactions)
+
+                if on_progress:
+                    on_progress(validation_report)
+                if len(transactions) < batch_size:
+                    break
+                last_id = transactions[-1]["id"]
+                logger.info(
+                    f"Validated {validation_report['total_transactions']} transactions"
+                )
 
             logger.info(
                 f"Transaction validation complete. Valid: {validation_report['valid_transactions']}/{validation_report['total_transactions']}"
@@ -968,6 +1311,74 @@ class BillingService:
             logger.error(f"Error validating transaction references: {e}")
             raise
 
+    def _check_source_references(
+        self, transactions: list[dict[str, Any]], checked: dict[str, dict[str, bool]]
+    ) -> None:
+        """Record whether the records referenced by a page of transactions exist."""
+        unchecked: dict[str, set[str]] = defaultdict(set)
+        for tx in transactions:
+            source = TransactionSource(tx["source"])
+            source_id = tx.get("source_id")
+            table_name = TransactionSourceMapping.get_source_table(source)
+            if (
+                source_id
+                and table_name
+                and TransactionSourceMapping.requires_source_id(source)
+                and source_id not in checked[table_name]
+            ):
+                unchecked[table_name].add(source_id)
+
+        for table_name, source_ids in unchecked.items():
+            result = (
+                self.supabase.table(table_name)
+                .select("id")
+                .in_("id", sorted(source_ids))
+                .execute()
+            )
+            existing = {row["id"] for row in result.data or []}
+            for source_id in source_ids:
+                checked[table_name][source_id] = source_id in existing
+
+    @staticmethod
+    def _validate_transaction_reference(
+        tx: dict[str, Any],
+        checked: dict[str, dict[str, bool]],
+        validation_report: dict[str, Any],
+    ) -> None:
+        source = TransactionSource(tx["source"])
+        source_id = tx.get("source_id")
+
+        # Check source/source_id relationship validity
+        if not TransactionSourceMapping.validate_source_relationship(source, source_id):
+            validation_report["invalid_source_relationships"].append(
+                {
+                    "transaction_id": tx["id"],
+                    "source": tx["source"],
+                    "source_id": source_id,
+                    "error": TransactionSourceMapping.get_validation_error(
+                        source, source_id
+                    ),
+                }
+            )
+            return
+
+        # Check if referenced record exists (for sources that require it)
+        if source_id and TransactionSourceMapping.requires_source_id(source):
+            table_name = TransactionSourceMapping.get_source_table(source)
+            if table_name and not checked[table_name][source_id]:
+                validation_report["orphaned_references"].append(
+                    {
+                        "transaction_id": tx["id"],
+                        "source": tx["source"],
+                        "source_id": source_id,
+                        "referenced_table": table_name,
+                        "error": f"Referenced {table_name} record {source_id} does not exist",
+                    }
+                )
+                return
+
+        validation_report["valid_transactions"] += 1
+
     async def get_transaction_source_details(
         self, transaction_id: UUID
     ) -> dict[str, Any]:
@@ -1028,5 +1439,16 @@ class BillingService:
             raise
 
 
+def _webhook_event_customer(event: dict[str, Any]) -> Optional[str]:
+    """Stripe customer id a webhook event belongs to, used to order its events."""
+    obj = event.get("data", {}).get("object", {})
+    if obj.get("object") == "customer":
+        return obj.get("id")
+    customer = obj.get("customer")
+    if isinstance(customer, dict):
+        return customer.get("id")
+    return customer
+
+
 # Global instance
 billing_service = BillingService()
@@ -1,16 +1,29 @@
 """
 Stripe integration service for payment processing.
+
+The stripe SDK is synchronous, so every API call runs in a dedicated,
+bounded thread pool instead of blocking the event loop; the pool size caps
+concurrent requests to Stripe. Prices, products and customers change rarely
+and are cached for stripe_cache_ttl_seconds, with concurrent misses for the
+same object sharing one request.
 """
 
+import asyncio
+import functools
 import logging
-from typing import Any, Optional
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Awaitable, Callable, Optional, TypeVar
 
 import stripe
 
+from shared.common.single_flight import SingleFlight
+from shared.common.ttl_cache import TTLCache
 from shared.config import settings
 
 logger = logging.getLogger(__name__)
 
+T = TypeVar("T")
+
 # Initialize Stripe with secret key
 stripe.api_key = getattr(settings, "stripe_secret_key", None)
 
@@ -28,6 +41,33 @@ class StripeService:
         # Set frontend URL for redirects
         self.frontend_url = settings.app_base_url or "http://localhost:3000"
 
+        self._executor = ThreadPoolExecutor(
+            max_workers=settings.stripe_max_concurrent_requests,
+            thread_name_prefix="stripe",
+        )
+        self._cache: TTLCache[Any] = TTLCache(settings.stripe_cache_ttl_seconds)
+        self._cache_loads: SingleFlight[Any] = SingleFlight()
+
+    async def _call(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run a blocking stripe SDK call in the Stripe thread pool."""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(
+            self._executor, functools.partial(fn, *args, **kwargs)
+        )
+
+    async def _cached(self, key: str, load: Callable[[], Awaitable[T]]) -> T:
+        """Return the cached object for key, loading it on a miss."""
+        cached = self._cache.get(key)
+        if cached is not None:
+            return cached
+
+        async def load_and_store() -> T:
+            value = await load()
+            self._cache.set(key, value)
+            return value
+
+        return await self._cache_loads.do(key, load_and_store)
+
     async def create_customer(
         self,
         email: str,
@@ -42,13 +82,17 @@ class StripeService:
                 **(metadata or {}),
             }
 
-            customer = stripe.Customer.create(
-                email=email, name=name, metadata=customer_metadata
+            customer = await self._call(
+                stripe.Customer.create,
+                email=email,
+                name=name,
+                metadata=customer_metadata,
             )
 
             logger.info(
                 f"Created Stripe customer {customer.id} for organization {organization_id}"
             )
+            self._cache.set(f"customer:{customer.id}", customer)
             return customer
 
         except stripe.error.StripeError as e:
@@ -56,9 +100,12 @@ class StripeService:
             raise
 
     async def get_customer(self, customer_id: str) -> stripe.Customer:
-        """Retrieve a Stripe customer."""
+        """Retrieve a Stripe customer (cached)."""
         try:
-            return stripe.Customer.retrieve(customer_id)
+            return await self._cached(
+                f"customer:{customer_id}",
+                lambda: self._call(stripe.Customer.retrieve, customer_id),
+            )
         except stripe.error.StripeError as e:
             logger.error(f"Failed to retrieve Stripe customer {customer_id}: {e}")
             raise
@@ -66,7 +113,10 @@ class StripeService:
     async def update_customer(self, customer_id: str, **kwargs) -> stripe.Customer:
         """Update a Stripe customer."""
         try:
-            return stripe.Customer.modify(customer_id, **kwargs)
+            self._cache.invalidate(f"customer:{customer_id}")
+            customer = await self._call(stripe.Customer.modify, customer_id, **kwargs)
+            self._cache.set(f"customer:{customer_id}", customer)
+            return customer
         except stripe.error.StripeError as e:
             logger.error(f"Failed to update Stripe customer {customer_id}: {e}")
             raise
@@ -102,7 +152,7 @@ class StripeService:
                 if subscription_data:
                     session_params["subscription_data"] = subscription_data
 
-            session = stripe.checkout.Session.create(**session_params)
+            session = await self._call(stripe.checkout.Session.create, **session_params)
 
             logger.info(
                 f"Created checkout session {session.id} for customer {customer_id}"
@@ -131,7 +181,9 @@ class StripeService:
             if trial_period_days:
                 subscription_params["trial_period_days"] = trial_period_days
 
-            subscription = stripe.Subscription.create(**subscription_params)
+            subscription = await self._call(
+                stripe.Subscription.create, **subscription_params
+            )
 
             logger.info(
                 f"Created subscription {subscription.id} for customer {customer_id}"
@@ -145,7 +197,7 @@ class StripeService:
     async def get_subscription(self, subscription_id: str) -> stripe.Subscription:
         """Retrieve a Stripe subscription."""
         try:
-            return stripe.Subscription.retrieve(subscription_id)
+            return await self._call(stripe.Subscription.retrieve, subscription_id)
         except stripe.error.StripeError as e:
             logger.error(f"Failed to retrieve subscription {subscription_id}: {e}")
             raise
@@ -155,7 +207,9 @@ class StripeService:
     ) -> stripe.Subscription:
         """Update a Stripe subscription."""
         try:
-            return stripe.Subscription.modify(subscription_id, **kwargs)
+            return await self._call(
+                stripe.Subscription.modify, subscription_id, **kwargs
+            )
         except stripe.error.StripeError as e:
             logger.error(f"Failed to update subscription {subscription_id}: {e}")
             raise
@@ -166,11 +220,15 @@ class StripeService:
         """Cancel a Stripe subscription."""
         try:
             if at_period_end:
-                subscription = stripe.Subscription.modify(
-                    subscription_id, cancel_at_period_end=True
+                subscription = await self._call(
+                    stripe.Subscription.modify,
+                    subscription_id,
+                    cancel_at_period_end=True,
                 )
             else:
-                subscription = stripe.Subscription.delete(subscription_id)
+                subscription = await self._call(
+                    stripe.Subscription.delete, subscription_id
+                )
 
             logger.info(
                 f"Cancelled subscription {subscription_id} (at_period_end={at_period_end})"
@@ -190,8 +248,10 @@ class StripeService:
                 f"Creating portal session for customer {customer_id} with return URL {return_url}"
             )
 
-            session = stripe.billing_portal.Session.create(
-                customer=customer_id, return_url=return_url
+            session = await self._call(
+                stripe.billing_portal.Session.create,
+                customer=customer_id,
+                return_url=return_url,
             )
 
             logger.info(
@@ -211,7 +271,7 @@ class StripeService:
     async def get_invoice(self, invoice_id: str) -> stripe.Invoice:
         """Retrieve a Stripe invoice."""
         try:
-            return stripe.Invoice.retrieve(invoice_id)
+            return await self._call(stripe.Invoice.retrieve, invoice_id)
         except stripe.error.StripeError as e:
             logger.error(f"Failed to retrieve invoice {invoice_id}: {e}")
             raise
@@ -219,20 +279,63 @@ class StripeService:
     async def get_payment_intent(self, payment_intent_id: str) -> stripe.PaymentIntent:
         """Retrieve a Stripe payment intent."""
         try:
-            return stripe.PaymentIntent.retrieve(payment_intent_id)
+            return await self._call(stripe.PaymentIntent.retrieve, payment_intent_id)
         except stripe.error.StripeError as e:
             logger.error(f"Failed to retrieve payment intent {payment_intent_id}: {e}")
             raise
 
     async def list_customer_invoices(
-        self, customer_id: str, limit: int = 10
-    ) -> list[stripe.Invoice]:
-        """list invoices for a customer."""
+        self, customer_id: str, limit: Optional[int] = None, page_size: int = 100
+    ) -> AsyncIterator[stripe.Invoice]:
+        """Stream a customer's invoices, newest first, fetching pages as needed.
+
+        Args:
+            customer_id: Stripe customer id
+            limit: Stop after this many invoices (all invoices if None)
+            page_size: Invoices fetched per Stripe API request (max 100)
+        """
+        yielded = 0
+        starting_after = None
+        while True:
+            params = {"customer": customer_id, "limit": page_size}
+            if starting_after:
+                params["starting_after"] = starting_after
+            try:
+                page = await self._call(stripe.Invoice.list, **params)
+            except stripe.error.StripeError as e:
+                logger.error(f"Failed to list invoices for customer {customer_id}: {e}")
+                raise
+
+            for invoice in page.data:
+                yield invoice
+                yielded += 1
+                if limit is not None and yielded >= limit:
+                    return
+
+            if not page.has_more or not page.data:
+                return
+            starting_after = page.data[-1].id
+
+    async def get_price(self, price_id: str) -> stripe.Price:
+        """Retrieve a Stripe price (cached)."""
+        try:
+            return await self._cached(
+                f"price:{price_id}",
+                lambda: self._call(stripe.Price.retrieve, price_id),
+            )
+        except stripe.error.StripeError as e:
+            logger.error(f"Failed to retrieve price {price_id}: {e}")
+            raise
+
+    async def get_product(self, product_id: str) -> stripe.Product:
+        """Retrieve a Stripe product (cached)."""
         try:
-            invoices = stripe.Invoice.list(customer=customer_id, limit=limit)
-            return invoices.data
+            return await self._cached(
+                f"product:{product_id}",
+                lambda: self._call(stripe.Product.retrieve, product_id),
+            )
         except stripe.error.StripeError as e:
-            logger.error(f"Failed to list invoices for customer {customer_id}: {e}")
+            logger.error(f"Failed to retrieve product {product_id}: {e}")
             raise
 
     def construct_webhook_event(
@@ -253,8 +356,8 @@ class StripeService:
     ) -> stripe.Subscription:
         """Reactivate a cancelled subscription."""
         try:
-            subscription = stripe.Subscription.modify(
-                subscription_id, cancel_at_period_end=False
+            subscription = await self._call(
+                stripe.Subscription.modify, subscription_id, cancel_at_period_end=False
             )
 
             logger.info(f"Reactivated subscription: {subscription_id}")
@@ -271,7 +374,8 @@ class StripeService:
     ) -> stripe.checkout.Session:
         """Create a Stripe Checkout session for subscription."""
         try:
-            session = stripe.checkout.Session.create(
+            session = await self._call(
+                stripe.checkout.Session.create,
                 mode="subscription",
                 customer=customer_id,
                 line_items=[
@@ -307,7 +411,8 @@ class StripeService:
     ) -> stripe.checkout.Session:
         """Create a Stripe Checkout session for credit purchase."""
         try:
-            session = stripe.checkout.Session.create(
+            session = await self._call(
+                stripe.checkout.Session.create,
                 mode="payment",
                 customer=customer_id,
                 line_items=[
@@ -346,8 +451,10 @@ class StripeService:
     ) -> stripe.billing_portal.Session:
         """Create a Stripe Customer Portal session."""
         try:
-            session = stripe.billing_portal.Session.create(
-                customer=customer_id, return_url=f"{self.frontend_url}/billing"
+            session = await self._call(
+                stripe.billing_portal.Session.create,
+                customer=customer_id,
+                return_url=f"{self.frontend_url}/billing",
             )
 
             logger.info(f"Created customer portal session for customer: {customer_id}")
@@ -2,8 +2,10 @@
 Stripe webhook event handler.
 """
 
+import json
 import logging
 from datetime import datetime
+from typing import Any, Awaitable, Callable
 from uuid import UUID
 
 from shared.config import settings
@@ -22,45 +24,35 @@ from .stripe_service import stripe_service
 logger = logging.getLogger(__name__)
 
 
-async def handle_stripe_webhook(payload: bytes, signature: str):
-    """Process Stripe webhook events."""
-    try:
-        # Get webhook secret from settings
-        webhook_secret = getattr(settings, "stripe_webhook_secret", None)
-        if not webhook_secret:
-            logger.error("Stripe webhook secret not configured")
-            return
+def construct_stripe_webhook_event(payload: bytes, signature: str) -> dict[str, Any]:
+    """Verify a Stripe webhook signature and return the event as a dict.
 
-        # Construct and verify webhook event
-        event = stripe_service.construct_webhook_event(
-            payload, signature, webhook_secret
-        )
+    Raises:
+        ValueError: If the webhook secret is not configured or the payload
+            is invalid
+        stripe.error.SignatureVerificationError: If the signature is invalid
+    """
+    webhook_secret = getattr(settings, "stripe_webhook_secret", None)
+    if not webhook_secret:
+        raise ValueError("Stripe webhook secret not configured")
 
-        logger.info(f"Processing Stripe webhook event: {event['type']}")
-
-        # Route event to appropriate handler
-        if event["type"] == "checkout.session.completed":
-            await handle_checkout_session_completed(event)
-        elif event["type"] == "customer.subscription.created":
-            await handle_subscription_created(event)
-        elif event["type"] == "customer.subscription.updated":
-            await handle_subscription_updated(event)
-        elif event["type"] == "customer.subscription.deleted":
-            await handle_subscription_deleted(event)
-        elif event["type"] == "invoice.payment_succeeded":
-            await handle_invoice_payment_succeeded(event)
-        elif event["type"] == "invoice.payment_failed":
-            await handle_invoice_payment_failed(event)
-        elif event["type"] == "payment_intent.succeeded":
-            await handle_payment_intent_succeeded(event)
-        elif event["type"] == "payment_intent.payment_failed":
-            await handle_payment_intent_failed(event)
-        else:
-            logger.info(f"Unhandled webhook event type: {event['type']}")
+    stripe_service.construct_webhook_event(payload, signature, webhook_secret)
+    # Store the event exactly as Stripe sent it
+    return json.loads(payload)
 
-    except Exception as e:
-        logger.error(f"Error processing webhook: {e}")
-        raise
+
+async def dispatch_stripe_event(event: dict[str, Any]) -> None:
+    """Route a verified Stripe event to its handler.
+
+    Raises whatever the handler raises, so the webhook inbox retries the event.
+    """
+    handler = EVENT_HANDLERS.get(event["type"])
+    if handler is None:
+        logger.info(f"Unhandled webhook event type: {event['type']}")
+        return
+
+    logger.info(f"Processing Stripe webhook event: {event['type']}")
+    await handler(event)
 
 
 async def handle_checkout_session_completed(event):
@@ -91,6 +83,15 @@ async def handle_checkout_session_completed(event):
             credit_amount = metadata.get("credit_amount")
 
             if product_id and credit_amount and session.get("payment_intent"):
+                # A retried event must not add the purchased credits twice
+                if await billing_service.has_purchased_credits(
+                    UUID(organization_id), session["payment_intent"]
+                ):
+                    logger.info(
+                        f"Credits for payment {session['payment_intent']} already added"
+                    )
+                    return
+
                 # Add purchased credits
                 await billing_service.add_purchased_credits(
                     organization_id=UUID(organization_id),
@@ -400,7 +401,7 @@ async def handle_invoice_payment_succeeded(event):
             ),
         )
 
-        await billing_service.create_billing_history(billing_data)
+        await billing_service.upsert_billing_history(billing_data)
 
         # If this is a subscription invoice, allocate credits
         if invoice.get("subscription"):
@@ -427,16 +428,27 @@ async def handle_invoice_payment_succeeded(event):
                 )
                 subscription_id = org_subscription.id if org_subscription else None
 
-                await billing_service.add_subscription_credits(
-                    organization_id=UUID(organization_id),
-                    credits=plan.included_credits,
-                    subscription_id=subscription_id,
-                    expires_at=expires_at,
-                )
+                # A retried event must not allocate the invoice's credits twice
+                if await billing_service.has_invoice_subscription_credits(
+                    UUID(organization_id), invoice["id"]
+                ):
+                    logger.info(
+                        f"Subscription credits for invoice {invoice['id']} "
+                        "already allocated"
+                    )
+                else:
+                    await billing_service.add_subscription_credits(
+                        organization_id=UUID(organization_id),
+                        credits=plan.included_credits,
+                        subscription_id=subscription_id,
+                        expires_at=expires_at,
+                        stripe_invoice_id=invoice["id"],
+                    )
 
-                logger.info(
-                    f"Allocated {plan.included_credits} subscription credits to organization {organization_id}"
-                )
+                    logger.info(
+                        f"Allocated {plan.included_credits} subscription credits "
+                        f"to organization {organization_id}"
+                    )
 
         logger.info(
             f"Processed successful invoice payment for organization {organization_id}"
@@ -483,7 +495,7 @@ async def handle_invoice_payment_failed(event):
             billing_reason=invoice.get("billing_reason"),
         )
 
-        await billing_service.create_billing_history(billing_data)
+        await billing_service.upsert_billing_history(billing_data)
 
         # Update subscription status if applicable
         if invoice.get("subscription"):
@@ -541,7 +553,7 @@ async def handle_payment_intent_succeeded(event):
             paid_at=datetime.fromtimestamp(payment_intent.get("created")),
         )
 
-        await billing_service.create_billing_history(billing_data)
+        await billing_service.upsert_billing_history(billing_data)
 
         logger.info(
             f"Processed successful payment intent for organization {organization_id}"
@@ -587,7 +599,7 @@ async def handle_payment_intent_failed(event):
             billing_reason="manual",
         )
 
-        await billing_service.create_billing_history(billing_data)
+        await billing_service.upsert_billing_history(billing_data)
 
         logger.info(
             f"Processed failed payment intent for organization {organization_id}"
@@ -598,6 +610,18 @@ async def handle_payment_intent_failed(event):
         raise
 
 
+EVENT_HANDLERS: dict[str, Callable[[dict[str, Any]], Awaitable[None]]] = {
+    "checkout.session.completed": handle_checkout_session_completed,
+    "customer.subscription.created": handle_subscription_created,
+    "customer.subscription.updated": handle_subscription_updated,
+    "customer.subscription.deleted": handle_subscription_deleted,
+    "invoice.payment_succeeded": handle_invoice_payment_succeeded,
+    "invoice.payment_failed": handle_invoice_payment_failed,
+    "payment_intent.succeeded": handle_payment_intent_succeeded,
+    "payment_intent.payment_failed": handle_payment_intent_failed,
+}
+
+
 def _map_stripe_status(stripe_status: str) -> SubscriptionStatus:
     """Map Stripe subscription status to our enum."""
     status_mapping = {
@@ -0,0 +1,262 @@
+"""
+Durable Stripe webhook processing.
+
+The webhook endpoint verifies the Stripe signature and stores the event in
+the `stripe_webhook_events` inbox before acknowledging it (see
+enqueue_stripe_event), instead of processing it in a FastAPI background task.
+The inbox is keyed by Stripe event id, so events Stripe retries or delivers
+twice are only applied once, and events acknowledged just before a restart
+are still processed afterwards.
+
+StripeWebhookInbox is an async worker pool that drains the inbox:
+- Events are claimed with a lease through claim_stripe_webhook_events, which
+  only hands out a customer's event once all earlier events of that
+  customer have finished. Events of one customer are therefore applied in
+  the order Stripe created them and never concurrently, across instances.
+- A failed event is retried with exponential backoff, holding back later
+  events of the same customer, until max_attempts is reached. It is then
+  marked failed, which releases the customer's later events, and has to be
+  replayed with scripts/replay_stripe_webhooks.py.
+- An event whose worker died is claimed again once its lease expires.
+"""
+
+import asyncio
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Optional, Set
+
+from opentelemetry import metrics
+
+from shared.config import settings
+
+from .models import StripeWebhookInboxEvent
+from .service import BillingService, billing_service
+from .webhook_handler import dispatch_stripe_event
+
+logger = logging.getLogger(__name__)
+
+# Get meter for this module
+meter = metrics.get_meter(__name__)
+
+# Create metrics
+webhook_events_counter = meter.create_counter(
+    "billing.webhooks.events",
+    description="Stripe webhook event processing attempts by outcome",
+)
+
+webhook_processing_duration = meter.create_histogram(
+    "billing.webhooks.processing.duration",
+    unit="s",
+    description="Duration of Stripe webhook event processing",
+)
+
+# Upper bound for handling one event before another worker may claim it
+LEASE_SECONDS = 300
+MAX_RETRY_DELAY_SECONDS = 3600
+
+
+class StripeWebhookInbox:
+    """Worker pool that processes Stripe webhook events from the inbox."""
+
+    def __init__(
+        self,
+        workers: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        poll_interval_seconds: float,
+        billing: BillingService = billing_service,
+        dispatch: Callable[[dict[str, Any]], Awaitable[None]] = dispatch_stripe_event,
+    ) -> None:
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.billing = billing
+        self.dispatch = dispatch
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+
+    async def start(self) -> None:
+        """Start draining the inbox."""
+        if self.running:
+            logger.warning("Stripe webhook inbox is already running")
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._run())
+        logger.info(f"Stripe webhook inbox started with {self.workers} worker(s)")
+
+    async def stop(self) -> None:
+        """Stop claiming events and wait for events in flight."""
+        if not self.running:
+            return
+
+        self.running = False
+        self.wake()
+        if self.task:
+            await self.task
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        logger.info("Stripe webhook inbox stopped")
+
+    def wake(self) -> None:
+        """Claim events now instead of at the next poll (e.g. after an enqueue)."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self.running:
+            claimed = 0
+            try:
+                claimed = await self._claim_and_spawn()
+            except Exception as e:
+                logger.error(
+                    f"Error claiming Stripe webhook events: {e}", exc_info=True
+                )
+
+            if claimed and len(self._in_flight) < self.workers:
+                # More events may be due right away
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.poll_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim_and_spawn(self) -> int:
+        free = self.workers - len(self._in_flight)
+        if free <= 0:
+            return 0
+
+        events = await self.billing.claim_webhook_events(free, LEASE_SECONDS)
+        for event in events:
+            task = asyncio.create_task(self.process(event))
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_done)
+        return len(events)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        # A worker is free and the customer's next event may now be claimable
+        self.wake()
+
+    async def drain(self) -> int:
+        """Process due events in the current task until none are left.
+
+        Used by the replay script and benchmarks; the running pool drains
+        the inbox continuously on its own.
+
+        Returns:
+            Number of events applied
+        """
+        applied = 0
+        while True:
+            events = await self.billing.claim_webhook_events(
+                self.workers, LEASE_SECONDS
+            )
+            if not events:
+                return applied
+            results = await asyncio.gather(*(self.process(event) for event in events))
+            applied += sum(results)
+
+    async def process(self, event: StripeWebhookInboxEvent) -> bool:
+        """Apply one claimed event and record the outcome in the inbox.
+
+        Returns:
+            True if the event was applied
+        """
+        start = time.perf_counter()
+        try:
+            await self.dispatch(event.payload)
+        except Exception as e:
+            webhook_processing_duration.record(time.perf_counter() - start)
+            await self._record_failure(event, e)
+            return False
+
+        webhook_processing_duration.record(time.perf_counter() - start)
+        webhook_events_counter.add(1, {"outcome": "succeeded"})
+        try:
+            if not await self.billing.complete_webhook_event(event):
+                logger.warning(
+                    f"Lease on Stripe webhook event {event.event_id} expired "
+                    "before it completed"
+                )
+        except Exception as e:
+            # The event is claimed again once its lease expires
+            logger.error(
+                f"Could not mark Stripe webhook event {event.event_id} done: {e}"
+            )
+        return True
+
+    async def _record_failure(
+        self, event: StripeWebhookInboxEvent, error: Exception
+    ) -> None:
+        if event.attempts >= self.max_attempts:
+            retry_at = None
+            webhook_events_counter.add(1, {"outcome": "failed"})
+            logger.error(
+                f"Stripe webhook event {event.event_id} ({event.event_type}) failed "
+                f"after {event.attempts} attempt(s), giving up: {error}"
+            )
+        else:
+            retry_at = datetime.now(timezone.utc) + timedelta(
+                seconds=self.retry_delay(event.attempts)
+            )
+            webhook_events_counter.add(1, {"outcome": "retry"})
+            logger.warning(
+                f"Stripe webhook event {event.event_id} ({event.event_type}) failed "
+                f"on attempt {event.attempts}, retrying at {retry_at.isoformat()}: "
+                f"{error}"
+            )
+        try:
+            await self.billing.fail_webhook_event(event, str(error), retry_at)
+        except Exception as e:
+            logger.error(
+                "Could not record failure of Stripe webhook event "
+                f"{event.event_id}: {e}"
+            )
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait before retrying an event that failed `attempts` times."""
+        return min(
+            self.retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS
+        )
+
+
+# Global instance
+stripe_webhook_inbox: Optional[StripeWebhookInbox] = None
+
+
+async def enqueue_stripe_event(event: dict[str, Any]) -> bool:
+    """Store a verified Stripe event in the inbox and wake the worker pool.
+
+    Returns:
+        False if the event was already in the inbox
+    """
+    inserted = await billing_service.enqueue_webhook_event(event)
+    if inserted and stripe_webhook_inbox:
+        stripe_webhook_inbox.wake()
+    return inserted
+
+
+async def start_stripe_webhook_inbox() -> None:
+    """Start the global Stripe webhook worker pool."""
+    global stripe_webhook_inbox
+    stripe_webhook_inbox = StripeWebhookInbox(
+        workers=settings.stripe_webhook_workers,
+        max_attempts=settings.stripe_webhook_max_attempts,
+        retry_base_seconds=settings.stripe_webhook_retry_base_seconds,
+        poll_interval_seconds=settings.stripe_webhook_poll_interval_seconds,
+    )
+    await stripe_webhook_inbox.start()
+
+
+async def stop_stripe_webhook_inbox() -> None:
+    """Stop the global Stripe webhook worker pool."""
+    global stripe_webhook_inbox
+    if stripe_webhook_inbox:
+        await stripe_webhook_inbox.stop()
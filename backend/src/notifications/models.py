@@ -9,6 +9,9 @@ from uuid import UUID
 
 from pydantic import BaseModel, EmailStr, Field
 
+# Recipients accepted by one send_notifications_batch call
+MAX_BATCH_RECIPIENTS = 1000
+
 
 class NotificationStatus(str, Enum):
     """Notification status enumeration."""
@@ -192,6 +195,68 @@ class SendNotificationResponse(BaseModel):
     message: str
 
 
+class NotificationBatchRecipient(BaseModel):
+    """A recipient of a batch notification."""
+
+    recipient_email: EmailStr
+    recipient_name: Optional[str] = None
+    user_id: Optional[UUID] = None
+    template_variables: Optional[Dict[str, Any]] = Field(
+        None, description="Variables for this recipient, overriding the shared ones"
+    )
+
+
+class SendNotificationBatchRequest(BaseModel):
+    """Request model for sending a notification to many recipients."""
+
+    event_key: str = Field(..., description="Event key that triggers the notification")
+    recipients: List[NotificationBatchRecipient] = Field(
+        ..., min_length=1, max_length=MAX_BATCH_RECIPIENTS
+    )
+    organization_id: Optional[UUID] = None
+    template_variables: Optional[Dict[str, Any]] = Field(
+        None, description="Variables shared by all recipients"
+    )
+    template_id: Optional[UUID] = Field(None, description="Override default template")
+
+
+class NotificationBatchResult(BaseModel):
+    """Outcome of a batch notification for one recipient."""
+
+    recipient_email: EmailStr
+    success: bool
+    notification_log_id: Optional[UUID] = None
+    status: NotificationStatus
+    message: str
+
+
+class SendNotificationBatchResponse(BaseModel):
+    """Response model for sending a notification to many recipients."""
+
+    queued: int
+    failed: int
+    results: List[NotificationBatchResult] = Field(
+        ..., description="One result per recipient, in request order"
+    )
+
+
+class NotificationOutboxMessage(BaseModel):
+    """An email waiting in the notification outbox."""
+
+    id: UUID
+    notification_log_id: UUID
+    message: Dict[str, Any] = Field(
+        ..., description="Resend send parameters (from, to, subject, html)"
+    )
+    attempts: int
+    next_attempt_at: datetime
+    last_error: Optional[str] = None
+    batch_key: Optional[str] = Field(
+        None, description="Emails with the same key are sent with one provider request"
+    )
+    created_at: datetime
+
+
 class NotificationEventWithTemplate(NotificationEvent):
     """Notification event with template details."""
 
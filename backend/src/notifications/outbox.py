@@ -0,0 +1,373 @@
+"""
+Asynchronous delivery of notification emails.
+
+NotificationService.send_notification renders an email and stores it in
+the `notification_outbox` table together with its pending log, then
+returns; it never waits on the email provider. NotificationOutbox is an
+async worker pool that sends the stored emails:
+- Emails are claimed with a lease through claim_notification_outbox, so
+  several instances can share the outbox and an email whose worker died is
+  claimed again once its lease expires.
+- Each email is sent with its outbox id as idempotency key, so an email
+  sent again after a lost outcome is not delivered twice.
+- Emails queued with a batch key (send_notifications_batch) are claimed
+  together and sent with one Resend batch request, keyed by their outbox
+  ids.
+- A failed send is retried with exponential backoff until max_attempts is
+  reached; emails the provider rejects are failed at once.
+- Outcomes are buffered and written to the outbox and `notification_logs`
+  in batches (finish_notification_outbox), one round trip per batch
+  instead of one log update per email.
+"""
+
+import asyncio
+import hashlib
+import logging
+import time
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Set
+
+from opentelemetry import metrics
+
+from shared.config import settings
+
+from .models import NotificationOutboxMessage, NotificationStatus
+from .service import NotificationService, notification_service
+from .transport import (
+    MAX_BATCH_SIZE,
+    EmailTransport,
+    PermanentSendError,
+    ResendTransport,
+)
+
+logger = logging.getLogger(__name__)
+
+# Get meter for this module
+meter = metrics.get_meter(__name__)
+
+# Create metrics
+outbox_emails_counter = meter.create_counter(
+    "notifications.outbox.emails",
+    description="Notification email send attempts by outcome",
+)
+
+outbox_send_duration = meter.create_histogram(
+    "notifications.outbox.send.duration",
+    unit="s",
+    description="Duration of notification email sends",
+)
+
+# Upper bound for sending one email before another worker may claim it
+LEASE_SECONDS = 300
+MAX_RETRY_DELAY_SECONDS = 3600
+# Outcomes buffered before a flush is started early
+FLUSH_BATCH_SIZE = 100
+
+
+def group_batches(
+    messages: List[NotificationOutboxMessage],
+) -> List[List[NotificationOutboxMessage]]:
+    """Group claimed emails into the batches they are sent in.
+
+    Emails sharing a batch key form one batch of at most MAX_BATCH_SIZE,
+    ordered by outbox id so a retried batch is sent with the same payload;
+    every other email is a batch of its own.
+    """
+    batches: List[List[NotificationOutboxMessage]] = []
+    keyed: Dict[str, List[NotificationOutboxMessage]] = {}
+    for message in messages:
+        if message.batch_key is None:
+            batches.append([message])
+        else:
+            keyed.setdefault(message.batch_key, []).append(message)
+    for batch in keyed.values():
+        batch.sort(key=lambda message: str(message.id))
+        batches.extend(
+            batch[i : i + MAX_BATCH_SIZE] for i in range(0, len(batch), MAX_BATCH_SIZE)
+        )
+    return batches
+
+
+class NotificationOutbox:
+    """Worker pool that sends notification emails from the outbox."""
+
+    def __init__(
+        self,
+        workers: int,
+        max_attempts: int,
+        retry_base_seconds: float,
+        poll_interval_seconds: float,
+        flush_interval_seconds: float,
+        store: NotificationService = notification_service,
+        transport: Optional[EmailTransport] = None,
+    ) -> None:
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.retry_base_seconds = retry_base_seconds
+        self.poll_interval_seconds = poll_interval_seconds
+        self.flush_interval_seconds = flush_interval_seconds
+        self.store = store
+        self.transport = transport or ResendTransport(max_concurrent_requests=workers)
+        self.running = False
+        self.task: Optional[asyncio.Task] = None
+        self.flush_task: Optional[asyncio.Task] = None
+        self._in_flight: Set[asyncio.Task] = set()
+        self._wakeup = asyncio.Event()
+        self._flush_requested = asyncio.Event()
+        self._results: List[Dict[str, Any]] = []
+
+    async def start(self) -> None:
+        """Start sending emails from the outbox."""
+        if self.running:
+            logger.warning("Notification outbox is already running")
+            return
+
+        self.running = True
+        self.task = asyncio.create_task(self._run())
+        self.flush_task = asyncio.create_task(self._flush_periodically())
+        logger.info(f"Notification outbox started with {self.workers} worker(s)")
+
+    async def stop(self) -> None:
+        """Stop claiming emails, wait for sends in flight and flush outcomes."""
+        if not self.running:
+            return
+
+        self.running = False
+        self.wake()
+        if self.task:
+            await self.task
+        if self._in_flight:
+            await asyncio.gather(*self._in_flight, return_exceptions=True)
+        self._flush_requested.set()
+        if self.flush_task:
+            await self.flush_task
+        await self.flush()
+        logger.info("Notification outbox stopped")
+
+    def wake(self) -> None:
+        """Claim emails now instead of at the next poll (e.g. after an enqueue)."""
+        self._wakeup.set()
+
+    async def _run(self) -> None:
+        while self.running:
+            claimed = 0
+            try:
+                claimed = await self._claim_and_spawn()
+            except Exception as e:
+                logger.error(f"Error claiming notification emails: {e}", exc_info=True)
+
+            if claimed and len(self._in_flight) < self.workers:
+                # More emails may be due right away
+                continue
+            try:
+                await asyncio.wait_for(
+                    self._wakeup.wait(), timeout=self.poll_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    async def _claim_and_spawn(self) -> int:
+        free = self.workers - len(self._in_flight)
+        if free <= 0:
+            return 0
+
+        messages = await self.store.claim_outbox_messages(free, LEASE_SECONDS)
+        for batch in group_batches(messages):
+            task = asyncio.create_task(self.process_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._on_done)
+        return len(messages)
+
+    def _on_done(self, task: asyncio.Task) -> None:
+        self._in_flight.discard(task)
+        self.wake()
+
+    async def _flush_periodically(self) -> None:
+        while self.running:
+            try:
+                await asyncio.wait_for(
+                    self._flush_requested.wait(), timeout=self.flush_interval_seconds
+                )
+            except asyncio.TimeoutError:
+                pass
+            self._flush_requested.clear()
+            await self.flush()
+
+    async def drain(self) -> int:
+        """Send due emails in the current task until none are left.
+
+        Used by tests and benchmarks; the running pool drains the outbox
+        continuously on its own.
+
+        Returns:
+            Number of emails sent
+        """
+        sent = 0
+        while True:
+            messages = await self.store.claim_outbox_messages(
+                self.workers, LEASE_SECONDS
+            )
+            if not messages:
+                await self.flush()
+                return sent
+            results = await asyncio.gather(
+                *(self.process_batch(batch) for batch in group_batches(messages))
+            )
+            sent += sum(results)
+            if len(self._results) >= FLUSH_BATCH_SIZE:
+                await self.flush()
+
+    async def process(self, message: NotificationOutboxMessage) -> bool:
+        """Send one claimed email and buffer the outcome.
+
+        Returns:
+            True if the email was sent
+        """
+        start = time.perf_counter()
+        try:
+            provider_message_id = await self.transport.send(
+                message.message, idempotency_key=str(message.id)
+            )
+        except Exception as e:
+            outbox_send_duration.record(time.perf_counter() - start)
+            self._record_failure(message, e)
+            return False
+
+        outbox_send_duration.record(time.perf_counter() - start)
+        outbox_emails_counter.add(1, {"outcome": "sent"})
+        self._record(
+            message,
+            status=NotificationStatus.SENT.value,
+            provider_message_id=provider_message_id,
+        )
+        return True
+
+    async def process_batch(self, messages: List[NotificationOutboxMessage]) -> int:
+        """Send claimed emails with one batch request and buffer the outcomes.
+
+        Returns:
+            Number of emails sent
+        """
+        if len(messages) == 1:
+            return int(await self.process(messages[0]))
+
+        # The key must not depend on claim order, so a batch claimed again
+        # after its outcome was lost is de-duplicated by Resend
+        messages = sorted(messages, key=lambda message: str(message.id))
+        ids = ",".join(str(message.id) for message in messages)
+        idempotency_key = f"batch-{hashlib.sha256(ids.encode()).hexdigest()}"
+        start = time.perf_counter()
+        try:
+            provider_message_ids = await self.transport.send_batch(
+                [message.message for message in messages],
+                idempotency_key=idempotency_key,
+            )
+        except Exception as e:
+            outbox_send_duration.record(time.perf_counter() - start)
+            for message in messages:
+                self._record_failure(message, e)
+            return 0
+
+        outbox_send_duration.record(time.perf_counter() - start)
+        outbox_emails_counter.add(len(messages), {"outcome": "sent"})
+        for message, provider_message_id in zip(messages, provider_message_ids):
+            self._record(
+                message,
+                status=NotificationStatus.SENT.value,
+                provider_message_id=provider_message_id,
+            )
+        return len(messages)
+
+    def _record_failure(
+        self, message: NotificationOutboxMessage, error: Exception
+    ) -> None:
+        recipients = ", ".join(message.message.get("to", []))
+        if (
+            isinstance(error, PermanentSendError)
+            or message.attempts >= self.max_attempts
+        ):
+            outbox_emails_counter.add(1, {"outcome": "failed"})
+            logger.error(
+                f"Notification email {message.id} to {recipients} failed after "
+                f"{message.attempts} attempt(s), giving up: {error}"
+            )
+            self._record(
+                message, status=NotificationStatus.FAILED.value, error=str(error)
+            )
+            return
+
+        retry_at = datetime.now(timezone.utc) + timedelta(
+            seconds=self.retry_delay(message.attempts)
+        )
+        outbox_emails_counter.add(1, {"outcome": "retry"})
+        logger.warning(
+            f"Notification email {message.id} to {recipients} failed on attempt "
+            f"{message.attempts}, retrying at {retry_at.isoformat()}: {error}"
+        )
+        self._record(
+            message,
+            status="retry",
+            error=str(error),
+            next_attempt_at=retry_at.isoformat(),
+        )
+
+    def _record(self, message: NotificationOutboxMessage, **outcome: Any) -> None:
+        self._results.append(
+            {"id": str(message.id), "attempts": message.attempts, **outcome}
+        )
+        if len(self._results) >= FLUSH_BATCH_SIZE:
+            self._flush_requested.set()
+
+    async def flush(self) -> None:
+        """Write buffered outcomes to the outbox and notification logs."""
+        if not self._results:
+            return
+
+        results, self._results = self._results, []
+        try:
+            await self.store.finish_outbox_messages(results)
+        except Exception as e:
+            # Kept for the next flush; should this process die first, the
+            # emails are claimed again once their leases expire and the
+            # idempotency key prevents a second delivery
+            logger.error(
+                f"Could not record {len(results)} notification email outcome(s): {e}"
+            )
+            self._results = results + self._results
+
+    def retry_delay(self, attempts: int) -> float:
+        """Seconds to wait before retrying an email that failed `attempts` times."""
+        return min(
+            self.retry_base_seconds * 2 ** (attempts - 1), MAX_RETRY_DELAY_SECONDS
+        )
+
+
+# Global instance
+notification_outbox: Optional[NotificationOutbox] = None
+
+
+def wake_notification_outbox() -> None:
+    """Wake the global worker pool, if running in this process, after an enqueue."""
+    if notification_outbox:
+        notification_outbox.wake()
+
+
+async def start_notification_outbox() -> None:
+    """Start the global notification outbox worker pool."""
+    global notification_outbox
+    notification_outbox = NotificationOutbox(
+        workers=settings.notification_outbox_workers,
+        max_attempts=settings.notification_outbox_max_attempts,
+        retry_base_seconds=settings.notification_outbox_retry_base_seconds,
+        poll_interval_seconds=settings.notification_outbox_poll_interval_seconds,
+        flush_interval_seconds=settings.notification_outbox_flush_interval_seconds,
+    )
+    await notification_outbox.start()
+
+
+async def stop_notification_outbox() -> None:
+    """Stop the global notification outbox worker pool."""
+    global notification_outbox
+    if notification_outbox:
+        await notification_outbox.stop()
@@ -0,0 +1,144 @@
+"""
+Compiled notification templates.
+
+A template is split once into literal segments and variable placeholders,
+so rendering is a single join over the segments, instead of a str.replace
+pass over the whole HTML per variable (database templates) or formatting
+the large BASE_TEMPLATE again for every email (built-in templates).
+Variable values are HTML-escaped as they are inserted.
+
+Database templates are compiled once per template version and cached by
+template id and updated_at; built-in templates are compiled once per event
+(see templates.get_compiled_template).
+"""
+
+import html
+import re
+from collections import OrderedDict
+from string import Formatter
+from threading import Lock
+from typing import Any, List, Mapping, NamedTuple, Optional, Tuple
+from uuid import UUID
+
+from src.notifications.models import NotificationTemplate
+
+# {name} placeholders of database templates; any other brace is literal text
+PLACEHOLDER_PATTERN = re.compile(r"\{([^{}]+)\}")
+
+# Compiled database templates kept per process
+MAX_COMPILED_TEMPLATES = 256
+
+
+class CompiledTemplate:
+    """A template split into literal text and variable placeholders.
+
+    A strict template raises KeyError for a placeholder without a value,
+    like str.format; a lenient one keeps the placeholder text as is.
+    """
+
+    __slots__ = ("literals", "fields", "strict")
+
+    def __init__(self, literals: List[str], fields: List[str], strict: bool) -> None:
+        # literals[i] precedes fields[i]; the last literal follows the last field
+        self.literals = literals
+        self.fields = fields
+        self.strict = strict
+
+    @classmethod
+    def from_format_string(cls, source: str) -> "CompiledTemplate":
+        """Compile a str.format template ({name} fields, {{ and }} escapes).
+
+        Raises:
+            ValueError: If the template is malformed or uses format specs,
+                conversions or attribute access
+        """
+        literals, fields = [""], []
+        for literal, field, format_spec, conversion in Formatter().parse(source):
+            literals[-1] += literal
+            if field is None:
+                continue
+            if format_spec or conversion or not field.isidentifier():
+                raise ValueError(f"Unsupported template field: {{{field}}}")
+            fields.append(field)
+            literals.append("")
+        return cls(literals, fields, strict=True)
+
+    @classmethod
+    def from_placeholders(cls, source: str) -> "CompiledTemplate":
+        """Compile a template with {name} placeholders and literal braces elsewhere.
+
+        Placeholders without a value are rendered verbatim, so CSS blocks
+        and unknown placeholders pass through unchanged.
+        """
+        parts = PLACEHOLDER_PATTERN.split(source)
+        return cls(parts[0::2], parts[1::2], strict=False)
+
+    def substitute(
+        self, field: str, template: "CompiledTemplate"
+    ) -> "CompiledTemplate":
+        """Inline another template in place of every occurrence of field."""
+        literals, fields = [self.literals[0]], []
+        for name, literal in zip(self.fields, self.literals[1:]):
+            if name == field:
+                literals[-1] += template.literals[0]
+                fields.extend(template.fields)
+                literals.extend(template.literals[1:])
+                literals[-1] += literal
+            else:
+                fields.append(name)
+                literals.append(literal)
+        return CompiledTemplate(literals, fields, self.strict)
+
+    def render(self, variables: Mapping[str, Any]) -> str:
+        """Render with the given variables, HTML-escaping each value.
+
+        Raises:
+            KeyError: If a strict template misses a variable
+        """
+        # Each value is converted once, however often it is used
+        values = {name: html.escape(str(value)) for name, value in variables.items()}
+        parts = [self.literals[0]]
+        for field, literal in zip(self.fields, self.literals[1:]):
+            value = values.get(field)
+            if value is None:
+                if self.strict:
+                    raise KeyError(field)
+                value = f"{{{field}}}"
+            parts.append(value)
+            parts.append(literal)
+        return "".join(parts)
+
+
+class CompiledNotificationTemplate(NamedTuple):
+    """Compiled subject and HTML of a notification template."""
+
+    subject: CompiledTemplate
+    html: CompiledTemplate
+
+
+_compiled_templates: "OrderedDict[Tuple[UUID, Any], CompiledNotificationTemplate]" = (
+    OrderedDict()
+)
+_compiled_templates_lock = Lock()
+
+
+def get_compiled_notification_template(
+    template: NotificationTemplate,
+) -> CompiledNotificationTemplate:
+    """Compiled form of a database template, compiled once per updated_at."""
+    key = (template.id, template.updated_at)
+    with _compiled_templates_lock:
+        compiled: Optional[CompiledNotificationTemplate] = _compiled_templates.get(key)
+        if compiled is not None:
+            _compiled_templates.move_to_end(key)
+            return compiled
+
+    compiled = CompiledNotificationTemplate(
+        subject=CompiledTemplate.from_placeholders(template.subject),
+        html=CompiledTemplate.from_placeholders(template.html_content),
+    )
+    with _compiled_templates_lock:
+        _compiled_templates[key] = compiled
+        while len(_compiled_templates) > MAX_COMPILED_TEMPLATES:
+            _compiled_templates.popitem(last=False)
+    return compiled
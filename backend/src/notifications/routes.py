@@ -6,11 +6,12 @@ import logging
 from typing import List, Optional
 from uuid import UUID
 
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Response, status
 from pydantic import BaseModel
 from src.auth.middleware import get_authenticated_user
 from src.auth.models import UserProfile
 
+from shared.common.pagination import NEXT_CURSOR_HEADER
 from shared.config import settings
 
 from .models import (
@@ -23,6 +24,8 @@ from .models import (
     NotificationTemplate,
     NotificationTemplateCreate,
     NotificationTemplateUpdate,
+    SendNotificationBatchRequest,
+    SendNotificationBatchResponse,
     SendNotificationRequest,
     SendNotificationResponse,
 )
@@ -39,6 +42,42 @@ router = APIRouter(prefix="/api/v1/notifications", tags=["notifications"])
 # ============================================================================
 
 
+@router.post(
+    "/batch",
+    response_model=SendNotificationBatchResponse,
+    status_code=status.HTTP_202_ACCEPTED,
+)
+async def send_notifications_batch(
+    request: SendNotificationBatchRequest,
+    user_auth: tuple[UUID, UserProfile] = Depends(get_authenticated_user),
+):
+    """
+    Queue a notification for many recipients, e.g. organization-wide notices.
+    Requires platform_admin role, since the caller picks the recipients,
+    template and template variables (including URLs).
+    Returns one result per recipient.
+    """
+    try:
+        user_id, user_profile = user_auth
+
+        # Check if user has platform_admin role
+        if not user_profile.has_role("platform_admin"):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Only platform administrators can send batch notifications",
+            )
+
+        return await notification_service.send_notifications_batch(request)
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Error sending batch notification: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Failed to send batch notification: {str(e)}",
+        )
+
+
 # ============================================================================
 # ADMIN ROUTES - Notification Events Management
 # ============================================================================
@@ -350,16 +389,21 @@ async def delete_notification_template(
 
 @router.get("/logs", response_model=List[NotificationLog])
 async def get_notification_logs(
+    response: Response,
     organization_id: Optional[UUID] = None,
     user_id: Optional[UUID] = None,
     status_filter: Optional[str] = None,
-    limit: int = 100,
+    limit: int = Query(100, ge=1, le=500),
+    cursor: Optional[str] = None,
     user_auth: tuple[UUID, UserProfile] = Depends(get_authenticated_user),
 ):
     """
     Get notification logs with optional filters.
     Users can see their own logs or their organization's logs.
     Platform admins can see all logs.
+
+    Logs are returned newest first. When more logs exist, the X-Next-Cursor
+    response header holds the cursor to pass for the next page.
     """
     current_user_id, user_profile = user_auth
 
@@ -399,9 +443,20 @@ async def get_notification_logs(
         elif not user_id and not organization_id:
             user_id = current_user_id
 
-    return await notification_service.get_notification_logs(
-        organization_id=organization_id, user_id=user_id, status=status, limit=limit
-    )
+    try:
+        page = await notification_service.get_notification_logs_page(
+            organization_id=organization_id,
+            user_id=user_id,
+            status=status,
+            limit=limit,
+            cursor=cursor,
+        )
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+    if page.next_cursor:
+        response.headers[NEXT_CURSOR_HEADER] = page.next_cursor
+    return page.items
 
 
 @router.get("/stats", response_model=NotificationStats)
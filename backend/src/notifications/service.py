@@ -2,29 +2,36 @@
 Notification service for sending and managing email notifications.
 """
 
-import html
+import asyncio
 import logging
 from datetime import datetime, timezone
-from typing import Any, Dict, List, Optional
-from uuid import UUID
+from typing import Any, Dict, List, Optional, Tuple
+from uuid import UUID, uuid4
 
 import resend
 from src.notifications.models import (
+    NotificationBatchResult,
     NotificationEvent,
     NotificationEventCreate,
     NotificationEventUpdate,
     NotificationLog,
     NotificationLogCreate,
+    NotificationOutboxMessage,
     NotificationStats,
     NotificationStatus,
     NotificationTemplate,
     NotificationTemplateCreate,
     NotificationTemplateUpdate,
+    SendNotificationBatchRequest,
+    SendNotificationBatchResponse,
     SendNotificationRequest,
     SendNotificationResponse,
 )
-from src.notifications.templates import TEMPLATE_REGISTRY, get_template_html
+from src.notifications.rendering import get_compiled_notification_template
+from src.notifications.templates import TEMPLATE_REGISTRY, get_compiled_template
+from src.notifications.transport import MAX_BATCH_SIZE
 
+from shared.common.pagination import CursorPage, keyset_page, keyset_query
 from shared.config import settings, supabase_config
 
 logger = logging.getLogger(__name__)
@@ -115,24 +122,6 @@ def validate_builtin_template_variables(
     return validate_template_variables(required_variables, template_variables)
 
 
-def sanitize_template_variables(template_variables: Dict[str, Any]) -> Dict[str, Any]:
-    """
-    Sanitize template variables to prevent XSS and other injection attacks.
-
-    Args:
-        template_variables: The variables to sanitize
-
-    Returns:
-        Sanitized variables
-    """
-    sanitized = {}
-    for key, value in template_variables.items():
-        # Convert to string and sanitize HTML
-        str_value = str(value)
-        sanitized[key] = html.escape(str_value)
-    return sanitized
-
-
 class NotificationService:
     """Service for managing notifications."""
 
@@ -397,7 +386,12 @@ class NotificationService:
     async def send_notification(
         self, request: SendNotificationRequest
     ) -> SendNotificationResponse:
-        """Send a notification email."""
+        """Render a notification email and queue it for sending.
+
+        The email is stored in the outbox together with its pending log and
+        sent by the outbox worker pool (see outbox.py), so callers do not
+        wait on the email provider. The log is updated once it is sent.
+        """
         try:
             # Get the notification event
             event = await self.get_notification_event_by_key(request.event_key)
@@ -423,21 +417,16 @@ class NotificationService:
                 # Use custom template from database
                 template = await self.get_notification_template(template_id)
                 if template and template.is_active:
-                    html_content = template.html_content
-                    subject = template.subject
                     # Validate that all required variables for this template are present
                     template_required_vars = template.template_variables or []
                     validated_db_vars = validate_template_variables(
                         template_required_vars, request.template_variables
                     )
 
-                    # Sanitize the validated variables for database templates
-                    sanitized_db_vars = sanitize_template_variables(validated_db_vars)
-
-                    # Replace variables in subject and content with sanitized validated values
-                    for key, value in sanitized_db_vars.items():
-                        html_content = html_content.replace(f"{{{key}}}", value)
-                        subject = subject.replace(f"{{{key}}}", value)
+                    # Render the compiled template; values are HTML-escaped
+                    compiled = get_compiled_notification_template(template)
+                    subject = compiled.subject.render(validated_db_vars)
+                    html_content = compiled.html.render(validated_db_vars)
 
             # Fallback to built-in template
             if not html_content and request.event_key in TEMPLATE_REGISTRY:
@@ -446,18 +435,10 @@ class NotificationService:
                     request.event_key, request.template_variables
                 )
 
-                # Sanitize the validated variables (with defaults applied) for built-in templates
-                sanitized_builtin_vars = sanitize_template_variables(
-                    validated_builtin_vars
-                )
-
-                # Use sanitized validated variables (with defaults applied) for built-in template
-                template_data = TEMPLATE_REGISTRY[request.event_key]
-                subject = template_data["subject"].format(**sanitized_builtin_vars)
-                # Use sanitized validated variables (with defaults applied) for built-in template
-                html_content = get_template_html(
-                    request.event_key, sanitized_builtin_vars
-                )
+                # Render the compiled built-in template; values are HTML-escaped
+                compiled = get_compiled_template(request.event_key)
+                subject = compiled.subject.render(validated_builtin_vars)
+                html_content = compiled.html.render(validated_builtin_vars)
 
             if not html_content:
                 raise ValueError(f"No template found for event: {request.event_key}")
@@ -486,89 +467,239 @@ class NotificationService:
                 status=NotificationStatus.PENDING,
                 metadata=request.template_variables,
             )
+            notification_log_id = uuid4()
+            message = {
+                "from": f"{from_name} <{from_email}>",
+                "to": [request.recipient_email],
+                "subject": subject,
+                "html": html_content,
+            }
 
-            log_response = (
-                self.supabase.table("notification_logs")
-                .insert(
-                    {
-                        "notification_event_id": str(log_data.notification_event_id),
-                        "notification_template_id": (
-                            str(log_data.notification_template_id)
-                            if log_data.notification_template_id
-                            else None
-                        ),
-                        "organization_id": (
-                            str(log_data.organization_id)
-                            if log_data.organization_id
-                            else None
-                        ),
-                        "user_id": str(log_data.user_id) if log_data.user_id else None,
-                        "recipient_email": log_data.recipient_email,
-                        "recipient_name": log_data.recipient_name,
-                        "subject": log_data.subject,
-                        "status": log_data.status.value,
-                        "provider": log_data.provider.value,
-                        "metadata": log_data.metadata,
-                    }
-                )
-                .execute()
-            )
+            # Queue the email; the outbox worker pool sends it
+            await self.enqueue_notifications([(notification_log_id, log_data, message)])
 
-            notification_log_id = UUID(log_response.data[0]["id"])
+            logger.info(
+                f"Notification queued: {request.event_key} to {request.recipient_email}"
+            )
 
-            # Send email via Resend
-            try:
-                params = {
-                    "from": f"{from_name} <{from_email}>",
-                    "to": [request.recipient_email],
-                    "subject": subject,
-                    "html": html_content,
-                }
+            return SendNotificationResponse(
+                success=True,
+                notification_log_id=notification_log_id,
+                status=NotificationStatus.PENDING,
+                message="Notification queued for sending",
+            )
 
-                email_response = resend.Emails.send(params)
+        except Exception as e:
+            logger.error(f"Error in send_notification: {e}")
+            raise
 
-                # Update log with success
-                self.supabase.table("notification_logs").update(
-                    {
-                        "status": NotificationStatus.SENT.value,
-                        "provider_message_id": email_response.get("id"),
-                        "sent_at": datetime.now(timezone.utc).isoformat(),
-                    }
-                ).eq("id", str(notification_log_id)).execute()
+    async def send_notifications_batch(
+        self, request: SendNotificationBatchRequest
+    ) -> SendNotificationBatchResponse:
+        """Render a notification for every recipient and queue the emails at once.
+
+        The event and template are looked up once, and all logs and emails
+        are written with one enqueue. The outbox sends them in chunks of
+        MAX_BATCH_SIZE, one Resend batch request per chunk. A recipient
+        missing template variables is reported as failed; the others are
+        still queued.
+        """
+        try:
+            # Get the notification event
+            event = await self.get_notification_event_by_key(request.event_key)
+            if not event:
+                raise ValueError(f"Notification event not found: {request.event_key}")
 
-                logger.info(
-                    f"Notification sent successfully: {request.event_key} to {request.recipient_email}"
+            # Check if event is enabled
+            if not event.is_enabled:
+                logger.info(f"Notification event is disabled: {request.event_key}")
+                return SendNotificationBatchResponse(
+                    queued=0,
+                    failed=len(request.recipients),
+                    results=[
+                        NotificationBatchResult(
+                            recipient_email=recipient.recipient_email,
+                            success=False,
+                            status=NotificationStatus.FAILED,
+                            message="Notification event is disabled",
+                        )
+                        for recipient in request.recipients
+                    ],
                 )
 
-                return SendNotificationResponse(
-                    success=True,
-                    notification_log_id=notification_log_id,
-                    status=NotificationStatus.SENT,
-                    message="Notification sent successfully",
-                )
+            template_id = request.template_id or event.default_template_id
+            template = None
+            compiled = None
+            required_variables: List[str] = []
 
-            except Exception as send_error:
-                # Update log with failure
-                self.supabase.table("notification_logs").update(
-                    {
-                        "status": NotificationStatus.FAILED.value,
-                        "error_message": str(send_error),
-                    }
-                ).eq("id", str(notification_log_id)).execute()
+            if template_id:
+                # Use custom template from database
+                template = await self.get_notification_template(template_id)
+                if template and template.is_active:
+                    compiled = get_compiled_notification_template(template)
+                    required_variables = template.template_variables or []
 
-                logger.error(f"Error sending notification via Resend: {send_error}")
+            # Fallback to built-in template
+            if compiled is None and request.event_key in TEMPLATE_REGISTRY:
+                compiled = get_compiled_template(request.event_key)
+                required_variables = TEMPLATE_REGISTRY[request.event_key]["variables"]
 
-                return SendNotificationResponse(
-                    success=False,
-                    notification_log_id=notification_log_id,
-                    status=NotificationStatus.FAILED,
-                    message=f"Failed to send notification: {str(send_error)}",
+            if compiled is None:
+                raise ValueError(f"No template found for event: {request.event_key}")
+
+            # Prepare sender details
+            from_email = (
+                template.from_email
+                if template and template.from_email
+                else self.from_email
+            )
+            from_name = (
+                template.from_name
+                if template and template.from_name
+                else self.from_name
+            )
+
+            notifications = []
+            results = []
+            for recipient in request.recipients:
+                # Recipient variables take precedence over shared ones
+                template_variables = {
+                    **(request.template_variables or {}),
+                    **(recipient.template_variables or {}),
+                }
+                try:
+                    validated_vars = validate_template_variables(
+                        required_variables, template_variables
+                    )
+                except ValueError as e:
+                    results.append(
+                        NotificationBatchResult(
+                            recipient_email=recipient.recipient_email,
+                            success=False,
+                            status=NotificationStatus.FAILED,
+                            message=str(e),
+                        )
+                    )
+                    continue
+
+                # Render the compiled template; values are HTML-escaped
+                subject = compiled.subject.render(validated_vars)
+                log_data = NotificationLogCreate(
+                    notification_event_id=event.id,
+                    notification_template_id=template_id,
+                    organization_id=request.organization_id,
+                    user_id=recipient.user_id,
+                    recipient_email=recipient.recipient_email,
+                    recipient_name=recipient.recipient_name,
+                    subject=subject,
+                    status=NotificationStatus.PENDING,
+                    metadata=template_variables,
                 )
+                notification_log_id = uuid4()
+                message = {
+                    "from": f"{from_name} <{from_email}>",
+                    "to": [recipient.recipient_email],
+                    "subject": subject,
+                    "html": compiled.html.render(validated_vars),
+                }
+                notifications.append((notification_log_id, log_data, message))
+                results.append(
+                    NotificationBatchResult(
+                        recipient_email=recipient.recipient_email,
+                        success=True,
+                        notification_log_id=notification_log_id,
+                        status=NotificationStatus.PENDING,
+                        message="Notification queued for sending",
+                    )
+                )
+
+            if notifications:
+                # Queue the emails; the outbox worker pool sends them in batches
+                await self.enqueue_notifications(
+                    notifications, batch_size=MAX_BATCH_SIZE
+                )
+
+            logger.info(
+                f"Notifications queued: {request.event_key} to {len(notifications)} "
+                f"of {len(request.recipients)} recipient(s)"
+            )
+
+            return SendNotificationBatchResponse(
+                queued=len(notifications),
+                failed=len(results) - len(notifications),
+                results=results,
+            )
 
         except Exception as e:
-            logger.error(f"Error in send_notification: {e}")
+            logger.error(f"Error in send_notifications_batch: {e}")
             raise
 
+    # Notification Outbox
+
+    async def enqueue_notifications(
+        self,
+        notifications: List[Tuple[UUID, NotificationLogCreate, Dict[str, Any]]],
+        batch_size: Optional[int] = None,
+    ) -> None:
+        """Store pending notification logs and their emails in the outbox.
+
+        Logs and outbox rows are written in one transaction, and the outbox
+        worker pool is woken to send them.
+
+        Args:
+            notifications: (log id, log, Resend message) per email
+            batch_size: If set, emails are grouped into batches of this size,
+                each sent with one provider request; otherwise every email
+                is sent on its own
+        """
+        logs = [
+            {"id": str(log_id), **log.model_dump(mode="json")}
+            for log_id, log, _ in notifications
+        ]
+        messages = [
+            {"notification_log_id": str(log_id), "message": message}
+            for log_id, _, message in notifications
+        ]
+        if batch_size:
+            batch_id = uuid4()
+            for i, message in enumerate(messages):
+                message["batch_key"] = f"{batch_id}:{i // batch_size}"
+        await asyncio.to_thread(
+            self.supabase.rpc(
+                "enqueue_notifications", {"p_logs": logs, "p_messages": messages}
+            ).execute
+        )
+
+        from src.notifications.outbox import wake_notification_outbox
+
+        wake_notification_outbox()
+
+    async def claim_outbox_messages(
+        self, limit: int, lease_seconds: int
+    ) -> List[NotificationOutboxMessage]:
+        """Lease up to limit due outbox emails for sending."""
+        response = await asyncio.to_thread(
+            self.supabase.rpc(
+                "claim_notification_outbox",
+                {"p_limit": limit, "p_lease_seconds": lease_seconds},
+            ).execute
+        )
+        return [NotificationOutboxMessage(**row) for row in response.data or []]
+
+    async def finish_outbox_messages(self, results: List[Dict[str, Any]]) -> None:
+        """Record a batch of send outcomes in the outbox and notification logs.
+
+        Args:
+            results: One dict per attempt with the outbox id, attempts, status
+                (sent, failed or retry), provider_message_id, error and, for
+                retries, next_attempt_at
+        """
+        await asyncio.to_thread(
+            self.supabase.rpc(
+                "finish_notification_outbox", {"p_results": results}
+            ).execute
+        )
+
     # Notification Logs
 
     async def get_notification_logs(
@@ -578,22 +709,45 @@ class NotificationService:
         status: Optional[NotificationStatus] = None,
         limit: int = 100,
     ) -> List[NotificationLog]:
-        """Get notification logs with optional filters."""
-        try:
-            query = self.supabase.table("notification_logs").select("*")
+        """Get the most recent notification logs with optional filters."""
+        page = await self.get_notification_logs_page(
+            organization_id=organization_id, user_id=user_id, status=status, limit=limit
+        )
+        return page.items
 
-            if organization_id:
-                query = query.eq("organization_id", str(organization_id))
-            if user_id:
-                query = query.eq("user_id", str(user_id))
-            if status:
-                query = query.eq("status", status.value)
+    async def get_notification_logs_page(
+        self,
+        organization_id: Optional[UUID] = None,
+        user_id: Optional[UUID] = None,
+        status: Optional[NotificationStatus] = None,
+        limit: int = 100,
+        cursor: Optional[str] = None,
+    ) -> CursorPage[NotificationLog]:
+        """Get a page of notification logs, newest first, with optional filters.
+
+        Raises:
+            ValueError: If the cursor is invalid
+        """
+        query = self.supabase.table("notification_logs").select("*")
+
+        if organization_id:
+            query = query.eq("organization_id", str(organization_id))
+        if user_id:
+            query = query.eq("user_id", str(user_id))
+        if status:
+            query = query.eq("status", status.value)
+        query = keyset_query(query, limit, cursor)
 
-            response = query.order("created_at", desc=True).limit(limit).execute()
-            return [NotificationLog(**item) for item in response.data]
+        try:
+            response = query.execute()
+            rows, next_cursor = keyset_page(response.data, limit)
+            return CursorPage[NotificationLog](
+                items=[NotificationLog(**item) for item in rows],
+                next_cursor=next_cursor,
+            )
         except Exception as e:
             logger.error(f"Error fetching notification logs: {e}")
-            return []
+            return CursorPage[NotificationLog](items=[])
 
     async def get_notification_stats(
         self, organization_id: Optional[UUID] = None
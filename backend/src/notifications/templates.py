@@ -2,6 +2,10 @@
 Email template definitions with beautiful HTML layouts.
 """
 
+from functools import lru_cache
+
+from src.notifications.rendering import CompiledNotificationTemplate, CompiledTemplate
+
 # Base HTML template with modern styling
 BASE_TEMPLATE = """
 <!DOCTYPE html>
@@ -424,32 +428,29 @@ TEMPLATE_REGISTRY = {
 }
 
 
-def get_template_html(event_key: str, variables: dict) -> str:
+@lru_cache(maxsize=None)
+def get_compiled_template(event_key: str) -> CompiledNotificationTemplate:
     """
-    Get rendered HTML for a template.
+    Get the compiled subject and HTML of a built-in template.
+
+    The event's content is inlined into BASE_TEMPLATE once, so rendering an
+    email is a single pass over pre-split segments.
 
     Args:
         event_key: The event key for the template
-        variables: Variables to inject into the template (should already include defaults)
 
     Returns:
-        Rendered HTML string
+        Compiled subject and full HTML
     """
     template_data = TEMPLATE_REGISTRY.get(event_key)
     if not template_data:
         raise ValueError(f"Template not found for event_key: {event_key}")
 
-    # Render content
-    content = template_data["html_content"].format(**variables)
-
-    # Prepare subject with variables
-    subject = template_data["subject"].format(**variables)
-
-    # Prepare variables for base template, ensuring required variables are present
-    # These should already be included via validate_template_variables in the service
-    base_template_vars = {"subject": subject, "content": content, **variables}
-
-    # Wrap in base template
-    html = BASE_TEMPLATE.format(**base_template_vars)
-
-    return html
+    subject = CompiledTemplate.from_format_string(template_data["subject"])
+    content = CompiledTemplate.from_format_string(template_data["html_content"])
+    html = (
+        CompiledTemplate.from_format_string(BASE_TEMPLATE)
+        .substitute("content", content)
+        .substitute("subject", subject)
+    )
+    return CompiledNotificationTemplate(subject=subject, html=html)
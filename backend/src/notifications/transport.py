@@ -0,0 +1,97 @@
+"""
+Email transports used by the notification outbox.
+
+ResendTransport delivers through the Resend API, one email at a time or
+up to MAX_BATCH_SIZE emails per batch request. The resend SDK is
+synchronous, so every call runs in a bounded thread pool instead of
+blocking the event loop. Tests and benchmarks substitute an in-memory
+transport with the same interface.
+"""
+
+import asyncio
+import functools
+import logging
+from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+
+import resend
+from resend.exceptions import MissingRequiredFieldsError, ValidationError
+
+logger = logging.getLogger(__name__)
+
+# Emails Resend accepts in one batch request
+MAX_BATCH_SIZE = 100
+
+
+class PermanentSendError(Exception):
+    """The provider rejected an email; sending it again cannot succeed."""
+
+
+class EmailTransport(ABC):
+    """Sends email messages."""
+
+    @abstractmethod
+    async def send(self, message: Dict[str, Any], idempotency_key: str) -> str:
+        """Send a message and return the provider's message id.
+
+        Sending again with the same idempotency_key must not deliver the
+        email twice.
+
+        Raises:
+            PermanentSendError: If the provider rejected the message
+            Exception: Any other error is treated as transient and retried
+        """
+
+    @abstractmethod
+    async def send_batch(
+        self, messages: List[Dict[str, Any]], idempotency_key: str
+    ) -> List[str]:
+        """Send up to MAX_BATCH_SIZE messages in one request.
+
+        Either all messages are sent or none is. Sending the same messages
+        again with the same idempotency_key must not deliver them twice.
+
+        Returns:
+            The provider's message ids, in the order of messages
+
+        Raises:
+            PermanentSendError: If the provider rejected any of the messages
+            Exception: Any other error is treated as transient and retried
+        """
+
+
+class ResendTransport(EmailTransport):
+    """Sends emails through the Resend API."""
+
+    def __init__(self, max_concurrent_requests: int) -> None:
+        self._executor = ThreadPoolExecutor(
+            max_workers=max_concurrent_requests, thread_name_prefix="resend"
+        )
+
+    async def send(self, message: Dict[str, Any], idempotency_key: str) -> str:
+        call = functools.partial(
+            resend.Emails.send, message, {"idempotency_key": idempotency_key}
+        )
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                self._executor, call
+            )
+        except (ValidationError, MissingRequiredFieldsError) as e:
+            raise PermanentSendError(str(e)) from e
+        return response["id"]
+
+    async def send_batch(
+        self, messages: List[Dict[str, Any]], idempotency_key: str
+    ) -> List[str]:
+        # Strict validation (the default) sends all messages or none
+        call = functools.partial(
+            resend.Batch.send, messages, {"idempotency_key": idempotency_key}
+        )
+        try:
+            response = await asyncio.get_running_loop().run_in_executor(
+                self._executor, call
+            )
+        except (ValidationError, MissingRequiredFieldsError) as e:
+            raise PermanentSendError(str(e)) from e
+        return [email["id"] for email in response["data"]]
@@ -1,25 +1,40 @@
 """Token Refresh Service
 
 This service automatically refreshes OAuth tokens before they expire.
-It runs as a background task using APScheduler.
-
-TODO: Future Enhancement
-------------------------
-When scaling to multiple backend instances, this approach will cause race conditions
-as each instance will attempt to refresh tokens independently. Migrate to Celery + Redis
-for distributed task queue with proper locking.
-
-Current approach works for single-instance deployments.
+It runs as a background asyncio task that sleeps until the earliest token
+in an expiry-ordered schedule needs refreshing.
+
+Multiple backend instances:
+Every instance runs the refresh loop. Before refreshing an agent tool, an
+instance takes a per-tool lease in Postgres (acquire_agent_tool_refresh_lease)
+and writes the new tokens fenced by the lease's fencing token, so only one
+instance refreshes a tool at a time and a holder whose lease expired cannot
+overwrite newer tokens.
+
+Concurrent refreshes of one tool:
+The background sweep and manual refreshes (POST /tools/agent/{id}/refresh)
+go through a single-flight keyed by agent_tool_id, so concurrent requests
+in one process share a single in-flight refresh. A manual refresh that
+finds the lease held by another instance waits for that instance's refresh
+and shares its result instead of refreshing again, which with providers
+that rotate refresh tokens would invalidate the winner's token.
 """
 
 import asyncio
+import heapq
 import logging
+import os
+import socket
+import time
 from datetime import datetime, timezone, timedelta
-from typing import Dict, List, Optional
-from uuid import UUID
+from enum import Enum
+from typing import Awaitable, Dict, List, Optional
+from uuid import UUID, uuid4
 
 import httpx
+from opentelemetry import metrics
 
+from shared.common.single_flight import SingleFlight
 from shared.voice_agents.tool_service import ToolService
 from shared.voice_agents.tool_models import AgentTool
 from shared.voice_agents.tools.base.oauth_provider_utils import (
@@ -29,11 +44,115 @@ from shared.config import settings
 
 logger = logging.getLogger(__name__)
 
+# Get meter for this module
+meter = metrics.get_meter(__name__)
+
+# Create metrics
+token_refresh_sweep_duration = meter.create_histogram(
+    "token_refresh.sweep.duration",
+    unit="s",
+    description="Duration of token refresh sweeps",
+)
+
+token_refresh_success_counter = meter.create_counter(
+    "token_refresh.success", description="Number of successful token refreshes"
+)
+
+token_refresh_failure_counter = meter.create_counter(
+    "token_refresh.failures", description="Number of failed token refreshes"
+)
+
+# Timeout for OAuth token endpoint requests
+TOKEN_REQUEST_TIMEOUT_SECONDS = 30.0
+
+# How often to check whether another instance finished a refresh
+LEASE_POLL_INTERVAL_SECONDS = 1.0
+
+
+class RefreshOutcome(str, Enum):
+    """Result of checking one agent tool's tokens."""
+
+    REFRESHED = "refreshed"  # Refreshed here or by another instance
+    SKIPPED = "skipped"  # Nothing to do: not due, expired, or leased elsewhere
+    FAILED = "failed"  # A refresh was due but could not be done
+
+
+class ProviderRateLimiter:
+    """Spaces out requests to one OAuth provider to a maximum rate.
+
+    Each caller reserves the next free slot and sleeps until it; a rate of 0
+    disables limiting. No lock is needed since reservation never awaits.
+    """
+
+    def __init__(self, rate_per_second: float) -> None:
+        self.interval = 1.0 / rate_per_second if rate_per_second > 0 else 0.0
+        self._next_slot = 0.0
+
+    async def acquire(self) -> None:
+        if not self.interval:
+            return
+        now = time.monotonic()
+        slot = max(now, self._next_slot)
+        self._next_slot = slot + self.interval
+        if slot > now:
+            await asyncio.sleep(slot - now)
+
+
+class RefreshSchedule:
+    """Min-heap of agent tools keyed by the time their token should be refreshed.
+
+    Rescheduling or removing a tool does not touch the heap: the latest
+    deadline per tool is kept in a dict and stale heap entries are skipped
+    when popped (lazy deletion).
+    """
+
+    def __init__(self) -> None:
+        self._heap: List[tuple[float, str]] = []
+        self._deadlines: Dict[str, float] = {}
+
+    def schedule(self, agent_tool_id: str, refresh_at: float) -> None:
+        """Schedule (or reschedule) a tool for refresh at a UNIX timestamp."""
+        self._deadlines[agent_tool_id] = refresh_at
+        heapq.heappush(self._heap, (refresh_at, agent_tool_id))
+
+    def remove(self, agent_tool_id: str) -> None:
+        """Stop tracking a tool, e.g. after its tokens were cleared."""
+        self._deadlines.pop(agent_tool_id, None)
+
+    def deadline(self, agent_tool_id: str) -> Optional[float]:
+        return self._deadlines.get(agent_tool_id)
+
+    def next_deadline(self) -> Optional[float]:
+        """Earliest pending refresh time, or None if nothing is scheduled."""
+        while self._heap:
+            refresh_at, agent_tool_id = self._heap[0]
+            if self._deadlines.get(agent_tool_id) == refresh_at:
+                return refresh_at
+            heapq.heappop(self._heap)
+        return None
+
+    def pop_due(self, now: float) -> Dict[str, float]:
+        """Remove and return every tool whose refresh time has passed."""
+        due = {}
+        while True:
+            refresh_at = self.next_deadline()
+            if refresh_at is None or refresh_at > now:
+                return due
+            _, agent_tool_id = heapq.heappop(self._heap)
+            due[agent_tool_id] = self._deadlines.pop(agent_tool_id)
+
+    def clear(self) -> None:
+        self._heap.clear()
+        self._deadlines.clear()
+
+    def __len__(self) -> int:
+        return len(self._deadlines)
+
 
 class TokenRefreshService:
     """Service for automatically refreshing OAuth tokens before they expire.
 
-    This service runs as a background task using APScheduler to check and
+    This service runs as a background asyncio task to check and
     refresh OAuth tokens that are approaching expiration. It ensures that users
     don't experience authentication failures during their sessions.
 
@@ -46,12 +165,15 @@ class TokenRefreshService:
 
     Configuration:
         Refresh timing is configurable via environment variables:
-        - TOKEN_REFRESH_CHECK_INTERVAL_MINUTES: How often to check for expiring tokens (default: 5)
         - TOKEN_REFRESH_EXPIRY_WINDOW_MINUTES: Refresh tokens expiring within this window (default: 15)
+        - TOKEN_REFRESH_CHECK_INTERVAL_MINUTES: Retry delay after a failed refresh
+          (default: 5)
+        - TOKEN_REFRESH_RESYNC_INTERVAL_MINUTES: How often to reload the schedule
+          (default: 60)
 
     Key Features:
-        - Runs every TOKEN_REFRESH_CHECK_INTERVAL_MINUTES as a background task
-        - Checks all tools with OAuth authentication
+        - Keeps a min-heap of refresh deadlines and sleeps until the earliest one
+        - Reschedules tools as soon as their tokens are saved or refreshed
         - Refreshes tokens expiring within TOKEN_REFRESH_EXPIRY_WINDOW_MINUTES
         - Works with any OAuth 2.0 provider (provider-agnostic)
         - Updates database with new encrypted tokens
@@ -89,6 +211,14 @@ class TokenRefreshService:
         self.tool_service = tool_service
         self.running = False
         self.task: Optional[asyncio.Task] = None
+        self.schedule = RefreshSchedule()
+        self._wakeup = asyncio.Event()
+        self._last_resync: Optional[float] = None
+        self._http_clients: Dict[str, httpx.AsyncClient] = {}
+        self._rate_limiters: Dict[str, ProviderRateLimiter] = {}
+        self._refreshes: SingleFlight[bool] = SingleFlight()
+        # Identifies this instance as a refresh lease holder
+        self.lease_holder = f"{socket.gethostname()}:{os.getpid()}:{uuid4().hex[:8]}"
 
     async def start(self) -> None:
         """Start the background token refresh task."""
@@ -97,6 +227,7 @@ class TokenRefreshService:
             return
 
         self.running = True
+        self.tool_service.add_token_listener(self.on_token_saved)
         self.task = asyncio.create_task(self._refresh_loop())
         logger.info("Token refresh service started")
 
@@ -106,34 +237,145 @@ class TokenRefreshService:
             return
 
         self.running = False
+        self.tool_service.remove_token_listener(self.on_token_saved)
         if self.task:
             self.task.cancel()
             try:
                 await self.task
             except asyncio.CancelledError:
                 pass
+        await self._close_http_clients()
         logger.info("Token refresh service stopped")
 
+    def _get_http_client(self, token_url: str) -> httpx.AsyncClient:
+        """Get the pooled HTTP client for a token endpoint, creating it once."""
+        client = self._http_clients.get(token_url)
+        if client is None:
+            concurrency = settings.token_refresh_concurrency
+            client = httpx.AsyncClient(
+                timeout=TOKEN_REQUEST_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=concurrency,
+                    max_keepalive_connections=concurrency,
+                ),
+            )
+            self._http_clients[token_url] = client
+        return client
+
+    async def _close_http_clients(self) -> None:
+        clients, self._http_clients = self._http_clients, {}
+        for client in clients.values():
+            try:
+                await client.aclose()
+            except Exception as e:
+                logger.warning(f"Error closing token endpoint client: {e}")
+
+    def _get_rate_limiter(self, provider: str) -> ProviderRateLimiter:
+        """Get the rate limiter for an OAuth provider, creating it once."""
+        limiter = self._rate_limiters.get(provider)
+        if limiter is None:
+            rate = settings.token_refresh_provider_rate_limits.get(
+                provider, settings.token_refresh_rate_limit_per_second
+            )
+            limiter = ProviderRateLimiter(rate)
+            self._rate_limiters[provider] = limiter
+        return limiter
+
+    def on_token_saved(
+        self, agent_tool_id: str, token_expires_at: Optional[str]
+    ) -> None:
+        """Update the schedule when a tool's tokens are saved or refreshed.
+
+        Registered as a ToolService token listener, so OAuth callbacks,
+        manual updates and this service's own refreshes all reschedule the
+        tool and wake the loop if its deadline is now the earliest.
+        """
+        if not token_expires_at:
+            self.schedule.remove(str(agent_tool_id))
+            return
+
+        expires_at = datetime.fromisoformat(token_expires_at).timestamp()
+        self._schedule_expiry(str(agent_tool_id), expires_at)
+        self._wakeup.set()
+
+    def _schedule_expiry(self, agent_tool_id: str, expires_at: float) -> None:
+        """Schedule a refresh one expiry window before the token expires."""
+        if expires_at <= time.time():
+            # Already expired: the user has to re-authenticate
+            self.schedule.remove(agent_tool_id)
+            return
+        window = settings.token_refresh_expiry_window_minutes * 60
+        self.schedule.schedule(agent_tool_id, expires_at - window)
+
+    async def _load_schedule(self) -> None:
+        """Rebuild the schedule from the plaintext token_expires_at column."""
+        schedule = RefreshSchedule()
+        self.schedule, previous = schedule, self.schedule
+        try:
+            async for page in self.tool_service.iter_token_expiries():
+                for agent_tool_id, expires_at in page:
+                    self._schedule_expiry(str(agent_tool_id), expires_at.timestamp())
+        except Exception:
+            # Keep refreshing what we already knew about
+            self.schedule = previous
+            raise
+        self._last_resync = time.monotonic()
+        logger.info(f"Token refresh schedule loaded with {len(self.schedule)} tool(s)")
+
+    def _resync_due(self) -> bool:
+        if self._last_resync is None:
+            return True
+        resync_interval = settings.token_refresh_resync_interval_minutes * 60
+        return time.monotonic() - self._last_resync >= resync_interval
+
+    def _seconds_until_wakeup(self) -> float:
+        """Seconds until the earliest refresh deadline or the next resync."""
+        resync_interval = settings.token_refresh_resync_interval_minutes * 60
+        until_resync = resync_interval - (time.monotonic() - self._last_resync)
+
+        next_deadline = self.schedule.next_deadline()
+        if next_deadline is None:
+            return max(until_resync, 0)
+        return max(min(next_deadline - time.time(), until_resync), 0)
+
     async def _refresh_loop(self) -> None:
-        """Main loop that checks and refreshes tokens periodically.
+        """Main loop that sleeps until the earliest token refresh deadline.
+
+        Each tool is scheduled for one expiry window before its token
+        expires, so the loop only wakes when a refresh is actually due, when
+        tokens are saved (on_token_saved), or to resync the schedule with the
+        database (picking up tokens saved by other instances).
 
-        Check interval and expiry window are configurable via environment variables:
-        - TOKEN_REFRESH_CHECK_INTERVAL_MINUTES (default: 5)
+        Timing is configurable via environment variables:
         - TOKEN_REFRESH_EXPIRY_WINDOW_MINUTES (default: 15)
+        - TOKEN_REFRESH_CHECK_INTERVAL_MINUTES: retry delay after a failed refresh
+          (default: 5)
+        - TOKEN_REFRESH_RESYNC_INTERVAL_MINUTES (default: 60)
         """
-        check_interval = settings.token_refresh_check_interval_minutes
         expiry_window = settings.token_refresh_expiry_window_minutes
-
         logger.info(
-            f"Token refresh loop: checking every {check_interval} minutes, "
-            f"refreshing tokens expiring within {expiry_window} minutes"
+            f"Token refresh loop: refreshing tokens {expiry_window} minutes "
+            "before expiry"
         )
 
         while self.running:
             try:
-                await self._refresh_expired_tokens()
-                # Check at configured interval
-                await asyncio.sleep(check_interval * 60)
+                if self._resync_due():
+                    await self._load_schedule()
+
+                self._wakeup.clear()
+                try:
+                    await asyncio.wait_for(
+                        self._wakeup.wait(), timeout=self._seconds_until_wakeup()
+                    )
+                    # The schedule changed; recompute the next deadline
+                    continue
+                except asyncio.TimeoutError:
+                    pass
+
+                due = self.schedule.pop_due(time.time())
+                if due:
+                    await self._refresh_due(due)
             except asyncio.CancelledError:
                 logger.info("Token refresh loop cancelled")
                 break
@@ -142,59 +384,149 @@ class TokenRefreshService:
                 # Wait 1 minute before retrying on error
                 await asyncio.sleep(60)
 
-    async def _refresh_expired_tokens(self) -> None:
-        """Find and refresh tokens that are about to expire.
+    async def _refresh_due(self, due: Dict[str, float]) -> None:
+        """Refresh tokens whose deadline passed and retry the ones that failed.
 
-        This queries all agent_tools that require OAuth and have tokens
-        expiring within the next 15 minutes, then refreshes them.
+        Successful refreshes reschedule themselves through on_token_saved.
+        Tools still unscheduled afterwards failed (or were skipped) and are
+        retried after TOKEN_REFRESH_CHECK_INTERVAL_MINUTES while their token
+        is still valid.
         """
-        # Get all agent tools with auth
-        # TODO: Create a method in tool_service to get tools requiring auth
-        # For now, we'll implement the query here
-        agent_tools = await self._get_tools_requiring_auth()
-
-        if not agent_tools:
-            logger.debug("No agent tools requiring authentication found")
-            return
+        logger.info(f"{len(due)} token(s) due for refresh")
+        try:
+            await self._refresh_expired_tokens()
+        finally:
+            # Also after a failed scan, so the unrefreshed tools are not lost
+            window = settings.token_refresh_expiry_window_minutes * 60
+            retry_at = time.time() + settings.token_refresh_check_interval_minutes * 60
+            for agent_tool_id, refresh_at in due.items():
+                if self.schedule.deadline(agent_tool_id) is not None:
+                    continue
+                if refresh_at + window > retry_at:
+                    self.schedule.schedule(agent_tool_id, retry_at)
+
+    async def _refresh_expired_tokens(self) -> Dict[str, float]:
+        """Find and refresh tokens that are about to expire.
 
-        logger.info(f"Checking {len(agent_tools)} tools for token refresh")
+        Streams agent_tools that require auth page by page from the tool
+        service, so only one page of decrypted configs is in memory at a
+        time. The plaintext token_expires_at column limits the scan to
+        tokens expiring within the configured window, so tools with
+        long-lived tokens are never fetched or decrypted. Up to
+        TOKEN_REFRESH_CONCURRENCY tokens are refreshed at once.
 
+        Returns:
+            Sweep statistics: checked, refreshed, skipped, failed and
+            duration_seconds
+        """
+        start = time.perf_counter()
+        expiring_before = datetime.now(timezone.utc) + timedelta(
+            minutes=settings.token_refresh_expiry_window_minutes
+        )
+        semaphore = asyncio.Semaphore(settings.token_refresh_concurrency)
+
+        async def refresh_one(agent_tool: AgentTool) -> RefreshOutcome:
+            async with semaphore:
+                try:
+                    return await self._refreshes.do(
+                        str(agent_tool.id),
+                        lambda: self._check_and_refresh_token(agent_tool),
+                    )
+                except Exception as e:
+                    logger.error(
+                        f"Error checking token for tool {agent_tool.tool.name}: {e}",
+                        exc_info=True,
+                    )
+                    return RefreshOutcome.FAILED
+
+        checked_count = 0
         refresh_count = 0
-        for agent_tool in agent_tools:
-            logger.info(f"Processing tool: {agent_tool.tool.name}, enabled: {agent_tool.is_enabled}")
-            try:
-                refreshed = await self._check_and_refresh_token(agent_tool)
-                if refreshed:
-                    refresh_count += 1
-            except Exception as e:
-                logger.error(
-                    f"Error checking token for tool {agent_tool.tool.name}: {e}",
-                    exc_info=True,
-                )
+        failure_count = 0
+        async for agent_tools in self.tool_service.iter_agent_tools_with_auth(
+            expiring_before=expiring_before
+        ):
+            checked_count += len(agent_tools)
+            logger.debug(f"Checking page of {len(agent_tools)} tools for token refresh")
+
+            results = await asyncio.gather(
+                *(refresh_one(agent_tool) for agent_tool in agent_tools)
+            )
+            refresh_count += results.count(RefreshOutcome.REFRESHED)
+            failure_count += results.count(RefreshOutcome.FAILED)
+
+        duration = time.perf_counter() - start
+        token_refresh_sweep_duration.record(duration)
+        if refresh_count:
+            token_refresh_success_counter.add(refresh_count)
+        if failure_count:
+            token_refresh_failure_counter.add(failure_count)
+
+        stats = {
+            "checked": checked_count,
+            "refreshed": refresh_count,
+            "skipped": checked_count - refresh_count - failure_count,
+            "failed": failure_count,
+            "duration_seconds": duration,
+        }
+
+        if checked_count == 0:
+            logger.debug("No agent tool tokens expiring within the refresh window")
+            return stats
 
-        if refresh_count > 0:
-            logger.info(f"Successfully refreshed {refresh_count} token(s)")
+        logger.info(
+            f"Token refresh sweep checked {checked_count} tool(s) in {duration:.2f}s: "
+            f"{refresh_count} refreshed, {stats['skipped']} skipped, "
+            f"{failure_count} failed"
+        )
+        return stats
+
+    async def refresh_agent_tool(
+        self, agent_tool_id: UUID
+    ) -> tuple[bool, Optional[str]]:
+        """Refresh one agent tool's tokens now, regardless of their expiry.
 
-    async def _get_tools_requiring_auth(self) -> List[AgentTool]:
-        """Get all agent tools that require OAuth authentication.
+        Joins a refresh of the same tool already in flight in this process,
+        and waits for (and shares the result of) another instance's refresh
+        if that instance holds the tool's lease. A joined background refresh
+        skips a tool leased elsewhere, so a skipped result is retried as a
+        manual refresh.
+
+        Args:
+            agent_tool_id: ID of the agent_tool to refresh
 
         Returns:
-            List of AgentTool objects with authentication requirements
+            Tuple of (refreshed, error message)
         """
-        tools, error = await self.tool_service.get_all_agent_tools_with_auth()
-        if error:
-            logger.error(f"Error getting tools requiring auth: {error}")
-            return []
-        return tools
-
-    async def _check_and_refresh_token(self, agent_tool: AgentTool) -> bool:
+        get_agent_tool = self.tool_service.get_agent_tool_with_sensitive_config
+        agent_tool, error = await get_agent_tool(agent_tool_id)
+        if error or not agent_tool:
+            return False, error or "Agent tool configuration not found"
+
+        def refresh() -> Awaitable[RefreshOutcome]:
+            return self._check_and_refresh_token(agent_tool, force=True)
+
+        outcome = await self._refreshes.do(str(agent_tool_id), refresh)
+        if outcome is RefreshOutcome.SKIPPED:
+            outcome = await self._refreshes.do(str(agent_tool_id), refresh)
+        if outcome is not RefreshOutcome.REFRESHED:
+            return False, "Token refresh failed; the tool may need to be reconnected"
+        return True, None
+
+    async def _check_and_refresh_token(
+        self, agent_tool: AgentTool, force: bool = False
+    ) -> RefreshOutcome:
         """Check if a token needs refresh and refresh it.
 
         Args:
             agent_tool: AgentTool instance to check and potentially refresh
+            force: Refresh even if the token is not within the expiry window,
+                and wait for another instance holding the lease instead of
+                skipping the tool
 
         Returns:
-            True if token was refreshed, False otherwise
+            REFRESHED if the token was refreshed (here or by another instance),
+            SKIPPED if no refresh was due or another instance holds the lease,
+            FAILED if a due refresh could not be done
 
         Notes:
             - Expiry window is configurable via TOKEN_REFRESH_EXPIRY_WINDOW_MINUTES
@@ -205,38 +537,39 @@ class TokenRefreshService:
             expiry_window_minutes = settings.token_refresh_expiry_window_minutes
             expiry_threshold = now + timedelta(minutes=expiry_window_minutes)
 
-            # sensitive_config is already decrypted by tool_service.get_all_agent_tools_with_auth()
+            # sensitive_config is already decrypted by
+            # tool_service.iter_agent_tools_with_auth()
             sensitive_config = agent_tool.sensitive_config
 
             if not sensitive_config:
                 logger.warning(f"No sensitive_config for tool {agent_tool.tool.name}")
-                return False
+                return RefreshOutcome.SKIPPED
 
             # Check if token exists and is expiring
             expires_at = sensitive_config.get("expires_at")
             if not expires_at:
                 logger.warning(f"No expires_at info found for tool {agent_tool.tool.name}")
-                return False
+                return RefreshOutcome.SKIPPED
 
             expires_datetime = datetime.fromtimestamp(expires_at, timezone.utc)
 
             # Check if token has already expired
-            if expires_datetime < now:
+            if expires_datetime < now and not force:
                 minutes_expired = (now - expires_datetime).total_seconds() / 60
                 logger.warning(
                     f"Token for tool {agent_tool.tool.name} EXPIRED "
                     f"({minutes_expired:.1f} minutes ago)"
                 )
-                return False
+                return RefreshOutcome.SKIPPED
 
             # Calculate time until expiry
             minutes_until_expiry = (expires_datetime - now).total_seconds() / 60
 
             # Refresh if expiring within configured window (expires before or at threshold)
-            if expires_datetime > expiry_threshold:
+            if expires_datetime > expiry_threshold and not force:
                 # Token is still valid for more than expiry window, so no refresh needed
                 logger.debug(f"Tool {agent_tool.tool.name} token valid for {minutes_until_expiry:.1f} minutes (expires at {expires_datetime.strftime('%H:%M:%S')}), skipping refresh")
-                return False
+                return RefreshOutcome.SKIPPED
 
             logger.info(
                 f"Token for {agent_tool.tool.name} expires in {minutes_until_expiry:.1f} minutes "
@@ -250,7 +583,7 @@ class TokenRefreshService:
                     f"No refresh_token available for tool {agent_tool.tool.name}. "
                     "User will need to re-authenticate."
                 )
-                return False
+                return RefreshOutcome.FAILED
 
             # Get OAuth config using centralized utility
             tool = agent_tool.tool
@@ -258,7 +591,7 @@ class TokenRefreshService:
 
             if not auth_config:
                 logger.error(f"No auth_config for tool {tool.name}")
-                return False
+                return RefreshOutcome.FAILED
 
             # Get OAuth provider manager singleton
             oauth_manager = get_oauth_manager()
@@ -268,59 +601,157 @@ class TokenRefreshService:
 
             if not token_url:
                 logger.error(f"No token_url in auth_config for tool {tool.name}")
-                return False
+                return RefreshOutcome.FAILED
 
             # Get OAuth credentials using singleton manager
             try:
                 credentials = oauth_manager.get_credentials(provider)
             except ValueError as e:
                 logger.error(f"Error getting OAuth credentials: {e}")
-                return False
+                return RefreshOutcome.FAILED
 
-            # Get OAuth data for refresh using singleton manager
-            oauth_data = oauth_manager.get_auth_data(
-                provider=provider,
-                flow="refresh",
-                refresh_token=refresh_token,
+            # Only one instance may refresh this tool at a time
+            fencing_token, error = await self.tool_service.acquire_refresh_lease(
+                agent_tool.id, self.lease_holder, settings.token_refresh_lease_seconds
             )
+            if fencing_token is None and not error and force:
+                if await self._wait_for_refresh_elsewhere(agent_tool):
+                    return RefreshOutcome.REFRESHED
+                return RefreshOutcome.FAILED
+            if error:
+                logger.error(
+                    f"Could not take refresh lease for tool {tool.name}: {error}"
+                )
+                return RefreshOutcome.FAILED
+            if fencing_token is None:
+                logger.info(
+                    f"Skipping refresh for tool {tool.name}: "
+                    "lease held by another instance"
+                )
+                return RefreshOutcome.SKIPPED
+
+            try:
+                return await self._refresh_under_lease(
+                    agent_tool, provider, token_url, fencing_token
+                )
+            finally:
+                await self.tool_service.release_refresh_lease(
+                    agent_tool.id, self.lease_holder, fencing_token
+                )
 
-            new_tokens = await self._refresh_oauth_token(
-                token_url=token_url,
-                oauth_data=oauth_data,
+        except Exception as e:
+            logger.error(
+                f"Error refreshing token for tool {agent_tool.tool.name}: {e}",
+                exc_info=True,
             )
+            return RefreshOutcome.FAILED
 
-            if not new_tokens:
-                logger.error(f"Failed to refresh token for tool {tool.name}")
-                return False
+    async def _refresh_under_lease(
+        self,
+        agent_tool: AgentTool,
+        provider: str,
+        token_url: str,
+        fencing_token: int,
+    ) -> RefreshOutcome:
+        """Refresh a tool's tokens while holding its refresh lease.
 
-            # Update sensitive config with new tokens
-            sensitive_config["access_token"] = new_tokens["access_token"]
-            if "expires_in" in new_tokens:
-                expires_in = new_tokens["expires_in"]
-                sensitive_config["expires_at"] = (
-                    datetime.now(timezone.utc) + timedelta(seconds=expires_in)
-                ).timestamp()
-            if "refresh_token" in new_tokens:
-                sensitive_config["refresh_token"] = new_tokens["refresh_token"]
-                logger.info(f"Received new refresh_token for tool {tool.name}")
-
-            # Update agent_tools table with refreshed tokens
-            await self._update_agent_tool(
-                agent_tool_id=agent_tool.id,
-                sensitive_config=sensitive_config,
-                tool_name=agent_tool.tool.name,
+        The tokens are re-read first: another instance may have refreshed
+        them (and rotated the refresh token) since this sweep loaded them.
+        The write is fenced, so it is rejected if the lease was taken over.
+        """
+        tool = agent_tool.tool
+        current, error = await self.tool_service.get_agent_tool_with_sensitive_config(
+            agent_tool.id
+        )
+        if error or not current or not current.sensitive_config:
+            logger.warning(
+                f"Tool {tool.name} tokens disappeared before refresh: {error}"
             )
+            return RefreshOutcome.FAILED
+
+        sensitive_config = current.sensitive_config
+        if self._refreshed_elsewhere(agent_tool, current):
+            logger.info(f"Tool {tool.name} tokens were already refreshed elsewhere")
+            return RefreshOutcome.REFRESHED
+
+        refresh_token = sensitive_config.get("refresh_token")
+        if not refresh_token:
+            logger.warning(f"No refresh_token available for tool {tool.name}")
+            return RefreshOutcome.FAILED
+
+        # Get OAuth data for refresh using singleton manager
+        oauth_data = get_oauth_manager().get_auth_data(
+            provider=provider,
+            flow="refresh",
+            refresh_token=refresh_token,
+        )
 
-            # Database update triggers Supabase Realtime, which auto-updates UI
+        await self._get_rate_limiter(provider).acquire()
+        new_tokens = await self._refresh_oauth_token(
+            token_url=token_url,
+            oauth_data=oauth_data,
+        )
 
-            return True
+        if not new_tokens:
+            logger.error(f"Failed to refresh token for tool {tool.name}")
+            return RefreshOutcome.FAILED
+
+        # Update sensitive config with new tokens
+        sensitive_config["access_token"] = new_tokens["access_token"]
+        if "expires_in" in new_tokens:
+            expires_in = new_tokens["expires_in"]
+            sensitive_config["expires_at"] = (
+                datetime.now(timezone.utc) + timedelta(seconds=expires_in)
+            ).timestamp()
+        if "refresh_token" in new_tokens:
+            sensitive_config["refresh_token"] = new_tokens["refresh_token"]
+            logger.info(f"Received new refresh_token for tool {tool.name}")
+
+        # Update agent_tools table with refreshed tokens
+        # Database update triggers Supabase Realtime, which auto-updates UI
+        saved = await self._update_agent_tool(
+            agent_tool_id=agent_tool.id,
+            sensitive_config=sensitive_config,
+            tool_name=tool.name,
+            fencing_token=fencing_token,
+        )
+        return RefreshOutcome.REFRESHED if saved else RefreshOutcome.FAILED
 
-        except Exception as e:
-            logger.error(
-                f"Error refreshing token for tool {agent_tool.tool.name}: {e}",
-                exc_info=True,
-            )
+    def _refreshed_elsewhere(self, agent_tool: AgentTool, current: AgentTool) -> bool:
+        """Whether current holds newer tokens than agent_tool, and reschedule if so.
+
+        Writes by other instances do not reach this instance's token
+        listener, so the new expiry is scheduled here.
+        """
+        expires_at = (current.sensitive_config or {}).get("expires_at")
+        previous_expires_at = agent_tool.sensitive_config.get("expires_at")
+        if not expires_at or expires_at == previous_expires_at:
             return False
+        self._schedule_expiry(str(agent_tool.id), float(expires_at))
+        return True
+
+    async def _wait_for_refresh_elsewhere(self, agent_tool: AgentTool) -> bool:
+        """Wait for the instance holding a tool's lease to finish refreshing it.
+
+        Polls the stored tokens for up to one lease duration, since the
+        holder's lease expires by then whether or not it succeeded.
+
+        Returns:
+            True once the stored tokens changed, False if they did not in time
+        """
+        logger.info(
+            f"Waiting for another instance to refresh tool {agent_tool.tool.name}"
+        )
+        deadline = time.monotonic() + settings.token_refresh_lease_seconds
+        while time.monotonic() < deadline:
+            await asyncio.sleep(LEASE_POLL_INTERVAL_SECONDS)
+            get_agent_tool = self.tool_service.get_agent_tool_with_sensitive_config
+            current, error = await get_agent_tool(agent_tool.id)
+            if error or not current:
+                return False
+            if self._refreshed_elsewhere(agent_tool, current):
+                return True
+        return False
 
     async def _refresh_oauth_token(
         self,
@@ -345,28 +776,37 @@ class TokenRefreshService:
             - Uses standard OAuth 2.0 grant_type="refresh_token"
             - Works with any provider implementing OAuth 2.0 refresh flow
             - Provider-specific differences handled via centralized OAuth utilities
+            - Reuses one pooled client (keep-alive connections) per token endpoint
         """
-        async with httpx.AsyncClient() as client:
-            response = await client.post(token_url, data=oauth_data)
+        client = self._get_http_client(token_url)
+        response = await client.post(token_url, data=oauth_data)
 
-            if response.status_code != 200:
-                logger.error(
-                    f"OAuth refresh failed with status {response.status_code}: "
-                    f"{response.text}"
-                )
-                return None
+        if response.status_code != 200:
+            logger.error(
+                f"OAuth refresh failed with status {response.status_code}: "
+                f"{response.text}"
+            )
+            return None
 
-            return response.json()
+        return response.json()
 
     async def _update_agent_tool(
-        self, agent_tool_id: UUID, sensitive_config: dict[str, str | float], tool_name: str
-    ) -> None:
+        self,
+        agent_tool_id: UUID,
+        sensitive_config: dict[str, str | float],
+        tool_name: str,
+        fencing_token: Optional[int] = None,
+    ) -> bool:
         """Update agent tool with new tokens.
 
         Args:
             agent_tool_id: ID of the agent_tool to update (UUID)
             sensitive_config: Decrypted dict with new tokens (will be encrypted by tool_service)
             tool_name: Tool name for logging (passed from caller)
+            fencing_token: Refresh lease fencing token guarding the write
+
+        Returns:
+            True if the tokens were saved
         """
         from shared.voice_agents.tool_models import AgentToolUpdate
 
@@ -376,13 +816,17 @@ class TokenRefreshService:
         )
 
         result, error = await self.tool_service.update_agent_tool(
-            agent_tool_id=agent_tool_id, update_data=update_data
+            agent_tool_id=agent_tool_id,
+            update_data=update_data,
+            fencing_token=fencing_token,
         )
 
         if error:
             logger.error(f"Failed to update {tool_name}: {error}")
-        else:
-            logger.info(f"Successfully refreshed {tool_name} token")
+            return False
+
+        logger.info(f"Successfully refreshed {tool_name} token")
+        return True
 
 
 # Global instance
@@ -309,11 +309,11 @@ async def oauth_callback(code: str, state: str):
         )  # Default 1 hour
 
     # 6. Get tool_id from DB
-    tools, _ = await tool_service.get_platform_tools(only_active=False)
-    tool_id = next((t.id for t in tools if t.name == tool_name), None)
+    platform_tool, _ = await tool_service.get_platform_tool(name=tool_name)
 
-    if not tool_id:
+    if not platform_tool:
         raise HTTPException(status_code=404, detail="Tool not found in DB")
+    tool_id = platform_tool.id
 
     # 7. Save to agent_tools
     await tool_service.configure_agent_tool(
@@ -367,6 +367,56 @@ async def logout_agent_tool(
     return updated_tool
 
 
+@tool_router.post("/agent/{agent_tool_id}/refresh")
+@tracer.start_as_current_span("tool.routes.refresh_agent_tool")
+async def refresh_agent_tool(
+    agent_tool_id: UUID,
+    user_data: tuple[UUID, UserProfile] = Depends(get_authenticated_user),
+):
+    """Refresh a tool's OAuth tokens now.
+
+    Concurrent requests for the same tool (including the background refresh)
+    share one refresh instead of each using the refresh token.
+    """
+    from src.services import token_refresh_service as token_refresh_module
+
+    current_user_id, user_profile = user_data
+
+    service = token_refresh_module.token_refresh_service
+    if not service:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Token refresh service is not running",
+        )
+
+    # Get agent tool and its agent to check organization
+    agent_tool, error = await tool_service.get_agent_tool_with_sensitive_config(
+        agent_tool_id
+    )
+    if error or not agent_tool:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Agent tool not found"
+        )
+    agent, error = await voice_agent_service.get_agent_by_id(agent_tool.agent_id)
+    if error or not agent:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail="Agent not found"
+        )
+
+    # Permission check
+    if not user_profile.has_role("platform_admin"):
+        if not user_profile.has_role("org_admin", str(agent.organization_id)):
+            raise HTTPException(
+                status_code=status.HTTP_403_FORBIDDEN,
+                detail="Insufficient permissions to refresh tools for this agent",
+            )
+
+    refreshed, error = await service.refresh_agent_tool(agent_tool_id)
+    if error:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=error)
+    return {"id": str(agent_tool_id), "refreshed": refreshed}
+
+
 @tool_router.put("/agent/{agent_tool_id}/api-key", response_model=AgentToolResponse)
 @tracer.start_as_current_span("tool.routes.set_api_key")
 async def set_api_key(
@@ -0,0 +1,53 @@
+"""
+Benchmarks for usage metering.
+
+Run with output:
+    pytest backend/tests/benchmarks/test_metering_benchmark.py -s
+"""
+
+import time
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from src.billing.metering import UsageMeter
+from src.billing.models import MeteredUsageResult
+
+EVENTS = 200_000
+ORGANIZATIONS = 500
+EVENT_NAMES = ["voice_second", "llm_token", "sms"]
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+async def test_benchmark_metering_throughput(tmp_path):
+    """Benchmark recording usage events and flushing them as one batch."""
+    billing = MagicMock()
+    billing.consume_metered_usage_batch = AsyncMock(
+        side_effect=lambda batch_id, usage: (
+            False,
+            [MeteredUsageResult(**entry.model_dump(), success=True) for entry in usage],
+        )
+    )
+    usage_meter = UsageMeter(tmp_path, flush_interval_seconds=60, billing=billing)
+    orgs = [uuid4() for _ in range(ORGANIZATIONS)]
+
+    start = time.perf_counter()
+    for i in range(EVENTS):
+        usage_meter.record(orgs[i % ORGANIZATIONS], EVENT_NAMES[i % len(EVENT_NAMES)])
+    record_elapsed = time.perf_counter() - start
+
+    start = time.perf_counter()
+    charged = await usage_meter.flush()
+    flush_elapsed = time.perf_counter() - start
+
+    entries = ORGANIZATIONS * len(EVENT_NAMES)
+    print(
+        f"\nrecorded {EVENTS:,} events in {record_elapsed:.2f}s "
+        f"({EVENTS / record_elapsed:,.0f} events/s, journaled); "
+        f"flushed {entries:,} aggregated entries in one batch "
+        f"in {flush_elapsed * 1000:.1f} ms"
+    )
+
+    assert charged == entries
+    assert billing.consume_metered_usage_batch.call_count == 1
@@ -0,0 +1,85 @@
+"""
+Benchmarks for the notification outbox.
+
+Run with output:
+    pytest backend/tests/benchmarks/test_notification_outbox_benchmark.py -s
+"""
+
+import time
+from uuid import uuid4
+
+import pytest
+from src.notifications.models import NotificationLogCreate
+from src.notifications.outbox import NotificationOutbox
+from src.notifications.transport import MAX_BATCH_SIZE
+
+EMAILS = 500
+# Simulated Resend API latency
+SEND_SECONDS = 0.01
+
+
+def _notification(i):
+    recipient = f"user{i}@example.com"
+    return (
+        uuid4(),
+        NotificationLogCreate(
+            notification_event_id=uuid4(), recipient_email=recipient, subject="Hello"
+        ),
+        {
+            "from": "App <noreply@example.com>",
+            "to": [recipient],
+            "subject": "Hello",
+            "html": "<p>Hello</p>",
+        },
+    )
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+@pytest.mark.parametrize(
+    "workers,batch_size", [(1, None), (16, None), (16, MAX_BATCH_SIZE)]
+)
+async def test_benchmark_notification_outbox_throughput(
+    workers, batch_size, notification_outbox_store, fake_resend_transport
+):
+    """Benchmark queueing emails on the request path, then draining the outbox.
+
+    With batch_size the emails are queued by one call, as by
+    send_notifications_batch, and sent with one request per batch.
+    """
+    fake_resend_transport.latency_seconds = SEND_SECONDS
+
+    start = time.perf_counter()
+    if batch_size:
+        await notification_outbox_store.enqueue_notifications(
+            [_notification(i) for i in range(EMAILS)], batch_size=batch_size
+        )
+    else:
+        for i in range(EMAILS):
+            await notification_outbox_store.enqueue_notifications([_notification(i)])
+    enqueue_elapsed = time.perf_counter() - start
+
+    outbox = NotificationOutbox(
+        workers=workers,
+        max_attempts=3,
+        retry_base_seconds=10,
+        poll_interval_seconds=60,
+        flush_interval_seconds=60,
+        store=notification_outbox_store,
+        transport=fake_resend_transport,
+    )
+    start = time.perf_counter()
+    sent = await outbox.drain()
+    drain_elapsed = time.perf_counter() - start
+
+    print(
+        f"\nqueued {EMAILS:,} emails in {enqueue_elapsed * 1000:.1f} ms "
+        f"({enqueue_elapsed / EMAILS * 1e6:.1f} us/email, inline send would wait "
+        f"{SEND_SECONDS * 1000:.0f} ms/request); {workers} worker(s) sent them in "
+        f"{drain_elapsed:.2f}s ({EMAILS / drain_elapsed:,.0f} emails/s) with "
+        f"{fake_resend_transport.requests} provider request(s) and "
+        f"{notification_outbox_store.finish_calls} log write batch(es)"
+    )
+
+    assert sent == EMAILS
+    assert notification_outbox_store.outbox == {}
@@ -0,0 +1,75 @@
+"""
+Benchmarks for encryption of sensitive data.
+
+Run with output:
+    pytest backend/tests/benchmarks/test_security_benchmark.py -s
+"""
+
+import time
+
+import pytest
+from cryptography.fernet import Fernet
+
+from shared.common.security import KeyManager, _derive_dev_key
+
+ITERATIONS = 2000
+PAYLOAD = (
+    b'{"access_token": "ya29.a0AfH6SMB", "refresh_token": "1//0gLx", '
+    b'"expires_at": 1735689600}'
+)
+
+
+def _ops_per_second(func, iterations: int = ITERATIONS) -> float:
+    start = time.perf_counter()
+    for _ in range(iterations):
+        func()
+    return iterations / (time.perf_counter() - start)
+
+
+@pytest.fixture
+def rotated_manager():
+    """Key manager with a primary and two previous keys."""
+    keys = [Fernet.generate_key().decode() for _ in range(3)]
+    return KeyManager(keys[0], keys[1:]), keys
+
+
+@pytest.mark.slow
+def test_benchmark_encrypt_decrypt_throughput(rotated_manager):
+    """Benchmark encrypt and decrypt with the cached cipher."""
+    manager, keys = rotated_manager
+    token = manager.cipher.encrypt(PAYLOAD)
+    old_token = KeyManager(keys[-1]).cipher.encrypt(PAYLOAD)
+
+    encrypt_ops = _ops_per_second(lambda: manager.cipher.encrypt(PAYLOAD))
+    decrypt_ops = _ops_per_second(lambda: manager.cipher.decrypt(token))
+    # Worst case: the matching key is the last one MultiFernet tries
+    decrypt_old_ops = _ops_per_second(lambda: manager.cipher.decrypt(old_token))
+    rotate_ops = _ops_per_second(lambda: manager.rotate(old_token.decode()))
+
+    print(
+        f"\nencrypt {encrypt_ops:,.0f} ops/s, decrypt {decrypt_ops:,.0f} ops/s, "
+        f"decrypt with oldest key {decrypt_old_ops:,.0f} ops/s, "
+        f"rotate {rotate_ops:,.0f} ops/s"
+    )
+
+    assert manager.cipher.decrypt(old_token) == PAYLOAD
+
+
+@pytest.mark.slow
+def test_benchmark_cached_vs_derived_dev_key():
+    """Benchmark the cached dev-key cipher against deriving the key per call."""
+    manager = KeyManager()
+    manager.cipher  # Warm up the cache
+
+    iterations = 20
+    derived_ops = _ops_per_second(
+        lambda: Fernet(_derive_dev_key()).encrypt(PAYLOAD), iterations
+    )
+    cached_ops = _ops_per_second(lambda: manager.cipher.encrypt(PAYLOAD), iterations)
+
+    print(
+        f"\ndev key encrypt: derived per call {derived_ops:,.1f} ops/s, "
+        f"cached {cached_ops:,.0f} ops/s ({cached_ops / derived_ops:,.0f}x)"
+    )
+
+    assert cached_ops > derived_ops
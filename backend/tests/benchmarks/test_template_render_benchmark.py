@@ -0,0 +1,100 @@
+"""
+Benchmarks for rendering notification templates.
+
+Run with output:
+    pytest backend/tests/benchmarks/test_template_render_benchmark.py -s
+"""
+
+import html
+import time
+from datetime import datetime, timezone
+from uuid import uuid4
+
+import pytest
+from src.notifications.models import NotificationTemplate
+from src.notifications.rendering import get_compiled_notification_template
+from src.notifications.service import validate_builtin_template_variables
+from src.notifications.templates import (
+    BASE_TEMPLATE,
+    TEMPLATE_REGISTRY,
+    get_compiled_template,
+)
+
+RENDERS = 5_000
+VARIABLES = 12
+EVENT_KEY = "organization.invitation"
+
+
+def _sanitize(variables):
+    """HTML-escape every value, as rendering did before templates were compiled."""
+    return {key: html.escape(str(value)) for key, value in variables.items()}
+
+
+def _timed(render):
+    start = time.perf_counter()
+    for _ in range(RENDERS):
+        render()
+    return (time.perf_counter() - start) / RENDERS * 1e6
+
+
+@pytest.mark.slow
+def test_benchmark_database_template_render():
+    """Benchmark per-variable str.replace against the compiled template."""
+    variables = {f"var_{i}": f"value <{i}>" for i in range(VARIABLES)}
+    paragraph = "".join(f"<p>{{var_{i}}}</p>" for i in range(VARIABLES))
+    now = datetime.now(timezone.utc)
+    template = NotificationTemplate(
+        id=uuid4(),
+        name="Benchmark",
+        subject="Hello {var_0}",
+        html_content=BASE_TEMPLATE.replace("{content}", paragraph * 10),
+        created_at=now,
+        updated_at=now,
+    )
+
+    def replace_per_variable():
+        html_content, subject = template.html_content, template.subject
+        for key, value in _sanitize(variables).items():
+            html_content = html_content.replace(f"{{{key}}}", value)
+            subject = subject.replace(f"{{{key}}}", value)
+        return subject, html_content
+
+    def compiled():
+        plan = get_compiled_notification_template(template)
+        return plan.subject.render(variables), plan.html.render(variables)
+
+    assert replace_per_variable() == compiled()
+    legacy_us, compiled_us = _timed(replace_per_variable), _timed(compiled)
+    print(
+        f"\n{len(template.html_content):,} byte template, {VARIABLES} variables: "
+        f"str.replace {legacy_us:.1f} us/render, compiled {compiled_us:.1f} us/render "
+        f"({legacy_us / compiled_us:.1f}x)"
+    )
+
+
+@pytest.mark.slow
+def test_benchmark_builtin_template_render():
+    """Benchmark formatting BASE_TEMPLATE per email against the compiled template."""
+    template_data = TEMPLATE_REGISTRY[EVENT_KEY]
+    variables = validate_builtin_template_variables(
+        EVENT_KEY, {name: f"<{name}>" for name in template_data["variables"]}
+    )
+
+    def format_per_email():
+        sanitized = _sanitize(variables)
+        subject = template_data["subject"].format(**sanitized)
+        content = template_data["html_content"].format(**sanitized)
+        return subject, BASE_TEMPLATE.format(
+            subject=subject, content=content, **sanitized
+        )
+
+    def compiled():
+        plan = get_compiled_template(EVENT_KEY)
+        return plan.subject.render(variables), plan.html.render(variables)
+
+    assert format_per_email() == compiled()
+    legacy_us, compiled_us = _timed(format_per_email), _timed(compiled)
+    print(
+        f"\n{EVENT_KEY}: str.format {legacy_us:.1f} us/render, "
+        f"compiled {compiled_us:.1f} us/render ({legacy_us / compiled_us:.1f}x)"
+    )
@@ -0,0 +1,104 @@
+"""
+Benchmarks for ToolService read paths.
+
+Run with output:
+    pytest backend/tests/benchmarks/test_tool_service_benchmark.py -s
+"""
+
+import time
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+
+from shared.common import security
+from shared.common.security import encrypt_data
+from shared.voice_agents.tool_models import AuthStatus
+from shared.voice_agents.tool_service import ToolService, decrypted_config_cache
+
+AGENT_TOOL_COUNT = 20
+
+
+@pytest.fixture
+def agent_with_oauth_tools(mock_supabase_client):
+    """ToolService returning one agent with many OAuth tools."""
+    agent_id = uuid4()
+    expires_at = datetime.now(timezone.utc).timestamp() + 3600
+    rows = []
+    for i in range(AGENT_TOOL_COUNT):
+        tool_id = uuid4()
+        rows.append(
+            {
+                "id": str(uuid4()),
+                "agent_id": str(agent_id),
+                "tool_id": str(tool_id),
+                "sensitive_config": encrypt_data(
+                    {
+                        "access_token": f"access-{i}",
+                        "refresh_token": f"refresh-{i}",
+                        "expires_at": expires_at,
+                    }
+                ),
+                "is_enabled": True,
+                "tool": {
+                    "id": str(tool_id),
+                    "name": f"OAuth Tool {i}",
+                    "auth_type": "oauth2",
+                    "requires_auth": True,
+                    "is_active": True,
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "updated_at": "2024-01-01T00:00:00Z",
+                },
+                "created_at": "2024-01-01T00:00:00Z",
+                "updated_at": "2024-01-01T00:00:00Z",
+            }
+        )
+
+    def execute():
+        # Fresh row dicts per call since get_agent_tools pops the joined tool
+        return MagicMock(data=[dict(row, tool=dict(row["tool"])) for row in rows])
+
+    mock_supabase_client.table.return_value.execute.side_effect = execute
+
+    decrypted_config_cache.clear()
+    with patch("shared.voice_agents.tool_service.supabase_config") as mock_config:
+        mock_config.client = mock_supabase_client
+        service = ToolService()
+        service.supabase_config = mock_config
+        yield service, agent_id
+    decrypted_config_cache.clear()
+
+
+@pytest.mark.slow
+async def test_benchmark_list_agent_tools_many_oauth(agent_with_oauth_tools):
+    """Benchmark get_agent_tools cold (decrypt once per row) and warm (cached)."""
+    service, agent_id = agent_with_oauth_tools
+
+    with patch(
+        "shared.voice_agents.tool_service.decrypt_data", wraps=security.decrypt_data
+    ) as decrypt_spy:
+        start = time.perf_counter()
+        tools, error = await service.get_agent_tools(agent_id)
+        cold = time.perf_counter() - start
+        cold_decrypts = decrypt_spy.call_count
+
+        start = time.perf_counter()
+        warm_runs = 10
+        for _ in range(warm_runs):
+            await service.get_agent_tools(agent_id)
+        warm = (time.perf_counter() - start) / warm_runs
+        warm_decrypts = decrypt_spy.call_count - cold_decrypts
+
+    print(
+        f"\nget_agent_tools with {AGENT_TOOL_COUNT} OAuth tools: "
+        f"cold {cold * 1000:.1f} ms ({cold_decrypts} decrypts), "
+        f"warm {warm * 1000:.1f} ms ({warm_decrypts} decrypts)"
+    )
+
+    assert error is None
+    assert all(tool.auth_status == AuthStatus.AUTHENTICATED for tool in tools)
+    # One decrypt per row on the first listing, none afterwards
+    assert cold_decrypts == AGENT_TOOL_COUNT
+    assert warm_decrypts == 0
+    assert warm < cold
@@ -0,0 +1,72 @@
+"""
+Benchmarks for the Stripe webhook inbox.
+
+Run with output:
+    pytest backend/tests/benchmarks/test_webhook_inbox_benchmark.py -s
+"""
+
+import asyncio
+import time
+
+import pytest
+from src.billing.models import WebhookEventStatus
+from src.billing.webhook_handler import construct_stripe_webhook_event
+from src.billing.webhook_inbox import StripeWebhookInbox
+
+EVENTS = 2_000
+CUSTOMERS = 200
+EVENT_TYPES = [
+    "invoice.payment_succeeded",
+    "customer.subscription.updated",
+    "payment_intent.succeeded",
+]
+# Simulated handler latency (Stripe API and database round trips)
+HANDLER_SECONDS = 0.002
+
+
+@pytest.mark.slow
+@pytest.mark.asyncio
+@pytest.mark.parametrize("workers", [1, 16])
+async def test_benchmark_webhook_inbox_throughput(
+    workers, stripe_webhook_secret, signed_stripe_event, webhook_inbox_store
+):
+    """Benchmark verifying and storing signed events, then draining the inbox."""
+    deliveries = [
+        signed_stripe_event(EVENT_TYPES[i % len(EVENT_TYPES)], f"cus_{i % CUSTOMERS}")
+        for i in range(EVENTS)
+    ]
+
+    async def dispatch(event):
+        await asyncio.sleep(HANDLER_SECONDS)
+
+    start = time.perf_counter()
+    for _, payload, signature in deliveries:
+        event = construct_stripe_webhook_event(payload, signature)
+        await webhook_inbox_store.enqueue_webhook_event(event)
+    ingest_elapsed = time.perf_counter() - start
+
+    inbox = StripeWebhookInbox(
+        workers=workers,
+        max_attempts=3,
+        retry_base_seconds=10,
+        poll_interval_seconds=60,
+        billing=webhook_inbox_store,
+        dispatch=dispatch,
+    )
+    start = time.perf_counter()
+    applied = await inbox.drain()
+    drain_elapsed = time.perf_counter() - start
+
+    print(
+        f"\nverified and stored {EVENTS:,} signed events in {ingest_elapsed:.2f}s "
+        f"({EVENTS / ingest_elapsed:,.0f} events/s); "
+        f"{workers} worker(s) applied them in {drain_elapsed:.2f}s "
+        f"({EVENTS / drain_elapsed:,.0f} events/s, "
+        f"{HANDLER_SECONDS * 1000:.0f} ms/event)"
+    )
+
+    assert applied == EVENTS
+    assert all(
+        event.status == WebhookEventStatus.SUCCEEDED
+        for event in webhook_inbox_store.events.values()
+    )
@@ -0,0 +1,274 @@
+"""
+Usage metering tests.
+"""
+
+import json
+from unittest.mock import AsyncMock, MagicMock
+from uuid import uuid4
+
+import pytest
+from src.billing.metering import UsageMeter
+from src.billing.models import MAX_METERED_QUANTITY, MeteredUsageResult
+
+
+def _results(usage, success=True):
+    return [
+        MeteredUsageResult(**entry.model_dump(), success=success) for entry in usage
+    ]
+
+
+@pytest.fixture
+def billing():
+    """BillingService double that charges every batch successfully."""
+    billing = MagicMock()
+    billing.consume_metered_usage_batch = AsyncMock(
+        side_effect=lambda batch_id, usage: (False, _results(usage))
+    )
+    return billing
+
+
+@pytest.fixture
+def usage_meter(tmp_path, billing):
+    return UsageMeter(tmp_path, flush_interval_seconds=60, billing=billing)
+
+
+def _charged(billing):
+    """Aggregated quantities of every batch charged so far."""
+    totals = {}
+    for call in billing.consume_metered_usage_batch.call_args_list:
+        for entry in call.args[1]:
+            key = (str(entry.organization_id), entry.event_name)
+            totals[key] = totals.get(key, 0) + entry.quantity
+    return totals
+
+
+class TestUsageMeter:
+    """Test cases for aggregation and batched flushes."""
+
+    @pytest.mark.asyncio
+    async def test_events_aggregate_per_org_and_event(self, usage_meter, billing):
+        """Test many events become one entry per (org, event) in one batch."""
+        org_a, org_b = uuid4(), uuid4()
+        for _ in range(60):
+            usage_meter.record(org_a, "voice_second")
+        usage_meter.record(org_a, "sms", 2)
+        usage_meter.record(org_b, "voice_second", 5)
+
+        charged = await usage_meter.flush()
+
+        assert charged == 3
+        billing.consume_metered_usage_batch.assert_called_once()
+        assert _charged(billing) == {
+            (str(org_a), "voice_second"): 60,
+            (str(org_a), "sms"): 2,
+            (str(org_b), "voice_second"): 5,
+        }
+        assert usage_meter.pending == {}
+        assert list(usage_meter.spill_dir.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_flush_with_nothing_pending(self, usage_meter, billing):
+        """Test an idle flush makes no database call."""
+        assert await usage_meter.flush() == 0
+        billing.consume_metered_usage_batch.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_before_newer_batches(
+        self, usage_meter, billing
+    ):
+        """Test a batch that failed to charge is kept on disk and retried first."""
+        org = uuid4()
+        billing.consume_metered_usage_batch.side_effect = Exception("database down")
+        usage_meter.record(org, "voice_second", 3)
+        await usage_meter.flush()
+
+        billing.consume_metered_usage_batch.side_effect = lambda batch_id, usage: (
+            False,
+            _results(usage),
+        )
+        usage_meter.record(org, "voice_second", 4)
+        await usage_meter.flush()
+
+        calls = billing.consume_metered_usage_batch.call_args_list
+        assert [call.args[1][0].quantity for call in calls] == [3, 3, 4]
+        # The retry reuses the batch id so the database can de-duplicate it
+        assert calls[0].args[0] == calls[1].args[0]
+        assert list(usage_meter.spill_dir.glob("batch-*")) == []
+
+    @pytest.mark.asyncio
+    async def test_uncharged_entries_are_reported(self, usage_meter, billing):
+        """Test entries the database could not charge do not count as charged."""
+        billing.consume_metered_usage_batch.side_effect = lambda batch_id, usage: (
+            False,
+            _results(usage, success=False),
+        )
+        usage_meter.record(uuid4(), "voice_second")
+
+        assert await usage_meter.flush() == 0
+        assert list(usage_meter.spill_dir.glob("batch-*")) == []
+
+    @pytest.mark.asyncio
+    async def test_partially_charged_entries_count_as_charged(
+        self, usage_meter, billing
+    ):
+        """Test an entry charged up to the balance counts, with its shortfall."""
+        billing.consume_metered_usage_batch.side_effect = lambda batch_id, usage: (
+            False,
+            [
+                MeteredUsageResult(
+                    **entry.model_dump(), success=True, unbilled_quantity=2
+                )
+                for entry in usage
+            ],
+        )
+        usage_meter.record(uuid4(), "voice_second", 5)
+
+        assert await usage_meter.flush() == 1
+
+    @pytest.mark.asyncio
+    async def test_large_aggregates_are_split(self, usage_meter, billing):
+        """Test an aggregate beyond the database's integer range is split."""
+        org = uuid4()
+        usage_meter.record(org, "voice_second", MAX_METERED_QUANTITY)
+        usage_meter.record(org, "voice_second", MAX_METERED_QUANTITY)
+        usage_meter.record(org, "voice_second", 3)
+
+        await usage_meter.flush()
+
+        usage = billing.consume_metered_usage_batch.call_args.args[1]
+        assert [entry.quantity for entry in usage] == [
+            MAX_METERED_QUANTITY,
+            MAX_METERED_QUANTITY,
+            3,
+        ]
+
+    def test_record_rejects_quantity_out_of_range(self, usage_meter):
+        """Test a single event larger than the database can charge is rejected."""
+        with pytest.raises(ValueError):
+            usage_meter.record(uuid4(), "voice_second", MAX_METERED_QUANTITY + 1)
+
+    @pytest.mark.asyncio
+    async def test_failing_batch_is_quarantined(self, tmp_path, billing):
+        """Test a batch that keeps failing is set aside so later batches flush."""
+        usage_meter = UsageMeter(tmp_path, 60, billing, max_batch_attempts=2)
+        bad_org, good_org = uuid4(), uuid4()
+
+        def consume(batch_id, usage):
+            if any(entry.organization_id == bad_org for entry in usage):
+                raise Exception("integer out of range")
+            return False, _results(usage)
+
+        billing.consume_metered_usage_batch.side_effect = consume
+        usage_meter.record(bad_org, "voice_second", 1)
+        await usage_meter.flush()
+        usage_meter.record(good_org, "voice_second", 2)
+
+        assert await usage_meter.flush() == 1
+        assert _charged(billing)[(str(good_org), "voice_second")] == 2
+        assert list(tmp_path.glob("batch-*")) == []
+        assert len(list(tmp_path.glob("quarantined-batch-*.json"))) == 1
+
+    @pytest.mark.asyncio
+    async def test_stop_flushes_pending_usage(self, usage_meter, billing):
+        """Test shutdown charges usage recorded since the last flush."""
+        org = uuid4()
+        await usage_meter.start()
+        usage_meter.record(org, "voice_second", 7)
+
+        await usage_meter.stop()
+
+        assert _charged(billing) == {(str(org), "voice_second"): 7}
+
+    @pytest.mark.asyncio
+    async def test_failed_first_flush_keeps_loop_running(self, tmp_path, billing):
+        """Test an error in the startup flush does not stop periodic flushes."""
+        import asyncio
+
+        usage_meter = UsageMeter(tmp_path, flush_interval_seconds=0.01, billing=billing)
+        flush = usage_meter.flush
+        calls = 0
+
+        async def flaky_flush():
+            nonlocal calls
+            calls += 1
+            if calls == 1:
+                raise OSError("disk full")
+            return await flush()
+
+        usage_meter.flush = flaky_flush
+        await usage_meter.start()
+        await asyncio.sleep(0.05)
+
+        assert calls > 1
+        assert not usage_meter.task.done()
+        await usage_meter.stop()
+
+
+class TestUsageMeterRecovery:
+    """Test cases for crash recovery from the spill directory."""
+
+    @pytest.mark.asyncio
+    async def test_journaled_usage_survives_crash(self, tmp_path, billing):
+        """Test usage recorded before a crash is charged after restart."""
+        org = uuid4()
+        crashed = UsageMeter(tmp_path, 60, billing)
+        crashed.record(org, "voice_second", 2)
+        crashed.record(org, "voice_second", 3)
+        # Simulate a crash with a torn final write
+        crashed._journal.write(f"{org}\tvoice_")
+        crashed._journal.flush()
+        crashed._journal.close()
+
+        restarted = UsageMeter(tmp_path, 60, billing)
+        await restarted.start()
+        await restarted.stop()
+
+        assert _charged(billing) == {(str(org), "voice_second"): 5}
+
+    @pytest.mark.asyncio
+    async def test_cut_batch_is_not_double_counted(self, tmp_path, billing):
+        """Test a crash after cutting a batch replays the batch, not its journal."""
+        org = uuid4()
+        crashed = UsageMeter(tmp_path, 60, billing)
+        crashed.record(org, "voice_second", 4)
+        batch_file = crashed._cut_batch()
+        batch_id = json.loads(batch_file.read_text())["batch_id"]
+        # Simulate a crash before the covered journal was deleted
+        covered = json.loads(batch_file.read_text())["journals"][0]
+        (tmp_path / covered).write_text(f"{org}\tvoice_second\t4\n")
+
+        restarted = UsageMeter(tmp_path, 60, billing)
+        await restarted.start()
+        await restarted.stop()
+
+        assert _charged(billing) == {(str(org), "voice_second"): 4}
+        assert str(billing.consume_metered_usage_batch.call_args.args[0]) == batch_id
+        assert list(tmp_path.iterdir()) == []
+
+    @pytest.mark.asyncio
+    async def test_legacy_batch_with_large_quantity_is_split(self, tmp_path, billing):
+        """Test a batch file cut before splitting is charged in database-sized parts."""
+        org = uuid4()
+        (tmp_path / "batch-1-legacy.json").write_text(
+            json.dumps(
+                {
+                    "batch_id": str(uuid4()),
+                    "journals": [],
+                    "usage": [
+                        {
+                            "organization_id": str(org),
+                            "event_name": "voice_second",
+                            "quantity": MAX_METERED_QUANTITY + 5,
+                        }
+                    ],
+                }
+            )
+        )
+
+        restarted = UsageMeter(tmp_path, 60, billing)
+        await restarted.start()
+        await restarted.stop()
+
+        usage = billing.consume_metered_usage_batch.call_args.args[1]
+        assert [entry.quantity for entry in usage] == [MAX_METERED_QUANTITY, 5]
+        assert list(tmp_path.iterdir()) == []
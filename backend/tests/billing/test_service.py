@@ -2,20 +2,24 @@
 Billing Service Tests
 """
 
+import asyncio
 from datetime import datetime, timedelta, timezone
 from unittest.mock import AsyncMock, MagicMock, patch
-from uuid import uuid4
+from uuid import UUID, uuid4
 
 import pytest
 
 from src.billing.models import (
     BillingStatus,
+    CreditEvent,
+    CreditProduct,
     CreditTransaction,
     OrganizationBillingSummary,
     OrganizationSubscription,
     OrganizationSubscriptionWithPlan,
     SubscriptionPlan,
     SubscriptionPlanCreate,
+    SubscriptionPlanUpdate,
     SubscriptionStatus,
 )
 
@@ -200,15 +204,19 @@ class TestBillingServiceSubscriptionPlans:
         sample_subscription_plan,
     ):
         """Filters to active plans only."""
+        inactive_plan = {
+            **sample_subscription_plan,
+            "id": str(uuid4()),
+            "is_active": False,
+        }
         mock_response = MagicMock()
-        mock_response.data = [sample_subscription_plan]
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = mock_response
+        mock_response.data = [sample_subscription_plan, inactive_plan]
+        mock_supabase_client.table.return_value.select.return_value.execute.return_value = mock_response
 
         result = await billing_service.get_subscription_plans(active_only=True)
 
         assert len(result) == 1
         assert result[0].is_active is True
-        mock_supabase_client.table.return_value.select.return_value.eq.assert_called_with("is_active", True)
 
     @pytest.mark.asyncio
     async def test_get_subscription_plans_empty(
@@ -548,7 +556,25 @@ class TestBillingServiceOrganizationSubscriptions:
 class TestBillingServiceCreditManagement:
     """Test cases for credit management."""
 
-    @pytest.mark.skip(reason="Complex mocking - requires chained Supabase queries with multiple side_effect calls")
+    @pytest.fixture(autouse=True)
+    def voice_call_event(self, billing_service):
+        """Catalog holding the voice_call credit event."""
+        now = datetime.now(timezone.utc)
+        billing_service.catalog.load(
+            "credit_events",
+            [
+                CreditEvent(
+                    id=uuid4(),
+                    name="voice_call",
+                    credit_cost=10,
+                    category="voice",
+                    created_at=now,
+                    updated_at=now,
+                )
+            ],
+            version=0,
+        )
+
     @pytest.mark.asyncio
     async def test_get_credit_balance_total(
         self,
@@ -556,25 +582,25 @@ class TestBillingServiceCreditManagement:
         mock_supabase_client,
         sample_org_id,
     ):
-        """Returns correct total_credits."""
-        mock_org_response = MagicMock()
-        mock_org_response.data = [{"credit_balance": 1500}]
-        mock_tx_response = MagicMock()
-        mock_tx_response.data = []
-        mock_expiring_response = MagicMock()
-        mock_expiring_response.data = []
-
-        mock_supabase_client.table.side_effect = [
-            MagicMock().select().eq().execute(mock_org_response),
-            MagicMock().select().eq().execute(mock_tx_response),
-            MagicMock().select().eq().gt().execute(mock_expiring_response),
-        ]
+        """Returns correct total_credits in one round trip."""
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={
+                "total_credits": 1500,
+                "subscription_credits": 0,
+                "purchased_credits": 0,
+                "expiring_soon": 0,
+                "expires_at": None,
+            }
+        )
 
         result = await billing_service.get_credit_balance(sample_org_id)
 
         assert result.total_credits == 1500
+        mock_supabase_client.rpc.assert_called_once_with(
+            "get_organization_credit_balance", {"p_organization_id": str(sample_org_id)}
+        )
+        mock_supabase_client.table.assert_not_called()
 
-    @pytest.mark.skip(reason="Complex mocking - requires chained Supabase queries with multiple side_effect calls")
     @pytest.mark.asyncio
     async def test_get_credit_balance_breakdown(
         self,
@@ -583,41 +609,39 @@ class TestBillingServiceCreditManagement:
         sample_org_id,
     ):
         """Returns subscription vs purchased breakdown."""
-        now = datetime.now(timezone.utc)
-
-        mock_org_response = MagicMock()
-        mock_org_response.data = [{"credit_balance": 1500}]
-
-        mock_tx_response = MagicMock()
-        mock_tx_response.data = [
-            {
-                "amount": 1000,
-                "source": "subscription",
-                "created_at": now.isoformat(),
-            },
-            {
-                "amount": 500,
-                "source": "purchase",
-                "created_at": now.isoformat(),
-            },
-        ]
-
-        mock_expiring_response = MagicMock()
-        mock_expiring_response.data = []
-
-        mock_supabase_client.table.side_effect = [
-            MagicMock().select().eq().execute(mock_org_response),
-            MagicMock().select().eq().execute(mock_tx_response),
-            MagicMock().select().eq().gt().execute(mock_expiring_response),
-        ]
+        expires_at = datetime.now(timezone.utc) + timedelta(days=10)
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={
+                "total_credits": 1500,
+                "subscription_credits": 1000,
+                "purchased_credits": 500,
+                "expiring_soon": 1000,
+                "expires_at": expires_at.isoformat(),
+            }
+        )
 
         result = await billing_service.get_credit_balance(sample_org_id)
 
         assert result.total_credits == 1500
         assert result.subscription_credits == 1000
         assert result.purchased_credits == 500
+        assert result.expiring_soon == 1000
+        assert result.expires_at == expires_at
+
+    @pytest.mark.asyncio
+    async def test_get_credit_balance_unknown_organization(
+        self,
+        billing_service,
+        mock_supabase_client,
+        sample_org_id,
+    ):
+        """Raises ValueError when the organization does not exist."""
+        rpc = mock_supabase_client.rpc
+        rpc.return_value.execute.return_value = MagicMock(data=None)
+
+        with pytest.raises(ValueError, match="not found"):
+            await billing_service.get_credit_balance(sample_org_id)
 
-    @pytest.mark.skip(reason="Complex mocking - requires credit_event, organization, and transaction table mocks")
     @pytest.mark.asyncio
     async def test_consume_credits_success(
         self,
@@ -625,48 +649,37 @@ class TestBillingServiceCreditManagement:
         mock_supabase_client,
         sample_org_id,
     ):
-        """Deducts credits and creates transaction."""
+        """Deducts credits and creates transaction in one atomic call."""
         from src.billing.models import CreditConsumptionRequest
 
-        now = datetime.now(timezone.utc)
+        transaction_id = uuid4()
         request = CreditConsumptionRequest(
             organization_id=sample_org_id,
             event_name="voice_call",
-            credits=50,
+            quantity=5,
+        )
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={
+                "success": True,
+                "credits_consumed": 50,
+                "balance_after": 950,
+                "transaction_id": str(transaction_id),
+            }
         )
-
-        mock_org_response = MagicMock()
-        mock_org_response.data = [{"credit_balance": 1000}]
-
-        mock_update_response = MagicMock()
-        mock_update_response.data = [{"credit_balance": 950}]
-
-        mock_tx_response = MagicMock()
-        mock_tx_response.data = [{
-            "id": str(uuid4()),
-            "organization_id": str(sample_org_id),
-            "transaction_type": "consumed",
-            "amount": -50,
-            "source": "consumption",
-            "source_id": "voice_call",
-            "expires_at": None,
-            "description": "Voice call",
-            "created_at": now.isoformat(),
-        }]
-
-        mock_supabase_client.table.side_effect = [
-            MagicMock().select().eq().execute(mock_org_response),
-            MagicMock().select().eq().execute(MagicMock(data=[{"id": uuid4(), "event_name": "voice_call", "cost_credits": 50}])),
-            MagicMock().update().eq().execute(mock_update_response),
-            MagicMock().insert().execute(mock_tx_response),
-        ]
 
         result = await billing_service.consume_credits(request)
 
         assert result.success is True
-        assert result.remaining_credits == 950
+        assert result.credits_consumed == 50
+        assert result.balance_after == 950
+        assert result.transaction_id == transaction_id
+        mock_supabase_client.rpc.assert_called_once()
+        name, params = mock_supabase_client.rpc.call_args.args
+        assert name == "consume_organization_credits"
+        assert params["p_organization_id"] == str(sample_org_id)
+        assert params["p_quantity"] == 5
+        mock_supabase_client.table.assert_not_called()
 
-    @pytest.mark.skip(reason="Complex mocking - requires credit_event, organization, and transaction table mocks")
     @pytest.mark.asyncio
     async def test_consume_credits_insufficient(
         self,
@@ -680,16 +693,661 @@ class TestBillingServiceCreditManagement:
         request = CreditConsumptionRequest(
             organization_id=sample_org_id,
             event_name="voice_call",
-            credits=50,
         )
-
-        mock_org_response = MagicMock()
-        mock_org_response.data = [{"credit_balance": 10}]
-
-        mock_supabase_client.table.return_value.select.return_value.eq.return_value.execute.return_value = mock_org_response
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={
+                "success": False,
+                "credits_consumed": 0,
+                "balance_after": 10,
+                "transaction_id": None,
+            }
+        )
 
         result = await billing_service.consume_credits(request)
 
         assert result.success is False
-        assert result.error == "Insufficient credits"
-        assert result.remaining_credits == 10
+        assert result.credits_consumed == 0
+        assert result.balance_after == 10
+
+    @pytest.mark.asyncio
+    async def test_consume_credits_unknown_event(
+        self,
+        billing_service,
+        mock_supabase_client,
+        sample_org_id,
+    ):
+        """Raises ValueError for an unknown or inactive event."""
+        from src.billing.models import CreditConsumptionRequest
+
+        request = CreditConsumptionRequest(
+            organization_id=sample_org_id,
+            event_name="missing",
+        )
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={"error": "Credit event 'missing' not found or inactive"}
+        )
+
+        with pytest.raises(ValueError, match="not found or inactive"):
+            await billing_service.consume_credits(request)
+
+        mock_supabase_client.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_consume_metered_usage_batch(
+        self,
+        billing_service,
+        mock_supabase_client,
+        sample_org_id,
+    ):
+        """Charges a batch of aggregated usage in one idempotent call."""
+        from src.billing.models import MeteredUsage
+
+        batch_id = uuid4()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={
+                "duplicate": False,
+                "results": [
+                    {
+                        "organization_id": str(sample_org_id),
+                        "event_name": "voice_second",
+                        "quantity": 60,
+                        "success": True,
+                        "credits_consumed": 60,
+                        "balance_after": 940,
+                        "transaction_id": str(uuid4()),
+                    }
+                ],
+            }
+        )
+
+        usage = MeteredUsage(
+            organization_id=sample_org_id, event_name="voice_second", quantity=60
+        )
+        duplicate, results = await billing_service.consume_metered_usage_batch(
+            batch_id, [usage]
+        )
+
+        assert duplicate is False
+        assert results[0].success is True
+        assert results[0].balance_after == 940
+        name, params = mock_supabase_client.rpc.call_args.args
+        assert name == "consume_organization_credits_batch"
+        assert params["p_batch_id"] == str(batch_id)
+        assert params["p_debits"] == [
+            {
+                "organization_id": str(sample_org_id),
+                "event_name": "voice_second",
+                "quantity": 60,
+            }
+        ]
+
+    @pytest.mark.asyncio
+    async def test_add_subscription_credits_atomic(
+        self,
+        billing_service,
+        mock_supabase_client,
+        sample_org_id,
+    ):
+        """Credits the balance and records the allocation in one atomic call."""
+        now = datetime.now(timezone.utc)
+        subscription_id = uuid4()
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data={
+                "id": str(uuid4()),
+                "organization_id": str(sample_org_id),
+                "transaction_type": "earned",
+                "amount": 500,
+                "balance_after": 1500,
+                "source": "subscription",
+                "source_id": str(subscription_id),
+                "credit_event_id": None,
+                "expires_at": None,
+                "stripe_payment_intent_id": None,
+                "description": "Subscription credits allocation",
+                "metadata": None,
+                "created_at": now.isoformat(),
+            }
+        )
+
+        result = await billing_service.add_subscription_credits(
+            sample_org_id, 500, subscription_id
+        )
+
+        assert isinstance(result, CreditTransaction)
+        assert result.balance_after == 1500
+        name, params = mock_supabase_client.rpc.call_args.args
+        assert name == "add_organization_credits"
+        assert params["p_amount"] == 500
+        assert params["p_transaction_type"] == "earned"
+        assert params["p_source_id"] == str(subscription_id)
+        mock_supabase_client.table.assert_not_called()
+
+
+class TestBillingServiceUsage:
+    """Test cases for usage rollups in summaries and usage stats."""
+
+    @pytest.fixture
+    def daily_usage(self, mock_supabase_client):
+        """Rollup rows for two voice days and one SMS day."""
+        mock_supabase_client.table.return_value.execute.return_value = MagicMock(
+            data=[
+                {
+                    "usage_date": "2026-03-01",
+                    "event_count": 120,
+                    "credits_consumed": 240,
+                    "credit_events": {"category": "voice"},
+                },
+                {
+                    "usage_date": "2026-03-02",
+                    "event_count": 30,
+                    "credits_consumed": 60,
+                    "credit_events": {"category": "voice"},
+                },
+                {
+                    "usage_date": "2026-03-02",
+                    "event_count": 5,
+                    "credits_consumed": 5,
+                    "credit_events": {"category": "sms"},
+                },
+            ]
+        )
+        return mock_supabase_client
+
+    @pytest.mark.asyncio
+    async def test_billing_summary_reads_rollup_and_runs_concurrently(
+        self, billing_service, daily_usage, sample_org_id
+    ):
+        """Subscription and balance are fetched concurrently; usage is the rollup."""
+        import asyncio
+
+        from src.billing.models import CreditBalance
+
+        period_start = datetime(2026, 3, 1, 15, 30, tzinfo=timezone.utc)
+        subscription = MagicMock(
+            current_period_start=period_start,
+            current_period_end=period_start + timedelta(days=30),
+            plan=None,
+        )
+        in_flight = 0
+        max_in_flight = 0
+
+        async def fetch(result):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            return result
+
+        billing_service.get_organization_subscription = lambda _: fetch(subscription)
+        billing_service.get_credit_balance = lambda _: fetch(
+            CreditBalance(
+                total_credits=700, subscription_credits=0,
+                purchased_credits=0, expiring_soon=0,
+            )
+        )
+
+        with patch("src.billing.service.OrganizationBillingSummary") as summary_model:
+            await billing_service.get_organization_billing_summary(sample_org_id)
+
+        assert max_in_flight == 2
+        kwargs = summary_model.call_args.kwargs
+        assert kwargs["current_period_usage"] == 305
+        assert kwargs["credit_balance"] == 700
+        daily_usage.table.assert_called_with("credit_usage_daily")
+        rollup = daily_usage.table.return_value
+        rollup.gte.assert_called_with("usage_date", "2026-03-01")
+
+    @pytest.mark.asyncio
+    async def test_usage_stats_by_category(
+        self, billing_service, daily_usage, sample_org_id
+    ):
+        """Usage stats aggregate rollup rows per event category."""
+        start = datetime(2026, 3, 1, tzinfo=timezone.utc)
+        end = datetime(2026, 3, 31, tzinfo=timezone.utc)
+
+        stats = await billing_service.get_usage_stats(sample_org_id, start, end)
+
+        assert stats.total_events == 155
+        assert stats.credits_consumed == 305
+        assert stats.events_by_category == {"voice": 150, "sms": 5}
+        assert stats.credits_by_category == {"voice": 300, "sms": 5}
+        rollup = daily_usage.table.return_value
+        rollup.lte.assert_called_with("usage_date", "2026-03-31")
+
+
+class _FakeTable:
+    """Minimal PostgREST table over a list of rows (eq/gt/in_/order/limit)."""
+
+    def __init__(self, rows, queries):
+        self.rows = rows
+        self.queries = queries
+
+    def select(self, *_):
+        self._filters, self._limit = [], None
+        return self
+
+    def eq(self, column, value):
+        self._filters.append(lambda row: row[column] == value)
+        return self
+
+    def gt(self, column, value):
+        self._filters.append(lambda row: row[column] > value)
+        return self
+
+    def in_(self, column, values):
+        self._filters.append(lambda row: row[column] in values)
+        return self
+
+    def order(self, column):
+        self._order = column
+        return self
+
+    def limit(self, limit):
+        self._limit = limit
+        return self
+
+    def execute(self):
+        self.queries.append(self)
+        rows = [row for row in self.rows if all(f(row) for f in self._filters)]
+        rows.sort(key=lambda row: row["id"])
+        return MagicMock(data=rows[: self._limit] if self._limit else rows)
+
+
+class TestBillingServiceTransactionReferences:
+    """Test cases for streaming validation of polymorphic references."""
+
+    @pytest.fixture
+    def ledger(self, billing_service):
+        """Ledger of 7 transactions over 2 credit events, one of them deleted."""
+        event, deleted_event = str(uuid4()), str(uuid4())
+        org = str(uuid4())
+        transactions = [
+            {
+                "id": f"00{i}",
+                "organization_id": org,
+                "source": "event_consumption",
+                "source_id": deleted_event if i == 2 else event,
+            }
+            for i in range(5)
+        ] + [
+            {
+                "id": "005",
+                "organization_id": org,
+                "source": "admin_adjustment",
+                "source_id": event,
+            },
+            {
+                "id": "006",
+                "organization_id": org,
+                "source": "purchase",
+                "source_id": None,
+            },
+        ]
+        tables = {
+            "credit_transactions": transactions,
+            "credit_events": [{"id": event}],
+        }
+        queries = {name: [] for name in tables}
+        billing_service.supabase = MagicMock()
+        billing_service.supabase.table.side_effect = lambda name: _FakeTable(
+            tables[name], queries[name]
+        )
+        return {"queries": queries, "event": event, "deleted_event": deleted_event}
+
+    @pytest.mark.asyncio
+    async def test_report_lists_invalid_and_orphaned_references(
+        self, billing_service, ledger
+    ):
+        """The report has the same shape and findings as a per-row check."""
+        report = await billing_service.validate_transaction_references(batch_size=3)
+
+        assert report["total_transactions"] == 7
+        assert report["valid_transactions"] == 4
+        assert [o["transaction_id"] for o in report["orphaned_references"]] == ["002"]
+        assert report["orphaned_references"][0]["referenced_table"] == "credit_events"
+        assert report["orphaned_references"][0]["error"] == (
+            f"Referenced credit_events record {ledger['deleted_event']} does not exist"
+        )
+        invalid = report["invalid_source_relationships"]
+        assert [i["transaction_id"] for i in invalid] == ["005", "006"]
+
+    @pytest.mark.asyncio
+    async def test_pages_by_keyset_with_one_lookup_per_table_and_page(
+        self, billing_service, ledger
+    ):
+        """References are checked in bulk, never once per transaction."""
+        progress = []
+
+        await billing_service.validate_transaction_references(
+            batch_size=3, on_progress=lambda report: progress.append(
+                report["total_transactions"]
+            )
+        )
+
+        # Pages of 3, 3 and 1 transactions
+        assert len(ledger["queries"]["credit_transactions"]) == 3
+        assert progress == [3, 6, 7]
+        # Both event ids are checked on the first page and remembered
+        assert len(ledger["queries"]["credit_events"]) == 1
+
+    @pytest.mark.asyncio
+    async def test_filters_by_organization(self, billing_service, ledger):
+        """Only the organization's transactions are validated."""
+        report = await billing_service.validate_transaction_references(
+            organization_id=uuid4()
+        )
+
+        assert report["total_transactions"] == 0
+        assert ledger["queries"]["credit_events"] == []
+
+
+class TestBillingServiceKeysetPagination:
+    """Test cases for cursor-paginated billing lists."""
+
+    @staticmethod
+    def _history_rows(org_id, n):
+        now = datetime.now(timezone.utc)
+        return [
+            {
+                "id": str(uuid4()),
+                "organization_id": str(org_id),
+                "amount": 1000 + i,
+                "status": BillingStatus.PAID.value,
+                "created_at": (now - timedelta(minutes=i)).isoformat(),
+                "updated_at": now.isoformat(),
+            }
+            for i in range(n)
+        ]
+
+    @pytest.mark.asyncio
+    async def test_billing_history_page_returns_next_cursor(
+        self, billing_service, mock_supabase_client, sample_org_id
+    ):
+        """A full page carries the cursor of its last row; the extra row is dropped."""
+        from shared.common.pagination import decode_cursor
+
+        rows = self._history_rows(sample_org_id, 3)
+        table = mock_supabase_client.table.return_value
+        table.execute.return_value = MagicMock(data=rows)
+
+        page = await billing_service.get_billing_history_page(sample_org_id, limit=2)
+
+        assert [str(item.id) for item in page.items] == [r["id"] for r in rows[:2]]
+        assert decode_cursor(page.next_cursor)[1] == rows[1]["id"]
+        table.limit.assert_called_with(3)
+        table.or_.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_billing_history_rejects_invalid_cursor(
+        self, billing_service, mock_supabase_client, sample_org_id
+    ):
+        """An invalid cursor is a ValueError, raised before any query."""
+        with pytest.raises(ValueError):
+            await billing_service.get_billing_history_page(
+                sample_org_id, cursor="garbage"
+            )
+
+        mock_supabase_client.table.return_value.execute.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_iter_organization_records_follows_cursors(
+        self, billing_service, mock_supabase_client, sample_org_id
+    ):
+        """Rows are streamed page by page until a short page."""
+        rows = self._history_rows(sample_org_id, 5)
+        table = mock_supabase_client.table.return_value
+        table.execute.side_effect = [
+            MagicMock(data=rows[0:3]),
+            MagicMock(data=rows[2:5]),
+            MagicMock(data=rows[4:5]),
+        ]
+
+        streamed = [
+            row
+            async for row in billing_service.iter_organization_records(
+                "billing_history", sample_org_id, page_size=2
+            )
+        ]
+
+        assert streamed == rows
+        assert table.execute.call_count == 3
+        assert table.or_.call_count == 2
+
+
+class TestBillingServiceCatalog:
+    """Test cases for the in-process plan, event and product catalog."""
+
+    @staticmethod
+    def _event(name, **fields):
+        now = datetime.now(timezone.utc).isoformat()
+        return {
+            "id": str(uuid4()),
+            "name": name,
+            "credit_cost": 10,
+            "category": "voice",
+            "is_active": True,
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        }
+
+    @pytest.mark.asyncio
+    async def test_reads_are_served_from_catalog(
+        self, billing_service, mock_supabase_client, sample_subscription_plan
+    ):
+        """The table is read once, then lookups are dict accesses."""
+        table = mock_supabase_client.table.return_value
+        table.execute.return_value = MagicMock(data=[sample_subscription_plan])
+
+        plans = await billing_service.get_subscription_plans()
+        plan = await billing_service.get_subscription_plan(plans[0].id)
+        await billing_service.get_subscription_plans(active_only=False)
+
+        assert plan is plans[0]
+        assert table.execute.call_count == 1
+        table.eq.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_concurrent_loads_share_one_query(
+        self, billing_service, mock_supabase_client
+    ):
+        """Concurrent readers of a cold table wait for the same load."""
+        table = mock_supabase_client.table.return_value
+        table.execute.return_value = MagicMock(data=[self._event("voice_call")])
+
+        events = await asyncio.gather(
+            *(billing_service.get_credit_event("voice_call") for _ in range(10))
+        )
+
+        assert all(event.name == "voice_call" for event in events)
+        assert table.execute.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_miss_reloads_once(self, billing_service, mock_supabase_client):
+        """An unknown name reloads the table once to find new events."""
+        table = mock_supabase_client.table.return_value
+        table.execute.side_effect = [
+            MagicMock(data=[self._event("voice_call")]),
+            MagicMock(data=[self._event("voice_call"), self._event("sms")]),
+        ]
+        await billing_service.get_credit_events()
+
+        assert (await billing_service.get_credit_event("sms")).name == "sms"
+        assert table.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_repeated_misses_do_not_reload(
+        self, billing_service, mock_supabase_client
+    ):
+        """Unknown names reload the table at most once per miss interval."""
+        table = mock_supabase_client.table.return_value
+        table.execute.return_value = MagicMock(data=[self._event("voice_call")])
+        await billing_service.get_credit_events()
+
+        for _ in range(5):
+            assert await billing_service.get_credit_event("nope") is None
+
+        assert table.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_update_replaces_cached_plan(
+        self, billing_service, mock_supabase_client, sample_subscription_plan
+    ):
+        """Updates are visible without reloading the catalog."""
+        table = mock_supabase_client.table.return_value
+        table.execute.side_effect = [
+            MagicMock(data=[sample_subscription_plan]),
+            MagicMock(data=[{**sample_subscription_plan, "is_active": False}]),
+        ]
+        await billing_service.get_subscription_plans()
+        version = billing_service.catalog.version
+
+        await billing_service.update_subscription_plan(
+            UUID(sample_subscription_plan["id"]),
+            SubscriptionPlanUpdate(is_active=False),
+        )
+
+        assert billing_service.catalog.version > version
+        assert await billing_service.get_subscription_plans() == []
+        assert table.execute.call_count == 2
+
+    @pytest.mark.asyncio
+    async def test_products_are_sorted_by_credit_amount(
+        self, billing_service, mock_supabase_client
+    ):
+        """Cached products are returned in credit amount order."""
+        now = datetime.now(timezone.utc).isoformat()
+
+        def product(credit_amount):
+            return {
+                "id": str(uuid4()),
+                "name": f"{credit_amount} credits",
+                "stripe_price_id": f"price_{credit_amount}",
+                "stripe_product_id": f"prod_{credit_amount}",
+                "credit_amount": credit_amount,
+                "price_amount": credit_amount * 2,
+                "created_at": now,
+                "updated_at": now,
+            }
+
+        table = mock_supabase_client.table.return_value
+        table.execute.return_value = MagicMock(
+            data=[product(1000), product(100), product(500)]
+        )
+
+        products = await billing_service.get_credit_products()
+
+        assert [p.credit_amount for p in products] == [100, 500, 1000]
+        assert all(isinstance(p, CreditProduct) for p in products)
+
+    def test_load_overtaken_by_change_is_discarded(self, billing_service):
+        """A load that read the table before a change does not overwrite it."""
+        catalog = billing_service.catalog
+        version = catalog.table_version("credit_events")
+        catalog.invalidate("credit_events")
+
+        assert catalog.load("credit_events", [], version) is False
+        assert catalog.is_stale("credit_events")
+        assert catalog.load(
+            "credit_events", [], catalog.table_version("credit_events")
+        )
+        assert not catalog.is_stale("credit_events")
+
+
+class TestBillingServiceBillingHistoryUpsert:
+    """Test cases for idempotent billing history writes from webhooks."""
+
+    @staticmethod
+    def _history(org_id, **fields):
+        now = datetime.now(timezone.utc).isoformat()
+        row = {
+            "id": str(uuid4()),
+            "organization_id": str(org_id),
+            "amount": 4900,
+            "currency": "usd",
+            "status": BillingStatus.PAID.value,
+            "created_at": now,
+            "updated_at": now,
+        }
+        row.update(fields)
+        return row
+
+    @pytest.mark.asyncio
+    async def test_new_invoice_is_inserted(
+        self, billing_service, mock_supabase_client, sample_org_id
+    ):
+        """An invoice without an entry gets one."""
+        from src.billing.models import BillingHistoryCreate
+
+        table = mock_supabase_client.table.return_value
+        inserted = self._history(sample_org_id, stripe_invoice_id="in_1")
+        table.execute.side_effect = [MagicMock(data=[]), MagicMock(data=[inserted])]
+
+        await billing_service.upsert_billing_history(
+            BillingHistoryCreate(
+                organization_id=sample_org_id,
+                stripe_invoice_id="in_1",
+                amount=4900,
+                status=BillingStatus.PAID,
+            )
+        )
+
+        table.insert.assert_called_once()
+        table.update.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_retried_invoice_updates_its_entry(
+        self, billing_service, mock_supabase_client, sample_org_id
+    ):
+        """A retried invoice event updates the entry instead of inserting again."""
+        from src.billing.models import BillingHistoryCreate
+
+        table = mock_supabase_client.table.return_value
+        existing = self._history(
+            sample_org_id, stripe_invoice_id="in_1", status=BillingStatus.FAILED.value
+        )
+        table.execute.side_effect = [
+            MagicMock(data=[existing]),
+            MagicMock(data=[{**existing, "status": BillingStatus.PAID.value}]),
+        ]
+
+        history = await billing_service.upsert_billing_history(
+            BillingHistoryCreate(
+                organization_id=sample_org_id,
+                stripe_invoice_id="in_1",
+                amount=4900,
+                status=BillingStatus.PAID,
+            )
+        )
+
+        assert history.status == BillingStatus.PAID
+        table.insert.assert_not_called()
+        table.update.assert_called_once()
+        table.eq.assert_called_with("id", existing["id"])
+
+    @pytest.mark.asyncio
+    async def test_payment_intent_of_an_invoice_is_skipped(
+        self, billing_service, mock_supabase_client, sample_org_id
+    ):
+        """A payment intent event keeps the entry of the invoice it paid."""
+        from src.billing.models import BillingHistoryCreate
+
+        table = mock_supabase_client.table.return_value
+        existing = self._history(
+            sample_org_id, stripe_invoice_id="in_1", stripe_payment_intent_id="pi_1"
+        )
+        table.execute.side_effect = [MagicMock(data=[existing])]
+
+        history = await billing_service.upsert_billing_history(
+            BillingHistoryCreate(
+                organization_id=sample_org_id,
+                stripe_payment_intent_id="pi_1",
+                amount=4900,
+                status=BillingStatus.PAID,
+            )
+        )
+
+        assert str(history.id) == existing["id"]
+        table.insert.assert_not_called()
+        table.update.assert_not_called()
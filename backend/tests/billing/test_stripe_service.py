@@ -0,0 +1,169 @@
+"""
+Stripe service tests.
+"""
+
+import asyncio
+import threading
+from types import SimpleNamespace
+from unittest.mock import MagicMock, patch
+
+import pytest
+from src.billing.stripe_service import StripeService
+
+
+@pytest.fixture
+def stripe_service():
+    return StripeService()
+
+
+def _page(ids, has_more):
+    return SimpleNamespace(
+        data=[SimpleNamespace(id=invoice_id) for invoice_id in ids], has_more=has_more
+    )
+
+
+class TestStripeServiceCalls:
+    """Test cases for running SDK calls off the event loop."""
+
+    @pytest.mark.asyncio
+    async def test_sdk_calls_run_in_stripe_thread_pool(self, stripe_service):
+        """Test the blocking SDK call does not run on the event loop thread."""
+        threads = []
+
+        def retrieve(subscription_id):
+            threads.append(threading.current_thread().name)
+            return SimpleNamespace(id=subscription_id)
+
+        with patch("stripe.Subscription.retrieve", side_effect=retrieve):
+            subscription = await stripe_service.get_subscription("sub_1")
+
+        assert subscription.id == "sub_1"
+        assert threads[0].startswith("stripe")
+        assert threads[0] != threading.current_thread().name
+
+    @pytest.mark.asyncio
+    async def test_slow_call_does_not_block_event_loop(self, stripe_service):
+        """Test other coroutines keep running while a Stripe call is in flight."""
+        release = threading.Event()
+        ticks = 0
+
+        def retrieve(subscription_id):
+            release.wait(timeout=5)
+            return SimpleNamespace(id=subscription_id)
+
+        async def ticker():
+            nonlocal ticks
+            while not release.is_set():
+                ticks += 1
+                if ticks == 5:
+                    release.set()
+                await asyncio.sleep(0.001)
+
+        with patch("stripe.Subscription.retrieve", side_effect=retrieve):
+            await asyncio.gather(stripe_service.get_subscription("sub_1"), ticker())
+
+        assert ticks >= 5
+
+
+class TestStripeServiceCache:
+    """Test cases for cached catalog and customer lookups."""
+
+    @pytest.mark.asyncio
+    async def test_customer_is_cached(self, stripe_service):
+        """Test repeated and concurrent lookups hit Stripe once."""
+        with patch(
+            "stripe.Customer.retrieve", return_value=SimpleNamespace(id="cus_1")
+        ) as retrieve:
+            customers = await asyncio.gather(
+                *(stripe_service.get_customer("cus_1") for _ in range(5))
+            )
+            await stripe_service.get_customer("cus_1")
+
+        assert retrieve.call_count == 1
+        assert {customer.id for customer in customers} == {"cus_1"}
+
+    @pytest.mark.asyncio
+    async def test_update_customer_refreshes_cache(self, stripe_service):
+        """Test an update replaces the cached customer."""
+        with patch(
+            "stripe.Customer.retrieve",
+            return_value=SimpleNamespace(id="cus_1", name="Old"),
+        ), patch(
+            "stripe.Customer.modify",
+            return_value=SimpleNamespace(id="cus_1", name="New"),
+        ):
+            await stripe_service.get_customer("cus_1")
+            await stripe_service.update_customer("cus_1", name="New")
+            customer = await stripe_service.get_customer("cus_1")
+
+        assert customer.name == "New"
+
+    @pytest.mark.asyncio
+    async def test_prices_and_products_are_cached(self, stripe_service):
+        """Test catalog objects are fetched once per id."""
+        with patch(
+            "stripe.Price.retrieve", side_effect=lambda i: SimpleNamespace(id=i)
+        ) as price, patch(
+            "stripe.Product.retrieve", side_effect=lambda i: SimpleNamespace(id=i)
+        ) as product:
+            for _ in range(3):
+                await stripe_service.get_price("price_1")
+                await stripe_service.get_product("prod_1")
+            await stripe_service.get_price("price_2")
+
+        assert price.call_count == 2
+        assert product.call_count == 1
+
+    @pytest.mark.asyncio
+    async def test_failed_lookup_is_not_cached(self, stripe_service):
+        """Test errors are raised and the next lookup retries."""
+        import stripe
+
+        with patch(
+            "stripe.Price.retrieve",
+            side_effect=[
+                stripe.error.APIConnectionError("down"),
+                SimpleNamespace(id="p"),
+            ],
+        ):
+            with pytest.raises(stripe.error.StripeError):
+                await stripe_service.get_price("p")
+            assert (await stripe_service.get_price("p")).id == "p"
+
+
+class TestListCustomerInvoices:
+    """Test cases for streaming invoices."""
+
+    @pytest.mark.asyncio
+    async def test_streams_every_page(self, stripe_service):
+        """Test pages are fetched with starting_after until has_more is false."""
+        pages = [_page(["in_1", "in_2"], True), _page(["in_3"], False)]
+        with patch("stripe.Invoice.list", side_effect=pages) as list_invoices:
+            invoices = [
+                invoice.id
+                async for invoice in stripe_service.list_customer_invoices(
+                    "cus_1", page_size=2
+                )
+            ]
+
+        assert invoices == ["in_1", "in_2", "in_3"]
+        assert list_invoices.call_args_list[1].kwargs == {
+            "customer": "cus_1",
+            "limit": 2,
+            "starting_after": "in_2",
+        }
+
+    @pytest.mark.asyncio
+    async def test_stops_at_limit_without_fetching_more(self, stripe_service):
+        """Test no page beyond the limit is requested."""
+        list_invoices = MagicMock(return_value=_page(["in_1", "in_2"], True))
+        with patch("stripe.Invoice.list", list_invoices):
+            invoices = [
+                invoice.id
+                async for invoice in stripe_service.list_customer_invoices(
+                    "cus_1", limit=2, page_size=2
+                )
+            ]
+
+        assert invoices == ["in_1", "in_2"]
+        assert list_invoices.call_count == 1
@@ -0,0 +1,443 @@
+"""
+Stripe webhook inbox tests.
+"""
+
+import asyncio
+import json
+from datetime import datetime, timedelta, timezone
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+import stripe
+from fastapi import HTTPException
+from src.billing.models import StripeWebhookInboxEvent, WebhookEventStatus
+from src.billing.routes import stripe_webhook
+from src.billing.service import BillingService
+from src.billing.webhook_handler import (
+    EVENT_HANDLERS,
+    construct_stripe_webhook_event,
+    dispatch_stripe_event,
+)
+from src.billing.webhook_inbox import StripeWebhookInbox
+
+
+@pytest.fixture
+def billing_service(mock_supabase_client):
+    with patch("src.billing.service.supabase_config") as mock_config:
+        mock_config.client = mock_supabase_client
+        yield BillingService()
+
+
+def _inbox(store, dispatch, **overrides):
+    options = dict(
+        workers=4, max_attempts=3, retry_base_seconds=10, poll_interval_seconds=60
+    )
+    options.update(overrides)
+    return StripeWebhookInbox(billing=store, dispatch=dispatch, **options)
+
+
+def _request(payload, signature):
+    request = MagicMock()
+    request.body = AsyncMock(return_value=payload)
+    request.headers = {"stripe-signature": signature} if signature else {}
+    return request
+
+
+class TestWebhookHandler:
+    """Test cases for verifying and dispatching Stripe events."""
+
+    def test_construct_verifies_signature(
+        self, stripe_webhook_secret, signed_stripe_event
+    ):
+        """Test a correctly signed payload is returned as the raw event dict."""
+        event, payload, signature = signed_stripe_event(
+            "invoice.payment_succeeded", "cus_1"
+        )
+
+        assert construct_stripe_webhook_event(payload, signature) == event
+
+    def test_construct_rejects_tampered_payload(
+        self, stripe_webhook_secret, signed_stripe_event
+    ):
+        """Test a payload that does not match its signature is rejected."""
+        _, payload, signature = signed_stripe_event(
+            "invoice.payment_succeeded", "cus_1"
+        )
+
+        with pytest.raises(stripe.error.SignatureVerificationError):
+            construct_stripe_webhook_event(
+                payload.replace(b"cus_1", b"cus_2"), signature
+            )
+
+    def test_construct_requires_secret(self, signed_stripe_event):
+        """Test events are not accepted without a configured webhook secret."""
+        _, payload, signature = signed_stripe_event("invoice.payment_succeeded")
+
+        with patch("src.billing.webhook_handler.settings") as settings:
+            settings.stripe_webhook_secret = None
+            with pytest.raises(ValueError, match="not configured"):
+                construct_stripe_webhook_event(payload, signature)
+
+    @pytest.mark.asyncio
+    async def test_dispatch_routes_by_type(self):
+        """Test events reach the handler registered for their type."""
+        handler = AsyncMock()
+        event = {"type": "invoice.payment_failed", "data": {"object": {}}}
+
+        with patch.dict(EVENT_HANDLERS, {"invoice.payment_failed": handler}):
+            await dispatch_stripe_event(event)
+
+        handler.assert_awaited_once_with(event)
+
+    @pytest.mark.asyncio
+    async def test_dispatch_ignores_unhandled_types(self):
+        """Test unknown event types succeed without a handler."""
+        await dispatch_stripe_event(
+            {"type": "customer.created", "data": {"object": {}}}
+        )
+
+    @pytest.mark.asyncio
+    async def test_retried_invoice_payment_does_not_allocate_credits_twice(self):
+        """Test a retried invoice event does not allocate its credits again."""
+        from src.billing.webhook_handler import handle_invoice_payment_succeeded
+
+        organization_id = "00000000-0000-0000-0000-000000000001"
+        event = {
+            "type": "invoice.payment_succeeded",
+            "created": 1700000000,
+            "data": {
+                "object": {
+                    "id": "in_1",
+                    "customer": "cus_1",
+                    "subscription": "sub_1",
+                    "amount_paid": 4900,
+                    "currency": "usd",
+                }
+            },
+        }
+        subscription = {
+            "metadata": {"organization_id": organization_id},
+            "items": {"data": [{"price": {"id": "price_1"}}]},
+        }
+        plan = MagicMock(stripe_price_id="price_1", included_credits=1000)
+
+        with patch("src.billing.webhook_handler.stripe_service") as stripe_mock, patch(
+            "src.billing.webhook_handler.billing_service"
+        ) as billing_mock:
+            stripe_mock.get_subscription = AsyncMock(return_value=subscription)
+            billing_mock.upsert_billing_history = AsyncMock()
+            billing_mock.get_subscription_plans = AsyncMock(return_value=[plan])
+            billing_mock.get_organization_subscription = AsyncMock(return_value=None)
+            billing_mock.add_subscription_credits = AsyncMock()
+            billing_mock.has_invoice_subscription_credits = AsyncMock(
+                side_effect=[False, True]
+            )
+
+            await handle_invoice_payment_succeeded(event)
+            await handle_invoice_payment_succeeded(event)
+
+        assert billing_mock.upsert_billing_history.await_count == 2
+        billing_mock.add_subscription_credits.assert_awaited_once()
+        assert (
+            billing_mock.add_subscription_credits.call_args.kwargs["stripe_invoice_id"]
+            == "in_1"
+        )
+
+
+class TestStripeWebhookRoute:
+    """Test cases for the webhook endpoint."""
+
+    @pytest.mark.asyncio
+    async def test_stores_event_before_acknowledging(
+        self, stripe_webhook_secret, signed_stripe_event
+    ):
+        """Test a verified event is enqueued and acknowledged."""
+        event, payload, signature = signed_stripe_event(
+            "checkout.session.completed", "cus_1"
+        )
+
+        with patch(
+            "src.billing.routes.enqueue_stripe_event", AsyncMock(return_value=True)
+        ) as enqueue:
+            response = await stripe_webhook(_request(payload, signature))
+
+        enqueue.assert_awaited_once_with(event)
+        assert json.loads(response.body) == {"status": "success", "duplicate": False}
+
+    @pytest.mark.asyncio
+    async def test_acknowledges_duplicate_delivery(
+        self, stripe_webhook_secret, signed_stripe_event
+    ):
+        """Test an event already in the inbox is acknowledged as a duplicate."""
+        _, payload, signature = signed_stripe_event(
+            "checkout.session.completed", "cus_1"
+        )
+
+        with patch(
+            "src.billing.routes.enqueue_stripe_event", AsyncMock(return_value=False)
+        ):
+            response = await stripe_webhook(_request(payload, signature))
+
+        assert json.loads(response.body)["duplicate"] is True
+
+    @pytest.mark.asyncio
+    async def test_rejects_invalid_signature(
+        self, stripe_webhook_secret, signed_stripe_event
+    ):
+        """Test a bad signature is rejected without touching the inbox."""
+        _, payload, _ = signed_stripe_event("checkout.session.completed", "cus_1")
+
+        with patch("src.billing.routes.enqueue_stripe_event", AsyncMock()) as enqueue:
+            with pytest.raises(HTTPException) as exc_info:
+                await stripe_webhook(_request(payload, "t=1,v1=bad"))
+
+        assert exc_info.value.status_code == 400
+        enqueue.assert_not_awaited()
+
+    @pytest.mark.asyncio
+    async def test_storage_failure_is_not_acknowledged(
+        self, stripe_webhook_secret, signed_stripe_event
+    ):
+        """Test Stripe gets an error (and retries) when the event is not stored."""
+        _, payload, signature = signed_stripe_event(
+            "checkout.session.completed", "cus_1"
+        )
+
+        with patch(
+            "src.billing.routes.enqueue_stripe_event",
+            AsyncMock(side_effect=Exception("database unavailable")),
+        ):
+            with pytest.raises(HTTPException) as exc_info:
+                await stripe_webhook(_request(payload, signature))
+
+        assert exc_info.value.status_code == 500
+
+
+class TestBillingServiceWebhookInbox:
+    """Test cases for the inbox database calls."""
+
+    @pytest.mark.asyncio
+    async def test_enqueue_passes_event_and_customer(
+        self, billing_service, mock_supabase_client, signed_stripe_event
+    ):
+        """Test the event is stored under its id with its Stripe customer."""
+        event, _, _ = signed_stripe_event("invoice.payment_succeeded", "cus_42")
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=True
+        )
+
+        inserted = await billing_service.enqueue_webhook_event(event)
+
+        assert inserted is True
+        name, params = mock_supabase_client.rpc.call_args.args
+        assert name == "enqueue_stripe_webhook_event"
+        assert params["p_event_id"] == event["id"]
+        assert params["p_customer_id"] == "cus_42"
+        assert params["p_payload"] == event
+
+    @pytest.mark.asyncio
+    async def test_enqueue_customer_event_uses_object_id(
+        self, billing_service, mock_supabase_client, signed_stripe_event
+    ):
+        """Test customer.* events are ordered under the customer they describe."""
+        event, _, _ = signed_stripe_event("customer.updated", id="cus_7")
+        mock_supabase_client.rpc.return_value.execute.return_value = MagicMock(
+            data=False
+        )
+
+        inserted = await billing_service.enqueue_webhook_event(event)
+
+        assert inserted is False
+        assert mock_supabase_client.rpc.call_args.args[1]["p_customer_id"] == "cus_7"
+
+    @pytest.mark.asyncio
+    async def test_complete_is_fenced_by_attempts(
+        self, billing_service, mock_supabase_client
+    ):
+        """Test completing a claim only updates the attempt that was claimed."""
+        event = StripeWebhookInboxEvent(
+            event_id="evt_1",
+            sequence=1,
+            event_type="invoice.payment_succeeded",
+            stripe_created_at=datetime.now(timezone.utc),
+            payload={},
+            status=WebhookEventStatus.PROCESSING,
+            attempts=2,
+        )
+        table = mock_supabase_client.table.return_value
+
+        completed = await billing_service.complete_webhook_event(event)
+
+        assert completed is False
+        table.eq.assert_any_call("event_id", "evt_1")
+        table.eq.assert_any_call("status", "processing")
+        table.eq.assert_any_call("attempts", 2)
+
+    @pytest.mark.asyncio
+    async def test_replay_requires_a_filter(self, billing_service):
+        """Test replaying never resets the whole inbox by accident."""
+        with pytest.raises(ValueError):
+            await billing_service.replay_webhook_events()
+
+
+class TestStripeWebhookInbox:
+    """Test cases for the worker pool."""
+
+    @pytest.mark.asyncio
+    async def test_duplicate_event_is_applied_once(
+        self, webhook_inbox_store, signed_stripe_event
+    ):
+        """Test a redelivered event id is stored and applied only once."""
+        dispatch = AsyncMock()
+        event, _, _ = signed_stripe_event("checkout.session.completed", "cus_1")
+
+        assert await webhook_inbox_store.enqueue_webhook_event(event) is True
+        assert await webhook_inbox_store.enqueue_webhook_event(event) is False
+        applied = await _inbox(webhook_inbox_store, dispatch).drain()
+
+        assert applied == 1
+        dispatch.assert_awaited_once_with(event)
+        assert (
+            webhook_inbox_store.events[event["id"]].status
+            == WebhookEventStatus.SUCCEEDED
+        )
+
+    @pytest.mark.asyncio
+    async def test_events_of_a_customer_are_applied_in_order(
+        self, webhook_inbox_store, signed_stripe_event
+    ):
+        """Test a customer's events never overlap and follow creation order."""
+        applied = {}
+        running = set()
+
+        async def dispatch(event):
+            customer = event["data"]["object"]["customer"]
+            assert customer not in running
+            running.add(customer)
+            await asyncio.sleep(0.001)
+            running.discard(customer)
+            applied.setdefault(customer, []).append(event["created"])
+
+        created = int(datetime.now(timezone.utc).timestamp()) - 100
+        for i in range(30):
+            # Delivered out of creation order
+            event, _, _ = signed_stripe_event(
+                "invoice.payment_succeeded", f"cus_{i % 3}", created=created + 30 - i
+            )
+            await webhook_inbox_store.enqueue_webhook_event(event)
+
+        await _inbox(webhook_inbox_store, dispatch).drain()
+
+        assert set(applied) == {"cus_0", "cus_1", "cus_2"}
+        for timestamps in applied.values():
+            assert timestamps == sorted(timestamps)
+
+    @pytest.mark.asyncio
+    async def test_failure_is_retried_with_backoff(
+        self, webhook_inbox_store, signed_stripe_event
+    ):
+        """Test a failed event is rescheduled and holds back the customer's next."""
+        dispatch = AsyncMock(side_effect=[Exception("Stripe API timeout"), None])
+        first, _, _ = signed_stripe_event(
+            "invoice.payment_succeeded", "cus_1", created=1
+        )
+        second, _, _ = signed_stripe_event(
+            "invoice.payment_succeeded", "cus_1", created=2
+        )
+        await webhook_inbox_store.enqueue_webhook_event(first)
+        await webhook_inbox_store.enqueue_webhook_event(second)
+
+        applied = await _inbox(webhook_inbox_store, dispatch).drain()
+
+        assert applied == 0
+        stored = webhook_inbox_store.events[first["id"]]
+        assert stored.status == WebhookEventStatus.PENDING
+        assert stored.last_error == "Stripe API timeout"
+        assert stored.next_attempt_at > datetime.now(timezone.utc) + timedelta(
+            seconds=5
+        )
+        assert webhook_inbox_store.events[second["id"]].attempts == 0
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(
+        self, webhook_inbox_store, signed_stripe_event
+    ):
+        """Test an event failing max_attempts times is failed and unblocks others."""
+        failing, _, _ = signed_stripe_event(
+            "invoice.payment_succeeded", "cus_1", created=1
+        )
+        following, _, _ = signed_stripe_event(
+            "invoice.payment_succeeded", "cus_1", created=2
+        )
+        await webhook_inbox_store.enqueue_webhook_event(failing)
+        await webhook_inbox_store.enqueue_webhook_event(following)
+
+        async def dispatch(event):
+            if event["id"] == failing["id"]:
+                raise Exception("bad payload")
+
+        inbox = _inbox(webhook_inbox_store, dispatch, max_attempts=3)
+        for _ in range(3):
+            # Make the scheduled retry due immediately
+            webhook_inbox_store.events[failing["id"]].next_attempt_at = datetime.now(
+                timezone.utc
+            )
+            await inbox.drain()
+
+        assert (
+            webhook_inbox_store.events[failing["id"]].status
+            == WebhookEventStatus.FAILED
+        )
+        assert webhook_inbox_store.events[failing["id"]].attempts == 3
+        assert (
+            webhook_inbox_store.events[following["id"]].status
+            == WebhookEventStatus.SUCCEEDED
+        )
+
+    def test_retry_delay_doubles_up_to_cap(self, webhook_inbox_store):
+        """Test exponential backoff between attempts."""
+        inbox = _inbox(webhook_inbox_store, AsyncMock(), retry_base_seconds=10)
+
+        assert [inbox.retry_delay(n) for n in (1, 2, 3)] == [10, 20, 40]
+        assert inbox.retry_delay(20) == 3600
+
+    @pytest.mark.asyncio
+    async def test_expired_lease_is_claimed_again(
+        self, webhook_inbox_store, signed_stripe_event
+    ):
+        """Test an event whose worker died is processed after its lease expires."""
+        dispatch = AsyncMock()
+        event, _, _ = signed_stripe_event("invoice.payment_succeeded", "cus_1")
+        await webhook_inbox_store.enqueue_webhook_event(event)
+        (lost,) = await webhook_inbox_store.claim_webhook_events(1, lease_seconds=0)
+
+        applied = await _inbox(webhook_inbox_store, dispatch).drain()
+
+        assert applied == 1
+        stored = webhook_inbox_store.events[event["id"]]
+        assert stored.status == WebhookEventStatus.SUCCEEDED
+        assert stored.attempts == 2
+        # The first worker's late completion is fenced out
+        assert await webhook_inbox_store.complete_webhook_event(lost) is False
+
+    @pytest.mark.asyncio
+    async def test_running_pool_processes_enqueued_events(
+        self, webhook_inbox_store, signed_stripe_event
+    ):
+        """Test the started pool picks up events when woken and drains on stop."""
+        done = asyncio.Event()
+        dispatch = AsyncMock(side_effect=lambda event: done.set())
+        inbox = _inbox(webhook_inbox_store, dispatch)
+        await inbox.start()
+
+        event, _, _ = signed_stripe_event("invoice.payment_succeeded", "cus_1")
+        await webhook_inbox_store.enqueue_webhook_event(event)
+        inbox.wake()
+        await asyncio.wait_for(done.wait(), timeout=5)
+        await inbox.stop()
+
+        assert (
+            webhook_inbox_store.events[event["id"]].status
+            == WebhookEventStatus.SUCCEEDED
+        )
+        assert inbox.running is False
@@ -5,12 +5,16 @@ Note: Python paths are configured via test-env.sh (PYTHONPATH environment variab
 """
 import sys
 import os
+import hashlib
+import hmac
+import json
+import time
 from pathlib import Path
 
 import pytest
 from unittest.mock import MagicMock, AsyncMock, patch
-from uuid import uuid4
-from datetime import datetime, timezone
+from uuid import UUID, uuid4
+from datetime import datetime, timedelta, timezone
 
 @pytest.fixture
 def sample_user_id():
@@ -63,6 +67,7 @@ def mock_supabase_client():
     table_mock = MagicMock()
     table_mock.select.return_value = table_mock
     table_mock.insert.return_value = table_mock
+    table_mock.upsert.return_value = table_mock
     table_mock.update.return_value = table_mock
     table_mock.delete.return_value = table_mock
     table_mock.eq.return_value = table_mock
@@ -73,6 +78,10 @@ def mock_supabase_client():
     table_mock.gte.return_value = table_mock
     table_mock.lte.return_value = table_mock
     table_mock.is_.return_value = table_mock
+    table_mock.neq.return_value = table_mock
+    table_mock.in_.return_value = table_mock
+    table_mock.or_.return_value = table_mock
+    table_mock.gt.return_value = table_mock
     table_mock.execute.return_value = MagicMock(data=[])
     client.table.return_value = table_mock
 
@@ -110,3 +119,269 @@ def mock_resend():
     with patch('resend.Emails.send') as mock:
         mock.return_value = {"id": "test-email-id"}
         yield mock
+
+
+STRIPE_TEST_WEBHOOK_SECRET = "whsec_test_secret"
+
+
+@pytest.fixture
+def stripe_webhook_secret():
+    """Configure the webhook handler with STRIPE_TEST_WEBHOOK_SECRET."""
+    with patch("src.billing.webhook_handler.settings") as settings:
+        settings.stripe_webhook_secret = STRIPE_TEST_WEBHOOK_SECRET
+        yield STRIPE_TEST_WEBHOOK_SECRET
+
+
+@pytest.fixture
+def signed_stripe_event():
+    """Build Stripe webhook events signed like Stripe does.
+
+    Returns a factory taking (event_type, customer_id, **object_fields) and
+    returning (event, payload, signature) for STRIPE_TEST_WEBHOOK_SECRET.
+    """
+    counter = iter(range(1, 10**9))
+
+    def factory(event_type, customer_id=None, created=None, **object_fields):
+        n = next(counter)
+        data_object = {"id": f"obj_{n}", "object": event_type.split(".")[0]}
+        if customer_id:
+            data_object["customer"] = customer_id
+        data_object.update(object_fields)
+        event = {
+            "id": f"evt_test_{n}",
+            "object": "event",
+            "type": event_type,
+            "created": created or int(time.time()),
+            "data": {"object": data_object},
+        }
+        payload = json.dumps(event).encode()
+        timestamp = int(time.time())
+        digest = hmac.new(
+            STRIPE_TEST_WEBHOOK_SECRET.encode(),
+            f"{timestamp}.".encode() + payload,
+            hashlib.sha256,
+        ).hexdigest()
+        return event, payload, f"t={timestamp},v1={digest}"
+
+    return factory
+
+
+class FakeWebhookInboxStore:
+    """In-memory stand-in for the BillingService webhook inbox methods.
+
+    Mirrors claim_stripe_webhook_events: an event is only claimed once every
+    earlier unfinished event of the same customer has finished.
+    """
+
+    def __init__(self):
+        self.events = {}
+        self._sequence = 0
+
+    async def enqueue_webhook_event(self, event):
+        from src.billing.models import StripeWebhookInboxEvent
+        from src.billing.service import _webhook_event_customer
+
+        if event["id"] in self.events:
+            return False
+        self._sequence += 1
+        self.events[event["id"]] = StripeWebhookInboxEvent(
+            event_id=event["id"],
+            sequence=self._sequence,
+            event_type=event["type"],
+            customer_id=_webhook_event_customer(event),
+            stripe_created_at=datetime.fromtimestamp(event["created"], tz=timezone.utc),
+            payload=event,
+            next_attempt_at=datetime.now(timezone.utc),
+        )
+        return True
+
+    async def claim_webhook_events(self, limit, lease_seconds):
+        from src.billing.models import WebhookEventStatus
+
+        now = datetime.now(timezone.utc)
+        active = (WebhookEventStatus.PENDING, WebhookEventStatus.PROCESSING)
+        unfinished = sorted(
+            (e for e in self.events.values() if e.status in active),
+            key=lambda e: (e.stripe_created_at, e.sequence),
+        )
+        blocked, claimed = set(), []
+        for event in unfinished:
+            if event.customer_id in blocked:
+                continue
+            if event.customer_id:
+                blocked.add(event.customer_id)
+            if event.status == WebhookEventStatus.PENDING:
+                due = event.next_attempt_at <= now
+            else:
+                due = event.locked_until <= now
+            if due and len(claimed) < limit:
+                event.status = WebhookEventStatus.PROCESSING
+                event.attempts += 1
+                event.locked_until = now + timedelta(seconds=lease_seconds)
+                claimed.append(event.model_copy())
+        return claimed
+
+    async def complete_webhook_event(self, event):
+        from src.billing.models import WebhookEventStatus
+
+        now = datetime.now(timezone.utc)
+        return self._finish(
+            event, status=WebhookEventStatus.SUCCEEDED, processed_at=now
+        )
+
+    async def fail_webhook_event(self, event, error, retry_at=None):
+        from src.billing.models import WebhookEventStatus
+
+        if retry_at is None:
+            return self._finish(
+                event, status=WebhookEventStatus.FAILED, last_error=error
+            )
+        return self._finish(
+            event,
+            status=WebhookEventStatus.PENDING,
+            next_attempt_at=retry_at,
+            last_error=error,
+        )
+
+    def _finish(self, event, **update):
+        from src.billing.models import WebhookEventStatus
+
+        stored = self.events[event.event_id]
+        if (
+            stored.status != WebhookEventStatus.PROCESSING
+            or stored.attempts != event.attempts
+        ):
+            return False
+        for field, value in update.items():
+            setattr(stored, field, value)
+        stored.locked_until = None
+        return True
+
+
+@pytest.fixture
+def webhook_inbox_store():
+    """In-memory Stripe webhook inbox."""
+    return FakeWebhookInboxStore()
+
+
+class FakeResendTransport:
+    """In-memory stand-in for ResendTransport.
+
+    Like Resend, a message sent again with the same idempotency key returns
+    the original message id and is not delivered twice. Errors queued in
+    failures[recipient] are raised, one per attempt, before delivering; in
+    a batch they fail the whole batch.
+    """
+
+    def __init__(self, latency_seconds=0.0):
+        self.latency_seconds = latency_seconds
+        self.delivered = []
+        self.failures = {}
+        self.requests = 0
+        self._sent = {}
+
+    async def send(self, message, idempotency_key):
+        import asyncio
+
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        self.requests += 1
+        errors = self.failures.get(message["to"][0])
+        if errors:
+            raise errors.pop(0)
+        if idempotency_key not in self._sent:
+            self._sent[idempotency_key] = f"re_{uuid4().hex}"
+            self.delivered.append(message)
+        return self._sent[idempotency_key]
+
+    async def send_batch(self, messages, idempotency_key):
+        import asyncio
+
+        if self.latency_seconds:
+            await asyncio.sleep(self.latency_seconds)
+        self.requests += 1
+        for message in messages:
+            errors = self.failures.get(message["to"][0])
+            if errors:
+                raise errors.pop(0)
+        if idempotency_key not in self._sent:
+            self._sent[idempotency_key] = [f"re_{uuid4().hex}" for _ in messages]
+            self.delivered.extend(messages)
+        return self._sent[idempotency_key]
+
+
+class FakeNotificationOutboxStore:
+    """In-memory stand-in for the NotificationService outbox methods.
+
+    Mirrors the notification outbox functions: claiming pushes
+    next_attempt_at out by the lease, and failures and retries are fenced
+    on the attempt count.
+    """
+
+    def __init__(self):
+        self.outbox = {}
+        self.logs = {}
+        self.finish_calls = 0
+
+    async def enqueue_notifications(self, notifications, batch_size=None):
+        from src.notifications.models import NotificationOutboxMessage
+
+        now = datetime.now(timezone.utc)
+        batch_id = uuid4()
+        for i, (log_id, log, message) in enumerate(notifications):
+            self.logs[log_id] = {"id": log_id, **log.model_dump(mode="json")}
+            outbox_id = uuid4()
+            self.outbox[outbox_id] = NotificationOutboxMessage(
+                id=outbox_id,
+                notification_log_id=log_id,
+                message=message,
+                attempts=0,
+                next_attempt_at=now,
+                batch_key=f"{batch_id}:{i // batch_size}" if batch_size else None,
+                created_at=now,
+            )
+
+    async def claim_outbox_messages(self, limit, lease_seconds):
+        now = datetime.now(timezone.utc)
+        due = [m for m in self.outbox.values() if m.next_attempt_at <= now]
+        picked = sorted(due, key=lambda m: m.next_attempt_at)[:limit]
+        # Due emails of a picked batch are claimed with it
+        batch_keys = {m.batch_key for m in picked if m.batch_key}
+        picked_ids = {m.id for m in picked}
+        due = [m for m in due if m.id in picked_ids or m.batch_key in batch_keys]
+        for message in due:
+            message.attempts += 1
+            message.next_attempt_at = now + timedelta(seconds=lease_seconds)
+        return [message.model_copy() for message in due]
+
+    async def finish_outbox_messages(self, results):
+        self.finish_calls += 1
+        for result in results:
+            stored = self.outbox.get(UUID(result["id"]))
+            if stored is None:
+                continue
+            if result["status"] != "sent" and stored.attempts != result["attempts"]:
+                continue
+            if result["status"] == "retry":
+                retry_at = datetime.fromisoformat(result["next_attempt_at"])
+                stored.next_attempt_at = retry_at
+                stored.last_error = result["error"]
+                continue
+            del self.outbox[stored.id]
+            self.logs[stored.notification_log_id].update(
+                status=result["status"],
+                provider_message_id=result.get("provider_message_id"),
+                error_message=result.get("error"),
+            )
+
+
+@pytest.fixture
+def fake_resend_transport():
+    """In-memory email transport."""
+    return FakeResendTransport()
+
+
+@pytest.fixture
+def notification_outbox_store():
+    """In-memory notification outbox."""
+    return FakeNotificationOutboxStore()
@@ -0,0 +1,561 @@
+"""
+Notification outbox tests.
+"""
+
+import asyncio
+from datetime import datetime, timezone
+from unittest.mock import MagicMock, patch
+from uuid import uuid4
+
+import pytest
+from resend.exceptions import ApplicationError, ValidationError
+from src.notifications.models import (
+    NotificationBatchRecipient,
+    NotificationLogCreate,
+    NotificationOutboxMessage,
+    NotificationStatus,
+    SendNotificationBatchRequest,
+    SendNotificationRequest,
+)
+from src.notifications.outbox import (
+    MAX_RETRY_DELAY_SECONDS,
+    NotificationOutbox,
+    group_batches,
+)
+from src.notifications.transport import (
+    MAX_BATCH_SIZE,
+    PermanentSendError,
+    ResendTransport,
+)
+
+
+@pytest.fixture
+def notification_service(mock_supabase_client):
+    with patch("src.notifications.service.supabase_config") as mock_config:
+        mock_config.client = mock_supabase_client
+        from src.notifications.service import NotificationService
+
+        yield NotificationService()
+
+
+def _outbox(store, transport, **overrides):
+    options = dict(
+        workers=4,
+        max_attempts=3,
+        retry_base_seconds=10,
+        poll_interval_seconds=60,
+        flush_interval_seconds=60,
+    )
+    options.update(overrides)
+    return NotificationOutbox(store=store, transport=transport, **options)
+
+
+async def _enqueue(store, *recipients, batch_size=None):
+    log_ids = [uuid4() for _ in recipients]
+    await store.enqueue_notifications(
+        [
+            (
+                log_id,
+                NotificationLogCreate(
+                    notification_event_id=uuid4(),
+                    recipient_email=recipient,
+                    subject="Hello",
+                ),
+                {
+                    "from": "App <noreply@example.com>",
+                    "to": [recipient],
+                    "subject": "Hello",
+                    "html": "<p>Hello</p>",
+                },
+            )
+            for log_id, recipient in zip(log_ids, recipients)
+        ],
+        batch_size=batch_size,
+    )
+    return log_ids
+
+
+def _make_due(store):
+    for message in store.outbox.values():
+        message.next_attempt_at = datetime.now(timezone.utc)
+
+
+class TestSendNotification:
+    """Test cases for queueing notifications."""
+
+    @pytest.mark.asyncio
+    async def test_queues_without_calling_provider(
+        self, notification_service, mock_supabase_client
+    ):
+        """Test the email is stored in the outbox instead of sent inline."""
+        now = datetime.now(timezone.utc).isoformat()
+        mock_supabase_client.table.return_value.execute.return_value = MagicMock(
+            data={
+                "id": str(uuid4()),
+                "name": "Password reset",
+                "event_key": "user.password_reset",
+                "category": "auth",
+                "is_enabled": True,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+        request = SendNotificationRequest(
+            event_key="user.password_reset",
+            recipient_email="user@example.com",
+            template_variables={
+                "user_name": "Ada",
+                "reset_url": "https://example.com/reset",
+                "expiry_hours": "2",
+            },
+        )
+
+        with patch("src.notifications.service.resend") as resend, patch(
+            "src.notifications.outbox.notification_outbox"
+        ) as outbox:
+            result = await notification_service.send_notification(request)
+
+        resend.Emails.send.assert_not_called()
+        outbox.wake.assert_called_once()
+        assert result.success is True
+        assert result.status == NotificationStatus.PENDING
+
+        name, params = mock_supabase_client.rpc.call_args.args
+        assert name == "enqueue_notifications"
+        (log,) = params["p_logs"]
+        (message,) = params["p_messages"]
+        assert (
+            log["id"]
+            == message["notification_log_id"]
+            == str(result.notification_log_id)
+        )
+        assert log["status"] == "pending"
+        assert message["message"]["to"] == ["user@example.com"]
+        assert "https://example.com/reset" in message["message"]["html"]
+
+
+class TestSendNotificationsBatch:
+    """Test cases for queueing a notification for many recipients."""
+
+    @pytest.fixture
+    def password_reset_event(self, mock_supabase_client):
+        now = datetime.now(timezone.utc).isoformat()
+        mock_supabase_client.table.return_value.execute.return_value = MagicMock(
+            data={
+                "id": str(uuid4()),
+                "name": "Password reset",
+                "event_key": "user.password_reset",
+                "category": "auth",
+                "is_enabled": True,
+                "created_at": now,
+                "updated_at": now,
+            }
+        )
+
+    @pytest.mark.asyncio
+    async def test_queues_all_recipients_in_one_write(
+        self, notification_service, mock_supabase_client, password_reset_event
+    ):
+        """Test the event is looked up once and all emails are enqueued together."""
+        recipients = [
+            NotificationBatchRecipient(
+                recipient_email=f"user{i}@example.com",
+                template_variables={"user_name": f"<User {i}>"},
+            )
+            for i in range(MAX_BATCH_SIZE + 1)
+        ]
+        request = SendNotificationBatchRequest(
+            event_key="user.password_reset",
+            recipients=recipients,
+            template_variables={
+                "user_name": "Shared",
+                "reset_url": "https://example.com/reset",
+                "expiry_hours": "2",
+            },
+        )
+
+        with patch("src.notifications.outbox.notification_outbox"):
+            result = await notification_service.send_notifications_batch(request)
+
+        assert mock_supabase_client.table.return_value.execute.call_count == 1
+        assert mock_supabase_client.rpc.call_count == 1
+        assert (result.queued, result.failed) == (MAX_BATCH_SIZE + 1, 0)
+
+        name, params = mock_supabase_client.rpc.call_args.args
+        assert name == "enqueue_notifications"
+        messages = params["p_messages"]
+        assert [m["notification_log_id"] for m in messages] == [
+            str(r.notification_log_id) for r in result.results
+        ]
+        assert len({m["batch_key"] for m in messages[:MAX_BATCH_SIZE]}) == 1
+        assert messages[-1]["batch_key"] != messages[0]["batch_key"]
+        assert "&lt;User 7&gt;" in messages[7]["message"]["html"]
+        assert messages[7]["message"]["to"] == ["user7@example.com"]
+
+    @pytest.mark.asyncio
+    async def test_recipient_missing_variables_fails_alone(
+        self, notification_service, mock_supabase_client, password_reset_event
+    ):
+        """Test a recipient without its required variables does not stop the others."""
+        request = SendNotificationBatchRequest(
+            event_key="user.password_reset",
+            recipients=[
+                NotificationBatchRecipient(
+                    recipient_email="ok@example.com",
+                    template_variables={"reset_url": "https://example.com/reset"},
+                ),
+                NotificationBatchRecipient(recipient_email="missing@example.com"),
+            ],
+            template_variables={"user_name": "Ada", "expiry_hours": "2"},
+        )
+
+        with patch("src.notifications.outbox.notification_outbox"):
+            result = await notification_service.send_notifications_batch(request)
+
+        ok, missing = result.results
+        assert (result.queued, result.failed) == (1, 1)
+        assert ok.success and ok.status == NotificationStatus.PENDING
+        assert not missing.success and missing.notification_log_id is None
+        assert "reset_url" in missing.message
+        (log,) = mock_supabase_client.rpc.call_args.args[1]["p_logs"]
+        assert log["recipient_email"] == "ok@example.com"
+
+    @pytest.mark.asyncio
+    async def test_disabled_event_queues_nothing(
+        self, notification_service, mock_supabase_client, password_reset_event
+    ):
+        """Test every recipient fails when the event is disabled."""
+        mock_supabase_client.table.return_value.execute.return_value.data[
+            "is_enabled"
+        ] = False
+        request = SendNotificationBatchRequest(
+            event_key="user.password_reset",
+            recipients=[NotificationBatchRecipient(recipient_email="a@example.com")],
+        )
+
+        result = await notification_service.send_notifications_batch(request)
+
+        assert (result.queued, result.failed) == (0, 1)
+        assert result.results[0].message == "Notification event is disabled"
+        mock_supabase_client.rpc.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_route_rejects_organization_admins(self):
+        """Test only platform admins can choose recipients of a batch."""
+        from fastapi import HTTPException
+        from src.notifications.routes import send_notifications_batch
+
+        organization_id = uuid4()
+        user_profile = MagicMock()
+        user_profile.has_role.side_effect = lambda role, org_id=None: (
+            role == "org_admin" and org_id == str(organization_id)
+        )
+        request = SendNotificationBatchRequest(
+            event_key="organization.invitation",
+            organization_id=organization_id,
+            recipients=[NotificationBatchRecipient(recipient_email="a@example.com")],
+        )
+
+        with patch("src.notifications.routes.notification_service") as service:
+            with pytest.raises(HTTPException) as exc_info:
+                await send_notifications_batch(request, (uuid4(), user_profile))
+
+        assert exc_info.value.status_code == 403
+        service.send_notifications_batch.assert_not_called()
+
+
+class TestResendTransport:
+    """Test cases for sending through Resend."""
+
+    @pytest.mark.asyncio
+    async def test_sends_with_idempotency_key(self):
+        """Test the outbox id is passed as Resend idempotency key."""
+        transport = ResendTransport(max_concurrent_requests=2)
+        message = {"to": ["user@example.com"], "subject": "Hi"}
+
+        with patch("src.notifications.transport.resend") as resend:
+            resend.Emails.send.return_value = {"id": "re_123"}
+            message_id = await transport.send(message, idempotency_key="key-1")
+
+        assert message_id == "re_123"
+        resend.Emails.send.assert_called_once_with(
+            message, {"idempotency_key": "key-1"}
+        )
+
+    @pytest.mark.asyncio
+    async def test_validation_errors_are_permanent(self):
+        """Test a message Resend rejects is not retried."""
+        transport = ResendTransport(max_concurrent_requests=2)
+
+        with patch("src.notifications.transport.resend") as resend:
+            resend.Emails.send.side_effect = ValidationError(
+                code=422, error_type="validation_error", message="Invalid `to` field"
+            )
+            with pytest.raises(PermanentSendError, match="Invalid"):
+                await transport.send({"to": ["bad"]}, idempotency_key="key-1")
+
+    @pytest.mark.asyncio
+    async def test_sends_batch_with_idempotency_key(self):
+        """Test a batch is sent with one Resend batch request."""
+        transport = ResendTransport(max_concurrent_requests=2)
+        messages = [{"to": ["a@example.com"]}, {"to": ["b@example.com"]}]
+
+        with patch("src.notifications.transport.resend") as resend:
+            resend.Batch.send.return_value = {"data": [{"id": "re_1"}, {"id": "re_2"}]}
+            message_ids = await transport.send_batch(messages, idempotency_key="key-1")
+
+        assert message_ids == ["re_1", "re_2"]
+        resend.Batch.send.assert_called_once_with(
+            messages, {"idempotency_key": "key-1"}
+        )
+
+
+class TestNotificationOutbox:
+    """Test cases for the outbox worker pool."""
+
+    @pytest.mark.asyncio
+    async def test_sends_and_records_outcomes_in_one_batch(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test sent emails are removed and their logs updated in one write."""
+        log_ids = await _enqueue(
+            notification_outbox_store, *(f"user{i}@example.com" for i in range(10))
+        )
+
+        sent = await _outbox(notification_outbox_store, fake_resend_transport).drain()
+
+        assert sent == 10
+        assert len(fake_resend_transport.delivered) == 10
+        assert notification_outbox_store.outbox == {}
+        assert notification_outbox_store.finish_calls == 1
+        for log_id in log_ids:
+            log = notification_outbox_store.logs[log_id]
+            assert log["status"] == "sent"
+            assert log["provider_message_id"].startswith("re_")
+
+    @pytest.mark.asyncio
+    async def test_failure_is_retried_with_backoff(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test a transient failure is rescheduled and sent on the next attempt."""
+        (log_id,) = await _enqueue(notification_outbox_store, "user@example.com")
+        fake_resend_transport.failures["user@example.com"] = [
+            ApplicationError(code=500, error_type="application_error", message="Down")
+        ]
+        outbox = _outbox(notification_outbox_store, fake_resend_transport)
+
+        assert await outbox.drain() == 0
+        (message,) = notification_outbox_store.outbox.values()
+        assert message.last_error == "Down"
+        assert (
+            message.next_attempt_at - datetime.now(timezone.utc)
+        ).total_seconds() > 5
+        assert notification_outbox_store.logs[log_id]["status"] == "pending"
+
+        _make_due(notification_outbox_store)
+        assert await outbox.drain() == 1
+        assert notification_outbox_store.logs[log_id]["status"] == "sent"
+
+    @pytest.mark.asyncio
+    async def test_permanent_failure_is_not_retried(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test an email the provider rejects is failed on the first attempt."""
+        (log_id,) = await _enqueue(notification_outbox_store, "user@example.com")
+        fake_resend_transport.failures["user@example.com"] = [
+            PermanentSendError("Invalid recipient")
+        ]
+
+        await _outbox(notification_outbox_store, fake_resend_transport).drain()
+
+        assert notification_outbox_store.outbox == {}
+        log = notification_outbox_store.logs[log_id]
+        assert log["status"] == "failed"
+        assert log["error_message"] == "Invalid recipient"
+
+    @pytest.mark.asyncio
+    async def test_gives_up_after_max_attempts(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test an email failing on every attempt is marked failed."""
+        (log_id,) = await _enqueue(notification_outbox_store, "user@example.com")
+        fake_resend_transport.failures["user@example.com"] = [
+            TimeoutError("timed out") for _ in range(5)
+        ]
+        outbox = _outbox(
+            notification_outbox_store, fake_resend_transport, max_attempts=2
+        )
+
+        await outbox.drain()
+        _make_due(notification_outbox_store)
+        await outbox.drain()
+
+        assert notification_outbox_store.outbox == {}
+        assert notification_outbox_store.logs[log_id]["status"] == "failed"
+        assert fake_resend_transport.delivered == []
+
+    def test_retry_delay_doubles_up_to_cap(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test the backoff doubles per attempt and is capped."""
+        outbox = _outbox(notification_outbox_store, fake_resend_transport)
+
+        assert [outbox.retry_delay(n) for n in (1, 2, 3)] == [10, 20, 40]
+        assert outbox.retry_delay(30) == MAX_RETRY_DELAY_SECONDS
+
+    @pytest.mark.asyncio
+    async def test_lost_outcome_does_not_send_twice(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test an email claimed again after its outcome was lost is delivered once."""
+        (log_id,) = await _enqueue(notification_outbox_store, "user@example.com")
+        crashed = _outbox(notification_outbox_store, fake_resend_transport)
+        (message,) = await notification_outbox_store.claim_outbox_messages(1, 0)
+        await crashed.process(message)
+        # The process dies before flushing; the lease expires
+
+        await _outbox(notification_outbox_store, fake_resend_transport).drain()
+
+        assert len(fake_resend_transport.delivered) == 1
+        assert notification_outbox_store.logs[log_id]["status"] == "sent"
+
+    @pytest.mark.asyncio
+    async def test_failed_flush_keeps_outcomes(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test outcomes that could not be written are written by the next flush."""
+        (log_id,) = await _enqueue(notification_outbox_store, "user@example.com")
+        outbox = _outbox(notification_outbox_store, fake_resend_transport)
+        (message,) = await notification_outbox_store.claim_outbox_messages(1, 60)
+        await outbox.process(message)
+
+        finish = notification_outbox_store.finish_outbox_messages
+        with patch.object(
+            notification_outbox_store,
+            "finish_outbox_messages",
+            side_effect=ConnectionError("database unavailable"),
+        ):
+            await outbox.flush()
+        assert notification_outbox_store.logs[log_id]["status"] == "pending"
+
+        notification_outbox_store.finish_outbox_messages = finish
+        await outbox.flush()
+        assert notification_outbox_store.logs[log_id]["status"] == "sent"
+
+    @pytest.mark.asyncio
+    async def test_batch_is_sent_with_one_request(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test emails queued as a batch are claimed together and sent at once."""
+        log_ids = await _enqueue(
+            notification_outbox_store,
+            *(f"user{i}@example.com" for i in range(10)),
+            batch_size=MAX_BATCH_SIZE,
+        )
+
+        sent = await _outbox(
+            notification_outbox_store, fake_resend_transport, workers=1
+        ).drain()
+
+        assert sent == 10
+        assert fake_resend_transport.requests == 1
+        assert all(
+            notification_outbox_store.logs[log_id]["status"] == "sent"
+            for log_id in log_ids
+        )
+
+    @pytest.mark.asyncio
+    async def test_failed_batch_is_retried_as_a_whole(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test a failed batch is retried once, with the same idempotency key."""
+        log_ids = await _enqueue(
+            notification_outbox_store,
+            "a@example.com",
+            "b@example.com",
+            batch_size=MAX_BATCH_SIZE,
+        )
+        fake_resend_transport.failures["b@example.com"] = [
+            ApplicationError(code=500, error_type="application_error", message="Down")
+        ]
+        outbox = _outbox(notification_outbox_store, fake_resend_transport)
+
+        assert await outbox.drain() == 0
+        assert fake_resend_transport.delivered == []
+
+        _make_due(notification_outbox_store)
+        assert await outbox.drain() == 2
+        assert fake_resend_transport.requests == 2
+        assert all(
+            notification_outbox_store.logs[log_id]["status"] == "sent"
+            for log_id in log_ids
+        )
+
+    @pytest.mark.asyncio
+    async def test_lost_batch_outcome_does_not_send_twice(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test a batch claimed again after its outcome was lost is delivered once."""
+        await _enqueue(
+            notification_outbox_store,
+            "a@example.com",
+            "b@example.com",
+            batch_size=MAX_BATCH_SIZE,
+        )
+        crashed = _outbox(notification_outbox_store, fake_resend_transport)
+        messages = await notification_outbox_store.claim_outbox_messages(1, 0)
+        # Claims return a batch in no particular order
+        messages.sort(key=lambda message: str(message.id), reverse=True)
+        await crashed.process_batch(messages)
+
+        await _outbox(notification_outbox_store, fake_resend_transport).drain()
+
+        assert len(fake_resend_transport.delivered) == 2
+        assert notification_outbox_store.outbox == {}
+
+    def test_group_batches_splits_large_batches(self):
+        """Test batches are capped at the provider limit and singles stay alone."""
+        now = datetime.now(timezone.utc)
+
+        def message(batch_key):
+            return NotificationOutboxMessage(
+                id=uuid4(),
+                notification_log_id=uuid4(),
+                message={},
+                attempts=1,
+                next_attempt_at=now,
+                batch_key=batch_key,
+                created_at=now,
+            )
+
+        messages = [message("b:0") for _ in range(MAX_BATCH_SIZE + 5)]
+        messages += [message(None), message(None)]
+
+        batches = group_batches(messages)
+
+        assert sorted(len(batch) for batch in batches) == [1, 1, 5, MAX_BATCH_SIZE]
+
+    @pytest.mark.asyncio
+    async def test_running_pool_sends_enqueued_emails(
+        self, notification_outbox_store, fake_resend_transport
+    ):
+        """Test the running pool sends emails after a wake and flushes on stop."""
+        outbox = _outbox(notification_outbox_store, fake_resend_transport)
+        await outbox.start()
+        try:
+            log_ids = await _enqueue(
+                notification_outbox_store, "a@example.com", "b@example.com"
+            )
+            outbox.wake()
+            for _ in range(100):
+                if len(fake_resend_transport.delivered) == 2:
+                    break
+                await asyncio.sleep(0.01)
+        finally:
+            await outbox.stop()
+
+        assert len(fake_resend_transport.delivered) == 2
+        assert all(
+            notification_outbox_store.logs[log_id]["status"] == "sent"
+            for log_id in log_ids
+        )
@@ -0,0 +1,116 @@
+"""
+Compiled notification template tests.
+"""
+
+import html
+from datetime import datetime, timedelta, timezone
+from uuid import uuid4
+
+import pytest
+from src.notifications.models import NotificationTemplate
+from src.notifications.rendering import (
+    CompiledTemplate,
+    get_compiled_notification_template,
+)
+from src.notifications.service import validate_builtin_template_variables
+from src.notifications.templates import (
+    BASE_TEMPLATE,
+    TEMPLATE_REGISTRY,
+    get_compiled_template,
+)
+
+
+def _template(**fields):
+    now = datetime.now(timezone.utc)
+    return NotificationTemplate(
+        **{
+            "id": uuid4(),
+            "name": "Custom",
+            "subject": "Hi {name}",
+            "html_content": (
+                "<style>p {color: red}</style><p>Hello {name}, {missing}</p>"
+            ),
+            "created_at": now,
+            "updated_at": now,
+            **fields,
+        }
+    )
+
+
+class TestCompiledTemplate:
+    """Test cases for compiling and rendering templates."""
+
+    def test_values_are_escaped(self):
+        """Test variable values are HTML-escaped, template text is not."""
+        template = CompiledTemplate.from_placeholders("<b>{name}</b>")
+
+        assert template.render({"name": "<script>"}) == "<b>&lt;script&gt;</b>"
+
+    def test_placeholders_keep_unknown_braces(self):
+        """Test CSS blocks and placeholders without a value pass through."""
+        compiled = get_compiled_notification_template(_template())
+
+        assert compiled.html.render({"name": "Ada"}) == (
+            "<style>p {color: red}</style><p>Hello Ada, {missing}</p>"
+        )
+
+    def test_values_are_not_substituted_again(self):
+        """Test a value that looks like a placeholder is inserted literally."""
+        template = CompiledTemplate.from_placeholders("{a} {b}")
+
+        assert template.render({"a": "{b}", "b": "x"}) == "{b} x"
+
+    def test_format_string_is_strict(self):
+        """Test built-in templates fail on a missing variable, like str.format."""
+        template = CompiledTemplate.from_format_string("{{literal}} {name}")
+
+        assert template.render({"name": "Ada"}) == "{literal} Ada"
+        with pytest.raises(KeyError):
+            template.render({})
+
+    def test_format_specs_are_rejected(self):
+        """Test fields the renderer cannot reproduce are rejected when compiling."""
+        with pytest.raises(ValueError, match="Unsupported"):
+            CompiledTemplate.from_format_string("{amount:.2f}")
+
+    @pytest.mark.parametrize("event_key", sorted(TEMPLATE_REGISTRY))
+    def test_builtin_matches_format(self, event_key):
+        """Test compiled built-in templates render exactly like str.format."""
+        template_data = TEMPLATE_REGISTRY[event_key]
+        variables = validate_builtin_template_variables(
+            event_key,
+            {name: f"<{name}> & co" for name in template_data["variables"]},
+        )
+        sanitized = {key: html.escape(str(value)) for key, value in variables.items()}
+        subject = template_data["subject"].format(**sanitized)
+        expected = BASE_TEMPLATE.format(
+            subject=subject,
+            content=template_data["html_content"].format(**sanitized),
+            **sanitized,
+        )
+
+        compiled = get_compiled_template(event_key)
+
+        assert compiled.subject.render(variables) == subject
+        assert compiled.html.render(variables) == expected
+
+
+class TestCompiledTemplateCache:
+    """Test cases for caching compiled database templates."""
+
+    def test_compiled_once_per_version(self):
+        """Test a template is recompiled only when updated_at changes."""
+        template = _template()
+
+        first = get_compiled_notification_template(template)
+        assert get_compiled_notification_template(template.model_copy()) is first
+
+        updated = template.model_copy(
+            update={
+                "html_content": "<p>Bye {name}</p>",
+                "updated_at": template.updated_at + timedelta(seconds=1),
+            }
+        )
+        compiled = get_compiled_notification_template(updated)
+        assert compiled is not first
+        assert compiled.html.render({"name": "Ada"}) == "<p>Bye Ada</p>"
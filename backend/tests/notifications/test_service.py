@@ -396,22 +396,3 @@ class TestNotificationServiceTemplates:
         assert result["name"] == "John"
         assert result["app_name"] == "SaaS Platform API"
         assert result["app_url"] == "http://localhost:3000"
-
-    @pytest.mark.asyncio
-    async def test_sanitize_template_variables(
-        self,
-    ):
-        """Sanitize template variables to prevent XSS."""
-        from src.notifications.service import sanitize_template_variables
-        
-        template_vars = {
-            "name": "<script>alert('xss')</script>",
-            "email": "john@example.com",
-            "message": "Hello & welcome!"
-        }
-        
-        result = sanitize_template_variables(template_vars)
-        
-        assert result["name"] == "&lt;script&gt;alert(&#x27;xss&#x27;)&lt;/script&gt;"
-        assert result["email"] == "john@example.com"
-        assert result["message"] == "Hello &amp; welcome!"
\ No newline at end of file
@@ -8,7 +8,7 @@ from uuid import uuid4
 
 from shared.voice_agents.tool_service import ToolService
 from shared.voice_agents.tool_models import AgentTool, PlatformTool
-from src.services.token_refresh_service import TokenRefreshService
+from src.services.token_refresh_service import RefreshOutcome, TokenRefreshService
 
 
 @pytest.fixture
@@ -23,6 +23,13 @@ def token_refresh_service(tool_service):
     return TokenRefreshService(tool_service)
 
 
+def mock_agent_tool():
+    """Bare AgentTool mock with an id, as refreshes are keyed by it."""
+    agent_tool = MagicMock(spec=AgentTool)
+    agent_tool.id = uuid4()
+    return agent_tool
+
+
 @pytest.fixture
 def sample_agent_tool():
     """Sample AgentTool with OAuth tokens."""
@@ -79,6 +86,9 @@ class TestTokenRefreshService:
         await token_refresh_service.start()
         assert token_refresh_service.running is True
 
+        # Clean up
+        await token_refresh_service.stop()
+
     async def test_stop_service_running(self, token_refresh_service):
         """Test stopping service when running."""
         await token_refresh_service.start()
@@ -98,14 +108,14 @@ class TestTokenRefreshService:
         sample_agent_tool.sensitive_config = None
 
         result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-        assert result is False
+        assert result is RefreshOutcome.SKIPPED
 
     async def test_check_and_refresh_token_no_expires_at(self, token_refresh_service, sample_agent_tool):
         """Test token check with no expires_at."""
         sample_agent_tool.sensitive_config = {"access_token": "test"}
 
         result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-        assert result is False
+        assert result is RefreshOutcome.SKIPPED
 
     async def test_check_and_refresh_token_expired(self, token_refresh_service, sample_agent_tool):
         """Test token check with already expired token."""
@@ -114,7 +124,7 @@ class TestTokenRefreshService:
         sample_agent_tool.sensitive_config["expires_at"] = expired_time.timestamp()
 
         result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-        assert result is False
+        assert result is RefreshOutcome.SKIPPED
 
     async def test_check_and_refresh_token_valid_long_time(self, token_refresh_service, sample_agent_tool):
         """Test token check with token valid for long time."""
@@ -123,24 +133,32 @@ class TestTokenRefreshService:
         sample_agent_tool.sensitive_config["expires_at"] = far_future.timestamp()
 
         result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-        assert result is False
+        assert result is RefreshOutcome.SKIPPED
 
     async def test_check_and_refresh_token_no_refresh_token(self, token_refresh_service, sample_agent_tool):
         """Test token check with no refresh token."""
         sample_agent_tool.sensitive_config["refresh_token"] = None
 
         result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-        assert result is False
+        assert result is RefreshOutcome.FAILED
 
     async def test_check_and_refresh_token_no_auth_config(self, token_refresh_service, sample_agent_tool):
         """Test token check with no auth config."""
         sample_agent_tool.tool.auth_config = None
 
         result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-        assert result is False
+        assert result is RefreshOutcome.FAILED
 
-    async def test_check_and_refresh_token_success(self, token_refresh_service, sample_agent_tool):
+    async def test_check_and_refresh_token_success(
+        self, token_refresh_service, tool_service, sample_agent_tool
+    ):
         """Test successful token refresh."""
+        tool_service.acquire_refresh_lease = AsyncMock(return_value=(7, None))
+        tool_service.release_refresh_lease = AsyncMock(return_value=(True, None))
+        tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+            return_value=(sample_agent_tool, None)
+        )
+
         # Mock the OAuth manager
         with patch('src.services.token_refresh_service.get_oauth_manager') as mock_get_manager:
             mock_manager = MagicMock()
@@ -158,13 +176,18 @@ class TestTokenRefreshService:
                 mock_refresh.return_value = new_tokens
 
                 with patch.object(token_refresh_service, '_update_agent_tool', new_callable=AsyncMock) as mock_update:
+                    mock_update.return_value = True
                     result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
-                    assert result is True
+                    assert result is RefreshOutcome.REFRESHED
 
                     # Verify refresh was called
                     mock_refresh.assert_called_once()
-                    # Verify update was called
+                    # Verify update was called, fenced by the lease
                     mock_update.assert_called_once()
+                    assert mock_update.call_args.kwargs["fencing_token"] == 7
+                    tool_service.release_refresh_lease.assert_called_once_with(
+                        sample_agent_tool.id, token_refresh_service.lease_holder, 7
+                    )
 
     async def test_refresh_oauth_token_success(self, token_refresh_service):
         """Test successful OAuth token refresh."""
@@ -249,19 +272,481 @@ class TestTokenRefreshService:
 
         tool_service.update_agent_tool.assert_called_once()
 
-    async def test_get_tools_requiring_auth_success(self, token_refresh_service, tool_service):
-        """Test successful retrieval of tools requiring auth."""
-        mock_tools = [MagicMock(spec=AgentTool), MagicMock(spec=AgentTool)]
-        tool_service.get_all_agent_tools_with_auth = AsyncMock(return_value=(mock_tools, None))
+    async def test_refresh_expired_tokens_consumes_pages(
+        self, token_refresh_service, tool_service
+    ):
+        """Test every tool of every streamed page is checked."""
+        pages = [
+            [mock_agent_tool(), mock_agent_tool()],
+            [mock_agent_tool()],
+        ]
+
+        async def iter_pages():
+            for page in pages:
+                yield page
+
+        tool_service.iter_agent_tools_with_auth = MagicMock(return_value=iter_pages())
+
+        with patch.object(
+            token_refresh_service, "_check_and_refresh_token", new_callable=AsyncMock
+        ) as mock_check:
+            mock_check.return_value = RefreshOutcome.REFRESHED
+            await token_refresh_service._refresh_expired_tokens()
+
+        assert mock_check.call_count == 3
+        # Only tokens expiring within the window are fetched
+        expiring_before = tool_service.iter_agent_tools_with_auth.call_args.kwargs[
+            "expiring_before"
+        ]
+        window = expiring_before - datetime.now(timezone.utc)
+        assert timedelta(minutes=14) < window <= timedelta(minutes=15)
+
+    async def test_refresh_expired_tokens_no_tools(
+        self, token_refresh_service, tool_service
+    ):
+        """Test an empty scan refreshes nothing."""
+
+        async def iter_pages():
+            return
+            yield
+
+        tool_service.iter_agent_tools_with_auth = MagicMock(return_value=iter_pages())
+
+        with patch.object(
+            token_refresh_service, "_check_and_refresh_token", new_callable=AsyncMock
+        ) as mock_check:
+            await token_refresh_service._refresh_expired_tokens()
+
+        mock_check.assert_not_called()
+
+
+class TestRefreshSchedule:
+    """Test cases for the expiry-ordered refresh schedule."""
+
+    def test_pops_due_in_deadline_order(self):
+        """Test only tools whose deadline passed are popped."""
+        from src.services.token_refresh_service import RefreshSchedule
+
+        schedule = RefreshSchedule()
+        schedule.schedule("late", 300.0)
+        schedule.schedule("early", 100.0)
+        schedule.schedule("middle", 200.0)
+
+        assert schedule.next_deadline() == 100.0
+        assert list(schedule.pop_due(now=250.0)) == ["early", "middle"]
+        assert len(schedule) == 1
+        assert schedule.next_deadline() == 300.0
+
+    def test_reschedule_and_remove_skip_stale_entries(self):
+        """Test rescheduled or removed tools are not popped at old deadlines."""
+        from src.services.token_refresh_service import RefreshSchedule
+
+        schedule = RefreshSchedule()
+        schedule.schedule("a", 100.0)
+        schedule.schedule("b", 150.0)
+        schedule.schedule("a", 500.0)
+        schedule.remove("b")
+
+        assert schedule.pop_due(now=200.0) == {}
+        assert schedule.next_deadline() == 500.0
+
+
+@pytest.mark.asyncio
+class TestTokenRefreshScheduling:
+    """Test cases for scheduling refreshes by token expiry."""
+
+    async def test_token_saved_schedules_refresh_before_expiry(
+        self, token_refresh_service
+    ):
+        """Test saving tokens schedules a refresh one window before expiry."""
+        from shared.config import settings
+
+        expires_at = datetime.now(timezone.utc) + timedelta(hours=1)
+
+        token_refresh_service.on_token_saved("tool-1", expires_at.isoformat())
+
+        window = settings.token_refresh_expiry_window_minutes * 60
+        assert token_refresh_service.schedule.deadline("tool-1") == pytest.approx(
+            expires_at.timestamp() - window
+        )
+        assert token_refresh_service._wakeup.is_set()
+
+        token_refresh_service.on_token_saved("tool-1", None)
+        assert token_refresh_service.schedule.deadline("tool-1") is None
 
-        result = await token_refresh_service._get_tools_requiring_auth()
-        assert result == mock_tools
+    async def test_load_schedule_from_expiries(
+        self, token_refresh_service, tool_service
+    ):
+        """Test the schedule is seeded from plaintext expiries without decrypting."""
+        soon = datetime.now(timezone.utc) + timedelta(minutes=30)
+        later = datetime.now(timezone.utc) + timedelta(hours=2)
 
-        tool_service.get_all_agent_tools_with_auth.assert_called_once()
+        async def iter_expiries():
+            yield [("tool-1", later), ("tool-2", soon)]
 
-    async def test_get_tools_requiring_auth_failure(self, token_refresh_service, tool_service):
-        """Test retrieval of tools requiring auth failure."""
-        tool_service.get_all_agent_tools_with_auth = AsyncMock(return_value=(None, "Database error"))
+        tool_service.iter_token_expiries = MagicMock(return_value=iter_expiries())
 
-        result = await token_refresh_service._get_tools_requiring_auth()
-        assert result == []
\ No newline at end of file
+        await token_refresh_service._load_schedule()
+
+        assert len(token_refresh_service.schedule) == 2
+        assert token_refresh_service.schedule.next_deadline() < soon.timestamp()
+
+    async def test_failed_refresh_is_retried(self, token_refresh_service):
+        """Test due tools that were not refreshed are retried while still valid."""
+        import time
+
+        now = time.time()
+        due = {"failed": now, "expired": now - 15 * 60}
+
+        with patch.object(
+            token_refresh_service, "_refresh_expired_tokens", new_callable=AsyncMock
+        ):
+            await token_refresh_service._refresh_due(due)
+
+        assert token_refresh_service.schedule.deadline("failed") > now
+        assert token_refresh_service.schedule.deadline("expired") is None
+
+    async def test_failed_scan_is_retried(self, token_refresh_service):
+        """Test due tools are rescheduled when the refresh scan fails part way."""
+        import time
+
+        now = time.time()
+
+        with patch.object(
+            token_refresh_service,
+            "_refresh_expired_tokens",
+            new=AsyncMock(side_effect=RuntimeError("page fetch failed")),
+        ):
+            with pytest.raises(RuntimeError):
+                await token_refresh_service._refresh_due({"due": now})
+
+        assert token_refresh_service.schedule.deadline("due") > now
+
+    async def test_loop_sleeps_until_earliest_deadline(
+        self, token_refresh_service, tool_service
+    ):
+        """Test the loop refreshes as soon as the earliest deadline passes."""
+        import asyncio
+        import time
+
+        async def load_schedule():
+            token_refresh_service._last_resync = time.monotonic()
+            token_refresh_service.schedule.schedule("tool-1", time.time() + 0.05)
+
+        refreshed = asyncio.Event()
+
+        async def refresh():
+            refreshed.set()
+
+        with patch.object(
+            token_refresh_service, "_load_schedule", side_effect=load_schedule
+        ), patch.object(
+            token_refresh_service, "_refresh_expired_tokens", side_effect=refresh
+        ):
+            await token_refresh_service.start()
+            await asyncio.wait_for(refreshed.wait(), timeout=2)
+            await token_refresh_service.stop()
+
+        tool_service.add_token_listener.assert_called_once_with(
+            token_refresh_service.on_token_saved
+        )
+
+
+@pytest.mark.asyncio
+class TestConcurrentRefresh:
+    """Test cases for bounded-parallel refresh sweeps."""
+
+    async def test_sweep_concurrency_is_bounded(
+        self, token_refresh_service, tool_service
+    ):
+        """Test no more than token_refresh_concurrency refreshes run at once."""
+        import asyncio
+
+        pages = [[mock_agent_tool() for _ in range(12)]]
+
+        async def iter_pages():
+            for page in pages:
+                yield page
+
+        tool_service.iter_agent_tools_with_auth = MagicMock(return_value=iter_pages())
+        in_flight = 0
+        max_in_flight = 0
+
+        async def check(agent_tool):
+            nonlocal in_flight, max_in_flight
+            in_flight += 1
+            max_in_flight = max(max_in_flight, in_flight)
+            await asyncio.sleep(0.01)
+            in_flight -= 1
+            if agent_tool is pages[0][0]:
+                return RefreshOutcome.FAILED
+            if agent_tool is pages[0][1]:
+                return RefreshOutcome.SKIPPED
+            return RefreshOutcome.REFRESHED
+
+        with patch(
+            "src.services.token_refresh_service.settings"
+        ) as mock_settings, patch.object(
+            token_refresh_service, "_check_and_refresh_token", side_effect=check
+        ):
+            mock_settings.token_refresh_expiry_window_minutes = 15
+            mock_settings.token_refresh_concurrency = 3
+            stats = await token_refresh_service._refresh_expired_tokens()
+
+        assert max_in_flight == 3
+        assert stats["checked"] == 12
+        assert stats["refreshed"] == 10
+        # A skipped tool (not due, or leased elsewhere) is not a failure
+        assert stats["skipped"] == 1
+        assert stats["failed"] == 1
+        assert stats["duration_seconds"] > 0
+
+    async def test_http_client_pooled_per_endpoint(self, token_refresh_service):
+        """Test one client is reused per token endpoint and closed on stop."""
+        get_http_client = token_refresh_service._get_http_client
+        google = get_http_client("https://oauth2.googleapis.com/token")
+        again = get_http_client("https://oauth2.googleapis.com/token")
+        other = get_http_client("https://login.example.com/token")
+
+        assert google is again
+        assert google is not other
+
+        token_refresh_service.running = True
+        await token_refresh_service.stop()
+
+        assert google.is_closed and other.is_closed
+        assert token_refresh_service._http_clients == {}
+
+    async def test_provider_rate_limit(self, token_refresh_service):
+        """Test requests to one provider are spaced out to the configured rate."""
+        import time
+
+        with patch("src.services.token_refresh_service.settings") as mock_settings:
+            mock_settings.token_refresh_provider_rate_limits = {"google": 50.0}
+            mock_settings.token_refresh_rate_limit_per_second = 0
+            google = token_refresh_service._get_rate_limiter("google")
+            other = token_refresh_service._get_rate_limiter("github")
+
+        start = time.monotonic()
+        for _ in range(5):
+            await google.acquire()
+        google_elapsed = time.monotonic() - start
+
+        start = time.monotonic()
+        for _ in range(5):
+            await other.acquire()
+        other_elapsed = time.monotonic() - start
+
+        # 5 requests at 50/s need at least 4 intervals of 20 ms
+        assert google_elapsed >= 0.075
+        assert other_elapsed < 0.01
+        assert token_refresh_service._get_rate_limiter("google") is google
+
+
+@pytest.mark.asyncio
+class TestRefreshLease:
+    """Test cases for the cross-instance refresh lease."""
+
+    @pytest.fixture
+    def oauth_manager(self):
+        with patch(
+            "src.services.token_refresh_service.get_oauth_manager"
+        ) as mock_get_manager:
+            mock_manager = MagicMock()
+            mock_manager.extract_oauth_config.return_value = (
+                "google", "https://oauth.example.com/token"
+            )
+            mock_get_manager.return_value = mock_manager
+            yield mock_manager
+
+    async def test_skips_when_lease_held_elsewhere(
+        self, token_refresh_service, tool_service, sample_agent_tool, oauth_manager
+    ):
+        """Test no refresh happens while another instance holds the lease."""
+        tool_service.acquire_refresh_lease = AsyncMock(return_value=(None, None))
+        tool_service.release_refresh_lease = AsyncMock()
+
+        with patch.object(
+            token_refresh_service, "_refresh_oauth_token", new_callable=AsyncMock
+        ) as mock_refresh:
+            result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
+
+        assert result is RefreshOutcome.SKIPPED
+        mock_refresh.assert_not_called()
+        tool_service.release_refresh_lease.assert_not_called()
+
+    async def test_skips_when_refreshed_elsewhere(
+        self, token_refresh_service, tool_service, sample_agent_tool, oauth_manager
+    ):
+        """Test tokens refreshed by another instance are shared, not refreshed again."""
+        current = MagicMock(spec=AgentTool)
+        current.sensitive_config = dict(
+            sample_agent_tool.sensitive_config,
+            expires_at=sample_agent_tool.sensitive_config["expires_at"] + 3600,
+        )
+        tool_service.acquire_refresh_lease = AsyncMock(return_value=(3, None))
+        tool_service.release_refresh_lease = AsyncMock(return_value=(True, None))
+        tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+            return_value=(current, None)
+        )
+
+        with patch.object(
+            token_refresh_service, "_refresh_oauth_token", new_callable=AsyncMock
+        ) as mock_refresh:
+            result = await token_refresh_service._check_and_refresh_token(sample_agent_tool)
+
+        # The other instance's tokens are the shared result
+        assert result is RefreshOutcome.REFRESHED
+        mock_refresh.assert_not_called()
+        schedule = token_refresh_service.schedule
+        assert schedule.deadline(str(sample_agent_tool.id)) is not None
+        # The lease is always released
+        tool_service.release_refresh_lease.assert_called_once()
+
+    async def test_lost_lease_write_reports_failure(
+        self, token_refresh_service, tool_service
+    ):
+        """Test a fenced write rejected by the database counts as a failure."""
+        tool_service.update_agent_tool = AsyncMock(
+            return_value=(None, "Agent tool not found or refresh lease lost")
+        )
+
+        saved = await token_refresh_service._update_agent_tool(
+            uuid4(), {"access_token": "x"}, "Test Tool", fencing_token=2
+        )
+
+        assert saved is False
+        assert tool_service.update_agent_tool.call_args.kwargs["fencing_token"] == 2
+
+
+@pytest.mark.asyncio
+class TestSingleFlightRefresh:
+    """Test cases for coalescing concurrent refreshes of one tool."""
+
+    async def test_concurrent_refreshes_share_one_refresh(
+        self, token_refresh_service, tool_service, sample_agent_tool
+    ):
+        """Test concurrent manual and background refreshes run one refresh."""
+        import asyncio
+
+        tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+            return_value=(sample_agent_tool, None)
+        )
+
+        async def iter_pages():
+            yield [sample_agent_tool]
+
+        tool_service.iter_agent_tools_with_auth = MagicMock(return_value=iter_pages())
+        calls = 0
+
+        async def check(agent_tool, force=False):
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return RefreshOutcome.REFRESHED
+
+        with patch.object(
+            token_refresh_service, "_check_and_refresh_token", side_effect=check
+        ):
+            results = await asyncio.gather(
+                token_refresh_service.refresh_agent_tool(sample_agent_tool.id),
+                token_refresh_service.refresh_agent_tool(sample_agent_tool.id),
+                token_refresh_service._refresh_expired_tokens(),
+            )
+
+        assert calls == 1
+        assert results[0] == (True, None)
+        assert results[1] == (True, None)
+        assert results[2]["refreshed"] == 1
+
+    async def test_manual_refresh_retries_skipped_background_refresh(
+        self, token_refresh_service, tool_service, sample_agent_tool
+    ):
+        """Test a manual refresh joining a sweep that skipped the tool refreshes it."""
+        import asyncio
+
+        tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+            return_value=(sample_agent_tool, None)
+        )
+
+        async def iter_pages():
+            yield [sample_agent_tool]
+
+        tool_service.iter_agent_tools_with_auth = MagicMock(return_value=iter_pages())
+        sweep_started = asyncio.Event()
+        finish_sweep = asyncio.Event()
+        forced = []
+
+        async def check(agent_tool, force=False):
+            forced.append(force)
+            if force:
+                return RefreshOutcome.REFRESHED
+            # The sweep finds the lease held by another instance
+            sweep_started.set()
+            await finish_sweep.wait()
+            return RefreshOutcome.SKIPPED
+
+        with patch.object(
+            token_refresh_service, "_check_and_refresh_token", side_effect=check
+        ):
+            sweep = asyncio.create_task(token_refresh_service._refresh_expired_tokens())
+            await sweep_started.wait()
+            manual = asyncio.create_task(
+                token_refresh_service.refresh_agent_tool(sample_agent_tool.id)
+            )
+            await asyncio.sleep(0)
+            finish_sweep.set()
+            result = await manual
+            stats = await sweep
+
+        assert forced == [False, True]
+        assert result == (True, None)
+        assert stats["skipped"] == 1
+
+    async def test_manual_refresh_waits_for_lease_holder(
+        self, token_refresh_service, tool_service, sample_agent_tool
+    ):
+        """Test a manual refresh shares another instance's refresh."""
+        refreshed = MagicMock(spec=AgentTool)
+        refreshed.sensitive_config = dict(
+            sample_agent_tool.sensitive_config,
+            expires_at=sample_agent_tool.sensitive_config["expires_at"] + 3600,
+        )
+        tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+            side_effect=[
+                (sample_agent_tool, None),
+                (sample_agent_tool, None),
+                (refreshed, None),
+            ]
+        )
+        tool_service.acquire_refresh_lease = AsyncMock(return_value=(None, None))
+
+        with patch(
+            "src.services.token_refresh_service.get_oauth_manager"
+        ) as mock_get_manager, patch(
+            "src.services.token_refresh_service.LEASE_POLL_INTERVAL_SECONDS", 0
+        ), patch.object(
+            token_refresh_service, "_refresh_oauth_token", new_callable=AsyncMock
+        ) as mock_refresh:
+            mock_get_manager.return_value.extract_oauth_config.return_value = (
+                "google",
+                "https://oauth.example.com/token",
+            )
+            result = await token_refresh_service.refresh_agent_tool(
+                sample_agent_tool.id
+            )
+
+        assert result == (True, None)
+        mock_refresh.assert_not_called()
+
+    async def test_manual_refresh_unknown_tool(
+        self, token_refresh_service, tool_service
+    ):
+        """Test refreshing a missing tool reports the lookup error."""
+        tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+            return_value=(None, "Agent tool configuration not found")
+        )
+
+        result = await token_refresh_service.refresh_agent_tool(uuid4())
+
+        assert result == (False, "Agent tool configuration not found")
@@ -0,0 +1,95 @@
+"""
+Tests for cursor (keyset) pagination helpers.
+"""
+
+from urllib.parse import unquote
+
+import pytest
+from postgrest import SyncPostgrestClient
+
+from shared.common.pagination import (
+    decode_cursor,
+    encode_cursor,
+    keyset_page,
+    keyset_query,
+)
+
+ROW_ID = "7c9e6679-7425-40de-944b-e07fc1f90ae7"
+CREATED_AT = "2026-03-01T10:00:00.123456+00:00"
+
+
+def _rows(n):
+    return [
+        {"id": f"00000000-0000-0000-0000-{i:012d}", "created_at": CREATED_AT}
+        for i in range(n, 0, -1)
+    ]
+
+
+class TestCursor:
+    """Test cursor encoding."""
+
+    def test_round_trip(self):
+        """A cursor decodes to the row it was made from."""
+        cursor = encode_cursor({"id": ROW_ID, "created_at": CREATED_AT})
+
+        assert decode_cursor(cursor) == (CREATED_AT, ROW_ID)
+        assert "=" not in cursor
+
+    @pytest.mark.parametrize(
+        "cursor",
+        ["", "not-base64!", encode_cursor({"id": "x", "created_at": CREATED_AT})],
+    )
+    def test_invalid_cursor_rejected(self, cursor):
+        """Malformed cursors raise ValueError instead of reaching the query."""
+        with pytest.raises(ValueError, match="Invalid cursor"):
+            decode_cursor(cursor)
+
+
+class TestKeyset:
+    """Test query building and page splitting."""
+
+    def test_first_page_orders_newest_first(self):
+        """Without a cursor the query is only ordered and limited."""
+        query = keyset_query(
+            SyncPostgrestClient("http://localhost")
+            .table("billing_history")
+            .select("*"),
+            limit=10,
+        )
+
+        assert query.params["order"] == "created_at.desc,id.desc"
+        assert query.params["limit"] == "11"
+        assert "or" not in query.params
+
+    def test_cursor_starts_strictly_after_row(self):
+        """The next page filters on (created_at, id) < cursor."""
+        cursor = encode_cursor({"id": ROW_ID, "created_at": CREATED_AT})
+
+        query = keyset_query(
+            SyncPostgrestClient("http://localhost")
+            .table("billing_history")
+            .select("*"),
+            limit=10,
+            cursor=cursor,
+        )
+
+        assert unquote(query.params["or"]) == (
+            f'(created_at.lt."{CREATED_AT}",'
+            f'and(created_at.eq."{CREATED_AT}",id.lt.{ROW_ID}))'
+        )
+
+    def test_page_with_extra_row_has_next_cursor(self):
+        """The extra row signals another page; the cursor is the last kept row."""
+        rows = _rows(11)
+
+        page, cursor = keyset_page(rows, limit=10)
+
+        assert page == rows[:10]
+        assert decode_cursor(cursor) == (CREATED_AT, rows[9]["id"])
+
+    def test_last_page_has_no_cursor(self):
+        """A short page is the last one."""
+        page, cursor = keyset_page(_rows(3), limit=10)
+
+        assert len(page) == 3
+        assert cursor is None
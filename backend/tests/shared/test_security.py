@@ -2,8 +2,19 @@
 Tests for shared security utilities.
 """
 import os
+from unittest.mock import patch
+
 import pytest
-from shared.common.security import encrypt_data, decrypt_data, get_fernet
+from cryptography.fernet import Fernet
+
+from shared.common import security
+from shared.common.security import (
+    KeyManager,
+    decrypt_data,
+    encrypt_data,
+    get_fernet,
+    rotate_encrypted_data,
+)
 
 
 class TestEncryptDecrypt:
@@ -104,3 +115,90 @@ class TestGetFernet:
         fernet = get_fernet()
         
         assert fernet is not None
+
+    def test_get_fernet_is_cached(self):
+        """Returns the same cipher instance on every call."""
+        assert get_fernet() is get_fernet()
+
+
+class TestKeyManager:
+    """Test key caching and rotation."""
+
+    def test_dev_key_derived_once(self):
+        """Derives the development key only on first use."""
+        manager = KeyManager()
+
+        with patch.object(
+            security, "_derive_dev_key", wraps=security._derive_dev_key
+        ) as derive:
+            manager.cipher
+            manager.cipher
+            manager.cipher.encrypt(b"data")
+
+        assert derive.call_count == 1
+
+    def test_reset_rebuilds_cipher(self):
+        """Builds a new cipher after reset."""
+        manager = KeyManager(Fernet.generate_key().decode())
+        first = manager.cipher
+
+        manager.reset()
+
+        assert manager.cipher is not first
+
+    def test_previous_key_still_decrypts(self):
+        """Decrypts data encrypted with a previous key."""
+        old_key = Fernet.generate_key().decode()
+        new_key = Fernet.generate_key().decode()
+        token = KeyManager(old_key).cipher.encrypt(b"secret")
+
+        rotated_manager = KeyManager(new_key, [old_key])
+
+        assert rotated_manager.cipher.decrypt(token) == b"secret"
+        assert rotated_manager.needs_rotation(token.decode())
+
+    def test_rotate_uses_primary_key(self):
+        """Rotated tokens decrypt with the primary key alone."""
+        old_key = Fernet.generate_key().decode()
+        new_key = Fernet.generate_key().decode()
+        token = KeyManager(old_key).cipher.encrypt(b"secret").decode()
+        manager = KeyManager(new_key, [old_key])
+
+        rotated = manager.rotate(token)
+
+        assert not manager.needs_rotation(rotated)
+        assert KeyManager(new_key).cipher.decrypt(rotated.encode()) == b"secret"
+
+
+class TestRotateEncryptedData:
+    """Test rotate_encrypted_data function."""
+
+    @pytest.fixture
+    def rotated_keys(self, monkeypatch):
+        """Install a key manager with a new primary and one previous key."""
+        old_key = Fernet.generate_key().decode()
+        new_key = Fernet.generate_key().decode()
+        old_manager = KeyManager(old_key)
+        monkeypatch.setattr(security, "key_manager", KeyManager(new_key, [old_key]))
+        return old_manager
+
+    def test_rotates_old_ciphertext(self, rotated_keys):
+        """Re-encrypts data that used a previous key."""
+        old_token = rotated_keys.cipher.encrypt(b'{"token": "abc"}').decode()
+
+        rotated = rotate_encrypted_data(old_token)
+
+        assert rotated != old_token
+        assert decrypt_data(rotated) == {"token": "abc"}
+
+    def test_current_ciphertext_unchanged(self, rotated_keys):
+        """Returns data already using the primary key unchanged."""
+        token = encrypt_data({"token": "abc"})
+
+        assert rotate_encrypted_data(token) == token
+
+    def test_undecryptable_returns_none(self, rotated_keys):
+        """Returns None when no active key can decrypt the data."""
+        foreign = KeyManager(Fernet.generate_key().decode()).cipher.encrypt(b"x")
+
+        assert rotate_encrypted_data(foreign.decode()) is None
@@ -0,0 +1,94 @@
+"""
+Tests for the single-flight primitive.
+"""
+
+import asyncio
+
+import pytest
+
+from shared.common.single_flight import SingleFlight
+
+
+@pytest.mark.asyncio
+class TestSingleFlight:
+    """Test coalescing of concurrent calls."""
+
+    async def test_concurrent_calls_share_one_execution(self):
+        """Concurrent callers for one key get the result of a single call."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def refresh():
+            nonlocal calls
+            calls += 1
+            await asyncio.sleep(0.01)
+            return calls
+
+        results = await asyncio.gather(
+            *(flight.do("tool-1", refresh) for _ in range(5))
+        )
+
+        assert calls == 1
+        assert results == [1] * 5
+        assert len(flight) == 0
+
+    async def test_different_keys_run_independently(self):
+        """Calls for different keys are not coalesced."""
+        flight = SingleFlight()
+
+        async def echo(value):
+            await asyncio.sleep(0.01)
+            return value
+
+        results = await asyncio.gather(
+            flight.do("a", lambda: echo("a")), flight.do("b", lambda: echo("b"))
+        )
+
+        assert results == ["a", "b"]
+
+    async def test_next_call_after_completion_runs_again(self):
+        """A finished call is not cached."""
+        flight = SingleFlight()
+        calls = 0
+
+        async def refresh():
+            nonlocal calls
+            calls += 1
+            return calls
+
+        assert await flight.do("tool-1", refresh) == 1
+        assert await flight.do("tool-1", refresh) == 2
+
+    async def test_exception_is_shared(self):
+        """Every waiter sees the exception of the shared call."""
+        flight = SingleFlight()
+
+        async def fail():
+            await asyncio.sleep(0.01)
+            raise RuntimeError("provider down")
+
+        results = await asyncio.gather(
+            flight.do("tool-1", fail), flight.do("tool-1", fail), return_exceptions=True
+        )
+
+        assert all(isinstance(r, RuntimeError) for r in results)
+        assert not flight.in_flight("tool-1")
+
+    async def test_cancelled_caller_does_not_cancel_others(self):
+        """Cancelling one waiter leaves the shared call running for the rest."""
+        flight = SingleFlight()
+        release = asyncio.Event()
+
+        async def refresh():
+            await release.wait()
+            return "new-token"
+
+        first = asyncio.create_task(flight.do("tool-1", refresh))
+        second = asyncio.create_task(flight.do("tool-1", refresh))
+        await asyncio.sleep(0)
+        first.cancel()
+        release.set()
+
+        assert await second == "new-token"
+        with pytest.raises(asyncio.CancelledError):
+            await first
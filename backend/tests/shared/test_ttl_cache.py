@@ -0,0 +1,54 @@
+"""
+Tests for the TTL cache.
+"""
+
+from unittest.mock import patch
+
+from shared.common.ttl_cache import TTLCache
+
+
+class TestTTLCache:
+    """Test expiry, eviction and invalidation."""
+
+    def test_value_expires_after_ttl(self):
+        """Values are served until their TTL passes."""
+        cache = TTLCache(ttl_seconds=60)
+        with patch("shared.common.ttl_cache.time.monotonic", return_value=1000.0):
+            cache.set("price:1", "a")
+        with patch("shared.common.ttl_cache.time.monotonic", return_value=1059.0):
+            assert cache.get("price:1") == "a"
+        with patch("shared.common.ttl_cache.time.monotonic", return_value=1060.0):
+            assert cache.get("price:1") is None
+        assert len(cache) == 0
+
+    def test_oldest_entry_evicted_beyond_max_entries(self):
+        """Storing past max_entries drops the least recently stored value."""
+        cache = TTLCache(ttl_seconds=60, max_entries=2)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        cache.set("a", 3)
+        cache.set("c", 4)
+
+        assert cache.get("b") is None
+        assert cache.get("a") == 3
+        assert cache.get("c") == 4
+
+    def test_invalidate_and_clear(self):
+        """Invalidated keys are no longer served."""
+        cache = TTLCache(ttl_seconds=60)
+        cache.set("a", 1)
+        cache.set("b", 2)
+
+        cache.invalidate("a")
+        assert cache.get("a") is None
+        assert cache.get("b") == 2
+
+        cache.clear()
+        assert len(cache) == 0
+
+    def test_zero_ttl_disables_cache(self):
+        """A TTL of 0 never stores anything."""
+        cache = TTLCache(ttl_seconds=0)
+        cache.set("a", 1)
+
+        assert cache.get("a") is None
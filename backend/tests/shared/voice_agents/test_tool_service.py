@@ -2,7 +2,7 @@
 Tests for shared Tool Service.
 """
 import pytest
-from unittest.mock import MagicMock
+from unittest.mock import AsyncMock, MagicMock
 from uuid import uuid4
 from datetime import datetime, timezone
 
@@ -20,6 +20,15 @@ def tool_service(mock_supabase_client):
     """ToolService with mocked Supabase."""
     from unittest.mock import patch
 
+    from shared.voice_agents.tool_service import (
+        decrypted_config_cache,
+        platform_tool_catalog,
+    )
+
+    # Tests reuse the same fake ciphertexts, so start from empty caches
+    decrypted_config_cache.clear()
+    platform_tool_catalog.invalidate()
+
     with patch('shared.voice_agents.tool_service.supabase_config') as mock_config:
         mock_config.client = mock_supabase_client
         mock_config.is_configured.return_value = True
@@ -28,6 +37,9 @@ def tool_service(mock_supabase_client):
         service.supabase_config = mock_config
         yield service
 
+    decrypted_config_cache.clear()
+    platform_tool_catalog.invalidate()
+
 
 
 @pytest.fixture
@@ -153,24 +165,21 @@ class TestToolService:
             "updated_at": "2024-01-01T00:00:00Z"
         }
 
-        # Create separate execute mocks for different calls
-        mock_check_response = MagicMock()
-        mock_check_response.data = []
-
-        mock_insert_response = MagicMock()
-        mock_insert_response.data = [tool_data_with_id]
+        mock_upsert_response = MagicMock()
+        mock_upsert_response.data = [tool_data_with_id]
 
-        # Use side_effect on execute to return different responses
-        mock_supabase_client.table.return_value.execute.side_effect = [
-            mock_check_response,
-            mock_insert_response
-        ]
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.return_value = mock_upsert_response
 
         result, error = await tool_service.upsert_platform_tool(tool_data)
 
         assert error is None
         assert result is not None
         assert result.name == "Test Tool"
+        # Single ON CONFLICT (name) round trip, no existence check
+        assert table_mock.upsert.call_args.kwargs["on_conflict"] == "name"
+        table_mock.select.assert_not_called()
+        table_mock.execute.assert_called_once()
 
     async def test_get_platform_tools_all(self, tool_service, mock_supabase_client):
         """Test getting all platform tools."""
@@ -244,14 +253,10 @@ class TestToolService:
         mock_platform_response = MagicMock()
         mock_platform_response.data = [platform_tool_data]
 
-        mock_check_response = MagicMock()
-        mock_check_response.data = []
-
         # Set side_effect to return different responses in order
         mock_supabase_client.table.return_value.execute.side_effect = [
-            mock_check_response,    # Check for existing
-            mock_insert_response,   # Insert agent tool
-            mock_platform_response   # Get platform tool for requires_auth
+            mock_insert_response,   # Upsert agent tool
+            mock_platform_response   # Load platform tool catalog for requires_auth
         ]
 
         # Patch encrypt_data
@@ -347,3 +352,573 @@ class TestToolService:
 
         assert error is None
         assert result is True
+
+    async def test_get_platform_tool_hashes(self, tool_service, mock_supabase_client):
+        """Test stored catalog hashes are keyed by tool name."""
+        mock_response = MagicMock()
+        mock_response.data = [
+            {"name": "Gmail", "catalog_hash": "abc"},
+            {"name": "Google_calendar", "catalog_hash": None},
+        ]
+        mock_supabase_client.table.return_value.execute.return_value = mock_response
+
+        hashes, error = await tool_service.get_platform_tool_hashes()
+
+        assert error is None
+        assert hashes == {"Gmail": "abc", "Google_calendar": None}
+
+    async def test_bulk_upsert_platform_tools(self, tool_service, mock_supabase_client):
+        """Test several tools are upserted in one request on name conflict."""
+        from shared.voice_agents.tool_models import PlatformToolCreate
+
+        tools_data = [
+            PlatformToolCreate(name="Tool A", catalog_hash="hash-a"),
+            PlatformToolCreate(name="Tool B", catalog_hash="hash-b"),
+        ]
+
+        mock_response = MagicMock()
+        mock_response.data = [
+            {
+                "id": str(uuid4()),
+                "name": tool.name,
+                "catalog_hash": tool.catalog_hash,
+                "is_active": True,
+                "created_at": "2024-01-01T00:00:00Z",
+                "updated_at": "2024-01-01T00:00:00Z",
+            }
+            for tool in tools_data
+        ]
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.return_value = mock_response
+
+        result, error = await tool_service.bulk_upsert_platform_tools(tools_data)
+
+        assert error is None
+        assert [tool.name for tool in result] == ["Tool A", "Tool B"]
+        rows = table_mock.upsert.call_args.args[0]
+        assert [row["name"] for row in rows] == ["Tool A", "Tool B"]
+        assert table_mock.upsert.call_args.kwargs["on_conflict"] == "name"
+        table_mock.execute.assert_called_once()
+
+    async def test_bulk_upsert_platform_tools_empty(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test an empty batch does not hit the database."""
+        result, error = await tool_service.bulk_upsert_platform_tools([])
+
+        assert result == []
+        assert error is None
+        mock_supabase_client.table.assert_not_called()
+
+    async def test_reencrypt_sensitive_configs(
+        self, tool_service, mock_supabase_client, monkeypatch
+    ):
+        """Test only rows using a previous key are rotated, with compare-and-swap."""
+        from cryptography.fernet import Fernet
+
+        from shared.common import security
+        from shared.common.security import KeyManager, decrypt_data
+
+        old_key = Fernet.generate_key().decode()
+        new_key = Fernet.generate_key().decode()
+        old_token = KeyManager(old_key).cipher.encrypt(b'{"a": 1}').decode()
+        monkeypatch.setattr(security, "key_manager", KeyManager(new_key, [old_key]))
+        current_token = security.encrypt_data({"b": 2})
+
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.not_ = table_mock
+        table_mock.gt.return_value = table_mock
+        table_mock.execute.side_effect = [
+            MagicMock(
+                data=[
+                    {"id": "1", "sensitive_config": old_token},
+                    {"id": "2", "sensitive_config": current_token},
+                    {"id": "3", "sensitive_config": "garbage"},
+                ]
+            ),
+            MagicMock(data=[{"id": "1"}]),
+        ]
+
+        stats, error = await tool_service.reencrypt_sensitive_configs(batch_size=10)
+
+        assert error is None
+        assert stats == {"scanned": 3, "rotated": 1, "skipped": 0, "failed": 1}
+        update = table_mock.update.call_args.args[0]
+        assert decrypt_data(update["sensitive_config"]) == {"a": 1}
+        table_mock.eq.assert_any_call("sensitive_config", old_token)
+
+    async def test_configure_agent_tool_parallel(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test parallel configures of the same tool converge on one row."""
+        import asyncio
+
+        from shared.voice_agents.tool_service import platform_tool_catalog
+
+        agent_id, tool_id = uuid4(), uuid4()
+        platform_tool_catalog.load(
+            [
+                PlatformTool(
+                    id=tool_id,
+                    name="Weather",
+                    auth_type="none",
+                    requires_auth=False,
+                    created_at="2024-01-01T00:00:00Z",
+                    updated_at="2024-01-01T00:00:00Z",
+                )
+            ]
+        )
+
+        # Minimal stand-in for the agent_tools table enforcing uq_agent_tool
+        rows = {}
+        pending = []
+        table_mock = mock_supabase_client.table.return_value
+
+        def upsert(data, on_conflict):
+            pending.append((data, on_conflict))
+            return table_mock
+
+        def execute():
+            data, on_conflict = pending.pop(0)
+            key = tuple(data[column] for column in on_conflict.split(","))
+            existing = rows.get(
+                key, {"id": str(uuid4()), "created_at": "2024-01-01T00:00:00Z"}
+            )
+            rows[key] = {**existing, **data, "updated_at": "2024-01-01T00:00:00Z"}
+            return MagicMock(data=[rows[key]])
+
+        table_mock.upsert.side_effect = upsert
+        table_mock.execute.side_effect = execute
+
+        results = await asyncio.gather(
+            *[
+                tool_service.configure_agent_tool(
+                    AgentToolCreate(
+                        agent_id=agent_id, tool_id=tool_id, config={"units": str(i)}
+                    )
+                )
+                for i in range(20)
+            ]
+        )
+
+        assert all(error is None for _, error in results)
+        assert len(rows) == 1
+        assert len({result.id for result, _ in results}) == 1
+        # One round trip per configure, never a separate existence check
+        assert table_mock.execute.call_count == 20
+        table_mock.select.assert_not_called()
+        table_mock.insert.assert_not_called()
+
+    async def test_iter_agent_tools_with_auth_keyset_pages(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test auth tools stream in keyset pages filtered by the database."""
+        from unittest.mock import patch
+
+        def row(i):
+            return {
+                "id": f"00000000-0000-0000-0000-{i:012d}",
+                "agent_id": str(uuid4()),
+                "tool_id": str(uuid4()),
+                "sensitive_config": f"cipher-{i}",
+                "created_at": "2024-01-01T00:00:00Z",
+                "updated_at": "2024-01-01T00:00:00Z",
+                "tool": {
+                    "id": str(uuid4()),
+                    "name": f"Tool {i}",
+                    "requires_auth": True,
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "updated_at": "2024-01-01T00:00:00Z",
+                },
+            }
+
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.not_ = table_mock
+        table_mock.gt.return_value = table_mock
+        table_mock.execute.side_effect = [
+            MagicMock(data=[row(1), row(2)]),
+            MagicMock(data=[row(3)]),
+        ]
+
+        def fake_decrypt(ciphertext):
+            # Row 2 cannot be decrypted and is skipped
+            return {} if ciphertext == "cipher-2" else {"access_token": ciphertext}
+
+        with patch(
+            "shared.voice_agents.tool_service.decrypt_data", side_effect=fake_decrypt
+        ):
+            stream = tool_service.iter_agent_tools_with_auth(page_size=2)
+            pages = [page async for page in stream]
+
+        assert [[tool.tool.name for tool in page] for page in pages] == [
+            ["Tool 1"],
+            ["Tool 3"],
+        ]
+        assert pages[1][0].sensitive_config == {"access_token": "cipher-3"}
+        table_mock.eq.assert_any_call("tool.requires_auth", True)
+        table_mock.is_.assert_any_call("sensitive_config", "null")
+        # Second page continues after the last row of the first, skipped or not
+        table_mock.gt.assert_called_once_with("id", row(2)["id"])
+
+    async def test_iter_token_expiries_page_error_raises(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test a failed page fetch is not mistaken for the end of the expiries."""
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.side_effect = ConnectionError("connection reset")
+
+        with pytest.raises(RuntimeError, match="connection reset"):
+            async for _ in tool_service.iter_token_expiries():
+                pass
+
+    async def test_iter_agent_tools_with_auth_page_error_raises(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test a failed page fetch is reported instead of ending the scan early."""
+        from unittest.mock import patch
+
+        with patch.object(
+            tool_service,
+            "_fetch_agent_tools_with_auth_page",
+            new=AsyncMock(return_value=([], "connection reset")),
+        ):
+            with pytest.raises(RuntimeError, match="connection reset"):
+                async for _ in tool_service.iter_agent_tools_with_auth():
+                    pass
+
+            tools, error = await tool_service.get_all_agent_tools_with_auth()
+
+        assert tools == []
+        assert "connection reset" in error
+
+    async def test_token_expires_at_kept_in_sync(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test saving or clearing tokens updates the plaintext expiry column."""
+        from shared.voice_agents.tool_service import get_token_expires_at
+
+        expires_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        table_mock = mock_supabase_client.table.return_value
+
+        sensitive_config = {"access_token": "a", "expires_at": expires_at.timestamp()}
+        await tool_service.configure_agent_tool(
+            AgentToolCreate(
+                agent_id=uuid4(), tool_id=uuid4(), sensitive_config=sensitive_config
+            )
+        )
+        upserted = table_mock.upsert.call_args.args[0]
+        assert upserted["token_expires_at"] == expires_at.isoformat()
+
+        await tool_service.update_agent_tool(
+            uuid4(), AgentToolUpdate(sensitive_config=None)
+        )
+        assert table_mock.update.call_args.args[0]["token_expires_at"] is None
+
+        await tool_service.update_agent_tool(uuid4(), AgentToolUpdate(is_enabled=False))
+        assert "token_expires_at" not in table_mock.update.call_args.args[0]
+
+        assert get_token_expires_at({"api_key": "k"}) is None
+
+    async def test_iter_agent_tools_with_auth_expiry_window(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test the refresh scan only selects tokens expiring within the window."""
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.not_ = table_mock
+        expiring_before = datetime(2030, 1, 1, tzinfo=timezone.utc)
+
+        pages = [
+            page
+            async for page in tool_service.iter_agent_tools_with_auth(
+                expiring_before=expiring_before
+            )
+        ]
+
+        assert pages == []
+        table_mock.lte.assert_called_once_with(
+            "token_expires_at", expiring_before.isoformat()
+        )
+        assert table_mock.gte.call_args.args[0] == "token_expires_at"
+
+    async def test_token_listener_notified_on_save(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test token listeners receive the new expiry when tokens are saved."""
+        listener = MagicMock()
+        tool_service.add_token_listener(listener)
+        expires_at = datetime(2030, 1, 1, tzinfo=timezone.utc)
+        mock_supabase_client.table.return_value.execute.return_value = MagicMock(
+            data=[{"id": "agent-tool-1"}]
+        )
+
+        await tool_service.update_agent_tool(
+            uuid4(),
+            AgentToolUpdate(sensitive_config={"expires_at": expires_at.timestamp()}),
+        )
+        await tool_service.update_agent_tool(uuid4(), AgentToolUpdate(is_enabled=True))
+
+        listener.assert_called_once_with("agent-tool-1", expires_at.isoformat())
+
+    async def test_refresh_lease_rpcs(self, tool_service, mock_supabase_client):
+        """Test leases are acquired and released through the Postgres functions."""
+        agent_tool_id = uuid4()
+        rpc = mock_supabase_client.rpc
+        rpc.return_value.execute.return_value = MagicMock(data=4)
+
+        token, error = await tool_service.acquire_refresh_lease(
+            agent_tool_id, "host:1", 60
+        )
+
+        assert (token, error) == (4, None)
+        rpc.assert_called_with(
+            "acquire_agent_tool_refresh_lease",
+            {
+                "p_agent_tool_id": str(agent_tool_id),
+                "p_holder": "host:1",
+                "p_ttl_seconds": 60,
+            },
+        )
+
+        released, _ = await tool_service.release_refresh_lease(
+            agent_tool_id, "host:1", 4
+        )
+        assert released is True
+        assert rpc.call_args.args[0] == "release_agent_tool_refresh_lease"
+
+    async def test_fenced_update(self, tool_service, mock_supabase_client):
+        """Test fenced updates only apply over older fencing tokens."""
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.or_.return_value = table_mock
+
+        result, error = await tool_service.update_agent_tool(
+            uuid4(),
+            AgentToolUpdate(sensitive_config={"access_token": "a"}),
+            fencing_token=5,
+        )
+
+        assert result is None
+        assert error == "Agent tool not found or refresh lease lost"
+        assert table_mock.update.call_args.args[0]["refresh_fencing_token"] == 5
+        table_mock.or_.assert_called_once_with(
+            "refresh_fencing_token.is.null,refresh_fencing_token.lt.5"
+        )
+
+
+class TestDecryptedConfigCache:
+    """Test cases for the decrypted sensitive config cache."""
+
+    def test_get_returns_copy(self):
+        """Test cached configs can be modified without affecting the cache."""
+        from shared.voice_agents.tool_service import DecryptedConfigCache
+
+        cache = DecryptedConfigCache(max_size=4)
+        cache.put("ciphertext", {"access_token": "token"})
+
+        first = cache.get("ciphertext")
+        first["access_token"] = "changed"
+
+        assert cache.get("ciphertext") == {"access_token": "token"}
+
+    def test_miss_returns_none(self):
+        """Test unknown ciphertexts miss."""
+        from shared.voice_agents.tool_service import DecryptedConfigCache
+
+        assert DecryptedConfigCache().get("unknown") is None
+
+    def test_eviction_is_bounded_and_zeroizes(self):
+        """Test oldest entries are evicted and their plaintext overwritten."""
+        from shared.voice_agents.tool_service import DecryptedConfigCache
+
+        cache = DecryptedConfigCache(max_size=2)
+        cache.put("a", {"access_token": "token-a"})
+        oldest_buffer = next(iter(cache._entries.values()))
+        cache.put("b", {"access_token": "token-b"})
+        cache.put("c", {"access_token": "token-c"})
+
+        assert len(cache) == 2
+        assert cache.get("a") is None
+        assert cache.get("c") == {"access_token": "token-c"}
+        assert set(oldest_buffer) == {0}
+
+    def test_clear_zeroizes(self):
+        """Test clearing the cache overwrites all plaintext."""
+        from shared.voice_agents.tool_service import DecryptedConfigCache
+
+        cache = DecryptedConfigCache(max_size=2)
+        cache.put("a", {"access_token": "token-a"})
+        buffer = next(iter(cache._entries.values()))
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert set(buffer) == {0}
+
+    def test_disabled_when_size_zero(self):
+        """Test a zero-sized cache stores nothing."""
+        from shared.voice_agents.tool_service import DecryptedConfigCache
+
+        cache = DecryptedConfigCache(max_size=0)
+        cache.put("a", {"access_token": "token-a"})
+
+        assert len(cache) == 0
+
+    async def test_get_agent_tools_decrypts_each_row_once(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test listing tools decrypts each sensitive config only once."""
+        from unittest.mock import patch
+
+        agent_id = uuid4()
+        tool_id = uuid4()
+        expires_at = datetime.now(timezone.utc).timestamp() + 3600
+        rows = [
+            {
+                "id": str(uuid4()),
+                "agent_id": str(agent_id),
+                "tool_id": str(tool_id),
+                "sensitive_config": f"encrypted-{i}",
+                "is_enabled": True,
+                "tool": {
+                    "id": str(tool_id),
+                    "name": "Gmail",
+                    "auth_type": "oauth2",
+                    "requires_auth": True,
+                    "is_active": True,
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "updated_at": "2024-01-01T00:00:00Z",
+                },
+                "created_at": "2024-01-01T00:00:00Z",
+                "updated_at": "2024-01-01T00:00:00Z",
+            }
+            for i in range(3)
+        ]
+        mock_response = MagicMock()
+        mock_response.data = rows
+        mock_supabase_client.table.return_value.execute.return_value = mock_response
+
+        with patch(
+            'shared.voice_agents.tool_service.decrypt_data',
+            return_value={"access_token": "token", "expires_at": expires_at},
+        ) as mock_decrypt:
+            tools, error = await tool_service.get_agent_tools(agent_id)
+
+        assert error is None
+        assert len(tools) == 3
+        assert all(tool.auth_status == AuthStatus.AUTHENTICATED for tool in tools)
+        assert all(tool.token_expires_at == expires_at for tool in tools)
+        assert mock_decrypt.call_count == 3
+
+
+class TestPlatformToolCatalog:
+    """Test cases for the in-memory platform tool catalog."""
+
+    @staticmethod
+    def _tool_row(name: str, auth_type: str = "oauth2") -> dict:
+        return {
+            "id": str(uuid4()),
+            "name": name,
+            "auth_type": auth_type,
+            "requires_auth": True,
+            "is_active": True,
+            "created_at": "2024-01-01T00:00:00Z",
+            "updated_at": "2024-01-01T00:00:00Z",
+        }
+
+    async def test_loaded_once_and_indexed(self, tool_service, mock_supabase_client):
+        """Test lookups by id and name share a single catalog fetch."""
+        rows = [self._tool_row("Gmail"), self._tool_row("Weather", "api_key")]
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.return_value = MagicMock(data=rows)
+
+        by_id, error = await tool_service.get_platform_tool(tool_id=rows[1]["id"])
+        by_name, _ = await tool_service.get_platform_tool(name="Gmail")
+
+        assert error is None
+        assert by_id.name == "Weather"
+        assert str(by_name.id) == rows[0]["id"]
+        table_mock.execute.assert_called_once()
+
+    async def test_miss_reloads_once(self, tool_service, mock_supabase_client):
+        """Test a tool added after the load is found by reloading."""
+        gmail = self._tool_row("Gmail")
+        new_tool = self._tool_row("Slack")
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.side_effect = [
+            MagicMock(data=[gmail]),
+            MagicMock(data=[gmail, new_tool]),
+        ]
+
+        await tool_service.get_platform_tool(name="Gmail")
+        tool, error = await tool_service.get_platform_tool(name="Slack")
+
+        assert error is None
+        assert tool.name == "Slack"
+        assert table_mock.execute.call_count == 2
+
+    async def test_repeated_misses_do_not_reload(
+        self, tool_service, mock_supabase_client
+    ):
+        """Test unknown ids reload the catalog at most once per cooldown."""
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.return_value = MagicMock(data=[self._tool_row("Gmail")])
+
+        for _ in range(5):
+            tool, error = await tool_service.get_platform_tool(tool_id=uuid4())
+            assert tool is None and error is None
+
+        # The first load plus a single reload for the first miss
+        assert table_mock.execute.call_count == 2
+
+    async def test_upsert_refreshes_catalog(self, tool_service, mock_supabase_client):
+        """Test upserting a tool updates the cached entry without a reload."""
+        from shared.voice_agents.tool_models import PlatformToolCreate
+        from shared.voice_agents.tool_service import platform_tool_catalog
+
+        row = self._tool_row("Gmail")
+        table_mock = mock_supabase_client.table.return_value
+        table_mock.execute.return_value = MagicMock(data=[row])
+        await tool_service.get_platform_tool(name="Gmail")
+        version = platform_tool_catalog.version
+
+        updated = dict(row, auth_type="api_key")
+        table_mock.execute.return_value = MagicMock(data=[updated])
+        await tool_service.upsert_platform_tool(PlatformToolCreate(name="Gmail"))
+        calls = table_mock.execute.call_count
+
+        tool, _ = await tool_service.get_platform_tool(tool_id=row["id"])
+
+        assert tool.auth_type == "api_key"
+        assert platform_tool_catalog.version > version
+        assert table_mock.execute.call_count == calls
+
+    async def test_configure_uses_catalog(self, tool_service, mock_supabase_client):
+        """Test configure_agent_tool reads auth info from the cached catalog."""
+        from shared.voice_agents.tool_service import platform_tool_catalog
+
+        tool = PlatformTool(**self._tool_row("Weather", "api_key"))
+        platform_tool_catalog.load([tool])
+        agent_id = uuid4()
+        mock_supabase_client.table.return_value.execute.return_value = MagicMock(
+            data=[
+                {
+                    "id": str(uuid4()),
+                    "agent_id": str(agent_id),
+                    "tool_id": str(tool.id),
+                    "is_enabled": True,
+                    "created_at": "2024-01-01T00:00:00Z",
+                    "updated_at": "2024-01-01T00:00:00Z",
+                }
+            ]
+        )
+
+        result, error = await tool_service.configure_agent_tool(
+            AgentToolCreate(agent_id=agent_id, tool_id=tool.id)
+        )
+
+        assert error is None
+        assert result.connection_status == "connected_auth_invalid"
+        selects = [
+            c for c in mock_supabase_client.table.call_args_list
+            if c.args == ("platform_tools",)
+        ]
+        assert selects == []
@@ -0,0 +1,121 @@
+"""
+Tests for tool routes.
+"""
+
+from unittest.mock import AsyncMock, Mock, patch
+from uuid import UUID
+
+import pytest
+from fastapi import HTTPException
+
+
+class TestRefreshAgentToolRoute:
+    """Test cases for the manual token refresh route."""
+
+    agent_tool_id = UUID("00000000-0000-0000-0000-000000000001")
+    agent_id = UUID("00000000-0000-0000-0000-000000000002")
+    org_id = UUID("00000000-0000-0000-0000-000000000003")
+    user_id = UUID("00000000-0000-0000-0000-000000000004")
+
+    def _patches(self, refresh_service):
+        agent_tool = Mock(agent_id=self.agent_id)
+        agent = Mock(organization_id=self.org_id)
+        tool_service = patch("src.voice_agents.tool_routes.tool_service")
+        voice_service = patch("src.voice_agents.tool_routes.voice_agent_service")
+        module = patch(
+            "src.services.token_refresh_service.token_refresh_service",
+            refresh_service,
+        )
+        return tool_service, voice_service, module, agent_tool, agent
+
+    @pytest.mark.asyncio
+    async def test_refresh_denied_for_other_organization(self):
+        """A user who is not an admin of the tool's organization cannot refresh it."""
+        from src.voice_agents.tool_routes import refresh_agent_tool
+
+        refresh_service = Mock()
+        refresh_service.refresh_agent_tool = AsyncMock(return_value=(True, None))
+        tool_patch, voice_patch, module_patch, agent_tool, agent = self._patches(
+            refresh_service
+        )
+
+        user_profile = Mock()
+        user_profile.has_role = Mock(return_value=False)
+
+        with tool_patch as mock_tool_service, voice_patch as mock_voice_service:
+            with module_patch:
+                mock_tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+                    return_value=(agent_tool, None)
+                )
+                mock_voice_service.get_agent_by_id = AsyncMock(
+                    return_value=(agent, None)
+                )
+
+                with pytest.raises(HTTPException) as exc_info:
+                    await refresh_agent_tool(
+                        agent_tool_id=self.agent_tool_id,
+                        user_data=(self.user_id, user_profile),
+                    )
+
+        assert exc_info.value.status_code == 403
+        refresh_service.refresh_agent_tool.assert_not_called()
+
+    @pytest.mark.asyncio
+    async def test_refresh_allowed_for_org_admin(self):
+        """An admin of the tool's organization can refresh it."""
+        from src.voice_agents.tool_routes import refresh_agent_tool
+
+        refresh_service = Mock()
+        refresh_service.refresh_agent_tool = AsyncMock(return_value=(True, None))
+        tool_patch, voice_patch, module_patch, agent_tool, agent = self._patches(
+            refresh_service
+        )
+
+        user_profile = Mock()
+        user_profile.has_role = Mock(
+            side_effect=lambda role, org_id=None: role == "org_admin"
+            and org_id == str(self.org_id)
+        )
+
+        with tool_patch as mock_tool_service, voice_patch as mock_voice_service:
+            with module_patch:
+                mock_tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+                    return_value=(agent_tool, None)
+                )
+                mock_voice_service.get_agent_by_id = AsyncMock(
+                    return_value=(agent, None)
+                )
+
+                result = await refresh_agent_tool(
+                    agent_tool_id=self.agent_tool_id,
+                    user_data=(self.user_id, user_profile),
+                )
+
+        assert result == {"id": str(self.agent_tool_id), "refreshed": True}
+        refresh_service.refresh_agent_tool.assert_awaited_once_with(self.agent_tool_id)
+
+    @pytest.mark.asyncio
+    async def test_refresh_unknown_tool_not_found(self):
+        """Refreshing an unknown agent tool returns 404."""
+        from src.voice_agents.tool_routes import refresh_agent_tool
+
+        refresh_service = Mock()
+        refresh_service.refresh_agent_tool = AsyncMock(return_value=(True, None))
+        tool_patch, voice_patch, module_patch, _, _ = self._patches(refresh_service)
+
+        user_profile = Mock()
+        user_profile.has_role = Mock(return_value=True)
+
+        with tool_patch as mock_tool_service, voice_patch, module_patch:
+            mock_tool_service.get_agent_tool_with_sensitive_config = AsyncMock(
+                return_value=(None, "Agent tool configuration not found")
+            )
+
+            with pytest.raises(HTTPException) as exc_info:
+                await refresh_agent_tool(
+                    agent_tool_id=self.agent_tool_id,
+                    user_data=(self.user_id, user_profile),
+                )
+
+        assert exc_info.value.status_code == 404
+        refresh_service.refresh_agent_tool.assert_not_called()
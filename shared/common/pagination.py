@@ -0,0 +1,76 @@
+"""
+Cursor (keyset) pagination for PostgREST queries.
+
+Lists that grow without bound (billing history, credit transactions,
+notification logs) are paged newest first on (created_at, id) instead of
+with offsets: the cursor encodes the last row of a page and the next page
+starts strictly after it. Every page costs one index range scan, however
+deep, and rows inserted meanwhile never shift or duplicate entries.
+"""
+
+import base64
+import json
+from datetime import datetime
+from typing import Any, Generic, List, Optional, Tuple, TypeVar
+from uuid import UUID
+
+from pydantic import BaseModel
+
+T = TypeVar("T")
+
+# Response header carrying the cursor of the next page on list endpoints
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class CursorPage(BaseModel, Generic[T]):
+    """One page of a cursor-paginated list."""
+
+    items: List[T]
+    next_cursor: Optional[str] = None
+
+
+def encode_cursor(row: dict[str, Any]) -> str:
+    """Opaque cursor pointing just past the given row."""
+    raw = json.dumps([str(row["created_at"]), str(row["id"])])
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> Tuple[str, str]:
+    """Return the (created_at, id) a cursor points past.
+
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        created_at, row_id = json.loads(base64.urlsafe_b64decode(padded))
+        datetime.fromisoformat(created_at)
+        UUID(row_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+    return created_at, row_id
+
+
+def keyset_query(query: Any, limit: int, cursor: Optional[str] = None) -> Any:
+    """Order a query newest first on (created_at, id) and start after cursor.
+
+    One row more than limit is requested so keyset_page can tell whether
+    another page follows.
+    """
+    if cursor:
+        created_at, row_id = decode_cursor(cursor)
+        query = query.or_(
+            f'created_at.lt."{created_at}",'
+            f'and(created_at.eq."{created_at}",id.lt.{row_id})'
+        )
+    return query.order("created_at", desc=True).order("id", desc=True).limit(limit + 1)
+
+
+def keyset_page(
+    rows: List[dict[str, Any]], limit: int
+) -> Tuple[List[dict[str, Any]], Optional[str]]:
+    """Split the rows of a keyset_query into the page and the next cursor."""
+    if len(rows) <= limit:
+        return rows, None
+    page = rows[:limit]
+    return page, encode_cursor(page[-1])
@@ -1,14 +1,24 @@
 """
 Security utilities for encryption and sensitive data handling.
+
+Keys are managed by a process-wide KeyManager that builds the cipher once.
+To rotate keys:
+    1. Set the new key as ENCRYPTION_KEY and move the old one to
+       ENCRYPTION_PREVIOUS_KEYS (comma-separated, newest first).
+    2. Deploy; data encrypted with any listed key can still be decrypted.
+    3. Run backend/scripts/reencrypt_sensitive_configs.py to re-encrypt old
+       ciphertexts with the new key.
+    4. Remove the old key from ENCRYPTION_PREVIOUS_KEYS.
 """
 
 import base64
 import json
 import logging
 import os
-from typing import Any, Dict
+import threading
+from typing import Any, Dict, List, Optional
 
-from cryptography.fernet import Fernet
+from cryptography.fernet import Fernet, InvalidToken, MultiFernet
 from cryptography.hazmat.primitives import hashes
 from cryptography.hazmat.primitives.kdf.pbkdf2 import PBKDF2HMAC
 
@@ -18,23 +28,102 @@ logger = logging.getLogger(__name__)
 # from a secure environment variable.
 ENCRYPTION_KEY = os.getenv("ENCRYPTION_KEY")
 
+# Retired keys that are still accepted for decryption during a rotation
+ENCRYPTION_PREVIOUS_KEYS = os.getenv("ENCRYPTION_PREVIOUS_KEYS")
 
-def get_fernet() -> Fernet:
-    """Get Fernet instance for encryption/decryption."""
-    if not ENCRYPTION_KEY:
-        # Fallback for development ONLY - in production this must be set
-        # Using a deterministic key based on a fixed salt for dev convenience
-        salt = b"ai-voice-agent-platform-salt"
-        kdf = PBKDF2HMAC(
-            algorithm=hashes.SHA256(),
-            length=32,
-            salt=salt,
-            iterations=100000,
-        )
-        key = base64.urlsafe_b64encode(kdf.derive(b"dev-secret-key"))
-        return Fernet(key)
 
-    return Fernet(ENCRYPTION_KEY.encode())
+def _derive_dev_key() -> bytes:
+    """Derive the development fallback key (expensive, PBKDF2 with 100k iterations)."""
+    # Using a deterministic key based on a fixed salt for dev convenience
+    salt = b"ai-voice-agent-platform-salt"
+    kdf = PBKDF2HMAC(
+        algorithm=hashes.SHA256(),
+        length=32,
+        salt=salt,
+        iterations=100000,
+    )
+    return base64.urlsafe_b64encode(kdf.derive(b"dev-secret-key"))
+
+
+def _split_keys(value: Optional[str]) -> List[str]:
+    if not value:
+        return []
+    return [key.strip() for key in value.split(",") if key.strip()]
+
+
+class KeyManager:
+    """Builds and caches the cipher used for sensitive data.
+
+    The primary key encrypts; the primary and all previous keys decrypt, via
+    MultiFernet. Keys are derived and the cipher is built once on first use.
+
+    Attributes:
+        primary_key: Key used for new encryptions (dev key derived if None)
+        previous_keys: Older keys still accepted for decryption
+    """
+
+    def __init__(
+        self,
+        primary_key: Optional[str] = None,
+        previous_keys: Optional[List[str]] = None,
+    ) -> None:
+        self.primary_key = primary_key
+        self.previous_keys = previous_keys or []
+        self._primary: Optional[Fernet] = None
+        self._cipher: Optional[MultiFernet] = None
+        self._lock = threading.Lock()
+
+    def _build(self) -> None:
+        if self.primary_key:
+            primary = Fernet(self.primary_key.encode())
+        else:
+            # Fallback for development ONLY - in production this must be set
+            logger.warning("ENCRYPTION_KEY not set, deriving development key")
+            primary = Fernet(_derive_dev_key())
+
+        previous = [Fernet(key.encode()) for key in self.previous_keys]
+        self._primary = primary
+        self._cipher = MultiFernet([primary, *previous])
+
+    @property
+    def cipher(self) -> MultiFernet:
+        """Get the cached cipher, building it on first use."""
+        if self._cipher is None:
+            with self._lock:
+                if self._cipher is None:
+                    self._build()
+        return self._cipher
+
+    def needs_rotation(self, token: str) -> bool:
+        """Check whether a token was encrypted with a key other than the primary."""
+        self.cipher  # Ensure keys are built
+        try:
+            self._primary.decrypt(token.encode())
+            return False
+        except InvalidToken:
+            return True
+
+    def rotate(self, token: str) -> str:
+        """Re-encrypt a token with the primary key.
+
+        Raises:
+            InvalidToken: If no active key can decrypt the token
+        """
+        return self.cipher.rotate(token.encode()).decode()
+
+    def reset(self) -> None:
+        """Drop the cached cipher so it is rebuilt on next use."""
+        with self._lock:
+            self._primary = None
+            self._cipher = None
+
+
+key_manager = KeyManager(ENCRYPTION_KEY, _split_keys(ENCRYPTION_PREVIOUS_KEYS))
+
+
+def get_fernet() -> MultiFernet:
+    """Get the cached cipher for encryption/decryption."""
+    return key_manager.cipher
 
 
 def encrypt_data(data: Dict[str, Any]) -> str:
@@ -57,7 +146,7 @@ def decrypt_data(encrypted_str: str) -> Dict[str, Any]:
         f = get_fernet()
         decrypted_data = f.decrypt(encrypted_str.encode())
         result = json.loads(decrypted_data.decode())
-        logger.info(f"Successfully decrypted data, keys: {list(result.keys())}")
+        logger.debug(f"Successfully decrypted data, keys: {list(result.keys())}")
         return result
     except Exception as e:
         # If decryption fails (e.g. wrong key), return empty dict
@@ -67,4 +156,23 @@ def decrypt_data(encrypted_str: str) -> Dict[str, Any]:
             f"Decryption failed: {type(e).__name__}: {str(e)}. "
             f"Encrypted data preview: {preview}"
         )
-        return {}
\ No newline at end of file
+        return {}
+
+
+def rotate_encrypted_data(encrypted_str: str) -> Optional[str]:
+    """Re-encrypt an encrypted string with the current primary key.
+
+    Returns:
+        The re-encrypted string, the input unchanged if it already uses the
+        primary key, or None if no active key can decrypt it.
+    """
+    if not encrypted_str:
+        return encrypted_str
+
+    try:
+        if not key_manager.needs_rotation(encrypted_str):
+            return encrypted_str
+        return key_manager.rotate(encrypted_str)
+    except InvalidToken:
+        logger.error("Rotation failed: no active key can decrypt the data")
+        return None
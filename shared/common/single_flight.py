@@ -0,0 +1,49 @@
+"""
+Single-flight execution of async calls.
+
+Concurrent callers asking for the same key share one in-flight call instead
+of each starting their own, e.g. so an OAuth token is refreshed once even
+when several code paths ask for it at the same moment.
+"""
+
+import asyncio
+from typing import Awaitable, Callable, Dict, Generic, Hashable, TypeVar
+
+T = TypeVar("T")
+
+
+class SingleFlight(Generic[T]):
+    """Coalesces concurrent calls with the same key into one execution.
+
+    The first caller for a key starts the call; callers arriving while it is
+    in flight await the same task and get its result (or exception). Once it
+    finishes the key is forgotten, so the next caller starts a fresh call.
+
+    The shared task is shielded, so a cancelled caller does not cancel the
+    call for the others.
+    """
+
+    def __init__(self) -> None:
+        self._calls: Dict[Hashable, asyncio.Task] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run fn for key, or join the call already in flight for key."""
+        task = self._calls.get(key)
+        if task is None:
+            task = asyncio.ensure_future(fn())
+            self._calls[key] = task
+            task.add_done_callback(lambda done: self._forget(key, done))
+        return await asyncio.shield(task)
+
+    def in_flight(self, key: Hashable) -> bool:
+        return key in self._calls
+
+    def _forget(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._calls.get(key) is task:
+            del self._calls[key]
+        # Retrieve the exception so an unawaited failure is not logged as lost
+        if not task.cancelled():
+            task.exception()
+
+    def __len__(self) -> int:
+        return len(self._calls)
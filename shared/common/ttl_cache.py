@@ -0,0 +1,58 @@
+"""
+In-memory cache with per-entry expiry.
+
+Used for lookups of data that rarely changes, e.g. Stripe prices, products
+and customers, where serving a value that is a few minutes old is
+acceptable and avoids a remote call per request.
+"""
+
+import time
+from collections import OrderedDict
+from typing import Generic, Hashable, Optional, Tuple, TypeVar
+
+V = TypeVar("V")
+
+
+class TTLCache(Generic[V]):
+    """Maps keys to values that expire ttl_seconds after they were stored.
+
+    At most max_entries values are kept; storing beyond that evicts the
+    least recently stored entry. A ttl_seconds of 0 disables the cache.
+    Not thread-safe: use it from one event loop.
+    """
+
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, V]]" = OrderedDict()
+
+    def get(self, key: Hashable) -> Optional[V]:
+        """Return the value stored for key, or None if missing or expired."""
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if time.monotonic() >= expires_at:
+            del self._entries[key]
+            return None
+        return value
+
+    def set(self, key: Hashable, value: V) -> None:
+        """Store value for key, replacing any previous value."""
+        if self.ttl_seconds <= 0:
+            return
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    def invalidate(self, key: Hashable) -> None:
+        """Forget the value stored for key."""
+        self._entries.pop(key, None)
+
+    def clear(self) -> None:
+        """Forget every value."""
+        self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -4,7 +4,7 @@ Uses Pydantic Settings for type-safe configuration handling.
 """
 
 import json
-from typing import Optional
+from typing import Dict, Optional
 
 from pydantic import Field, validator
 from pydantic_settings import BaseSettings
@@ -148,7 +148,9 @@ class Settings(BaseSettings):
         default=5,
         ge=1,
         le=60,
-        description="Interval in minutes to check for tokens needing refresh (default: 5)",
+        description=(
+            "Minutes to wait before retrying a failed token refresh (default: 5)"
+        ),
     )
     token_refresh_expiry_window_minutes: int = Field(
         default=15,
@@ -156,6 +158,189 @@ class Settings(BaseSettings):
         le=60,
         description="Window in minutes before expiry to refresh tokens (default: 15)",
     )
+    token_refresh_resync_interval_minutes: int = Field(
+        default=60,
+        ge=1,
+        le=1440,
+        description=(
+            "Interval in minutes to reload the token refresh schedule from the database"
+        ),
+    )
+    token_refresh_concurrency: int = Field(
+        default=10,
+        ge=1,
+        le=100,
+        description="Maximum token refreshes in flight at once during a sweep",
+    )
+    token_refresh_rate_limit_per_second: float = Field(
+        default=10.0,
+        ge=0,
+        description=(
+            "Default max token refresh requests per second per OAuth provider "
+            "(0 = unlimited)"
+        ),
+    )
+    token_refresh_provider_rate_limits: Dict[str, float] = Field(
+        default_factory=dict,
+        description=(
+            'Per-provider overrides of the refresh rate limit, e.g. {"google": 20}'
+        ),
+    )
+    token_refresh_lease_seconds: int = Field(
+        default=60,
+        ge=5,
+        le=600,
+        description=(
+            "Duration of the per-tool refresh lease shared across backend instances"
+        ),
+    )
+    token_refresh_page_size: int = Field(
+        default=100,
+        ge=1,
+        le=1000,
+        description="Agent tools fetched per page when scanning for token refresh",
+    )
+
+    # Tool Service Settings
+    sensitive_config_cache_size: int = Field(
+        default=1024,
+        ge=0,
+        description="Max decrypted tool configs kept in memory (0 disables the cache)",
+    )
+    platform_tool_catalog_ttl_seconds: int = Field(
+        default=300,
+        ge=0,
+        description="Seconds before the in-memory platform tool catalog is reloaded",
+    )
+    platform_tool_catalog_miss_reload_seconds: int = Field(
+        default=30,
+        ge=0,
+        description=(
+            "Min seconds between platform tool catalog reloads caused by lookup misses"
+        ),
+    )
+
+    # Usage Metering Settings
+    usage_metering_flush_interval_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        le=3600,
+        description=(
+            "Seconds between flushes of aggregated metered usage to the credit ledger"
+        ),
+    )
+    usage_metering_spill_dir: str = Field(
+        default="data/usage-metering",
+        description=(
+            "Directory for the metering journal and unconfirmed batches "
+            "(use persistent storage)"
+        ),
+    )
+    usage_metering_max_batch_attempts: int = Field(
+        default=10,
+        ge=1,
+        description=(
+            "Failed charges of a metering batch before it is quarantined so later "
+            "batches can flush"
+        ),
+    )
+
+    # Stripe API Settings
+    stripe_max_concurrent_requests: int = Field(
+        default=16,
+        ge=1,
+        le=128,
+        description="Stripe API calls run at once in the Stripe thread pool",
+    )
+    stripe_cache_ttl_seconds: int = Field(
+        default=300,
+        ge=0,
+        description=(
+            "Seconds Stripe prices, products and customers are cached "
+            "(0 disables the cache)"
+        ),
+    )
+    billing_catalog_ttl_seconds: int = Field(
+        default=300,
+        ge=0,
+        description=(
+            "Seconds before the in-memory catalog of plans, credit events "
+            "and credit products is reloaded"
+        ),
+    )
+    billing_catalog_miss_reload_seconds: int = Field(
+        default=30,
+        ge=0,
+        description=(
+            "Min seconds between billing catalog reloads caused by lookup misses"
+        ),
+    )
+
+    # Stripe Webhook Inbox Settings
+    stripe_webhook_workers: int = Field(
+        default=4,
+        ge=1,
+        le=64,
+        description="Stripe webhook events processed concurrently per instance",
+    )
+    stripe_webhook_max_attempts: int = Field(
+        default=8,
+        ge=1,
+        le=50,
+        description="Attempts before a Stripe webhook event is marked failed",
+    )
+    stripe_webhook_retry_base_seconds: float = Field(
+        default=10.0,
+        gt=0,
+        le=3600,
+        description=(
+            "Delay before the first retry of a failed Stripe webhook event; "
+            "doubles per attempt"
+        ),
+    )
+    stripe_webhook_poll_interval_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        le=300,
+        description="Seconds between polls of the Stripe webhook inbox when idle",
+    )
+
+    # Notification Outbox Settings
+    notification_outbox_workers: int = Field(
+        default=8,
+        ge=1,
+        le=64,
+        description="Notification emails sent concurrently per instance",
+    )
+    notification_outbox_max_attempts: int = Field(
+        default=6,
+        ge=1,
+        le=50,
+        description="Attempts before a notification email is marked failed",
+    )
+    notification_outbox_retry_base_seconds: float = Field(
+        default=30.0,
+        gt=0,
+        le=3600,
+        description=(
+            "Delay before the first retry of a failed notification email; "
+            "doubles per attempt"
+        ),
+    )
+    notification_outbox_poll_interval_seconds: float = Field(
+        default=5.0,
+        gt=0,
+        le=300,
+        description="Seconds between polls of the notification outbox when idle",
+    )
+    notification_outbox_flush_interval_seconds: float = Field(
+        default=1.0,
+        gt=0,
+        le=60,
+        description=(
+            "Seconds between batched writes of send outcomes to notification_logs"
+        ),
+    )
 
     @validator("cors_origins", pre=True)
     def parse_cors_origins(cls, v):
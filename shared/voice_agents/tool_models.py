@@ -59,6 +59,9 @@ class PlatformToolCreate(PlatformToolBase):
     tool_functions_schema: Optional[Dict[str, Any]] = Field(
         None, description="Function schemas for LLM debugging and inspection"
     )
+    catalog_hash: Optional[str] = Field(
+        None, description="Hash of tool metadata and function schemas from last sync"
+    )
 
 
 class PlatformTool(PlatformToolBase):
@@ -68,6 +71,9 @@ class PlatformTool(PlatformToolBase):
     tool_functions_schema: Optional[Dict[str, Any]] = Field(
         None, description="Function schemas for LLM debugging and inspection"
     )
+    catalog_hash: Optional[str] = Field(
+        None, description="Hash of tool metadata and function schemas from last sync"
+    )
     created_at: datetime = Field(..., description="Creation timestamp")
     updated_at: datetime = Field(..., description="Last update timestamp")
 
@@ -132,6 +138,9 @@ class AgentTool(AgentToolBase):
     last_refreshed_at: Optional[datetime] = Field(
         None, description="Timestamp when OAuth tokens were last auto-refreshed"
     )
+    token_expires_at: Optional[datetime] = Field(
+        None, description="Access token expiry, mirrored from sensitive_config"
+    )
     tool: Optional[PlatformTool] = Field(None, description="Tool details")
 
 
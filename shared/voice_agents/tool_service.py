@@ -2,17 +2,21 @@
 Tool service for managing platform tools and agent-specific tool configurations.
 """
 
+import hashlib
+import json
 import logging
+import threading
 import time
-from datetime import datetime
-from typing import List, Optional
+from collections import OrderedDict
+from datetime import datetime, timezone
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
 from uuid import UUID
 
 from opentelemetry import trace
 from supabase import Client
 
-from shared.common.security import decrypt_data, encrypt_data
-from shared.config import supabase_config
+from shared.common.security import decrypt_data, encrypt_data, rotate_encrypted_data
+from shared.config import settings, supabase_config
 
 from .tool_models import (
     AgentTool,
@@ -74,6 +78,199 @@ def _with_retry(max_retries: int = 3, delay: float = 0.5):
     return decorator
 
 
+class DecryptedConfigCache:
+    """Bounded LRU cache of decrypted sensitive configs.
+
+    Entries are keyed by the SHA-256 digest of the ciphertext, so the
+    ciphertext itself is never held as a key and re-encrypted configs
+    (Fernet tokens are unique per encryption) naturally miss. Plaintext is
+    kept as a bytearray and overwritten with zeros when an entry is evicted
+    or the cache is cleared. Lookups return a fresh dict, so callers can
+    modify the result without touching the cached copy.
+    """
+
+    def __init__(self, max_size: int = 1024) -> None:
+        self.max_size = max_size
+        self._entries: "OrderedDict[bytes, bytearray]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _key(ciphertext: str) -> bytes:
+        return hashlib.sha256(ciphertext.encode()).digest()
+
+    @staticmethod
+    def _zeroize(buffer: bytearray) -> None:
+        buffer[:] = bytes(len(buffer))
+
+    def get(self, ciphertext: str) -> Optional[Dict[str, Any]]:
+        """Get the decrypted config for a ciphertext, or None on a miss."""
+        key = self._key(ciphertext)
+        with self._lock:
+            buffer = self._entries.get(key)
+            if buffer is None:
+                return None
+            self._entries.move_to_end(key)
+            return json.loads(bytes(buffer))
+
+    def put(self, ciphertext: str, config: Dict[str, Any]) -> None:
+        """Cache the decrypted config for a ciphertext, evicting the oldest entry."""
+        if self.max_size <= 0 or not ciphertext or not config:
+            return
+
+        key = self._key(ciphertext)
+        buffer = bytearray(json.dumps(config).encode())
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._zeroize(previous)
+            self._entries[key] = buffer
+            while len(self._entries) > self.max_size:
+                _, evicted = self._entries.popitem(last=False)
+                self._zeroize(evicted)
+
+    def clear(self) -> None:
+        """Zeroize and drop all entries."""
+        with self._lock:
+            for buffer in self._entries.values():
+                self._zeroize(buffer)
+            self._entries.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+decrypted_config_cache = DecryptedConfigCache(
+    max_size=settings.sensitive_config_cache_size
+)
+
+
+class PlatformToolCatalog:
+    """Process-wide cache of the platform tool catalog.
+
+    The catalog only changes on deploy, so it is loaded once and indexed by
+    id and name. It is reloaded when its TTL expires or after invalidate(),
+    and single tools are replaced in place when they are upserted. Every
+    change bumps version so callers can tell the catalog was refreshed.
+    Lookup misses reload it at most once per miss_reload_seconds, so
+    repeated unknown ids do not each cost a full-table query.
+    """
+
+    def __init__(
+        self, ttl_seconds: float = 300, miss_reload_seconds: float = 30
+    ) -> None:
+        self.ttl_seconds = ttl_seconds
+        self.miss_reload_seconds = miss_reload_seconds
+        self.version = 0
+        self._by_id: Dict[str, PlatformTool] = {}
+        self._by_name: Dict[str, PlatformTool] = {}
+        self._loaded_at: Optional[float] = None
+        self._miss_reloaded_at: Optional[float] = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_stale(self) -> bool:
+        """Whether the catalog has never been loaded or its TTL has expired."""
+        if self._loaded_at is None:
+            return True
+        return time.monotonic() - self._loaded_at > self.ttl_seconds
+
+    def load(self, tools: List[PlatformTool]) -> None:
+        """Replace the whole catalog."""
+        with self._lock:
+            self._by_id = {str(tool.id): tool for tool in tools}
+            self._by_name = {tool.name: tool for tool in tools}
+            self._loaded_at = time.monotonic()
+            self.version += 1
+
+    def claim_miss_reload(self) -> bool:
+        """Whether a lookup miss may reload the catalog now.
+
+        Returns True at most once per miss_reload_seconds.
+        """
+        with self._lock:
+            now = time.monotonic()
+            if (
+                self._miss_reloaded_at is not None
+                and now - self._miss_reloaded_at < self.miss_reload_seconds
+            ):
+                return False
+            self._miss_reloaded_at = now
+            return True
+
+    def put(self, tool: PlatformTool) -> None:
+        """Add or replace a single tool without reloading the catalog."""
+        with self._lock:
+            previous = self._by_id.get(str(tool.id))
+            if previous is not None and previous.name != tool.name:
+                self._by_name.pop(previous.name, None)
+            self._by_id[str(tool.id)] = tool
+            self._by_name[tool.name] = tool
+            self.version += 1
+
+    def get_by_id(self, tool_id: Any) -> Optional[PlatformTool]:
+        return self._by_id.get(str(tool_id))
+
+    def get_by_name(self, name: str) -> Optional[PlatformTool]:
+        return self._by_name.get(name)
+
+    def invalidate(self) -> None:
+        """Force a reload on next access."""
+        with self._lock:
+            self._loaded_at = None
+            self._miss_reloaded_at = None
+            self.version += 1
+
+
+platform_tool_catalog = PlatformToolCatalog(
+    ttl_seconds=settings.platform_tool_catalog_ttl_seconds,
+    miss_reload_seconds=settings.platform_tool_catalog_miss_reload_seconds,
+)
+
+
+def decrypt_sensitive_config(ciphertext: Optional[str]) -> Dict[str, Any]:
+    """
+    Decrypt an agent tool's sensitive config, decrypting each ciphertext once.
+
+    Args:
+        ciphertext: Encrypted JSON string from agent_tools.sensitive_config
+
+    Returns:
+        Decrypted config dict, or an empty dict if missing or undecryptable
+    """
+    if not ciphertext:
+        return {}
+
+    cached = decrypted_config_cache.get(ciphertext)
+    if cached is not None:
+        return cached
+
+    decrypted = decrypt_data(ciphertext)
+    if not decrypted or not isinstance(decrypted, dict):
+        return {}
+
+    decrypted_config_cache.put(ciphertext, decrypted)
+    return decrypted
+
+
+def get_token_expires_at(sensitive_config: Optional[Dict[str, Any]]) -> Optional[str]:
+    """
+    Get the plaintext token expiry to store alongside an encrypted config.
+
+    agent_tools.token_expires_at mirrors sensitive_config["expires_at"] so
+    the refresh job can find expiring tokens without decrypting every row.
+
+    Returns:
+        ISO 8601 UTC timestamp, or None if the config has no expiry
+    """
+    expires_at = (sensitive_config or {}).get("expires_at")
+    if not expires_at:
+        return None
+    try:
+        return datetime.fromtimestamp(float(expires_at), timezone.utc).isoformat()
+    except (TypeError, ValueError, OverflowError):
+        return None
+
+
 def validate_token_status(
     sensitive_config: Optional[str], auth_type: Optional[str] = "oauth2"
 ) -> AuthStatus:
@@ -91,8 +288,8 @@ def validate_token_status(
         return AuthStatus.NOT_AUTHENTICATED
 
     try:
-        decrypted_data = decrypt_data(sensitive_config)
-        if not decrypted_data or not isinstance(decrypted_data, dict):
+        decrypted_data = decrypt_sensitive_config(sensitive_config)
+        if not decrypted_data:
             return AuthStatus.NOT_AUTHENTICATED
 
         # OAuth token validation
@@ -153,50 +350,115 @@ class ToolService:
 
     def __init__(self) -> None:
         self.supabase_config = supabase_config
+        self._token_listeners: List[Callable[[str, Optional[str]], None]] = []
 
     @property
     def supabase(self) -> Optional[Client]:
         """Get Supabase client."""
         return self.supabase_config.client
 
+    def add_token_listener(
+        self, listener: Callable[[str, Optional[str]], None]
+    ) -> None:
+        """Register a callback invoked when an agent tool's tokens are saved.
+
+        The callback receives the agent tool id and the new token_expires_at
+        (ISO 8601, or None when tokens were cleared). It runs inline, so it
+        must be fast and must not raise.
+        """
+        self._token_listeners.append(listener)
+
+    def remove_token_listener(
+        self, listener: Callable[[str, Optional[str]], None]
+    ) -> None:
+        """Unregister a callback added with add_token_listener."""
+        if listener in self._token_listeners:
+            self._token_listeners.remove(listener)
+
+    def _notify_token_saved(
+        self, agent_tool_id: str, token_expires_at: Optional[str]
+    ) -> None:
+        for listener in self._token_listeners:
+            try:
+                listener(agent_tool_id, token_expires_at)
+            except Exception as e:
+                logger.error(
+                    f"Token listener failed for agent tool {agent_tool_id}: {e}"
+                )
+
     # Platform Tools
     @tracer.start_as_current_span("tool.upsert_platform_tool")
     @_with_retry(max_retries=3)
     async def upsert_platform_tool(
         self, tool_data: PlatformToolCreate
     ) -> tuple[Optional[PlatformTool], Optional[str]]:
-        """Upsert a platform tool by name."""
+        """Upsert a platform tool by name in a single round trip."""
         try:
-            # Check if exists
-            existing = (
-                self.supabase.table("platform_tools")
-                .select("*")
-                .eq("name", tool_data.name)
-                .execute()
-            )
-
             # Dump model and exclude fields not in DB (none - we save all fields)
             data_dict = tool_data.model_dump(exclude_none=True)
 
-            if existing.data:
-                response = (
-                    self.supabase.table("platform_tools")
-                    .update(data_dict)
-                    .eq("id", existing.data[0]["id"])
-                    .execute()
-                )
-            else:
-                response = (
-                    self.supabase.table("platform_tools").insert(data_dict).execute()
-                )
+            # ON CONFLICT (name) DO UPDATE, so concurrent saves cannot race
+            response = (
+                self.supabase.table("platform_tools")
+                .upsert(data_dict, on_conflict="name")
+                .execute()
+            )
 
             if not response.data:
                 return None, "Failed to upsert platform tool"
-            return PlatformTool(**response.data[0]), None
+            platform_tool = PlatformTool(**response.data[0])
+            platform_tool_catalog.put(platform_tool)
+            return platform_tool, None
         except Exception as e:
             logger.error(f"Error upserting platform tool: {e}")
             return None, str(e)
 
+    @tracer.start_as_current_span("tool.get_platform_tool_hashes")
+    @_with_retry(max_retries=3)
+    async def get_platform_tool_hashes(
+        self,
+    ) -> tuple[Dict[str, Optional[str]], Optional[str]]:
+        """Get the stored catalog hash of every platform tool, keyed by name."""
+        try:
+            response = (
+                self.supabase.table("platform_tools")
+                .select("name, catalog_hash")
+                .execute()
+            )
+            hashes = {item["name"]: item.get("catalog_hash") for item in response.data}
+            return hashes, None
+        except Exception as e:
+            logger.error(f"Error getting platform tool hashes: {e}")
+            return {}, str(e)
+
+    @tracer.start_as_current_span("tool.bulk_upsert_platform_tools")
+    @_with_retry(max_retries=3)
+    async def bulk_upsert_platform_tools(
+        self, tools_data: List[PlatformToolCreate]
+    ) -> tuple[List[PlatformTool], Optional[str]]:
+        """Upsert several platform tools by name in a single request."""
+        if not tools_data:
+            return [], None
+
+        try:
+            # Every row carries the same keys so PostgREST can bulk upsert them
+            rows = [tool_data.model_dump() for tool_data in tools_data]
+            response = (
+                self.supabase.table("platform_tools")
+                .upsert(rows, on_conflict="name")
+                .execute()
+            )
+
+            if not response.data:
+                return [], "Failed to upsert platform tools"
+            platform_tools = [PlatformTool(**item) for item in response.data]
+            for platform_tool in platform_tools:
+                platform_tool_catalog.put(platform_tool)
+            return platform_tools, None
+        except Exception as e:
+            logger.error(f"Error bulk upserting platform tools: {e}")
+            return [], str(e)
+
     @tracer.start_as_current_span("tool.get_platform_tools")
     async def get_platform_tools(
         self, only_active: bool = True
@@ -213,6 +475,48 @@ class ToolService:
             logger.error(f"Error getting platform tools: {e}")
             return [], str(e)
 
+    @tracer.start_as_current_span("tool.get_platform_tool")
+    async def get_platform_tool(
+        self, tool_id: Optional[UUID] = None, name: Optional[str] = None
+    ) -> tuple[Optional[PlatformTool], Optional[str]]:
+        """Get a single platform tool by id or name from the in-memory catalog.
+
+        The catalog is loaded on first use and reloaded when stale, or on a
+        miss in case the tool was added by another instance (at most once
+        per miss_reload_seconds).
+        """
+
+        def lookup() -> Optional[PlatformTool]:
+            if tool_id is not None:
+                return platform_tool_catalog.get_by_id(tool_id)
+            return platform_tool_catalog.get_by_name(name)
+
+        try:
+            reloaded = False
+            if platform_tool_catalog.is_stale:
+                tools, error = await self.get_platform_tools(only_active=False)
+                if error:
+                    return None, error
+                platform_tool_catalog.load(tools)
+                reloaded = True
+
+            platform_tool = lookup()
+            if (
+                platform_tool is None
+                and not reloaded
+                and platform_tool_catalog.claim_miss_reload()
+            ):
+                tools, error = await self.get_platform_tools(only_active=False)
+                if error:
+                    return None, error
+                platform_tool_catalog.load(tools)
+                platform_tool = lookup()
+
+            return platform_tool, None
+        except Exception as e:
+            logger.error(f"Error getting platform tool {tool_id or name}: {e}")
+            return None, str(e)
+
     # Agent Tools
     @tracer.start_as_current_span("tool.configure_agent_tool")
     async def configure_agent_tool(
@@ -227,46 +531,37 @@ class ToolService:
             data["agent_id"] = str(agent_tool_data.agent_id)
             data["tool_id"] = str(agent_tool_data.tool_id)
 
+            data["token_expires_at"] = get_token_expires_at(
+                agent_tool_data.sensitive_config
+            )
+
             # Encrypt sensitive config if present
             if agent_tool_data.sensitive_config:
                 data["sensitive_config"] = encrypt_data(
                     agent_tool_data.sensitive_config
                 )
+                # We already hold the plaintext, so reads never need to decrypt it
+                decrypted_config_cache.put(
+                    data["sensitive_config"], agent_tool_data.sensitive_config
+                )
 
-            # Check if configuration already exists
-            existing = (
+            # ON CONFLICT (agent_id, tool_id) DO UPDATE in a single round trip
+            response = (
                 self.supabase.table("agent_tools")
-                .select("*")
-                .eq("agent_id", str(agent_tool_data.agent_id))
-                .eq("tool_id", str(agent_tool_data.tool_id))
+                .upsert(data, on_conflict="agent_id,tool_id")
                 .execute()
             )
 
-            if existing.data:
-                # Update
-                update_payload = agent_tool_data.model_dump(
-                    exclude={"agent_id", "tool_id"}
-                )
-                if agent_tool_data.sensitive_config:
-                    update_payload["sensitive_config"] = data["sensitive_config"]
-
-                response = (
-                    self.supabase.table("agent_tools")
-                    .update(update_payload)
-                    .eq("id", existing.data[0]["id"])
-                    .execute()
-                )
-            else:
-                # Insert
-                response = self.supabase.table("agent_tools").insert(data).execute()
-
             if not response.data:
                 return None, "Failed to configure agent tool"
 
+            self._notify_token_saved(
+                response.data[0]["id"], data["token_expires_at"]
+            )
+
             # Fetch platform tool to get requires_auth for connection status
-            platform_tools, _ = await self.get_platform_tools(only_active=False)
-            platform_tool = next(
-                (t for t in platform_tools if t.id == agent_tool_data.tool_id), None
+            platform_tool, _ = await self.get_platform_tool(
+                tool_id=agent_tool_data.tool_id
             )
 
             # Build response model without sensitive config
@@ -319,9 +614,10 @@ class ToolService:
                 # Extract token expiry from encrypted config for display
                 token_expires_at = None
                 try:
-                    decrypted_config = decrypt_data(item.get("sensitive_config"))
-                    if decrypted_config and isinstance(decrypted_config, dict):
-                        token_expires_at = decrypted_config.get("expires_at")
+                    decrypted_config = decrypt_sensitive_config(
+                        item.get("sensitive_config")
+                    )
+                    token_expires_at = decrypted_config.get("expires_at")
                 except Exception:
                     pass
 
@@ -381,9 +677,10 @@ class ToolService:
                 sensitive_config = None
                 if item.get("sensitive_config"):
                     try:
-                        decrypted_config = decrypt_data(item.get("sensitive_config"))
-                        if decrypted_config and isinstance(decrypted_config, dict):
-                            sensitive_config = decrypted_config
+                        sensitive_config = (
+                            decrypt_sensitive_config(item.get("sensitive_config"))
+                            or None
+                        )
                     except Exception as e:
                         logger.error(f"Error decrypting sensitive config: {e}")
 
@@ -412,11 +709,50 @@ class ToolService:
             )
             return [], str(e)
 
+    @tracer.start_as_current_span("tool.get_agent_tool_with_sensitive_config")
+    async def get_agent_tool_with_sensitive_config(
+        self, agent_tool_id: UUID
+    ) -> tuple[Optional[AgentTool], Optional[str]]:
+        """Get an agent tool with its platform tool and decrypted sensitive config."""
+        try:
+            response = (
+                self.supabase.table("agent_tools")
+                .select("*, tool:platform_tools(*)")
+                .eq("id", str(agent_tool_id))
+                .execute()
+            )
+            if not response.data:
+                return None, "Agent tool configuration not found"
+
+            item = response.data[0]
+            tool_data = item.pop("tool", None)
+            item["sensitive_config"] = (
+                decrypt_sensitive_config(item.get("sensitive_config")) or None
+            )
+            agent_tool = AgentTool(**item)
+            if tool_data:
+                agent_tool.tool = PlatformTool(**tool_data)
+            return agent_tool, None
+        except Exception as e:
+            logger.error(f"Error getting agent tool {agent_tool_id}: {e}")
+            return None, str(e)
+
     @tracer.start_as_current_span("tool.update_agent_tool")
     async def update_agent_tool(
-        self, agent_tool_id: UUID, update_data: AgentToolUpdate
+        self,
+        agent_tool_id: UUID,
+        update_data: AgentToolUpdate,
+        fencing_token: Optional[int] = None,
     ) -> tuple[Optional[AgentToolResponse], Optional[str]]:
-        """Update an agent tool configuration."""
+        """Update an agent tool configuration.
+
+        Args:
+            agent_tool_id: Agent tool to update
+            update_data: Fields to update
+            fencing_token: Refresh lease fencing token. When given, the update
+                only applies if no write with a newer token has happened, so a
+                holder whose lease was taken over cannot clobber fresh tokens.
+        """
         try:
             # Get model dump to extract values
             data = update_data.model_dump(exclude_unset=True)
@@ -425,29 +761,52 @@ class ToolService:
             if update_data.unselected_functions is not None:
                 data["unselected_functions"] = update_data.unselected_functions
 
+            # Keep the plaintext expiry in sync, including when tokens are cleared
+            if "sensitive_config" in data:
+                data["token_expires_at"] = get_token_expires_at(
+                    update_data.sensitive_config
+                )
+
             # Encrypt sensitive config if present in update
             if update_data.sensitive_config is not None:
                 data["sensitive_config"] = encrypt_data(update_data.sensitive_config)
+                decrypted_config_cache.put(
+                    data["sensitive_config"], update_data.sensitive_config
+                )
 
             # Handle last_refreshed_at - convert datetime to ISO string if present
             if update_data.last_refreshed_at is not None:
                 data["last_refreshed_at"] = update_data.last_refreshed_at.isoformat()
 
-            response = (
+            if fencing_token is not None:
+                data["refresh_fencing_token"] = fencing_token
+
+            query = (
                 self.supabase.table("agent_tools")
                 .update(data)
                 .eq("id", str(agent_tool_id))
-                .execute()
             )
+            if fencing_token is not None:
+                query = query.or_(
+                    "refresh_fencing_token.is.null,"
+                    f"refresh_fencing_token.lt.{fencing_token}"
+                )
+            response = query.execute()
 
             if not response.data:
+                if fencing_token is not None:
+                    return None, "Agent tool not found or refresh lease lost"
                 return None, "Agent tool configuration not found"
 
+            if "token_expires_at" in data:
+                self._notify_token_saved(
+                    response.data[0]["id"], data["token_expires_at"]
+                )
+
             # Fetch platform tool to get auth_type for auth status validation
             result_data = response.data[0]
-            platform_tools, _ = await self.get_platform_tools(only_active=False)
-            platform_tool = next(
-                (t for t in platform_tools if t.id == result_data["tool_id"]), None
+            platform_tool, _ = await self.get_platform_tool(
+                tool_id=result_data["tool_id"]
             )
 
             # Build response model without sensitive config
@@ -472,6 +831,57 @@ class ToolService:
             logger.error(f"Error updating agent tool {agent_tool_id}: {e}")
             return None, str(e)
 
+    @tracer.start_as_current_span("tool.acquire_refresh_lease")
+    async def acquire_refresh_lease(
+        self, agent_tool_id: UUID, holder: str, ttl_seconds: int
+    ) -> tuple[Optional[int], Optional[str]]:
+        """Try to take the token refresh lease for an agent tool.
+
+        Args:
+            agent_tool_id: Agent tool whose tokens will be refreshed
+            holder: Unique id of the caller (e.g. backend instance)
+            ttl_seconds: Lease duration; it expires by itself if not released
+
+        Returns:
+            The lease's fencing token, or None if another holder has a live lease
+        """
+        try:
+            response = self.supabase.rpc(
+                "acquire_agent_tool_refresh_lease",
+                {
+                    "p_agent_tool_id": str(agent_tool_id),
+                    "p_holder": holder,
+                    "p_ttl_seconds": ttl_seconds,
+                },
+            ).execute()
+            return response.data, None
+        except Exception as e:
+            logger.error(
+                f"Error acquiring refresh lease for agent tool {agent_tool_id}: {e}"
+            )
+            return None, str(e)
+
+    @tracer.start_as_current_span("tool.release_refresh_lease")
+    async def release_refresh_lease(
+        self, agent_tool_id: UUID, holder: str, fencing_token: int
+    ) -> tuple[bool, Optional[str]]:
+        """Release a refresh lease if it is still held with fencing_token."""
+        try:
+            response = self.supabase.rpc(
+                "release_agent_tool_refresh_lease",
+                {
+                    "p_agent_tool_id": str(agent_tool_id),
+                    "p_holder": holder,
+                    "p_fencing_token": fencing_token,
+                },
+            ).execute()
+            return bool(response.data), None
+        except Exception as e:
+            logger.error(
+                f"Error releasing refresh lease for agent tool {agent_tool_id}: {e}"
+            )
+            return False, str(e)
+
     @tracer.start_as_current_span("tool.delete_agent_tool")
     async def delete_agent_tool(
         self, agent_tool_id: UUID
@@ -490,46 +900,81 @@ class ToolService:
             logger.error(f"Error deleting agent tool {agent_tool_id}: {e}")
             return None, str(e)
 
-    @tracer.start_as_current_span("tool.get_all_agent_tools_with_auth")
+    @tracer.start_as_current_span("tool.fetch_agent_tools_with_auth_page")
     @_with_retry(max_retries=3)
-    async def get_all_agent_tools_with_auth(
+    async def _fetch_agent_tools_with_auth_page(
         self,
-    ) -> tuple[List[AgentTool], Optional[str]]:
-        """Get all agent tools that require authentication (for token refresh).
-
-        Returns:
-            List of AgentTool objects with sensitive config for tools requiring auth
+        after_id: Optional[str],
+        page_size: int,
+        expiring_before: Optional[datetime] = None,
+    ) -> tuple[List[Dict[str, Any]], Optional[str]]:
+        """Fetch one keyset page of agent_tools rows that require auth.
+
+        The inner join keeps only rows whose platform tool requires auth and
+        rows without sensitive_config are excluded, so filtering happens in
+        the database. With expiring_before, only rows whose token is still
+        valid but expires by then are returned, using the token_expires_at
+        index. Rows are ordered by id and continue after after_id.
         """
         try:
-            # Get all agent_tools that require auth (requires filter)
-            # Join with platform_tools to filter by requires_auth
-            response = (
+            query = (
                 self.supabase.table("agent_tools")
-                .select("*, tool:platform_tools(*)")
-                .execute()
+                .select("*, tool:platform_tools!inner(*)")
+                .eq("tool.requires_auth", True)
+                .not_.is_("sensitive_config", "null")
+                .order("id")
+                .limit(page_size)
             )
+            if expiring_before is not None:
+                query = query.gte(
+                    "token_expires_at", datetime.now(timezone.utc).isoformat()
+                ).lte("token_expires_at", expiring_before.isoformat())
+            if after_id is not None:
+                query = query.gt("id", after_id)
+            response = query.execute()
+            return response.data or [], None
+        except Exception as e:
+            logger.error(f"Error fetching agent tools with auth after {after_id}: {e}")
+            return [], str(e)
 
-            agent_tools = []
-            for item in response.data:
-                # Extract tool details from joined query
-                tool_data = item.get("tool")
+    async def iter_agent_tools_with_auth(
+        self,
+        page_size: Optional[int] = None,
+        expiring_before: Optional[datetime] = None,
+    ) -> AsyncIterator[List[AgentTool]]:
+        """Stream agent tools that require auth, one page at a time (for token refresh).
 
-                # Filter to only tools requiring auth
-                if not tool_data or not tool_data.get("requires_auth", False):
-                    continue
+        Only the current page is held in memory and decrypted.
 
-                # Only process if there's sensitive_config (tokens exist)
-                if not item.get("sensitive_config"):
-                    continue
+        Args:
+            page_size: Rows per page (default: settings.token_refresh_page_size)
+            expiring_before: Only include valid tokens expiring by this time
 
+        Yields:
+            Lists of AgentTool objects with decrypted sensitive config
+
+        Raises:
+            RuntimeError: If a page cannot be fetched, so callers do not
+                mistake a partial scan for a complete one
+        """
+        page_size = page_size or settings.token_refresh_page_size
+        after_id: Optional[str] = None
+
+        while True:
+            rows, error = await self._fetch_agent_tools_with_auth_page(
+                after_id, page_size, expiring_before
+            )
+            if error:
+                logger.error(f"Stopping agent tools with auth scan: {error}")
+                raise RuntimeError(f"Failed to fetch agent tools with auth: {error}")
+
+            agent_tools = []
+            for item in rows:
                 # Decrypt sensitive config
-                sensitive_config = None
-                try:
-                    decrypted_config = decrypt_data(item.get("sensitive_config"))
-                    if decrypted_config and isinstance(decrypted_config, dict):
-                        sensitive_config = decrypted_config
-                except Exception as e:
-                    logger.error(f"Error decrypting sensitive config: {e}")
+                sensitive_config = decrypt_sensitive_config(
+                    item.get("sensitive_config")
+                )
+                if not sensitive_config:
                     continue
 
                 # Build full AgentTool with sensitive config
@@ -544,17 +989,160 @@ class ToolService:
                     "created_at": item["created_at"],
                     "updated_at": item["updated_at"],
                     "last_refreshed_at": item.get("last_refreshed_at"),
+                    "token_expires_at": item.get("token_expires_at"),
                 }
 
                 agent_tool = AgentTool(**agent_tool_dict)
-                if tool_data:
-                    agent_tool.tool = PlatformTool(**tool_data)
+                agent_tool.tool = PlatformTool(**item["tool"])
                 agent_tools.append(agent_tool)
 
+            if agent_tools:
+                yield agent_tools
+
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1]["id"]
+
+    async def iter_token_expiries(
+        self, page_size: Optional[int] = None
+    ) -> AsyncIterator[List[tuple[str, datetime]]]:
+        """Stream (agent_tool_id, token_expires_at) for every still-valid token.
+
+        Reads only the plaintext token_expires_at column, so nothing is
+        decrypted. Used to seed the token refresh schedule.
+
+        Args:
+            page_size: Rows per page (default: settings.token_refresh_page_size)
+
+        Yields:
+            Lists of (agent tool id, token expiry) tuples
+
+        Raises:
+            RuntimeError: If a page cannot be fetched
+        """
+        page_size = page_size or settings.token_refresh_page_size
+        now = datetime.now(timezone.utc).isoformat()
+        after_id: Optional[str] = None
+
+        while True:
+            try:
+                query = (
+                    self.supabase.table("agent_tools")
+                    .select("id, token_expires_at")
+                    .gte("token_expires_at", now)
+                    .order("id")
+                    .limit(page_size)
+                )
+                if after_id is not None:
+                    query = query.gt("id", after_id)
+                rows = query.execute().data or []
+            except Exception as e:
+                logger.error(f"Error getting token expiries after {after_id}: {e}")
+                raise RuntimeError(f"Failed to fetch token expiries: {e}") from e
+
+            if rows:
+                yield [
+                    (row["id"], datetime.fromisoformat(row["token_expires_at"]))
+                    for row in rows
+                ]
+
+            if len(rows) < page_size:
+                return
+            after_id = rows[-1]["id"]
+
+    @tracer.start_as_current_span("tool.get_all_agent_tools_with_auth")
+    async def get_all_agent_tools_with_auth(
+        self,
+    ) -> tuple[List[AgentTool], Optional[str]]:
+        """Get all agent tools that require authentication.
+
+        Collects every page of iter_agent_tools_with_auth(); prefer iterating
+        pages directly when processing many tools.
+
+        Returns:
+            List of AgentTool objects with sensitive config for tools requiring auth
+        """
+        try:
+            agent_tools = []
+            async for page in self.iter_agent_tools_with_auth():
+                agent_tools.extend(page)
             return agent_tools, None
         except Exception as e:
             logger.error(f"Error getting all agent tools with auth: {e}")
             return [], str(e)
 
+    @tracer.start_as_current_span("tool.reencrypt_sensitive_configs")
+    async def reencrypt_sensitive_configs(
+        self, batch_size: int = 100, dry_run: bool = False
+    ) -> tuple[Dict[str, int], Optional[str]]:
+        """Re-encrypt agent tool sensitive configs with the primary key.
+
+        Pages through agent_tools by id and rotates every ciphertext that was
+        encrypted with a previous key. Each update only applies if the row
+        still holds the ciphertext that was read, so a concurrent token
+        refresh is never overwritten.
+
+        Args:
+            batch_size: Number of rows fetched per page
+            dry_run: Count rows needing rotation without updating them
+
+        Returns:
+            Counts of scanned, rotated, skipped (changed concurrently) and
+            failed (undecryptable) rows
+        """
+        stats = {"scanned": 0, "rotated": 0, "skipped": 0, "failed": 0}
+        try:
+            last_id: Optional[str] = None
+            while True:
+                query = (
+                    self.supabase.table("agent_tools")
+                    .select("id, sensitive_config")
+                    .not_.is_("sensitive_config", "null")
+                    .order("id")
+                    .limit(batch_size)
+                )
+                if last_id is not None:
+                    query = query.gt("id", last_id)
+                rows = query.execute().data or []
+
+                for row in rows:
+                    stats["scanned"] += 1
+                    ciphertext = row.get("sensitive_config")
+                    rotated = rotate_encrypted_data(ciphertext)
+                    if rotated is None:
+                        logger.error(
+                            f"Could not decrypt sensitive config for agent tool "
+                            f"{row['id']} with any active key"
+                        )
+                        stats["failed"] += 1
+                        continue
+                    if rotated == ciphertext:
+                        continue
+                    if dry_run:
+                        stats["rotated"] += 1
+                        continue
+
+                    response = (
+                        self.supabase.table("agent_tools")
+                        .update({"sensitive_config": rotated})
+                        .eq("id", row["id"])
+                        .eq("sensitive_config", ciphertext)
+                        .execute()
+                    )
+                    if response.data:
+                        stats["rotated"] += 1
+                    else:
+                        stats["skipped"] += 1
+
+                if len(rows) < batch_size:
+                    break
+                last_id = rows[-1]["id"]
+
+            logger.info(f"Re-encrypted sensitive configs: {stats}")
+            return stats, None
+        except Exception as e:
+            logger.error(f"Error re-encrypting sensitive configs: {e}")
+            return stats, str(e)
+
 
 tool_service = ToolService()
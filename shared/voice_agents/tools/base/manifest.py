@@ -0,0 +1,152 @@
+"""
+Build-time Tool Manifest
+
+Generates and reads a JSON manifest describing every registered tool: its
+class location, metadata, function names, signatures, schemas and
+descriptions. Production images generate the manifest at build time so the
+registry can start without importing and introspecting every tool module.
+
+Generate the manifest (run from the project root):
+    python -m shared.voice_agents.tools.base.manifest
+"""
+
+import argparse
+import inspect
+import json
+import logging
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Optional
+
+if TYPE_CHECKING:
+    from shared.voice_agents.tools.base.registry_livekit import LiveKitToolRegistry
+
+logger = logging.getLogger(__name__)
+
+# Bump when the manifest layout changes; older manifests are ignored
+MANIFEST_VERSION = 1
+
+TOOLS_PACKAGE = "shared.voice_agents.tools.implementations"
+
+DEFAULT_MANIFEST_PATH = Path(__file__).resolve().parent.parent / "tool_manifest.json"
+
+
+def build_manifest(
+    registry: "LiveKitToolRegistry", package_path: str = TOOLS_PACKAGE
+) -> Dict[str, Any]:
+    """
+    Build a manifest from a registry populated by introspection.
+
+    Args:
+        registry: Registry with tools registered from package_path
+        package_path: Package the tools were registered from
+
+    Returns:
+        Manifest dictionary ready to be serialized to JSON
+    """
+    tools = {}
+    for name in registry.get_tool_names():
+        tool_class = registry.get_tool_class(name)
+
+        functions = []
+        for func in registry.get_tool_functions(name):
+            schema = registry._extract_schema_from_function(func)
+            if not schema:
+                continue
+            functions.append(
+                {
+                    "name": func.__name__,
+                    "signature": str(inspect.signature(func)),
+                    "description": func.__doc__ or "",
+                    "schema": schema,
+                }
+            )
+
+        tools[name] = {
+            "module": tool_class.__module__,
+            "class_name": tool_class.__name__,
+            "metadata": registry._metadata[name].model_dump(mode="json"),
+            "functions": functions,
+        }
+
+    return {
+        "version": MANIFEST_VERSION,
+        "package": package_path,
+        "generated_at": datetime.now(timezone.utc).isoformat(),
+        "tools": tools,
+    }
+
+
+def read_manifest(
+    path: Path = DEFAULT_MANIFEST_PATH, package_path: str = TOOLS_PACKAGE
+) -> Optional[Dict[str, Any]]:
+    """
+    Read and validate a manifest file.
+
+    Returns:
+        The manifest dictionary, or None if it is missing, unreadable, built
+        by a different manifest version or for a different package.
+    """
+    if not path.exists():
+        return None
+
+    try:
+        manifest = json.loads(path.read_text())
+    except (OSError, ValueError) as e:
+        logger.warning(f"Tool manifest at {path} could not be read: {e}")
+        return None
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        logger.warning(
+            f"Tool manifest version {manifest.get('version')} does not match "
+            f"expected version {MANIFEST_VERSION}, ignoring it"
+        )
+        return None
+
+    if manifest.get("package") != package_path:
+        logger.warning(
+            f"Tool manifest was built for {manifest.get('package')}, "
+            f"not {package_path}, ignoring it"
+        )
+        return None
+
+    return manifest
+
+
+def write_manifest(
+    path: Path = DEFAULT_MANIFEST_PATH, package_path: str = TOOLS_PACKAGE
+) -> Dict[str, Any]:
+    """Introspect all tools in package_path and write the manifest to path."""
+    from shared.voice_agents.tools.base.registry_livekit import LiveKitToolRegistry
+
+    registry = LiveKitToolRegistry()
+    registry.register_tools_from_package(package_path, use_manifest=False)
+    manifest = build_manifest(registry, package_path)
+
+    path.write_text(json.dumps(manifest, indent=2, sort_keys=True) + "\n")
+    logger.info(f"Wrote tool manifest with {len(manifest['tools'])} tools to {path}")
+    return manifest
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description="Generate the tool manifest")
+    parser.add_argument(
+        "--output",
+        type=Path,
+        default=DEFAULT_MANIFEST_PATH,
+        help=f"Output path (default: {DEFAULT_MANIFEST_PATH})",
+    )
+    parser.add_argument(
+        "--package",
+        default=TOOLS_PACKAGE,
+        help=f"Tool implementations package (default: {TOOLS_PACKAGE})",
+    )
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO)
+    manifest = write_manifest(args.output, args.package)
+    print(f"Generated manifest with {len(manifest['tools'])} tools at {args.output}")
+
+
+if __name__ == "__main__":
+    main()
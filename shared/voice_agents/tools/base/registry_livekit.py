@@ -5,19 +5,28 @@ This registry extracts function schemas directly from decorated function objects
 without parsing source files or using AST.
 
 This is the preferred approach over AST-based registry.
+
+Outside development, the registry loads a build-time manifest (see
+manifest.py) instead of introspecting, and imports tool modules lazily on
+first use.
 """
 
+import hashlib
 import importlib
 import inspect
+import json
 import logging
 import pkgutil
+from pathlib import Path
 from typing import Any, Callable, Dict, List, Optional, Type
 
 from livekit.agents import RunContext
 
+from shared.config import settings
 from shared.voice_agents.tool_models import PlatformToolCreate
 from shared.voice_agents.tool_service import ToolService
-from shared.voice_agents.tools.base.base_tool import BaseTool
+from shared.voice_agents.tools.base.base_tool import BaseTool, ToolMetadata
+from shared.voice_agents.tools.base.manifest import DEFAULT_MANIFEST_PATH, read_manifest
 
 logger = logging.getLogger(__name__)
 
@@ -33,12 +42,44 @@ class LiveKitToolRegistry:
     def __init__(self) -> None:
         self._tools: Dict[str, Type[BaseTool]] = {}
         self._functions: Dict[str, List[Callable]] = {}
-
-    def register_tools_from_package(self, package_path: str) -> None:
+        self._metadata: Dict[str, ToolMetadata] = {}
+        # Manifest entries by tool name; classes are imported on first use
+        self._manifest: Dict[str, Dict[str, Any]] = {}
+
+    def register_tools_from_package(
+        self,
+        package_path: str,
+        use_manifest: Optional[bool] = None,
+        manifest_path: Path = DEFAULT_MANIFEST_PATH,
+    ) -> None:
         """
         Dynamically discover and register all BaseTool subclasses in a package.
         Extracts @function_tool decorated methods by inspecting function objects.
+
+        Args:
+            package_path: Dotted path of the tool implementations package
+            use_manifest: Load the build-time manifest instead of introspecting.
+                Defaults to True outside the development environment. Falls back
+                to introspection if no valid manifest is found.
+            manifest_path: Location of the manifest file
         """
+        if use_manifest is None:
+            use_manifest = settings.environment != "development"
+
+        if use_manifest:
+            manifest = read_manifest(manifest_path, package_path)
+            if manifest:
+                self._manifest.update(manifest["tools"])
+                logger.info(
+                    f"LiveKit Registry: Loaded {len(manifest['tools'])} tools "
+                    f"from manifest {manifest_path}"
+                )
+                return
+            logger.warning(
+                f"LiveKit Registry: No valid tool manifest at {manifest_path}, "
+                "falling back to introspection"
+            )
+
         logger.info(f"LiveKit Registry: Registering tools from package: {package_path}")
         package = importlib.import_module(package_path)
         for loader, module_name, is_pkg in pkgutil.walk_packages(
@@ -56,6 +97,7 @@ class LiveKitToolRegistry:
                     tool_name = tool_instance.metadata.name
 
                     self._tools[tool_name] = obj
+                    self._metadata[tool_name] = tool_instance.metadata
 
                     # Extract @function_tool decorated methods
                     function_methods = self._extract_function_methods(tool_instance)
@@ -142,55 +184,104 @@ class LiveKitToolRegistry:
         """
         Sync registered tools with the platform_tools table.
         Extracts schemas from LiveKit function_tool decorators.
+
+        Each tool's metadata and function schemas are hashed and compared with
+        the hash stored on the last sync. Only tools whose hash changed are
+        written, in a single bulk upsert.
         """
+        tool_names = self.get_tool_names()
         logger.info(
-            f"LiveKit Registry: Starting sync of {len(self._tools)} registered tools to database"  # noqa: E501
+            f"LiveKit Registry: Starting sync of {len(tool_names)} registered tools to database"  # noqa: E501
         )
 
-        for name, tool_class in self._tools.items():
-            tool_instance = tool_class()
-            metadata = tool_instance.metadata
+        stored_hashes, error = await tool_service.get_platform_tool_hashes()
+        if error:
+            # Without stored hashes every tool is treated as changed
+            logger.warning(
+                "LiveKit Registry: Could not read stored tool hashes, "
+                f"syncing all tools: {error}"
+            )
 
-            logger.info(f"LiveKit Registry: Syncing tool: {name}")
+        changed_tools: List[PlatformToolCreate] = []
+        for name in tool_names:
+            tool_data = self._build_platform_tool_data(name)
+            if not tool_data:
+                continue
+
+            if stored_hashes.get(tool_data.name) == tool_data.catalog_hash:
+                logger.debug(f"LiveKit Registry: Tool {name} unchanged, skipping")
+                continue
+
+            changed_tools.append(tool_data)
+
+        if not changed_tools:
+            logger.info("LiveKit Registry: All tools up to date, nothing to sync")
+            return
+
+        result, error = await tool_service.bulk_upsert_platform_tools(changed_tools)
+        if error:
+            logger.error(f"LiveKit Registry: Failed to upsert tools: {error}")
+        else:
+            logger.info(
+                f"LiveKit Registry: Successfully upserted {len(result)} changed "
+                f"tools: {[t.name for t in changed_tools]}"
+            )
+
+    def _build_platform_tool_data(self, name: str) -> Optional[PlatformToolCreate]:
+        """
+        Build the platform_tools row for a registered tool, including its
+        catalog hash. Returns None if the tool has no function schemas.
+        """
+        if name in self._manifest:
+            # Manifest already holds the metadata and extracted schemas
+            entry = self._manifest[name]
+            metadata = ToolMetadata(**entry["metadata"])
+            function_schemas = [func["schema"] for func in entry["functions"]]
+        else:
+            metadata = self._metadata.get(name)
+            if metadata is None:
+                metadata = self._tools[name]().metadata
+                self._metadata[name] = metadata
 
             # Extract function schemas from LiveKit decorated methods
-            function_methods = self._functions.get(name, [])
             function_schemas = []
-
-            for func in function_methods:
+            for func in self._functions.get(name, []):
                 schema = self._extract_schema_from_function(func)
                 if schema:
                     function_schemas.append(schema)
-                    logger.info(
+                    logger.debug(
                         f"LiveKit Registry: Extracted schema for function: {schema['name']}"  # noqa: E501
                     )
 
-            if function_schemas:
-                tool_data = PlatformToolCreate(
-                    name=metadata.name,
-                    description=metadata.description,
-                    config_schema=metadata.config_schema,
-                    tool_functions_schema={"functions": function_schemas},
-                    requires_auth=metadata.requires_auth,
-                    auth_type=metadata.auth_type,
-                    auth_config=metadata.auth_config,
-                    is_active=True,
-                )
+        if not function_schemas:
+            logger.warning(
+                f"LiveKit Registry: No function schemas found for tool {name}, skipping"  # noqa: E501
+            )
+            return None
 
-                # Upsert to database (create or update by name)
-                result, error = await tool_service.upsert_platform_tool(tool_data)
-                if error:
-                    logger.error(
-                        f"LiveKit Registry: Failed to upsert tool {name}: {error}"
-                    )
-                else:
-                    logger.info(
-                        f"LiveKit Registry: Successfully upserted tool {name} with {len(function_schemas)} functions: {[s['name'] for s in function_schemas]}"  # noqa: E501
-                    )
-            else:
-                logger.warning(
-                    f"LiveKit Registry: No function schemas found for tool {name}, skipping"  # noqa: E501
-                )
+        tool_data = PlatformToolCreate(
+            name=metadata.name,
+            description=metadata.description,
+            config_schema=metadata.config_schema,
+            tool_functions_schema={"functions": function_schemas},
+            requires_auth=metadata.requires_auth,
+            auth_type=metadata.auth_type,
+            auth_config=metadata.auth_config,
+            is_active=True,
+        )
+        tool_data.catalog_hash = self.compute_catalog_hash(tool_data)
+        return tool_data
+
+    @staticmethod
+    def compute_catalog_hash(tool_data: PlatformToolCreate) -> str:
+        """
+        Compute a stable SHA-256 hash of a tool's metadata and function schemas.
+
+        Keys are sorted so the hash only changes when the content changes.
+        """
+        payload = tool_data.model_dump(mode="json", exclude={"catalog_hash"})
+        encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+        return hashlib.sha256(encoded).hexdigest()
 
     def _extract_schema_from_function(self, func: Callable) -> Optional[Dict[str, Any]]:
         """
@@ -270,13 +361,42 @@ class LiveKitToolRegistry:
             return None
 
     def get_tool_class(self, name: str) -> Type[BaseTool] | None:
-        return self._tools.get(name)
+        tool_class = self._tools.get(name)
+        if tool_class is None and name in self._manifest:
+            tool_class = self._load_from_manifest(name)
+        return tool_class
+
+    def _load_from_manifest(self, name: str) -> Type[BaseTool] | None:
+        """
+        Import a tool's module on first use and resolve its class and
+        functions by the names recorded in the manifest.
+        """
+        entry = self._manifest[name]
+        try:
+            module = importlib.import_module(entry["module"])
+            tool_class = getattr(module, entry["class_name"])
+        except (ImportError, AttributeError) as e:
+            logger.error(
+                f"LiveKit Registry: Failed to load tool {name} from manifest: {e}"
+            )
+            return None
+
+        self._tools[name] = tool_class
+        self._functions[name] = [
+            getattr(tool_class, func["name"])
+            for func in entry["functions"]
+            if hasattr(tool_class, func["name"])
+        ]
+        logger.debug(f"LiveKit Registry: Lazily loaded tool class: {name}")
+        return tool_class
 
     def get_tool_functions(self, tool_name: str) -> List[Callable]:
         """
         Get list of function objects for a specific tool.
         Returns actual decorated function objects.
         """
+        if tool_name not in self._functions and tool_name in self._manifest:
+            self._load_from_manifest(tool_name)
         return self._functions.get(tool_name, [])
 
     def get_tool_names(self) -> List[str]:
@@ -286,7 +406,7 @@ class LiveKitToolRegistry:
         Returns:
             List of tool names registered in this registry.
         """
-        return list(self._tools.keys())
+        return list(dict.fromkeys([*self._tools.keys(), *self._manifest.keys()]))
 
     def _extract_description_section(self, docstring: str) -> str:
         """
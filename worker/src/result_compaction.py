@@ -0,0 +1,279 @@
+"""
+Tool result compaction for the realtime model.
+
+Tool results are sent back to the Gemini realtime session as-is, so a
+single `get_sheet_values` or `list_events` call can push tens of kilobytes
+into the conversation context. This module shrinks results before they are
+returned from the tool wrapper:
+
+1. Null and empty fields nested inside the result are dropped. Top-level
+   keys are kept because they are the tool's response contract (for example
+   `{"events": []}` tells the model there are no events). List elements are
+   never dropped, so positions such as sheet columns stay intact.
+2. If the serialized result is still over the function's size budget, the
+   longest lists are truncated and a continuation hint is added so the model
+   can ask for the remaining items.
+3. Overly long strings are clipped as a last resort.
+"""
+
+import json
+import logging
+import os
+import re
+from typing import Any, Dict, List, Optional, Tuple
+
+logger = logging.getLogger("voice-worker")
+
+# Default budget (serialized JSON characters) for any tool function result
+DEFAULT_RESULT_BUDGET_CHARS = int(os.getenv("TOOL_RESULT_MAX_CHARS", "8000"))
+
+# Per-function overrides for functions that legitimately return more data
+FUNCTION_RESULT_BUDGETS: Dict[str, int] = {
+    "get_sheet_values": 12000,
+    "search_in_sheet": 8000,
+    "list_events": 6000,
+    "get_latest_emails": 8000,
+}
+
+# Hints telling the model how to fetch what was cut off.
+# Placeholders: {field}, {returned}, {total}, {next_index}
+CONTINUATION_HINTS: Dict[str, str] = {
+    "get_sheet_values": (
+        "Only the first {returned} of {total} rows were returned. "
+        "Call get_sheet_values again with a range starting at row {next_index} "
+        "to read the remaining rows."
+    ),
+    "list_events": (
+        "Only the first {returned} of {total} events were returned. "
+        "Call list_events again with time_min set after the last returned event "
+        "to see more."
+    ),
+}
+
+DEFAULT_CONTINUATION_HINT = (
+    "Only the first {returned} of {total} items in '{field}' were returned "
+    "to fit the response size limit. Ask for a narrower query to see the rest."
+)
+
+# Row number of the first cell in an A1 range such as 'Sheet1'!B5:F20
+_A1_START_ROW = re.compile(r"^\$?[A-Za-z]*\$?(\d+)")
+
+# Strings longer than this are clipped when list truncation is not enough
+MAX_STRING_CHARS = 500
+
+# Upper bound on truncation passes so compaction always terminates quickly
+_MAX_TRUNCATION_PASSES = 20
+
+_Path = Tuple[Any, ...]
+
+
+def get_result_budget(func_name: str) -> int:
+    """Get the serialized size budget (in characters) for a tool function."""
+    return FUNCTION_RESULT_BUDGETS.get(func_name, DEFAULT_RESULT_BUDGET_CHARS)
+
+
+def _serialized_size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+def _is_empty(value: Any) -> bool:
+    return value is None or value == "" or value == [] or value == {}
+
+
+def _prune_empty(value: Any) -> Any:
+    """Recursively drop dict keys holding None or empty values.
+
+    List elements are pruned but kept, even when empty: dropping a blank
+    cell from a sheet row would shift the later cells into wrong columns.
+    """
+    if isinstance(value, dict):
+        pruned = {}
+        for key, item in value.items():
+            item = _prune_empty(item)
+            if not _is_empty(item):
+                pruned[key] = item
+        return pruned
+    if isinstance(value, (list, tuple)):
+        return [_prune_empty(item) for item in value]
+    return value
+
+
+def _drop_nested_empty_fields(result: Any) -> Any:
+    """Prune empty fields below the top level, keeping top-level keys intact."""
+    if isinstance(result, dict):
+        return {key: _prune_empty(item) for key, item in result.items()}
+    return _prune_empty(result)
+
+
+def _find_lists(value: Any, path: _Path = ()) -> List[Tuple[_Path, Any, Any, list]]:
+    """Collect (path, container, key, list) for every list in the structure."""
+    found = []
+    if isinstance(value, dict):
+        for key, item in value.items():
+            if isinstance(item, list):
+                found.append((path + (key,), value, key, item))
+            found.extend(_find_lists(item, path + (key,)))
+    elif isinstance(value, list):
+        for index, item in enumerate(value):
+            if isinstance(item, list):
+                found.append((path + (index,), value, index, item))
+            found.extend(_find_lists(item, path + (index,)))
+    return found
+
+
+def _clip_strings(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _clip_strings(item) for key, item in value.items()}
+    if isinstance(value, list):
+        return [_clip_strings(item) for item in value]
+    if isinstance(value, str) and len(value) > MAX_STRING_CHARS:
+        return value[:MAX_STRING_CHARS] + "..."
+    return value
+
+
+def _format_path(path: _Path) -> str:
+    return ".".join(str(part) for part in path)
+
+
+def _first_index(func_name: str, result: Dict[str, Any]) -> int:
+    """Absolute index of the first returned item (the range's first sheet row)."""
+    if func_name == "get_sheet_values" and isinstance(result.get("range"), str):
+        start_cell = result["range"].rsplit("!", 1)[-1].split(":", 1)[0]
+        match = _A1_START_ROW.match(start_cell)
+        if match:
+            return int(match.group(1))
+    return 1
+
+
+def _build_hint(
+    func_name: str, field: str, returned: int, total: int, first_index: int = 1
+) -> str:
+    template = CONTINUATION_HINTS.get(func_name, DEFAULT_CONTINUATION_HINT)
+    return template.format(
+        field=field,
+        returned=returned,
+        total=total,
+        next_index=first_index + returned,
+    )
+
+
+def _with_truncation_metadata(
+    compacted: Dict[str, Any], totals: Dict[_Path, int], func_name: str
+) -> Dict[str, Any]:
+    """Return a copy of the result annotated with truncation info and a hint."""
+    truncated = []
+    for path, total in totals.items():
+        node: Any = compacted
+        try:
+            for part in path:
+                node = node[part]
+        except (IndexError, KeyError):
+            # A parent list was truncated too; this list is no longer present
+            continue
+        truncated.append(
+            {"field": _format_path(path), "returned": len(node), "total": total}
+        )
+
+    if not truncated:
+        return compacted
+
+    # Hint about the list that lost the most items
+    primary = max(truncated, key=lambda entry: entry["total"] - entry["returned"])
+    return {
+        **compacted,
+        "truncated": truncated,
+        "continuation_hint": _build_hint(
+            func_name,
+            primary["field"],
+            primary["returned"],
+            primary["total"],
+            _first_index(func_name, compacted),
+        ),
+    }
+
+
+def compact_tool_result(
+    func_name: str, result: Any, budget: Optional[int] = None
+) -> Any:
+    """
+    Compact a tool result so it fits within the function's size budget.
+
+    Args:
+        func_name: Name of the tool function that produced the result
+        result: Raw result returned by the tool function
+        budget: Size budget in serialized characters (defaults to the
+            per-function budget)
+
+    Returns:
+        The compacted result. Results that are not dicts or lists are
+        returned unchanged unless they are strings over the budget.
+    """
+    if budget is None:
+        budget = get_result_budget(func_name)
+
+    if isinstance(result, str):
+        if len(result) <= budget:
+            return result
+        return result[:budget] + "... (truncated)"
+
+    if not isinstance(result, (dict, list)):
+        return result
+
+    try:
+        original_size = _serialized_size(result)
+    except Exception as e:
+        logger.error(f"Failed to serialize tool {func_name} result: {e}")
+        return result
+
+    compacted = _drop_nested_empty_fields(result)
+    size = _serialized_size(compacted)
+
+    if size <= budget:
+        logger.debug(f"Tool {func_name} result size: {original_size} -> {size} chars")
+        return compacted
+
+    # Wrap top-level lists so truncation metadata has somewhere to live
+    if isinstance(compacted, list):
+        compacted = {"items": compacted}
+
+    # Shrink the longest list proportionally until the result, including
+    # its truncation metadata, fits the budget
+    totals: Dict[_Path, int] = {}
+    for _ in range(_MAX_TRUNCATION_PASSES):
+        if size <= budget:
+            break
+        candidates = [entry for entry in _find_lists(compacted) if len(entry[3]) > 1]
+        if not candidates:
+            break
+        path, container, key, items = max(
+            candidates, key=lambda entry: _serialized_size(entry[3])
+        )
+        totals.setdefault(path, len(items))
+        keep = max(1, min(len(items) - 1, int(len(items) * budget / size * 0.9)))
+        container[key] = items[:keep]
+        size = _serialized_size(_with_truncation_metadata(compacted, totals, func_name))
+
+    compacted = _with_truncation_metadata(compacted, totals, func_name)
+
+    if size > budget:
+        compacted = _clip_strings(compacted)
+        size = _serialized_size(compacted)
+
+    if size > budget:
+        # Nothing structural left to trim; hand back a bounded preview
+        preview = json.dumps(compacted, default=str)[: max(0, budget - 200)]
+        compacted = {
+            "truncated": True,
+            "preview": preview,
+            "continuation_hint": (
+                "The result was too large to return in full. "
+                "Ask for a narrower query."
+            ),
+        }
+        size = _serialized_size(compacted)
+
+    logger.info(
+        f"Tool {func_name} result compacted from {original_size} to {size} chars "
+        f"(budget {budget})"
+    )
+    return compacted
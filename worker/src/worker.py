@@ -15,6 +15,7 @@ from livekit.agents import (
 )
 from livekit.agents.voice import room_io
 from livekit.plugins.google.realtime import RealtimeModel
+from result_compaction import compact_tool_result
 
 from shared.voice_agents.livekit_service import livekit_service
 from shared.voice_agents.service import voice_agent_service
@@ -38,7 +39,7 @@ server = AgentServer()
 livekit_tool_registry.register_tools_from_package(
     "shared.voice_agents.tools.implementations"
 )
-logger.info(f"Registered tools: {list(livekit_tool_registry._tools.keys())}")
+logger.info(f"Registered tools: {livekit_tool_registry.get_tool_names()}")
 
 
 def _create_tool_wrapper(
@@ -48,7 +49,8 @@ def _create_tool_wrapper(
     Create a wrapper function for a tool method.
 
     The wrapper has the same signature as the original method (excluding 'self').
-    It accepts all parameters explicitly (no **kwargs), then delegates to the bound method.
+    It accepts all parameters explicitly (no **kwargs), then delegates to the bound
+    method and compacts the result to fit the function's size budget.
     """
     # Get parameter definitions for the wrapper function, preserving default values
     params_def = []
@@ -93,13 +95,8 @@ async def {func_name}({params_str}) -> Any:
     for pname in {other_param_names_repr}:
         kwargs[pname] = locals()[pname]
     result = await bound_method(context=context, **kwargs)
-    import json
-    try:
-        result_str = json.dumps(result, default=str)
-        logger.debug(f"Tool {func_name} result size: {{len(result_str)}} chars")
-    except Exception as e:
-        logger.error(f"Failed to serialize tool {func_name} result: {{e}}")
-    return result
+    # Enforce the per-function size budget before handing back to the model
+    return compact_tool_result({func_name!r}, result)
 """
 
     # Execute the code to create the wrapper function
@@ -111,7 +108,7 @@ async def {func_name}({params_str}) -> Any:
         "Union": Union,
         "RunContext": RunContext,
         "bound_method": bound_method,
-        "logger": logger,
+        "compact_tool_result": compact_tool_result,
     }
     local_scope = {}
     exec(wrapper_code, namespace, local_scope)
@@ -0,0 +1,171 @@
+"""Tests for tool result compaction in the worker."""
+
+import inspect
+import json
+from typing import Any
+
+import pytest
+from result_compaction import (
+    DEFAULT_RESULT_BUDGET_CHARS,
+    compact_tool_result,
+    get_result_budget,
+)
+
+from worker import _create_tool_wrapper
+
+
+def _size(value: Any) -> int:
+    return len(json.dumps(value, default=str))
+
+
+class TestResultBudget:
+    """Test cases for per-function size budgets."""
+
+    def test_known_function_has_override(self):
+        """Test functions with an override use their own budget."""
+        assert get_result_budget("get_sheet_values") != DEFAULT_RESULT_BUDGET_CHARS
+
+    def test_unknown_function_uses_default(self):
+        """Test unknown functions fall back to the default budget."""
+        assert get_result_budget("unknown_function") == DEFAULT_RESULT_BUDGET_CHARS
+
+
+class TestCompactToolResult:
+    """Test cases for compact_tool_result."""
+
+    def test_small_result_unchanged(self):
+        """Test small results pass through with top-level keys intact."""
+        result = {"success": True, "events": [], "note": None}
+        assert compact_tool_result("list_events", result) == result
+
+    def test_drops_nested_null_and_empty_fields(self):
+        """Test None and empty values nested in the result are removed."""
+        result = {
+            "events": [
+                {
+                    "id": "1",
+                    "summary": "Meeting",
+                    "description": None,
+                    "attendees": [],
+                    "reminders": {},
+                    "location": "",
+                }
+            ]
+        }
+
+        compacted = compact_tool_result("list_events", result)
+
+        assert compacted == {"events": [{"id": "1", "summary": "Meeting"}]}
+
+    def test_keeps_empty_list_elements(self):
+        """Test blank sheet cells keep their position in the row."""
+        result = {"values": [["Name", "", "Phone"], ["Ada", None, "555"], []]}
+
+        compacted = compact_tool_result("get_sheet_values", result)
+
+        assert compacted == result
+
+    def test_does_not_mutate_input(self):
+        """Test the original result object is left untouched."""
+        result = {"events": [{"id": str(i), "note": None} for i in range(5)]}
+
+        compact_tool_result("list_events", result, budget=50)
+
+        assert len(result["events"]) == 5
+        assert result["events"][0] == {"id": "0", "note": None}
+
+    def test_truncates_long_list_with_hint(self):
+        """Test large sheet results are truncated with a continuation hint."""
+        rows = [[f"r{r}c{c}" for c in range(26)] for r in range(1000)]
+        result = {"values": rows, "range": "Sheet1!A1:Z1000"}
+
+        compacted = compact_tool_result("get_sheet_values", result)
+
+        assert _size(compacted) <= get_result_budget("get_sheet_values")
+        assert 0 < len(compacted["values"]) < 1000
+        assert compacted["values"][0] == rows[0]
+        assert compacted["truncated"] == [
+            {"field": "values", "returned": len(compacted["values"]), "total": 1000}
+        ]
+        next_row = len(compacted["values"]) + 1
+        assert f"row {next_row}" in compacted["continuation_hint"]
+        assert compacted["range"] == "Sheet1!A1:Z1000"
+
+    def test_sheet_hint_uses_absolute_row(self):
+        """Test the next row in the hint counts from the start of the range."""
+        rows = [[f"r{r}c{c}" for c in range(26)] for r in range(500)]
+        result = {"values": rows, "range": "'Q1 Data'!B101:Z600"}
+
+        compacted = compact_tool_result("get_sheet_values", result)
+
+        next_row = 101 + len(compacted["values"])
+        assert f"row {next_row} " in compacted["continuation_hint"]
+
+    def test_default_hint_names_field(self):
+        """Test functions without a custom hint get the generic one."""
+        result = {"items": [{"name": "x" * 50} for _ in range(100)]}
+
+        compacted = compact_tool_result("some_tool", result, budget=500)
+
+        assert _size(compacted) <= 500
+        assert "'items'" in compacted["continuation_hint"]
+
+    def test_top_level_list_is_wrapped(self):
+        """Test top-level list results are wrapped when truncated."""
+        result = [{"id": i, "payload": "x" * 40} for i in range(100)]
+
+        compacted = compact_tool_result("some_tool", result, budget=400)
+
+        assert isinstance(compacted, dict)
+        assert compacted["truncated"][0]["total"] == 100
+        assert _size(compacted) <= 400
+
+    def test_clips_long_strings(self):
+        """Test oversized strings are clipped when no list can be trimmed."""
+        result = {"body": "a" * 5000, "subject": "Hello"}
+
+        compacted = compact_tool_result("get_email", result, budget=1000)
+
+        assert compacted["subject"] == "Hello"
+        assert len(compacted["body"]) < 5000
+        assert _size(compacted) <= 1000
+
+    def test_non_container_result_unchanged(self):
+        """Test scalar results are returned unchanged."""
+        assert compact_tool_result("some_tool", 42) == 42
+        assert compact_tool_result("some_tool", None) is None
+
+    def test_long_string_result_truncated(self):
+        """Test plain string results are cut to the budget."""
+        compacted = compact_tool_result("some_tool", "x" * 200, budget=50)
+        assert compacted.startswith("x" * 50)
+        assert compacted.endswith("(truncated)")
+
+
+class TestWrapperCompaction:
+    """Test the tool wrapper applies compaction."""
+
+    @pytest.mark.asyncio
+    async def test_wrapper_compacts_result(self, mock_run_context):
+        """Test wrapper output is compacted to the function budget."""
+
+        class SheetTool:
+            async def get_sheet_values(self, context: Any, range: str) -> dict:
+                rows = [["cell_value"] * 26] * 1000
+                return {"values": rows, "range": range}
+
+        tool = SheetTool()
+        original_func = SheetTool.get_sheet_values
+        sig = inspect.signature(original_func)
+        type_hints = {
+            k: v for k, v in original_func.__annotations__.items() if k != "self"
+        }
+
+        wrapper = _create_tool_wrapper(
+            tool.get_sheet_values, "get_sheet_values", sig, type_hints
+        )
+        result = await wrapper(mock_run_context, range="Sheet1!A1:Z1000")
+
+        assert len(result["values"]) < 1000
+        assert "continuation_hint" in result
+        assert _size(result) <= get_result_budget("get_sheet_values")
@@ -500,3 +500,198 @@ class TestLiveKitToolRegistry:
         assert tool_instance.config.spreadsheet_id == "test-id"
         assert tool_instance.config.default_range == "Sheet1!A1:B10"
         assert tool_instance.sensitive_config.access_token == "test-token"
+
+
+class TestLiveKitToolRegistrySync:
+    """Test cases for hash-gated sync_with_db."""
+
+    @pytest.fixture
+    def registry(self):
+        """Fresh registry with all tool implementations registered."""
+        from shared.voice_agents.tools.base.registry_livekit import \
+            LiveKitToolRegistry
+
+        registry = LiveKitToolRegistry()
+        registry.register_tools_from_package(
+            "shared.voice_agents.tools.implementations"
+        )
+        return registry
+
+    @pytest.fixture
+    def tool_service(self):
+        """Mock ToolService for sync."""
+        from unittest.mock import AsyncMock
+
+        service = Mock()
+        service.get_platform_tool_hashes = AsyncMock(return_value=({}, None))
+        service.bulk_upsert_platform_tools = AsyncMock(return_value=([], None))
+        service.upsert_platform_tool = AsyncMock()
+        return service
+
+    def test_catalog_hash_is_stable(self, registry):
+        """Test the same tool always hashes to the same value."""
+        first = registry._build_platform_tool_data("Gmail")
+        second = registry._build_platform_tool_data("Gmail")
+
+        assert first.catalog_hash is not None
+        assert first.catalog_hash == second.catalog_hash
+        assert first.catalog_hash == registry.compute_catalog_hash(first)
+
+    def test_catalog_hash_changes_with_schema(self, registry):
+        """Test changing a function schema changes the hash."""
+        tool_data = registry._build_platform_tool_data("Gmail")
+        original_hash = tool_data.catalog_hash
+
+        tool_data.tool_functions_schema["functions"][0]["description"] += " changed"
+
+        assert registry.compute_catalog_hash(tool_data) != original_hash
+
+    @pytest.mark.asyncio
+    async def test_sync_writes_all_new_tools_in_one_upsert(
+        self, registry, tool_service
+    ):
+        """Test tools without a stored hash are written in a single bulk upsert."""
+        await registry.sync_with_db(tool_service)
+
+        tool_service.bulk_upsert_platform_tools.assert_awaited_once()
+        tool_service.upsert_platform_tool.assert_not_called()
+        written = tool_service.bulk_upsert_platform_tools.await_args.args[0]
+        assert {tool.name for tool in written} == set(registry.get_tool_names())
+
+    @pytest.mark.asyncio
+    async def test_sync_skips_unchanged_tools(self, registry, tool_service):
+        """Test tools whose stored hash matches are not written."""
+        stored = {
+            name: registry._build_platform_tool_data(name).catalog_hash
+            for name in registry.get_tool_names()
+        }
+        stored["Gmail"] = "outdated-hash"
+        tool_service.get_platform_tool_hashes.return_value = (stored, None)
+
+        await registry.sync_with_db(tool_service)
+
+        written = tool_service.bulk_upsert_platform_tools.await_args.args[0]
+        assert [tool.name for tool in written] == ["Gmail"]
+
+    @pytest.mark.asyncio
+    async def test_sync_noop_when_nothing_changed(self, registry, tool_service):
+        """Test no write happens when every hash matches."""
+        stored = {
+            name: registry._build_platform_tool_data(name).catalog_hash
+            for name in registry.get_tool_names()
+        }
+        tool_service.get_platform_tool_hashes.return_value = (stored, None)
+
+        await registry.sync_with_db(tool_service)
+
+        tool_service.bulk_upsert_platform_tools.assert_not_called()
+
+
+class TestToolManifest:
+    """Test cases for loading tools from the build-time manifest."""
+
+    @pytest.fixture
+    def manifest_path(self, tmp_path):
+        """Generate a manifest from the tool implementations."""
+        from shared.voice_agents.tools.base.manifest import write_manifest
+
+        path = tmp_path / "tool_manifest.json"
+        write_manifest(path)
+        return path
+
+    @pytest.fixture
+    def introspected(self):
+        """Registry populated by introspection for comparison."""
+        from shared.voice_agents.tools.base.registry_livekit import \
+            LiveKitToolRegistry
+
+        registry = LiveKitToolRegistry()
+        registry.register_tools_from_package(
+            "shared.voice_agents.tools.implementations", use_manifest=False
+        )
+        return registry
+
+    @pytest.fixture
+    def from_manifest(self, manifest_path):
+        """Registry populated from the manifest."""
+        from shared.voice_agents.tools.base.registry_livekit import \
+            LiveKitToolRegistry
+
+        registry = LiveKitToolRegistry()
+        registry.register_tools_from_package(
+            "shared.voice_agents.tools.implementations",
+            use_manifest=True,
+            manifest_path=manifest_path,
+        )
+        return registry
+
+    def test_manifest_contents(self, manifest_path):
+        """Test manifest records classes, functions and schemas."""
+        import json
+
+        from shared.voice_agents.tools.base.manifest import MANIFEST_VERSION
+
+        manifest = json.loads(manifest_path.read_text())
+
+        assert manifest["version"] == MANIFEST_VERSION
+        gmail = manifest["tools"]["Gmail"]
+        assert gmail["class_name"] == "GmailTool"
+        send_email = next(f for f in gmail["functions"] if f["name"] == "send_email")
+        assert send_email["schema"]["name"] == "Send Email"
+        assert "context" in send_email["signature"]
+        assert "Description:" in send_email["description"]
+
+    def test_manifest_load_is_lazy(self, from_manifest, introspected):
+        """Test tool classes are only imported on first use."""
+        assert from_manifest._tools == {}
+        assert sorted(from_manifest.get_tool_names()) == sorted(
+            introspected.get_tool_names()
+        )
+
+        calendar_class = from_manifest.get_tool_class("Google_calendar")
+
+        assert calendar_class is introspected.get_tool_class("Google_calendar")
+        assert list(from_manifest._tools) == ["Google_calendar"]
+
+    def test_manifest_functions_match_introspection(self, from_manifest, introspected):
+        """Test function objects resolved from the manifest match introspection."""
+        for name in introspected.get_tool_names():
+            assert [f.__name__ for f in from_manifest.get_tool_functions(name)] == [
+                f.__name__ for f in introspected.get_tool_functions(name)
+            ]
+
+    def test_manifest_catalog_hash_matches_introspection(
+        self, from_manifest, introspected
+    ):
+        """Test sync computes the same catalog hash from either source."""
+        for name in introspected.get_tool_names():
+            assert (
+                from_manifest._build_platform_tool_data(name).catalog_hash
+                == introspected._build_platform_tool_data(name).catalog_hash
+            )
+
+    def test_falls_back_without_manifest(self, tmp_path):
+        """Test missing manifest falls back to introspection."""
+        from shared.voice_agents.tools.base.registry_livekit import \
+            LiveKitToolRegistry
+
+        registry = LiveKitToolRegistry()
+        registry.register_tools_from_package(
+            "shared.voice_agents.tools.implementations",
+            use_manifest=True,
+            manifest_path=tmp_path / "missing.json",
+        )
+
+        assert "Gmail" in registry._tools
+
+    def test_ignores_manifest_with_other_version(self, manifest_path):
+        """Test manifests from another format version are ignored."""
+        import json
+
+        from shared.voice_agents.tools.base.manifest import read_manifest
+
+        manifest = json.loads(manifest_path.read_text())
+        manifest["version"] = -1
+        manifest_path.write_text(json.dumps(manifest))
+
+        assert read_manifest(manifest_path) is None